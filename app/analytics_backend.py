@@ -0,0 +1,305 @@
+"""
+Parquet スナップショット（python -m scraper.local_mirror snapshot で作る month=YYYY-MM/results.parquet）を
+DuckDB で集計するバックエンド。APP_ANALYTICS_BACKEND=duckdb のとき、重いページ（台番号別の履歴・統計、
+ホール別出玉率）は pandas で全行を pivot_table / groupby する代わりにここを呼び、集計済みの小さな表だけを受け取る。
+
+ぶどう確率・設定予測（utils.calc_grape_rate / predict_setting / continuous_setting）も
+config/jagglar_rate.json の値を表にして SQL で計算する。
+"""
+import datetime as dt
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import mirror_backend
+except ModuleNotFoundError:  # リポジトリ直下から app.analytics_backend として読む場合
+    from app import mirror_backend
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_PARQUET_DIR = BASE_DIR / "data" / "results_parquet"
+RATE_JSON_PATH = BASE_DIR / "config" / "jagglar_rate.json"
+# continuous_setting の回転数による信頼度（max_game）
+TRUST_MAX_GAME = 10000
+
+PAYOUT_KEYS = ("day_last", "weekday")
+# results の1行（台×日）を決める列と、unit_stats の集計単位
+UNIT_KEYS = ["hall", "model", "unit_no", "date"]
+STATS_KEYS = ["prefecture", "hall", "model", "unit_no", "day_last"]
+
+
+def use_duckdb_analytics() -> bool:
+    """APP_ANALYTICS_BACKEND=duckdb なら Parquet スナップショットを DuckDB で集計する（既定は pandas）。"""
+    return os.getenv("APP_ANALYTICS_BACKEND", "pandas").strip().lower() == "duckdb"
+
+
+def parquet_dir() -> Path:
+    raw = os.getenv("ANALYTICS_PARQUET_DIR", "").strip()
+    return Path(raw) if raw else DEFAULT_PARQUET_DIR
+
+
+def stats_period(today: dt.date | None = None) -> tuple[dt.date | None, dt.date | None]:
+    """unit_stats / payout_rates に渡す集計期間（ページ 96・98 が明示的に渡す）。
+
+    Supabase の medal_rate_by_unit_no / medal_rate_by_hall_and_* は results 全体を集計する前提で、
+    既定ではスナップショット全体（None, None）を返す。APP_ANALYTICS_STATS_MONTHS=N のときは
+    N か月前の月初から today までに絞る（ビュー側で期間を絞っている場合はこれで揃える）。
+    """
+    raw = os.getenv("APP_ANALYTICS_STATS_MONTHS", "").strip()
+    if not raw:
+        return None, None
+    try:
+        months = int(raw)
+    except ValueError as e:
+        raise ValueError(f"APP_ANALYTICS_STATS_MONTHS は正の整数です: {raw}") from e
+    if months <= 0:
+        raise ValueError(f"APP_ANALYTICS_STATS_MONTHS は正の整数です: {raw}")
+    today = today or dt.date.today()
+    month_index = today.year * 12 + today.month - 1 - months
+    return dt.date(month_index // 12, month_index % 12 + 1, 1), today
+
+
+def _rate_tables() -> tuple[list[tuple], list[tuple]]:
+    """jagglar_rate.json から (機種, 設定, RB確率, BB確率, ぶどう確率) と ぶどう逆算の定数を作る。"""
+    with open(RATE_JSON_PATH, "r", encoding="utf-8") as f:
+        model_data = json.load(f)
+
+    def rate(value):
+        if isinstance(value, str) and value.startswith("1/"):
+            try:
+                return 1.0 / float(value.split("/")[1])
+            except ValueError:
+                return None
+        return None
+
+    rates, constants = [], []
+    for model, mdata in model_data.items():
+        for s, vals in mdata.items():
+            if not s.isdigit():
+                continue
+            p = [rate(vals.get(key)) for key in ["RB_RATE", "BB_RATE", "GRAPE_RATE"]]
+            # 確率が欠損している設定は predict_setting と同じく候補から外す
+            if None not in p:
+                rates.append((model, int(s), *p))
+        c = mdata.get("grape_constants")
+        if c:
+            constants.append((model, c["get_bb"], c["get_rb"], c["replay"], c["cherryOff"]))
+    return rates, constants
+
+
+@lru_cache(maxsize=None)
+def _connection(directory: str):
+    """スナップショットを results ビューとして読むインメモリの DuckDB（ディレクトリごとに1つ）。"""
+    try:
+        import duckdb
+    except ImportError as e:
+        raise RuntimeError("APP_ANALYTICS_BACKEND=duckdb には duckdb のインストールが必要です。") from e
+
+    conn = duckdb.connect()
+    pattern = str(Path(directory) / "month=*" / "*.parquet").replace("'", "''")
+    # ビューは問い合わせのたびに glob し直すため、スナップショットに追加された月もそのまま見える
+    conn.execute(
+        f"create view results as select * from read_parquet('{pattern}', "
+        "hive_partitioning = true, hive_types = {'month': varchar})"
+    )
+    rates, constants = _rate_tables()
+    conn.execute("create table setting_rates (model varchar, setting integer, p_rb double, p_bb double, p_grape double)")
+    conn.executemany("insert into setting_rates values (?, ?, ?, ?, ?)", rates)
+    conn.execute(
+        "create table grape_constants (model varchar, get_bb double, get_rb double, replay double, cherry_off double)"
+    )
+    conn.executemany("insert into grape_constants values (?, ?, ?, ?, ?)", constants)
+    return conn
+
+
+def _query(sql: str, params: list) -> pd.DataFrame:
+    directory = parquet_dir()
+    if not any(directory.glob("month=*/*.parquet")):
+        raise RuntimeError(
+            f"Parquet スナップショットがありません: {directory}（python -m scraper.local_mirror snapshot で作成）"
+        )
+    # Streamlit のスレッドごとに別のカーソルで読む
+    with _connection(str(directory)).cursor() as cur:
+        return cur.execute(sql, params).df()
+
+
+def _where(conditions: list[tuple[str, object]], start=None, end=None) -> tuple[str, list]:
+    """mirror_backend と同じ条件の where 句に、月のパーティションの絞り込みを足す。"""
+    where, params = mirror_backend._where(conditions, start, end)
+    if start is not None:
+        where += " and month >= ? and month <= ?"
+        params.extend([mirror_backend._iso(start)[:7], mirror_backend._iso(end)[:7]])
+    return where, params
+
+
+def _with_settings(source: str, keys: list[str]) -> str:
+    """source（model, game, bb, rb, medal を持つ行）に grape_rate, pred_setting, weight_setting を付ける SQL。
+
+    utils.calc_grape_rate（チェリー非取得）→ predict_setting（各設定のポアソン対数尤度の和）→
+    continuous_setting（尤度の softmax で重み付けした設定の平均 × 回転数の信頼度）と同じ計算。
+    keys は source の1行を一意に決める列（台ごとなら hall, model, unit_no, date、集計後なら group by の列）で、
+    設定ごとの尤度を行に戻すときの結合キーに使う。
+    """
+    key_cols = ", ".join(keys)
+    on = " and ".join(f"s.{k} is not distinct from g.{k}" for k in keys)
+    return f"""
+    with grape as (
+        select src.*,
+               -(src.game / nullif((-src.medal - (src.game * 3 - (src.bb * c.get_bb + src.rb * c.get_rb
+                   + src.game * c.replay + src.game * c.cherry_off))) / 8, 0)) as grape_rate
+        from ({source}) src left join grape_constants c on c.model = src.model
+    ),
+    loglik as (
+        select {", ".join(f"g.{k}" for k in keys)}, r.setting,
+               -lam_rb + rb_cnt * ln(lam_rb) - lgamma(rb_cnt + 1)
+               - lam_bb + bb_cnt * ln(lam_bb) - lgamma(bb_cnt + 1)
+               - lam_grape + grape_cnt * ln(lam_grape) - lgamma(grape_cnt + 1) as logl
+        from grape g
+        join setting_rates r on r.model = g.model
+        cross join lateral (
+            select greatest(coalesce(g.game, 0), 0) * r.p_rb as lam_rb,
+                   greatest(coalesce(g.game, 0), 0) * r.p_bb as lam_bb,
+                   greatest(coalesce(g.game, 0), 0) * r.p_grape as lam_grape,
+                   greatest(coalesce(g.rb, 0), 0) as rb_cnt,
+                   greatest(coalesce(g.bb, 0), 0) as bb_cnt,
+                   case when g.grape_rate > 0 and g.game > 0
+                        then greatest(round(g.game / g.grape_rate), 0) else 0 end as grape_cnt
+        ) x
+        where lam_rb > 0 and lam_bb > 0 and lam_grape > 0
+    ),
+    weights as (
+        select {key_cols}, setting, logl, exp(logl - max(logl) over (partition by {key_cols})) as w from loglik
+    ),
+    settings as (
+        select {key_cols}, arg_max(setting, logl) as pred_setting, sum(setting * w) / sum(w) as weight_setting
+        from weights group by {key_cols}
+    )
+    select g.*, s.pred_setting,
+           case when s.weight_setting is not null
+                then greatest(1, s.weight_setting * least(1.0, sqrt(g.game / {TRUST_MAX_GAME}))) end as weight_setting
+    from grape g left join settings s on {on}
+    """
+
+
+def _filters(start_date, end_date, day_last, weekday, pref, hall, model, unit_no=None):
+    return _where(
+        [
+            ("day_last", day_last),
+            ("weekday", weekday),
+            ("prefecture", pref),
+            ("hall", hall),
+            ("model", model),
+            ("unit_no", unit_no),
+        ],
+        start_date,
+        end_date,
+    )
+
+
+def aggregate_by_date(
+    keys, start_date, end_date, day_last=None, weekday=None, pref=None, hall=None, model=None, func="mean"
+) -> pd.DataFrame:
+    """keys（hall / model / unit_no の組）× date ごとの game, medal, weight_setting を集計する。
+
+    weight_setting は台ごとに小数1桁へ丸めてから集計する（ページの pivot_table と同じ）。
+    戻り値は keys, date, game, medal, weight_setting の縦長の表で、ページはこれを pivot するだけでよい。
+    """
+    agg = {"mean": "avg", "sum": "sum"}[func]
+    where, params = _filters(start_date, end_date, day_last, weekday, pref, hall, model)
+    # 設定予測は台ごとに機種の確率で計算するため、keys に無くても台を決める列は常に読む
+    columns = list(dict.fromkeys([*keys, *UNIT_KEYS, "game", "bb", "rb", "medal"]))
+    source = f"select {', '.join(columns)} from results{where}"
+    group = ", ".join([*keys, "date"])
+    return _query(
+        f"select {', '.join(keys)}, date::varchar as date, {agg}(game) as game, {agg}(medal) as medal, "
+        f"{agg}(round(weight_setting, 1)) as weight_setting "
+        f"from ({_with_settings(source, UNIT_KEYS)}) group by {group} order by {group}",
+        params,
+    )
+
+
+def unit_results(
+    start_date, end_date, day_last=None, weekday=None, pref=None, hall=None, model=None, unit_no=None
+) -> pd.DataFrame:
+    """台ごとの行（fetch_results_by_units と同じ列）に grape_rate, pred_setting, weight_setting を付けて返す。"""
+    where, params = _filters(start_date, end_date, day_last, weekday, pref, hall, model, unit_no)
+    source = (
+        "select prefecture, hall, model, unit_no, date::varchar as date, day_last, weekday, game, bb, rb, medal "
+        f"from results{where}"
+    )
+    return _query(f"{_with_settings(source, UNIT_KEYS)} order by date desc, unit_no", params)
+
+
+def unit_stats(
+    day_last=None,
+    pref=None,
+    hall=None,
+    model=None,
+    start_date=None,
+    end_date=None,
+    min_count=None,
+    max_rb_rate=None,
+    min_win_rate=None,
+) -> pd.DataFrame:
+    """(hall, model, unit_no, day_last) ごとの成績（medal_rate_by_unit_no と同じ列）を集計する。
+
+    count の下限・rb_rate の上限・win_rate の下限で絞り、合算値から grape_rate, pred_setting, weight_setting を付ける。
+    rb_rank はホール内の RB 確率の順位（1 が最も良い）。期間を指定しなければスナップショット全体を集計する
+    （ページからは stats_period() の期間を渡す）。
+    """
+    where, params = _filters(start_date, end_date, day_last, None, pref, hall, model)
+    having = []
+    if min_count is not None:
+        having.append("count(*) >= ?")
+        params.append(min_count)
+    if max_rb_rate is not None:
+        having.append("sum(game) / nullif(sum(rb), 0) <= ?")
+        params.append(max_rb_rate)
+    if min_win_rate is not None:
+        having.append("avg(case when medal > 0 then 1.0 else 0.0 end) >= ?")
+        params.append(min_win_rate)
+    source = f"""
+        select prefecture, hall, model, unit_no, day_last,
+               count(*) as count,
+               sum(game) as game, sum(medal) as medal, sum(bb) as bb, sum(rb) as rb,
+               avg(game) as avg_game, avg(medal) as avg_medal,
+               sum(game) / nullif(sum(bb), 0) as bb_rate,
+               sum(game) / nullif(sum(rb), 0) as rb_rate,
+               sum(game) / nullif(sum(bb) + sum(rb), 0) as total_rate,
+               (sum(game) * 3 + sum(medal)) / nullif(sum(game) * 3, 0) * 100 as medal_rate,
+               avg(case when medal > 0 then 1.0 else 0.0 end) as win_rate
+        from results{where}
+        group by {", ".join(STATS_KEYS)}
+        {("having " + " and ".join(having)) if having else ""}
+    """
+    return _query(
+        f"select *, rank() over (partition by hall order by rb_rate) as rb_rank "
+        f"from ({_with_settings(source, STATS_KEYS)}) order by hall, rb_rate",
+        params,
+    )
+
+
+def payout_rates(by, pref=None, hall=None, start_date=None, end_date=None) -> pd.DataFrame:
+    """(hall, day_last) または (hall, weekday) ごとの出玉率（medal_rate_by_hall_and_day_last / _weekday と同じ列）。
+
+    by: "day_last" または "weekday"
+    期間を指定しなければスナップショット全体を集計する（ページからは stats_period() の期間を渡す）。
+    返却列: prefecture, hall, by, count, avg_game, medal_rate（%）, win_rate
+    """
+    if by not in PAYOUT_KEYS:
+        raise ValueError(f"by は {PAYOUT_KEYS} のいずれかです: {by}")
+    where, params = _filters(start_date, end_date, None, None, pref, hall, None)
+    return _query(
+        f"""
+        select prefecture, hall, {by}, count(*) as count, avg(game) as avg_game,
+               (sum(game) * 3 + sum(medal)) / nullif(sum(game) * 3, 0) * 100 as medal_rate,
+               avg(case when medal > 0 then 1.0 else 0.0 end) as win_rate
+        from results{where}
+        group by prefecture, hall, {by}
+        order by hall, {by}
+        """,
+        params,
+    )
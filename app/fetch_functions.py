@@ -5,6 +5,11 @@ import pandas as pd
 from supabase import create_client, Client
 import streamlit as st
 
+try:
+    import mirror_backend
+except ModuleNotFoundError:  # リポジトリ直下から app.fetch_functions として読む場合
+    from app import mirror_backend
+
 
 @st.cache_resource
 def get_supabase_client() -> Client:
@@ -61,6 +66,8 @@ def fetch(
     hall, model を指定しない場合はすべてを取得。
     内部でページングして 1000件制限を回避する。
     """
+    if mirror_backend.use_local_mirror():
+        return mirror_backend.fetch(view, start, end, hall=hall, model=model, day_last=day_last)
     supabase = get_supabase_client()
     query = (
         supabase.table(view)
@@ -80,28 +87,17 @@ def fetch(
     return df
 
 
-@st.cache_data
-def fetch_results_by_units(
-    start_date, end_date, day_last=None, weekday=None, pref=None, hall=None, model=None, unit_no=None
-) -> pd.DataFrame:
+def build_results_by_units_query(
+    query, start_date, end_date, day_last=None, weekday=None, pref=None, hall=None, model=None, unit_no=None
+):
     """
-    latest_units_results から、指定期間・指定条件でデータを取得する。
-    pref, hall, model, unit_no:
-        None or "すべて" の場合はフィルタしない。
-    period:
-        今日を除いた直近 period 日分を取得する（日数ベース）。
+    fetch_results_by_units の絞り込み条件を query（latest_units_results の select）に付けて返す。
+    migrations/explain_check.py も同じ条件のクエリで実行計画を確認する。
     """
     ALL = "すべて"
 
-    supabase = get_supabase_client()
-
-    # ベースクエリ
-    query = (
-        supabase.table("latest_units_results")
-        .select("*")
-        .gte("date", start_date.isoformat())
-        .lte("date", end_date.isoformat())
-    )
+    # 期間
+    query = query.gte("date", start_date.isoformat()).lte("date", end_date.isoformat())
     # 末尾日フィルタ
     if day_last not in (None, ALL):
         query = query.in_("day_last", day_last)
@@ -122,6 +118,37 @@ def fetch_results_by_units(
     if unit_no not in (None, ALL):
         # query = query.eq("unit_no", unit_no)
         query = query.in_("unit_no", unit_no)
+    return query
+
+
+@st.cache_data
+def fetch_results_by_units(
+    start_date, end_date, day_last=None, weekday=None, pref=None, hall=None, model=None, unit_no=None
+) -> pd.DataFrame:
+    """
+    latest_units_results から、指定期間・指定条件でデータを取得する。
+    pref, hall, model, unit_no:
+        None or "すべて" の場合はフィルタしない。
+    period:
+        今日を除いた直近 period 日分を取得する（日数ベース）。
+    """
+    if mirror_backend.use_local_mirror():
+        return mirror_backend.fetch_results_by_units(
+            start_date, end_date, day_last, weekday, pref, hall, model, unit_no
+        )
+    supabase = get_supabase_client()
+
+    query = build_results_by_units_query(
+        supabase.table("latest_units_results").select("*"),
+        start_date,
+        end_date,
+        day_last=day_last,
+        weekday=weekday,
+        pref=pref,
+        hall=hall,
+        model=model,
+        unit_no=unit_no,
+    )
     # 実行
     rows = _fetch_all_rows(query)
     df = pd.DataFrame(rows)
@@ -132,11 +159,54 @@ def fetch_results_by_units(
     return df
 
 
+# --------------------------------------------------
+# 日次サマリー： (hall, model, date) / (hall, date) 単位の集計済みデータ
+# --------------------------------------------------
+@st.cache_data
+def fetch_daily_summary(
+    start_date, end_date, by_model=True, day_last=None, weekday=None, pref=None, hall=None, model=None
+) -> pd.DataFrame:
+    """
+    日次サマリー（daily_hall_model_summary_named / daily_hall_summary_named）から、
+    指定期間・指定条件の集計済みデータを取得する。台ごとの行を取得して集計するより大幅に少ない行数で済む。
+    by_model:
+        True なら (hall, model, date) 単位、False なら (hall, date) 単位。
+    返却列: prefecture, hall, (model), date, day_last, weekday, unit_count, game, medal, bb, rb（合計値）
+    """
+    if mirror_backend.use_local_mirror():
+        return mirror_backend.fetch_daily_summary(
+            start_date, end_date, by_model, day_last, weekday, pref, hall, model
+        )
+    ALL = "すべて"
+    supabase = get_supabase_client()
+    view = "daily_hall_model_summary_named" if by_model else "daily_hall_summary_named"
+    query = (
+        supabase.table(view)
+        .select("*")
+        .gte("date", start_date.isoformat())
+        .lte("date", end_date.isoformat())
+    )
+    if day_last not in (None, ALL):
+        query = query.in_("day_last", day_last)
+    if weekday not in (None, ALL):
+        query = query.in_("weekday", weekday)
+    if pref not in (None, ALL):
+        query = query.eq("prefecture", pref)
+    if hall not in (None, ALL):
+        query = query.eq("hall", hall)
+    if by_model and model not in (None, ALL):
+        query = query.eq("model", model)
+    rows = _fetch_all_rows(query)
+    return pd.DataFrame(rows)
+
+
 # --------------------------------------------------
 # マスタ系： prefectures / halls / models / units
 # --------------------------------------------------
 @st.cache_data
 def fetch_prefectures():
+    if mirror_backend.use_local_mirror():
+        return mirror_backend.fetch_prefectures()
     supabase = get_supabase_client()
     query = supabase.table("prefectures").select("*").order("prefecture_id")
     rows = _fetch_all_rows(query)
@@ -152,6 +222,8 @@ def fetch_halls(pref=None):
     pref が None または "すべて" の場合は都道府県での絞り込みなし。
     戻り値はホール名のリスト。
     """
+    if mirror_backend.use_local_mirror():
+        return mirror_backend.fetch_halls(pref)
     ALL = "すべて"
     supabase = get_supabase_client()
 
@@ -176,6 +248,8 @@ def fetch_halls(pref=None):
 
 @st.cache_data
 def fetch_models(pref=None, hall=None):
+    if mirror_backend.use_local_mirror():
+        return mirror_backend.fetch_models(pref, hall)
     ALL = "すべて"
     supabase = get_supabase_client()
     query = supabase.table("latest_models").select("prefecture,hall,model")
@@ -196,6 +270,8 @@ def fetch_units(pref=None, hall=None, model=None):
     pref, hall, model が None または "すべて" の場合はフィルタ無し。
     戻り値はユニット番号のリスト。
     """
+    if mirror_backend.use_local_mirror():
+        return mirror_backend.fetch_units(pref, hall, model)
     ALL = "すべて"
     supabase = get_supabase_client()
     # ベースクエリ
@@ -0,0 +1,149 @@
+"""
+ローカルミラー（python -m scraper.local_mirror sync で作る SQLite / DuckDB ファイル）から読むバックエンド。
+APP_DATA_BACKEND=local のとき、fetch_functions の各関数は Supabase の代わりにここを呼ぶ。
+引数と戻り値は fetch_functions の同名の関数と同じ。
+
+ミラーにあるのは results に名前を付けた results_named（全期間・全台）だけで、Supabase 側のビュー
+（latest_units_results など）の絞り込みは再現しない。fetch で読めるビューは RESULT_VIEWS に書いたものだけ。
+"""
+import os
+from pathlib import Path
+
+import pandas as pd
+
+ALL = "すべて"
+DEFAULT_MIRROR_PATH = Path(__file__).resolve().parent.parent / "data" / "mirror.sqlite"
+DUCKDB_SUFFIXES = (".duckdb", ".ddb")
+# fetch の view 名 → ミラーで同じ行を返すリレーション
+RESULT_VIEWS = {"result_joined": "results_named"}
+
+
+def use_local_mirror() -> bool:
+    """APP_DATA_BACKEND=local ならローカルミラーから読む（既定は supabase）。"""
+    return os.getenv("APP_DATA_BACKEND", "supabase").strip().lower() == "local"
+
+
+def mirror_path() -> Path:
+    raw = os.getenv("LOCAL_MIRROR_PATH", "").strip()
+    return Path(raw) if raw else DEFAULT_MIRROR_PATH
+
+
+def _read(sql: str, params: list) -> pd.DataFrame:
+    """ミラーを読み取り専用で開いてクエリを実行する（呼び出しごとに開くため同期中の更新も見える）。"""
+    path = mirror_path()
+    if not path.exists():
+        raise RuntimeError(f"ローカルミラーがありません: {path}（python -m scraper.local_mirror sync で作成）")
+    if path.suffix in DUCKDB_SUFFIXES:
+        import duckdb
+
+        with duckdb.connect(str(path), read_only=True) as conn:
+            return conn.execute(sql, params).df()
+
+    import sqlite3
+
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+
+
+def _iso(value) -> str:
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def _where(conditions: list[tuple[str, object]], start=None, end=None) -> tuple[str, list]:
+    """(列名, 値) の組から where 句を作る。値が None / "すべて" の条件は付けず、リストなら in で絞る。
+    start, end を指定すると date の範囲でも絞る。
+    """
+    clauses: list[str] = []
+    params: list = []
+    if start is not None:
+        clauses.append("date >= ? and date <= ?")
+        params.extend([_iso(start), _iso(end)])
+    for column, value in conditions:
+        if value in (None, ALL):
+            continue
+        if isinstance(value, (list, tuple, set)):
+            values = list(value)
+            clauses.append(f"{column} in ({', '.join('?' for _ in values)})" if values else "1 = 0")
+            params.extend(values)
+        else:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    return (" where " + " and ".join(clauses)) if clauses else "", params
+
+
+def fetch(view, start, end, hall=None, model=None, day_last=None) -> pd.DataFrame:
+    relation = RESULT_VIEWS.get(view)
+    if relation is None:
+        raise ValueError(f"ローカルミラーでは読めないビューです: {view}（対応: {', '.join(RESULT_VIEWS)}）")
+    where, params = _where([("hall", hall), ("model", model), ("day_last", day_last)], start, end)
+    return _read(
+        f"select date, hall, model, unit_no, game, bb, rb, medal, day_last from {relation}{where}",
+        params,
+    )
+
+
+def fetch_results_by_units(
+    start_date, end_date, day_last=None, weekday=None, pref=None, hall=None, model=None, unit_no=None
+) -> pd.DataFrame:
+    where, params = _where(
+        [
+            ("day_last", day_last),
+            ("weekday", weekday),
+            ("prefecture", pref),
+            ("hall", hall),
+            ("model", model),
+            ("unit_no", unit_no),
+        ],
+        start_date,
+        end_date,
+    )
+    # Supabase では latest_units_results を読むが、ミラーでは全台の results_named から読む
+    return _read(f"select * from results_named{where}", params)
+
+
+def fetch_daily_summary(
+    start_date, end_date, by_model=True, day_last=None, weekday=None, pref=None, hall=None, model=None
+) -> pd.DataFrame:
+    # 日次サマリーテーブルは写さず、results から同じ粒度で集計する
+    keys = ["prefecture", "hall", "model"] if by_model else ["prefecture", "hall"]
+    where, params = _where(
+        [
+            ("day_last", day_last),
+            ("weekday", weekday),
+            ("prefecture", pref),
+            ("hall", hall),
+            ("model", model if by_model else None),
+        ],
+        start_date,
+        end_date,
+    )
+    group = ", ".join(keys + ["date", "day_last", "weekday"])
+    counts = "count(*) as unit_count" if by_model else "count(distinct model) as model_count, count(*) as unit_count"
+    return _read(
+        f"select {group}, {counts}, sum(game) as game, sum(medal) as medal, sum(bb) as bb, sum(rb) as rb "
+        f"from results_named{where} group by {group}",
+        params,
+    )
+
+
+def fetch_prefectures() -> list:
+    return _read("select name from prefectures order by prefecture_id", [])["name"].tolist()
+
+
+def fetch_halls(pref=None) -> list:
+    where, params = _where([("prefecture", pref)])
+    return _read(f"select distinct hall from latest_models{where}", params)["hall"].tolist()
+
+
+def fetch_models(pref=None, hall=None) -> list:
+    where, params = _where([("prefecture", pref), ("hall", hall)])
+    return _read(f"select distinct model from latest_models{where}", params)["model"].tolist()
+
+
+def fetch_units(pref=None, hall=None, model=None) -> list:
+    where, params = _where([("prefecture", pref), ("hall", hall), ("model", model)])
+    df = _read(f"select distinct unit_no from latest_units_per_hall{where} order by unit_no", params)
+    return df["unit_no"].dropna().tolist()
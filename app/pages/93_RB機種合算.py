@@ -4,7 +4,7 @@ import streamlit as st
 from utils import yesterday, n_days_ago
 from ui.components import home_link
 from ui.filters import filters
-from fetch_functions import fetch_results_by_units
+from fetch_functions import fetch_daily_summary
 
 
 column_config = {
@@ -54,7 +54,8 @@ fi = filters(
 
 # ---- データ読み込み ----
 with st.spinner("データ取得中..."):
-    df = fetch_results_by_units(
+    # (hall, model, date) 単位の集計済みデータを読む
+    df = fetch_daily_summary(
         fi["start_date"],
         fi["end_date"],
         day_last=fi["day_last_list"],
@@ -64,15 +65,18 @@ with st.spinner("データ取得中..."):
         model=fi["model"],
     )
 
+if df.empty:
+    st.info("選択した条件のデータがありません。")
+    home_link(position="right")
+    st.stop()
+
 df["date_str"] = pd.to_datetime(df["date"]).dt.strftime("%y-%m-%d %a")
 
 group_index = ["hall", "model", "date_str"]
-group_cols = ["game", "medal", "bb", "rb"]
-df_sum = df.groupby(group_index).sum(group_cols)
-df_mean = df.groupby(group_index).mean(group_cols)
+df_sum = df.set_index(group_index)[["game", "medal", "bb", "rb", "unit_count"]]
 
-df_sum["game_m"] = df_mean["game"]
-df_sum["medal_m"] = df_mean["medal"]
+df_sum["game_m"] = df_sum["game"] / df_sum["unit_count"]
+df_sum["medal_m"] = df_sum["medal"] / df_sum["unit_count"]
 df_sum["rb_rate"] = df_sum.apply(
     lambda r: r["game"] / r["rb"] if r["rb"] != 0 else None, axis=1
 )
@@ -11,6 +11,7 @@ from utils import auto_height, make_style_val
 from fetch_functions import fetch_prefectures, fetch_halls, fetch_models, fetch_units
 from fetch_functions import fetch_results_by_units
 from utils import validate_dates, rotate_list_by_today
+import analytics_backend
 
 
 INTIAL_PERIOD = 3
@@ -56,6 +57,12 @@ def chunk_units_balanced(units, chunk_size=20, min_last=10):
     return chunks
 
 
+# APP_ANALYTICS_BACKEND=duckdb のときは Parquet スナップショットを DuckDB で集計し、集計済みの表だけを受け取る
+use_duckdb = analytics_backend.use_duckdb_analytics()
+aggregate_by_date = st.cache_data(analytics_backend.aggregate_by_date)
+unit_results = st.cache_data(analytics_backend.unit_results)
+
+
 # --- title ---
 page_title = "台番号別の履歴データ"
 st.set_page_config(page_title=page_title, page_icon="", layout="wide")
@@ -133,7 +140,10 @@ with col8:
 tab1, tab2 = st.tabs(["一覧表示", "個別表示"])
 with tab1:
     # --- hall history ---
-    df = fetch_results_by_units(start_date, end_date, day_last, weekday, pref)
+    if use_duckdb:
+        df = aggregate_by_date(["hall"], start_date, end_date, day_last, weekday, pref)
+    else:
+        df = fetch_results_by_units(start_date, end_date, day_last, weekday, pref)
     if df.empty:
         st.write("該当データがありません。")
         st.stop()
@@ -154,20 +164,24 @@ with tab1:
     pt_hall = pt
 
     # --- model history ---
-    df = fetch_results_by_units(start_date, end_date, day_last, weekday, pref, hall)
+    if use_duckdb:
+        df = aggregate_by_date(["hall", "model"], start_date, end_date, day_last, weekday, pref, hall)
+    else:
+        df = fetch_results_by_units(start_date, end_date, day_last, weekday, pref, hall)
     if df.empty:
         st.write("該当データがありません。")
         st.stop()
     df["date_str"] = pd.to_datetime(df["date"]).dt.strftime("%m-%d (%a)")
 
-    df = calc_grape_rate(df)
-    df["weight_setting"] = df.apply(
-        lambda r: continuous_setting(
-            r["game"], r["rb"], r["bb"], r["grape_rate"], r["model"]
-        ),
-        axis=1,
-    )
-    df["weight_setting"] = pd.to_numeric(df["weight_setting"], errors="coerce").round(1)
+    if not use_duckdb:
+        df = calc_grape_rate(df)
+        df["weight_setting"] = df.apply(
+            lambda r: continuous_setting(
+                r["game"], r["rb"], r["bb"], r["grape_rate"], r["model"]
+            ),
+            axis=1,
+        )
+        df["weight_setting"] = pd.to_numeric(df["weight_setting"], errors="coerce").round(1)
     idx = ["hall", "model"]
     # vals = ["game", "medal", "bb", "rb", "grape_rate", "weight_setting"]
     vals = ["game", "medal", "weight_setting"]
@@ -184,22 +198,27 @@ with tab1:
     pt_model = pt
 
     # --- unit history ---
-    df = fetch_results_by_units(
-        start_date, end_date, day_last, weekday, pref, hall, model
-    )
+    if use_duckdb:
+        # ぶどう確率・設定予測も計算済みの行を受け取る
+        df = unit_results(start_date, end_date, day_last, weekday, pref, hall, model)
+    else:
+        df = fetch_results_by_units(
+            start_date, end_date, day_last, weekday, pref, hall, model
+        )
     if df.empty:
         st.write("該当データがありません。")
         st.stop()
     # if day_last is not ALL:
     #     df = df[df["day_last"] == day_last]
     df = df.sort_values(["date", "unit_no"], ascending=[False, True])
-    df = calc_grape_rate(df)
-    df["weight_setting"] = df.apply(
-        lambda r: continuous_setting(
-            r["game"], r["rb"], r["bb"], r["grape_rate"], r["model"]
-        ),
-        axis=1,
-    )
+    if not use_duckdb:
+        df = calc_grape_rate(df)
+        df["weight_setting"] = df.apply(
+            lambda r: continuous_setting(
+                r["game"], r["rb"], r["bb"], r["grape_rate"], r["model"]
+            ),
+            axis=1,
+        )
     df["weight_setting"] = pd.to_numeric(df["weight_setting"], errors="coerce").round(1)
 
     idx = ["hall", "model", "unit_no"]
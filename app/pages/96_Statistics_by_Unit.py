@@ -8,6 +8,7 @@ from fetch_functions import get_supabase_client, _fetch_all_rows
 from fetch_functions import fetch_prefectures, fetch_halls
 from utils import calc_grape_rate, predict_setting, continuous_setting
 from utils import auto_height
+import analytics_backend
 
 
 def rotate_list_by_today(lst):
@@ -50,6 +51,8 @@ st.markdown(
 
 # --- fetch ---
 supabase = get_supabase_client()
+# APP_ANALYTICS_BACKEND=duckdb のときは Parquet スナップショットを DuckDB で集計し、集計済みの表だけを受け取る
+use_duckdb = analytics_backend.use_duckdb_analytics()
 
 
 @st.cache_data
@@ -68,9 +71,28 @@ def fetch(day_last, pref=None, hall=None, model=None):
     return df
 
 
+@st.cache_data
+def fetch_stats(day_last, pref=None, hall=None, count=5, rb_rate=322, win_rate=0.5):
+    """しきい値での絞り込み・ぶどう確率・設定予測まで DuckDB で済ませた台ごとの成績。"""
+    start_date, end_date = analytics_backend.stats_period()
+    return analytics_backend.unit_stats(
+        day_last,
+        pref=pref,
+        hall=hall,
+        start_date=start_date,
+        end_date=end_date,
+        min_count=count,
+        max_rb_rate=rb_rate,
+        min_win_rate=win_rate,
+    )
+
+
 @st.cache_data
 def fetch_filter(day_last, pref=None, hall=None, count=5, rb_rate=322, win_rate=0.5):
     ALL = "すべて"
+    if use_duckdb:
+        df = fetch_stats(day_last, pref=pref, hall=hall, count=count, rb_rate=rb_rate, win_rate=win_rate)
+        return df[["day_last", "count", "hall", "prefecture", "rb_rate", "win_rate"]]
     query = supabase.table("medal_rate_by_unit_no").select(
         "day_last,count,hall,prefecture,rb_rate,win_rate"
     )
@@ -124,7 +146,10 @@ with col8:
 
 
 # --- preprocess ---
-df = fetch(day_last, pref=pref, hall=hall)
+if use_duckdb:
+    df = fetch_stats(day_last, pref=pref, hall=hall, count=count, rb_rate=rb_rate, win_rate=win_rate)
+else:
+    df = fetch(day_last, pref=pref, hall=hall)
 round_list = [
     "bb_rate",
     "rb_rate",
@@ -143,29 +168,33 @@ df = df[df["count"] >= count]
 df = df[df["rb_rate"] <= rb_rate]
 # st.dataframe(df)
 
-df = df.rename(
-    columns={
-        "sum_game": "game",
-        "sum_medal": "medal",
-        "sum_bb": "bb",
-        "sum_rb": "rb",
-    }
-)
-df = calc_grape_rate(df)
-# df["grape_rate"] = df["grape_rate"].astype(float).round(2)
-df["grape_rate"] = pd.to_numeric(df["grape_rate"], errors="coerce").round(2)
-df["weight_setting"] = df.apply(
-    lambda r: continuous_setting(
-        r["game"], r["rb"], r["bb"], r["grape_rate"], r["model"]
-    ),
-    axis=1,
-).round(1)
-df["pred_setting"] = df.apply(
-    lambda row: predict_setting(
-        row["game"], row["rb"], row["bb"], row["grape_rate"], row["model"]
-    )[0],
-    axis=1,
-)
+if use_duckdb:
+    df["grape_rate"] = df["grape_rate"].round(2)
+    df["weight_setting"] = df["weight_setting"].round(1)
+else:
+    df = df.rename(
+        columns={
+            "sum_game": "game",
+            "sum_medal": "medal",
+            "sum_bb": "bb",
+            "sum_rb": "rb",
+        }
+    )
+    df = calc_grape_rate(df)
+    # df["grape_rate"] = df["grape_rate"].astype(float).round(2)
+    df["grape_rate"] = pd.to_numeric(df["grape_rate"], errors="coerce").round(2)
+    df["weight_setting"] = df.apply(
+        lambda r: continuous_setting(
+            r["game"], r["rb"], r["bb"], r["grape_rate"], r["model"]
+        ),
+        axis=1,
+    ).round(1)
+    df["pred_setting"] = df.apply(
+        lambda row: predict_setting(
+            row["game"], row["rb"], row["bb"], row["grape_rate"], row["model"]
+        )[0],
+        axis=1,
+    )
 
 df = df[df["weight_setting"] >= weight_setting]
 
@@ -227,6 +256,8 @@ else:
 def fetch_detail(hall, unit_no, day_last_list, period=3):
     today = date.today()
     start_date = date(today.year, today.month, 1) - relativedelta(months=period)
+    if use_duckdb:
+        return analytics_backend.unit_results(start_date, today, day_last=day_last_list, hall=hall, unit_no=unit_no)
     query = (
         supabase.table("latest_units_results")
         .select("date,hall,model,unit_no,game,bb,rb,medal,day_last")
@@ -273,20 +304,23 @@ elif len(df):
     # --- preprocess ---
     df_detail["bb_rate"] = (df_detail["game"] / df_detail["bb"]).round(0)
     df_detail["rb_rate"] = (df_detail["game"] / df_detail["rb"]).round(0)
-    df_detail = calc_grape_rate(df_detail)
-    df["grape_rate"] = pd.to_numeric(df["grape_rate"], errors="coerce").round(2)
-    df_detail["weight_setting"] = df_detail.apply(
-        lambda r: continuous_setting(
-            r["game"], r["rb"], r["bb"], r["grape_rate"], r["model"]
-        ),
-        axis=1,
-    ).round(2)
-    df_detail["pred_setting"] = df_detail.apply(
-        lambda row: predict_setting(
-            row["game"], row["rb"], row["bb"], row["grape_rate"], row["model"]
-        )[0],
-        axis=1,
-    )
+    if use_duckdb:
+        df_detail["weight_setting"] = df_detail["weight_setting"].round(2)
+    else:
+        df_detail = calc_grape_rate(df_detail)
+        df["grape_rate"] = pd.to_numeric(df["grape_rate"], errors="coerce").round(2)
+        df_detail["weight_setting"] = df_detail.apply(
+            lambda r: continuous_setting(
+                r["game"], r["rb"], r["bb"], r["grape_rate"], r["model"]
+            ),
+            axis=1,
+        ).round(2)
+        df_detail["pred_setting"] = df_detail.apply(
+            lambda row: predict_setting(
+                row["game"], row["rb"], row["bb"], row["grape_rate"], row["model"]
+            )[0],
+            axis=1,
+        )
 
     df_detail = df_detail.sort_values("date", ascending=False)
     df_detail = df_detail.drop(columns="day_last")
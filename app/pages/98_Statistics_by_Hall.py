@@ -5,6 +5,7 @@ import altair as alt
 from fetch_functions import get_supabase_client, _fetch_all_rows
 from fetch_functions import fetch_prefectures
 from utils import auto_height, make_style_val
+import analytics_backend
 
 
 page_title = "Statistics_by_Hall"
@@ -28,6 +29,9 @@ st.write(f"出玉率{threshold_value}%以上を表示(クリックでホール
 # --- fetch ---
 @st.cache_data()
 def medal_rate_by_hall_and_day_last(pref):
+    if analytics_backend.use_duckdb_analytics():
+        start_date, end_date = analytics_backend.stats_period()
+        return analytics_backend.payout_rates("day_last", pref=pref, start_date=start_date, end_date=end_date)
     supabase = get_supabase_client()
     query = (
         supabase.table("medal_rate_by_hall_and_day_last")
@@ -101,6 +105,9 @@ st.write(f"出玉率{threshold_value}%以上を表示(クリックでホール
 # --- fetch ---
 @st.cache_data()
 def medal_rate_by_hall_and_weekday(pref):
+    if analytics_backend.use_duckdb_analytics():
+        start_date, end_date = analytics_backend.stats_period()
+        return analytics_backend.payout_rates("weekday", pref=pref, start_date=start_date, end_date=end_date)
     supabase = get_supabase_client()
     query = (
         supabase.table("medal_rate_by_hall_and_weekday")
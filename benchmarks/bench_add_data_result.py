@@ -0,0 +1,121 @@
+"""add_data_result のレコード作成ベンチマーク。
+
+前処理済みデータと同じ列構成の合成データ（既定: 10万行・100万行）で、
+従来の iterrows による作成と build_result_records（列単位の処理）の所要時間を比較する。
+upsert 送信は行わない。
+
+実行: python -m benchmarks.bench_add_data_result [--rows 100000 1000000] [--legacy-max-rows 1000000]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from scraper.data_to_supabase import _records_to_dicts, build_result_records
+
+
+def _make_frame(rows: int, seed: int = 0) -> tuple[pd.DataFrame, dict, dict, dict]:
+    rng = np.random.default_rng(seed)
+    prefs = [f"県{i}" for i in range(5)]
+    halls = [f"ホール{i}" for i in range(200)]
+    models = [f"ジャグラー{i}" for i in range(20)]
+    pref_idx = rng.integers(0, len(prefs), rows)
+    df = pd.DataFrame(
+        {
+            "pref": np.array(prefs, dtype=object)[pref_idx],
+            "hall": np.array(halls, dtype=object)[rng.integers(0, len(halls), rows)],
+            "model": np.array(models, dtype=object)[rng.integers(0, len(models), rows)],
+            "date": pd.Timestamp("2026-01-01") + pd.to_timedelta(rng.integers(0, 300, rows), unit="D"),
+            "unit_no": rng.integers(1, 1000, rows),
+            "game": rng.integers(0, 9000, rows),
+            "bb": rng.integers(0, 40, rows),
+            "rb": rng.integers(0, 40, rows),
+            "medal": rng.integers(-3000, 5000, rows),
+        }
+    )
+    df["date"] = df["date"].dt.strftime("%Y-%m-%d")
+    pref_map = {p: i + 1 for i, p in enumerate(prefs)}
+    hall_keys = [(pid, h) for pid in pref_map.values() for h in halls]
+    hall_map = {key: n for n, key in enumerate(hall_keys, 1)}
+    model_map = {m: i + 1 for i, m in enumerate(models)}
+    return df, pref_map, hall_map, model_map
+
+
+def _build_records_iterrows(df, pref_map, hall_map, model_map) -> list[dict]:
+    """変更前の add_data_result と同じ iterrows による作成（比較用、警告ログは省略）。"""
+    records = []
+    for _, row in df.iterrows():
+        pid = pref_map.get(row["pref"])
+        if not pid:
+            continue
+        hall_id = hall_map.get((pid, row["hall"]))
+        if not hall_id:
+            continue
+        model_id = model_map.get(row["model"])
+        if not model_id:
+            continue
+        try:
+            unit_no = int(row["unit_no"])
+            game = int(row["game"])
+            bb = int(row["bb"])
+            rb = int(row["rb"])
+            medal = int(row["medal"])
+        except (TypeError, ValueError):
+            continue
+        records.append(
+            {
+                "hall_id": hall_id,
+                "model_id": model_id,
+                "unit_no": unit_no,
+                "date": str(row["date"]),
+                "game": game,
+                "bb": bb,
+                "rb": rb,
+                "medal": medal,
+            }
+        )
+    return records
+
+
+def run(sizes: list[int], legacy_max_rows: int) -> None:
+    for rows in sizes:
+        df, pref_map, hall_map, model_map = _make_frame(rows)
+
+        start = time.perf_counter()
+        records_df = build_result_records(df, pref_map, hall_map, model_map)
+        build_sec = time.perf_counter() - start
+        start = time.perf_counter()
+        records = _records_to_dicts(records_df)
+        to_dict_sec = time.perf_counter() - start
+        print(
+            f"[columnar] rows={rows}: build={build_sec:.2f}s records={to_dict_sec:.2f}s "
+            f"total={build_sec + to_dict_sec:.2f}s"
+        )
+
+        if rows > legacy_max_rows:
+            print(f"[iterrows] rows={rows}: --legacy-max-rows={legacy_max_rows} を超えるためスキップします")
+            continue
+        start = time.perf_counter()
+        legacy = _build_records_iterrows(df, pref_map, hall_map, model_map)
+        legacy_sec = time.perf_counter() - start
+        if legacy != records:
+            raise AssertionError(f"作成結果が一致しません: rows={rows}")
+        print(
+            f"[iterrows] rows={rows}: total={legacy_sec:.2f}s "
+            f"speedup={legacy_sec / (build_sec + to_dict_sec):.1f}x"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--legacy-max-rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    run(args.rows, args.legacy_max_rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Parquet スナップショットを DuckDB で集計する場合と、台ごとの行を取得して pandas で集計する場合の比較。
+
+合成の results（bench_local_mirror と同じ）をミラーへ写して Parquet に書き出し、
+台番号別の履歴・統計ページと同じ集計（ホール × 日付、機種 × 日付と設定予測、台ごとの成績）の所要時間を表示する。
+
+実行: python -m benchmarks.bench_analytics [--halls 20] [--units 150] [--days 365]
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.bench_local_mirror import START_DATE, _SyntheticSupabase, _time
+from scraper.local_mirror import export_parquet_snapshot, sync_local_mirror
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--halls", type=int, default=20)
+    parser.add_argument("--units", type=int, default=150)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        mirror, out = Path(tmp) / "mirror.sqlite", Path(tmp) / "results_parquet"
+        os.environ["LOCAL_MIRROR_PATH"] = str(mirror)
+        os.environ["ANALYTICS_PARQUET_DIR"] = str(out)
+        from app import analytics_backend, mirror_backend
+        from app.utils import calc_grape_rate, continuous_setting
+
+        rows = sync_local_mirror(_SyntheticSupabase(args.halls, args.units, args.days), mirror, full=True)
+        snapshot_sec, _ = _time(lambda: export_parquet_snapshot(mirror, out), 1)
+        print(f"rows={rows}, snapshot={snapshot_sec:.1f} s")
+
+        end = START_DATE + dt.timedelta(days=args.days - 1)
+        start = end - dt.timedelta(days=14)
+
+        def pandas_hall_pivot():
+            df = mirror_backend.fetch_results_by_units(start, end, pref="東京都")
+            return df.pivot_table(index=["hall"], columns=["date"], values=["game", "medal"], aggfunc="mean")
+
+        def pandas_model_pivot():
+            df = calc_grape_rate(mirror_backend.fetch_results_by_units(start, end, hall="ホール1"))
+            df["weight_setting"] = df.apply(
+                lambda r: continuous_setting(r["game"], r["rb"], r["bb"], r["grape_rate"], r["model"]), axis=1
+            )
+            df["weight_setting"] = pd.to_numeric(df["weight_setting"], errors="coerce").round(1)
+            return df.pivot_table(
+                index=["hall", "model"], columns=["date"], values=["game", "medal", "weight_setting"], aggfunc="mean"
+            )
+
+        def pandas_unit_stats():
+            df = mirror_backend.fetch_results_by_units(START_DATE, end, day_last=1, pref="東京都")
+            return df.groupby(["hall", "model", "unit_no"]).agg(
+                count=("game", "size"), game=("game", "sum"), medal=("medal", "sum"), rb=("rb", "sum")
+            )
+
+        cases = {
+            "hall x date pandas": pandas_hall_pivot,
+            "hall x date duckdb": lambda: analytics_backend.aggregate_by_date(["hall"], start, end, pref="東京都"),
+            "model x date + setting pandas": pandas_model_pivot,
+            "model x date + setting duckdb": lambda: analytics_backend.aggregate_by_date(
+                ["hall", "model"], start, end, hall="ホール1"
+            ),
+            "unit stats (no setting) pandas": pandas_unit_stats,
+            "unit stats + setting duckdb": lambda: analytics_backend.unit_stats(day_last=1, pref="東京都"),
+            "payout by day_last duckdb": lambda: analytics_backend.payout_rates("day_last", pref="東京都"),
+        }
+        for name, func in cases.items():
+            sec, result = _time(func, args.repeat)
+            print(f"{name:40s} {sec * 1000:9.2f} ms  rows={len(result)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""ローカルミラー（SQLite / DuckDB）から読むダッシュボード用クエリのベンチマーク。
+
+合成の results（ホール数 × 台数 × 日数）を sync_local_mirror でミラーへ写し、
+app/mirror_backend.py の各関数の所要時間（最良値）を表示する。
+
+実行: python -m benchmarks.bench_local_mirror [--halls 20] [--units 150] [--days 365] [--path /tmp/mirror.sqlite]
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from scraper.local_mirror import sync_local_mirror
+
+MODEL_COUNT = 30
+START_DATE = dt.date(2025, 10, 1)
+
+
+class _Res:
+    def __init__(self, data):
+        self.data = data
+
+
+class _SyntheticQuery:
+    """id から (日付, ホール, 台) を決める合成 results を、sync_local_mirror のページングに合わせて返す。"""
+
+    def __init__(self, source: "_SyntheticSupabase", name: str):
+        self.source = source
+        self.name = name
+        self.last_id = 0
+        self.size = None
+
+    def select(self, *args):
+        return self
+
+    def order(self, *args):
+        return self
+
+    def gte(self, *args):
+        return self
+
+    def gt(self, column, value):
+        self.last_id = value
+        return self
+
+    def limit(self, n):
+        self.size = n
+        return self
+
+    def range(self, start, end):
+        return self
+
+    def execute(self):
+        s = self.source
+        if self.name == "prefectures":
+            return _Res([{"prefecture_id": 1, "name": "東京都"}, {"prefecture_id": 2, "name": "埼玉県"}])
+        if self.name == "halls":
+            return _Res([{"hall_id": h, "name": f"ホール{h}", "prefecture_id": 1 + h % 2} for h in range(1, s.halls + 1)])
+        if self.name == "models":
+            return _Res([{"model_id": m, "name": f"機種{m}"} for m in range(1, MODEL_COUNT + 1)])
+        rows = []
+        for i in range(self.last_id, min(self.last_id + self.size, s.total)):
+            day, rest = divmod(i, s.halls * s.units)
+            hall, unit = divmod(rest, s.units)
+            rows.append(
+                {
+                    "id": i + 1,
+                    "hall_id": hall + 1,
+                    "model_id": 1 + (hall + unit // 10) % MODEL_COUNT,
+                    "unit_no": unit + 1,
+                    "date": (START_DATE + dt.timedelta(days=day)).isoformat(),
+                    "game": 1000 + (i * 37) % 8000,
+                    "bb": (i * 7) % 40,
+                    "rb": (i * 11) % 40,
+                    "medal": (i * 53) % 6000 - 3000,
+                }
+            )
+        return _Res(rows)
+
+
+class _SyntheticSupabase:
+    def __init__(self, halls: int, units: int, days: int):
+        self.halls, self.units, self.days = halls, units, days
+        self.total = halls * units * days
+
+    def table(self, name):
+        return _SyntheticQuery(self, name)
+
+
+def _time(func, repeat: int) -> tuple[float, object]:
+    result = None
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--halls", type=int, default=20)
+    parser.add_argument("--units", type=int, default=150)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--path", type=Path, help="ミラーのファイル（省略時は一時ファイル。.duckdb なら DuckDB）")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.path or Path(tmp) / "mirror.sqlite"
+        os.environ["LOCAL_MIRROR_PATH"] = str(path)
+        from app import mirror_backend
+
+        source = _SyntheticSupabase(args.halls, args.units, args.days)
+        sync_sec, rows = _time(lambda: sync_local_mirror(source, path, full=True), 1)
+        print(f"rows={rows}, path={path}, sync={sync_sec:.1f} s")
+
+        end = START_DATE + dt.timedelta(days=args.days - 1)
+        start = end - dt.timedelta(days=14)
+        cases = {
+            "fetch_results_by_units hall 15d": lambda: mirror_backend.fetch_results_by_units(start, end, hall="ホール1"),
+            "fetch_results_by_units hall+unit 1y": lambda: mirror_backend.fetch_results_by_units(
+                START_DATE, end, hall="ホール1", unit_no=[1, 2, 3]
+            ),
+            "fetch_results_by_units model 15d": lambda: mirror_backend.fetch_results_by_units(start, end, model="機種1"),
+            "fetch hall+model 15d": lambda: mirror_backend.fetch("result_joined", start, end, "ホール1", "機種1"),
+            "fetch_daily_summary 15d": lambda: mirror_backend.fetch_daily_summary(start, end, pref="東京都"),
+            "fetch_prefectures": mirror_backend.fetch_prefectures,
+            "fetch_halls": lambda: mirror_backend.fetch_halls("東京都"),
+            "fetch_models": lambda: mirror_backend.fetch_models(hall="ホール1"),
+            "fetch_units": lambda: mirror_backend.fetch_units(hall="ホール1", model="機種1"),
+        }
+        for name, func in cases.items():
+            sec, result = _time(func, args.repeat)
+            print(f"{name:40s} {sec * 1000:9.2f} ms  rows={len(result)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""機種名マッチャーのベンチマーク。
+
+target_models.yaml の alias から作った合成リンク文字列（接頭辞付き・全角・空白入り・
+対象外機種・alias の表記ゆれ）を対象に、従来の判定
+（日付ページごとに build_alias_to_canonical で YAML を読み、match_target_model_detail で
+alias を総なめする）と、事前に索引を作る ModelMatcher の所要時間を比較する。
+判定結果が一致することも確認する。
+
+実行: python -m benchmarks.bench_model_matcher [--links 5000] [--links-per-page 60] [--repeat 3]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from utils.target_models import (
+    build_alias_to_canonical,
+    compile_model_matcher,
+    load_target_models,
+    match_target_model_detail,
+)
+
+KATAKANA = "アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワン"
+
+
+def build_link_texts(count: int, seed: int = 0) -> list[str]:
+    """日付ページの機種リンクを模した文字列を作る（対象機種は3割程度）。"""
+    rng = random.Random(seed)
+    aliases = [alias for item in load_target_models() if item for alias in item.get("aliases") or []]
+    texts: list[str] = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.3 and aliases:
+            alias = rng.choice(aliases)
+            variant = rng.choice(["", "S", "L", "Ｓ", " "])
+            texts.append(f"{variant}{alias}" if variant.strip() else alias.replace("ー", "ー ", 1))
+        elif kind < 0.4 and aliases:
+            # 末尾に型式記号が付いた未登録の表記ゆれ
+            texts.append(rng.choice(aliases) + rng.choice(["-KT", "KK", "2", "Z"]))
+        else:
+            name = "".join(rng.choice(KATAKANA) for _ in range(rng.randint(4, 12)))
+            texts.append(rng.choice(["S", "P", "e ", "L", ""]) + name)
+    return texts
+
+
+def run_legacy(texts: list[str], links_per_page: int) -> list:
+    results = []
+    for start in range(0, len(texts), links_per_page):
+        alias_to_canonical = build_alias_to_canonical()
+        results.extend(match_target_model_detail(t, alias_to_canonical) for t in texts[start:start + links_per_page])
+    return results
+
+
+def run_compiled(texts: list[str], matcher) -> list:
+    return [matcher.match(t) for t in texts]
+
+
+def _time(func, repeat: int) -> tuple[float, object]:
+    result = None
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--links", type=int, default=5000)
+    parser.add_argument("--links-per-page", type=int, default=60, help="日付ページ1件あたりの機種リンク数")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = build_link_texts(args.links)
+    build_sec, matcher = _time(compile_model_matcher, 1)
+    legacy_sec, legacy = _time(lambda: run_legacy(texts, args.links_per_page), args.repeat)
+    match_only_sec, _ = _time(
+        lambda: [match_target_model_detail(t, matcher.exact) for t in texts], args.repeat
+    )
+    compiled_sec, compiled = _time(lambda: run_compiled(texts, matcher), args.repeat)
+    if legacy != compiled:
+        raise AssertionError("従来の判定と ModelMatcher の判定結果が一致しません")
+
+    unmatched = [t for t, m in zip(texts, compiled) if m is None]
+    near_sec, near = _time(lambda: [matcher.near_misses(t) for t in unmatched], 1)
+
+    matched = len(texts) - len(unmatched)
+    print(f"links={len(texts)}, matched={matched}, aliases={len(matcher.exact)}, build={build_sec * 1000:.2f} ms")
+    print(f"[legacy]   yaml+loop  {legacy_sec * 1000:9.2f} ms  {legacy_sec / len(texts) * 1e6:7.2f} us/link")
+    print(f"[legacy]   loop only  {match_only_sec * 1000:9.2f} ms  {match_only_sec / len(texts) * 1e6:7.2f} us/link")
+    print(
+        f"[compiled] match      {compiled_sec * 1000:9.2f} ms  {compiled_sec / len(texts) * 1e6:7.2f} us/link"
+        f"  speedup={legacy_sec / compiled_sec:.1f}x (loop only {match_only_sec / compiled_sec:.1f}x)"
+    )
+    reported = sum(1 for n in near if n)
+    print(
+        f"[near_miss] unmatched={len(unmatched)} {near_sec * 1000:9.2f} ms "
+        f"{near_sec / max(len(unmatched), 1) * 1e6:7.2f} us/link  near_misses={reported}"
+    )
+
+
+if __name__ == "__main__":
+    main()
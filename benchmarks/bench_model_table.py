@@ -0,0 +1,95 @@
+"""機種ページのテーブル抽出ベンチマーク。
+
+保存済み HTML（tests/fixtures/minrepo/*model*.html）を対象に、
+従来のセル単位 inner_text() 読み取りと evaluate_all による一括取得、
+および HTML パーサーによる取得の所要時間を比較する。
+
+実行: python -m benchmarks.bench_model_table [--repeat 20]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+from playwright.sync_api import Error as PWError, Page, sync_playwright
+
+from config import config
+from utils.utils import _norm_text
+from scraper.scraping_model_page import (
+    MODEL_TABLE_ROW_CSS,
+    MODEL_TABLE_ROWS_JS,
+    _table_from_row_cells,
+    parse_model_table_html,
+)
+
+FIXTURE_DIR = config.BASE_DIR / "tests" / "fixtures" / "minrepo"
+
+
+def _read_table_per_cell(page: Page) -> tuple[list[str], list[list[str]]]:
+    """変更前の extract_model_data と同じセル単位の読み取り（比較用）。"""
+    rows = page.locator(MODEL_TABLE_ROW_CSS)
+    ths = rows.nth(0).locator("th")
+    header = [_norm_text(ths.nth(i).inner_text()) for i in range(ths.count())]
+    table: list[list[str]] = []
+    for j in range(rows.count()):
+        tds = rows.nth(j).locator("td")
+        row = [_norm_text(tds.nth(k).inner_text()) for k in range(tds.count())]
+        if row:
+            table.append(row)
+    return header, table
+
+
+def _read_table_bulk(page: Page) -> tuple[list[str], list[list[str]]]:
+    return _table_from_row_cells(page.locator(MODEL_TABLE_ROW_CSS).evaluate_all(MODEL_TABLE_ROWS_JS))
+
+
+def _time(func, repeat: int) -> tuple[float, object]:
+    result = None
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def run(fixtures: list[Path], repeat: int) -> None:
+    htmls = {path.name: path.read_text(encoding="utf-8") for path in fixtures}
+
+    for name, html in htmls.items():
+        sec, (_, header, table) = _time(lambda: parse_model_table_html(html), repeat)
+        print(f"[html_parser] {name}: rows={len(table)} cols={len(header)} {sec * 1000:.2f} ms/page")
+
+    try:
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            page = browser.new_page()
+            for name, html in htmls.items():
+                page.set_content(html)
+                per_cell_sec, per_cell = _time(lambda: _read_table_per_cell(page), repeat)
+                bulk_sec, bulk = _time(lambda: _read_table_bulk(page), repeat)
+                if per_cell != bulk:
+                    raise AssertionError(f"抽出結果が一致しません: {name}")
+                print(
+                    f"[browser] {name}: rows={len(bulk[1])} "
+                    f"per_cell={per_cell_sec * 1000:.2f} ms/page "
+                    f"bulk={bulk_sec * 1000:.2f} ms/page "
+                    f"speedup={per_cell_sec / bulk_sec:.1f}x"
+                )
+            browser.close()
+    except PWError as e:
+        print(f"[browser] Chromium を起動できないためブラウザ比較をスキップします: {e}".splitlines()[0])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    fixtures = sorted(FIXTURE_DIR.glob("*model*.html"))
+    if not fixtures:
+        raise SystemExit(f"フィクスチャがありません: {FIXTURE_DIR}")
+    run(fixtures, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
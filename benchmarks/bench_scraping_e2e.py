@@ -0,0 +1,135 @@
+"""収集エンジンのエンドツーエンドベンチマーク。
+
+ローカルの min-repo フィクスチャサーバー（benchmarks.fixture_server）に対して
+各収集エンジンの extract_result_data_by_dates を実行し、
+ページ数/秒・CPU 時間・メモリ（プロセスツリーの RSS の最大値）を表示する。
+ブラウザを起動できない環境では sync / async をスキップする。
+ページキャッシュは使わず、レートリミッターは --rate-limit を付けたときだけ有効にする。
+
+実行: python -m benchmarks.bench_scraping_e2e [--engines http sync async] [--halls 3] [--days 3]
+      [--latency-ms 20] [--failure-rate 0.02]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from config import config
+from benchmarks.fixture_server import FixtureSite, MinrepoFixtureServer
+from scraper.browser_recycling import process_tree_rss_bytes
+
+MB = 1024 * 1024
+
+
+class _RssSampler:
+    """計測中のプロセスツリーの RSS を一定間隔で読み、最大値を保持する。"""
+
+    def __init__(self, interval_sec: float = 0.1) -> None:
+        self.interval_sec = interval_sec
+        self.peak = process_tree_rss_bytes() or 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_sec):
+            self.peak = max(self.peak, process_tree_rss_bytes() or 0)
+
+    def __enter__(self) -> "_RssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def _run_engine(engine_name: str, server: MinrepoFixtureServer, halls: list[str], days: int) -> dict | None:
+    from scraper.scraping_engines import open_scraping_engine
+
+    try:
+        engine_cm = open_scraping_engine(engine_name)
+        engine = engine_cm.__enter__()
+    except Exception as e:
+        print(f"{engine_name}: スキップしました（{type(e).__name__}: {str(e).splitlines()[0]}）")
+        return None
+
+    requests_before = server.stats.requests
+    failures_before = server.stats.failures
+    rows = 0
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        with _RssSampler() as sampler:
+            for hall in halls:
+                for _, _, _, df, _ in engine.extract_result_data_by_dates(server.hall_url(hall), days):
+                    rows += len(df)
+    finally:
+        engine_cm.__exit__(None, None, None)
+    elapsed = time.perf_counter() - start
+    pages = server.stats.requests - requests_before
+    return {
+        "engine": engine_name,
+        "pages": pages,
+        "failures": server.stats.failures - failures_before,
+        "rows": rows,
+        "elapsed": elapsed,
+        "pages_per_sec": pages / elapsed if elapsed > 0 else 0.0,
+        "cpu": time.process_time() - cpu_start,
+        "peak_rss_mb": sampler.peak / MB,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--engines", nargs="+", default=["http", "sync", "async"])
+    parser.add_argument("--halls", type=int, default=3)
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--units", type=int, default=40, help="機種ページあたりの台数")
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", action="store_true", help="レートリミッターを有効にして計測する")
+    args = parser.parse_args()
+
+    # 共有のキャッシュ・レートリミッターは初回利用時に環境変数から作られるため、先に設定する
+    os.environ["PAGE_CACHE"] = "false"
+    os.environ.setdefault("RATE_LIMIT", "true" if args.rate_limit else "false")
+
+    site = FixtureSite(
+        days=args.days,
+        units_per_model=args.units,
+        latency_sec=args.latency_ms / 1000,
+        latency_jitter_sec=args.jitter_ms / 1000,
+        failure_rate=args.failure_rate,
+    )
+    halls = [f"ベンチホール{i}" for i in range(args.halls)]
+    print(
+        f"halls={args.halls}, days={args.days}, units={args.units}, latency_ms={args.latency_ms}, "
+        f"failure_rate={args.failure_rate}, rate_limit={os.environ['RATE_LIMIT']}"
+    )
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp, MinrepoFixtureServer(site) as server:
+        # 生データ・中間 CSV は一時ディレクトリへ書く
+        config.CSV_DIR = Path(tmp)
+        os.environ["RAW_STORE_DIR"] = str(Path(tmp) / "raw")
+        for engine_name in args.engines:
+            result = _run_engine(engine_name, server, halls, args.days)
+            if result is not None:
+                results.append(result)
+
+    print(f"{'engine':<8}{'pages':>7}{'fail':>6}{'rows':>8}{'sec':>9}{'pages/s':>9}{'cpu_sec':>9}{'rss_mb':>9}")
+    for r in results:
+        print(
+            f"{r['engine']:<8}{r['pages']:>7}{r['failures']:>6}{r['rows']:>8}{r['elapsed']:>9.2f}"
+            f"{r['pages_per_sec']:>9.1f}{r['cpu']:>9.2f}{r['peak_rss_mb']:>9.1f}"
+        )
+    print("cpu_sec はこのプロセスのみ（Chromium の子プロセスは含まない）。rss_mb は子プロセスを含む最大値。")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""min-repo を模したローカル HTTP サーバー（ベンチマーク・テスト用）。
+
+ホール・日付・機種ページを合成 HTML で返す。page_cache を渡すと、
+ページキャッシュに記録済みの実際の HTML（リンク先をローカルに書き換えたもの）を返す。
+応答の遅延と、一定割合のエラー応答（既定 503）を注入できる。
+
+URL:
+    /tag/<slug>                  ホールページ
+    /d/<slug>/<YYYY-MM-DD>/      日付ページ
+    /d/<slug>/<YYYY-MM-DD>/?kishu=<n>  機種ページ
+
+実行: python -m benchmarks.fixture_server [--port 8765] [--latency-ms 50] [--failure-rate 0.05]
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+from scraper.page_cache import PageCache
+from utils.target_models import load_target_models
+
+WEEKDAYS = "月火水木金土日"
+LIVE_ORIGIN = "https://min-repo.com"
+
+
+@dataclass
+class FixtureSite:
+    """合成ページの内容とサーバーの振る舞い。"""
+
+    prefecture: str = "東京都"
+    days: int = 7
+    end_date: str = "2026-10-17"
+    units_per_model: int = 40
+    # 対象外の機種も混ぜ、機種名の照合を通す
+    extra_models: tuple[str, ...] = ("スマスロ北斗の拳",)
+    latency_sec: float = 0.0
+    latency_jitter_sec: float = 0.0
+    failure_rate: float = 0.0
+    failure_status: int = 503
+    seed: int = 0
+    page_cache: PageCache | None = None
+
+    def model_names(self) -> list[str]:
+        names = [m["canonical_name"] for m in load_target_models() if m and m.get("enabled", True)]
+        return names + list(self.extra_models)
+
+    def dates(self) -> list[str]:
+        end = dt.date.fromisoformat(self.end_date)
+        return [(end - dt.timedelta(days=i)).isoformat() for i in range(self.days)]
+
+
+@dataclass
+class FixtureStats:
+    requests: int = 0
+    failures: int = 0
+    by_type: dict[str, int] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def record(self, page_type: str, failed: bool) -> None:
+        with self.lock:
+            self.requests += 1
+            self.failures += int(failed)
+            self.by_type[page_type] = self.by_type.get(page_type, 0) + 1
+
+
+# =========================
+# 合成 HTML
+# =========================
+def _page(title: str, body: str) -> str:
+    return (
+        '<!DOCTYPE html>\n<html lang="ja">\n<head><meta charset="UTF-8">'
+        f"<title>{title} | みんレポ</title></head>\n"
+        f'<body><div id="content">{body}</div></body>\n</html>\n'
+    )
+
+
+def render_hall_page(site: FixtureSite, base_url: str, slug: str) -> str:
+    hall = unquote(slug)
+    rows = []
+    for date in site.dates():
+        d = dt.date.fromisoformat(date)
+        text = f"{d:%Y/%m/%d}"
+        href = f"{base_url}/d/{quote(hall)}/{date}/"
+        rows.append(f'<tr><td><a href="{href}">{text}({WEEKDAYS[d.weekday()]})</a></td><td>+0</td></tr>')
+    body = (
+        f"<h1>{hall}</h1>"
+        f'<div class="hall_info"><span class="todofuken">{site.prefecture}</span></div>'
+        f"<div><table><tr><th>日付</th><th>総差枚</th></tr>{''.join(rows)}</table></div>"
+    )
+    return _page(hall, body)
+
+
+def render_date_page(site: FixtureSite, slug: str, date: str) -> str:
+    hall = unquote(slug)
+    rows = "".join(
+        f'<tr><td><a href="?kishu={n}">{name}</a></td><td>+0</td></tr>'
+        for n, name in enumerate(site.model_names())
+    )
+    body = f"<h1>{hall} {date.replace('-', '/')}</h1><table class=\"kishu\"><tr><th>機種</th><th>平均差枚</th></tr>{rows}</table>"
+    return _page(f"{hall} {date}", body)
+
+
+def render_model_page(site: FixtureSite, slug: str, date: str, kishu: int) -> str:
+    hall = unquote(slug)
+    names = site.model_names()
+    name = names[kishu % len(names)]
+    rng = random.Random(f"{site.seed}:{hall}:{date}:{kishu}")
+    rows = [
+        f"<tr><td>{101 + kishu * 100 + i}</td><td>{rng.randint(500, 9000):,}</td>"
+        f"<td>{rng.randint(-3000, 4000):+,}</td><td>{rng.randint(0, 40)}</td><td>{rng.randint(0, 40)}</td></tr>"
+        for i in range(site.units_per_model)
+    ]
+    body = (
+        f"<h1>{hall} {date.replace('-', '/')} {name}</h1>"
+        f'<div class="tab_content"><h2>{name}　グラフ一覧</h2></div>'
+        '<div><div class="table_wrap"><table><tbody>'
+        "<tr><th>台番</th><th>G数</th><th>差枚</th><th>BB</th><th>RB</th></tr>"
+        f"{''.join(rows)}</tbody></table></div></div>"
+    )
+    return _page(f"{name} - {hall} {date}", body)
+
+
+# =========================
+# サーバー
+# =========================
+class MinrepoFixtureServer:
+    """with 文で起動・停止する。ポート 0 なら空いているポートを使う。"""
+
+    def __init__(self, site: FixtureSite | None = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.site = site or FixtureSite()
+        self.stats = FixtureStats()
+        self._rng = random.Random(self.site.seed)
+        self._rng_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def hall_url(self, slug: str) -> str:
+        return f"{self.base_url}/tag/{quote(slug)}"
+
+    def __enter__(self) -> "MinrepoFixtureServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="minrepo-fixture", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _inject(self) -> tuple[float, bool]:
+        """今回の応答の (遅延秒, 失敗させるか) を決める。"""
+        site = self.site
+        with self._rng_lock:
+            delay = site.latency_sec + self._rng.uniform(0, site.latency_jitter_sec)
+            failed = self._rng.random() < site.failure_rate
+        return delay, failed
+
+    def render(self, path_with_query: str) -> tuple[str, str | None]:
+        """(ページ種別, HTML) を返す。該当ページが無ければ HTML は None。"""
+        parts = urlsplit(path_with_query)
+        segments = [s for s in parts.path.split("/") if s]
+        page_type = "hall" if segments[:1] == ["tag"] else "model" if "kishu=" in parts.query else "date"
+
+        if self.site.page_cache is not None:
+            html = self.site.page_cache.get(LIVE_ORIGIN + path_with_query, page_type)
+            return page_type, html.replace(LIVE_ORIGIN, self.base_url) if html is not None else None
+
+        if page_type == "hall" and len(segments) == 2:
+            return page_type, render_hall_page(self.site, self.base_url, segments[1])
+        if len(segments) == 3 and segments[0] == "d":
+            _, slug, date = segments
+            if page_type == "model":
+                kishu = int(parse_qs(parts.query)["kishu"][0])
+                return page_type, render_model_page(self.site, slug, date, kishu)
+            return page_type, render_date_page(self.site, slug, date)
+        return page_type, None
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # httpx・Chromium と keep-alive で接続を使い回す実サイトに合わせる
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:  # noqa: N802
+                delay, failed = server._inject()
+                if delay > 0:
+                    time.sleep(delay)
+                page_type, html = server.render(self.path)
+                server.stats.record(page_type, failed)
+                if failed:
+                    self.send_error(server.site.failure_status)
+                    return
+                if html is None:
+                    self.send_error(404)
+                    return
+                data = html.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args) -> None:  # noqa: A002
+                pass
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="min-repo を模したローカル HTTP サーバー")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--page-cache", action="store_true", help="data/page_cache に記録済みの HTML を返す")
+    args = parser.parse_args()
+
+    site = FixtureSite(
+        days=args.days,
+        latency_sec=args.latency_ms / 1000,
+        latency_jitter_sec=args.jitter_ms / 1000,
+        failure_rate=args.failure_rate,
+        page_cache=PageCache(replay_only=True) if args.page_cache else None,
+    )
+    with MinrepoFixtureServer(site, port=args.port) as server:
+        print(f"serving: {server.hall_url('テストホール')}  (Ctrl+C で終了)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
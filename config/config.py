@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from dataclasses import dataclass
 
@@ -7,7 +8,8 @@ MAIN_URL = "https://min-repo.com/tag/"
 HALLS_YAML = "config/halls.yaml"
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-DATA_DIR = BASE_DIR / "data"
+# DATA_DIR でログ・CSV などの出力先を変えられる（テストは一時ディレクトリを使う）
+DATA_DIR = Path(os.getenv("DATA_DIR", "").strip() or BASE_DIR / "data")
 LOG_DIR = BASE_DIR / DATA_DIR / "logs"
 CSV_DIR = BASE_DIR / DATA_DIR / "csv"
 IMG_DIR = BASE_DIR / DATA_DIR / "imgs"
@@ -15,7 +17,7 @@ IMG_DIR = BASE_DIR / DATA_DIR / "imgs"
 LOG_PATH = LOG_DIR / 'minrepo.log'
 
 for d in [DATA_DIR, LOG_DIR, CSV_DIR, IMG_DIR]:
-    d.mkdir(exist_ok=True)
+    d.mkdir(parents=True, exist_ok=True)
 
 
 @dataclass
@@ -0,0 +1,203 @@
+"""fetch_results_by_units が発行するクエリの実行計画を EXPLAIN で確認する。
+
+ダッシュボードの代表的な絞り込み（ホール・機種・台番号など × 日付範囲）ごとに、
+app/fetch_functions.build_results_by_units_query で PostgREST のクエリを組み立て、
+その条件と1ページ目の limit/offset をそのまま SQL にして EXPLAIN (FORMAT JSON) を実行する。
+件数の少ないマスタ（prefectures・halls・models）以外に Seq Scan があれば失敗（終了コード1）にする。
+絞り込みに使う値は、対象期間の latest_units_results から1行選んで使う。
+
+実行例:
+    python -m migrations.explain_check
+    python -m migrations.explain_check --start 2026-10-01 --end 2026-10-15
+"""
+import argparse
+import csv
+import datetime as dt
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+
+from config import config
+from utils.logger_setup import setup_logger
+from migrations.runner import connect
+
+# =========================
+# 設定・ロガー
+# =========================
+filename, ext = os.path.splitext(os.path.basename(__file__))
+logger = setup_logger(filename, log_file=config.LOG_PATH)
+
+RESULTS_VIEW = "latest_units_results"
+# _fetch_all_rows の1ページの件数
+PAGE_SIZE = 1000
+# 件数が少なく Seq Scan で構わないテーブル
+SEQ_SCAN_ALLOWED_RELATIONS = frozenset({"prefectures", "halls", "models"})
+
+# PostgREST の演算子 → SQL の比較演算子
+_COMPARISON_OPERATORS = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+
+@dataclass(frozen=True)
+class ExplainCase:
+    name: str
+    filters: dict = field(default_factory=dict)
+
+
+def build_explain_cases(sample: dict) -> list[ExplainCase]:
+    """ダッシュボードで使う絞り込みの組み合わせを、sample の値で作る。"""
+    pref, hall, model = sample["prefecture"], sample["hall"], sample["model"]
+    return [
+        ExplainCase("hall", {"hall": hall}),
+        ExplainCase("pref_hall", {"pref": pref, "hall": hall}),
+        ExplainCase("pref_hall_model", {"pref": pref, "hall": hall, "model": model}),
+        ExplainCase("hall_unit_no", {"hall": hall, "unit_no": [sample["unit_no"]]}),
+        ExplainCase("hall_day_last", {"hall": hall, "day_last": [sample["day_last"]]}),
+        ExplainCase("model", {"model": model}),
+        ExplainCase("pref_model_weekday", {"pref": pref, "model": model, "weekday": [sample["weekday"]]}),
+    ]
+
+
+def postgrest_params(case: ExplainCase, start_date: dt.date, end_date: dt.date) -> list[tuple[str, str]]:
+    """fetch_results_by_units と同じ条件で組み立てたクエリの、1ページ目のクエリパラメータ。"""
+    from postgrest import SyncPostgrestClient
+
+    from app.fetch_functions import build_results_by_units_query
+
+    # リクエストは送らず、組み立てたパラメータだけを使う
+    client = SyncPostgrestClient("http://localhost")
+    query = build_results_by_units_query(
+        client.from_(RESULTS_VIEW).select("*"), start_date, end_date, **case.filters
+    )
+    return list(query.range(0, PAGE_SIZE - 1).request.params.multi_items())
+
+
+def _split_in_values(raw: str) -> list[str]:
+    """in.(a,"b,c") の括弧内を値のリストにする（予約文字を含む値は二重引用符で囲まれている）。"""
+    if not (raw.startswith("(") and raw.endswith(")")):
+        raise ValueError(f"in の値の形式が想定外です: {raw}")
+    return next(csv.reader([raw[1:-1]]))
+
+
+def params_to_sql(params: list[tuple[str, str]], relation: str = RESULTS_VIEW):
+    """PostgREST のクエリパラメータを、PostgREST が発行するのと同じ条件の SELECT 文にする。"""
+    from psycopg import sql
+
+    conditions = []
+    limit = offset = None
+    for column, value in params:
+        if column == "select":
+            if value != "*":
+                raise ValueError(f"select は * だけに対応しています: {value}")
+            continue
+        if column == "limit":
+            limit = int(value)
+            continue
+        if column == "offset":
+            offset = int(value)
+            continue
+        operator, _, operand = value.partition(".")
+        if operator == "in":
+            conditions.append(
+                sql.SQL("{} in ({})").format(
+                    sql.Identifier(column),
+                    sql.SQL(", ").join(sql.Literal(v) for v in _split_in_values(operand)),
+                )
+            )
+        elif operator in _COMPARISON_OPERATORS:
+            conditions.append(
+                sql.SQL("{} {} {}").format(
+                    sql.Identifier(column), sql.SQL(_COMPARISON_OPERATORS[operator]), sql.Literal(operand)
+                )
+            )
+        else:
+            raise ValueError(f"対応していない演算子です: {column}={value}")
+
+    query = sql.SQL("select * from {}").format(sql.Identifier("public", relation))
+    if conditions:
+        query += sql.SQL(" where ") + sql.SQL(" and ").join(conditions)
+    if limit is not None:
+        query += sql.SQL(" limit {}").format(sql.Literal(limit))
+    if offset is not None:
+        query += sql.SQL(" offset {}").format(sql.Literal(offset))
+    return query
+
+
+def find_seq_scans(plan: dict, allowed: frozenset[str] = SEQ_SCAN_ALLOWED_RELATIONS) -> list[str]:
+    """実行計画（EXPLAIN (FORMAT JSON) の Plan）から、許可されていない Seq Scan の対象テーブルを返す。"""
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") not in allowed:
+        found.append(plan.get("Relation Name", "?"))
+    for child in plan.get("Plans", []):
+        found.extend(find_seq_scans(child, allowed))
+    return found
+
+
+def sample_filter_values(conn, start_date: dt.date, end_date: dt.date) -> dict | None:
+    """絞り込みに使う値を、対象期間の latest_units_results から1行選ぶ。"""
+    cur = conn.execute(
+        "select prefecture, hall, model, unit_no, day_last, weekday "
+        "from public.latest_units_results where date between %s and %s limit 1",
+        (start_date, end_date),
+    )
+    row = cur.fetchone()
+    if row is None:
+        return None
+    return dict(zip([c.name for c in cur.description], row))
+
+
+def run_explain_check(
+    conn,
+    start_date: dt.date,
+    end_date: dt.date,
+    allowed: frozenset[str] = SEQ_SCAN_ALLOWED_RELATIONS,
+) -> dict[str, list[str]]:
+    """各ケースのクエリを EXPLAIN し、ケース名 → Seq Scan になったテーブルを返す（問題が無ければ空）。"""
+    sample = sample_filter_values(conn, start_date, end_date)
+    if sample is None:
+        raise RuntimeError(f"{RESULTS_VIEW} に {start_date}〜{end_date} の行がないため確認できません。")
+
+    failures: dict[str, list[str]] = {}
+    for case in build_explain_cases(sample):
+        start = time.perf_counter()
+        query = params_to_sql(postgrest_params(case, start_date, end_date))
+        (plan_json,) = conn.execute(b"explain (format json) " + query.as_bytes(conn)).fetchone()
+        plan = (json.loads(plan_json) if isinstance(plan_json, str) else plan_json)[0]["Plan"]
+        seq_scans = find_seq_scans(plan, allowed)
+        if seq_scans:
+            failures[case.name] = seq_scans
+            logger.error("Seq Scan になるクエリがあります: case=%s, relations=%s", case.name, ",".join(seq_scans))
+        logger.info(
+            "timing stage=explain_check case=%s seq_scans=%d total_cost=%.1f duration_sec=%.2f",
+            case.name,
+            len(seq_scans),
+            plan.get("Total Cost", 0.0),
+            time.perf_counter() - start,
+        )
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="fetch_results_by_units のクエリが Seq Scan にならないか確認する")
+    parser.add_argument("--dsn", help="接続文字列（省略時は SUPABASE_DB_URL）")
+    parser.add_argument("--start", type=dt.date.fromisoformat, help="開始日（省略時は終了日の14日前）")
+    parser.add_argument("--end", type=dt.date.fromisoformat, help="終了日（省略時は昨日）")
+    parser.add_argument(
+        "--allow-seq-scan", action="append", default=[], help="Seq Scan を許すテーブル（複数指定可）"
+    )
+    args = parser.parse_args()
+
+    end_date = args.end or dt.date.today() - dt.timedelta(days=1)
+    start_date = args.start or end_date - dt.timedelta(days=14)
+    with connect(args.dsn) as conn:
+        failures = run_explain_check(
+            conn, start_date, end_date, SEQ_SCAN_ALLOWED_RELATIONS | frozenset(args.allow_seq_scan)
+        )
+    if failures:
+        sys.exit(1)
+    logger.info("すべてのクエリでインデックスが使われています。")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""migrations/sql/NNNN_name.sql を番号順に適用するマイグレーションランナー。
+
+適用済みの番号とファイルのチェックサムを public.schema_migrations に記録し、未適用のものだけを
+1ファイル1トランザクションで適用する。適用済みのファイルが書き換えられていたらエラーにする。
+接続先は --dsn または SUPABASE_DB_URL（Supabase の Postgres 接続文字列）。
+
+実行例:
+    python -m migrations.runner status
+    python -m migrations.runner apply
+    python -m migrations.runner apply --target 4
+    # 先の月の results パーティションを作る（月に1回程度）
+    python -m migrations.runner partitions --months-ahead 3
+"""
+import argparse
+import hashlib
+import os
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from config import config
+from utils.logger_setup import setup_logger
+
+# =========================
+# 設定・ロガー
+# =========================
+filename, ext = os.path.splitext(os.path.basename(__file__))
+logger = setup_logger(filename, log_file=config.LOG_PATH)
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "sql"
+MIGRATION_FILE_PATTERN = re.compile(r"^(?P<version>\d{4})_(?P<name>\w+)\.sql$")
+# 複数の実行が同時に適用しないための advisory lock のキー
+MIGRATION_LOCK_KEY = 7_305_112_023
+
+
+class MigrationError(Exception):
+    """マイグレーションファイルと適用履歴が食い違う場合のエラー。"""
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    path: Path
+
+    @property
+    def sql(self) -> str:
+        return self.path.read_text(encoding="utf-8")
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.path.read_bytes()).hexdigest()
+
+
+def load_migrations(root: Path = MIGRATIONS_DIR) -> list[Migration]:
+    """マイグレーションファイルを番号順に返す。番号の重複はエラー。"""
+    migrations: dict[int, Migration] = {}
+    for path in sorted(root.glob("*.sql")):
+        m = MIGRATION_FILE_PATTERN.match(path.name)
+        if not m:
+            raise MigrationError(f"マイグレーションのファイル名は NNNN_name.sql にしてください: {path.name}")
+        version = int(m.group("version"))
+        if version in migrations:
+            raise MigrationError(f"マイグレーション番号が重複しています: {version}")
+        migrations[version] = Migration(version=version, name=m.group("name"), path=path)
+    return [migrations[v] for v in sorted(migrations)]
+
+
+def connect(dsn: str | None):
+    """dsn（省略時は SUPABASE_DB_URL）へ autocommit で接続する。"""
+    dsn = dsn or os.environ.get("SUPABASE_DB_URL")
+    if not dsn:
+        raise RuntimeError("マイグレーションには --dsn または SUPABASE_DB_URL の設定が必要です。")
+    try:
+        import psycopg
+    except ImportError as e:
+        raise RuntimeError("マイグレーションには psycopg のインストールが必要です。") from e
+    return psycopg.connect(dsn, autocommit=True)
+
+
+def _ensure_history_table(conn) -> None:
+    conn.execute(
+        """
+        create table if not exists public.schema_migrations (
+            version integer primary key,
+            name text not null,
+            checksum text not null,
+            applied_at timestamptz not null default now()
+        )
+        """
+    )
+
+
+def applied_migrations(conn) -> dict[int, str]:
+    """適用済みの番号 → チェックサム。"""
+    _ensure_history_table(conn)
+    rows = conn.execute("select version, checksum from public.schema_migrations").fetchall()
+    return {int(version): checksum for version, checksum in rows}
+
+
+def pending_migrations(
+    migrations: list[Migration], applied: dict[int, str], target: int | None = None
+) -> list[Migration]:
+    """未適用のマイグレーションを返す。適用済みのファイルが変わっていればエラー。"""
+    known = {m.version for m in migrations}
+    missing = sorted(set(applied) - known)
+    if missing:
+        raise MigrationError(f"適用済みのマイグレーションのファイルがありません: {missing}")
+    for m in migrations:
+        if m.version in applied and applied[m.version] != m.checksum:
+            raise MigrationError(f"適用済みのマイグレーションが書き換えられています: {m.path.name}")
+    return [m for m in migrations if m.version not in applied and (target is None or m.version <= target)]
+
+
+def apply_migrations(conn, migrations: list[Migration] | None = None, target: int | None = None) -> list[Migration]:
+    """未適用のマイグレーションを番号順に1つずつ、それぞれ1トランザクションで適用する。"""
+    migrations = load_migrations() if migrations is None else migrations
+    conn.execute("select pg_advisory_lock(%s)", (MIGRATION_LOCK_KEY,))
+    try:
+        pending = pending_migrations(migrations, applied_migrations(conn), target)
+        for m in pending:
+            start = time.perf_counter()
+            with conn.transaction():
+                conn.execute(m.sql)
+                conn.execute(
+                    "insert into public.schema_migrations (version, name, checksum) values (%s, %s, %s)",
+                    (m.version, m.name, m.checksum),
+                )
+            logger.info(
+                "timing stage=migration version=%04d name=%s duration_sec=%.2f",
+                m.version,
+                m.name,
+                time.perf_counter() - start,
+            )
+        if not pending:
+            logger.info("未適用のマイグレーションはありません。")
+        return pending
+    finally:
+        conn.execute("select pg_advisory_unlock(%s)", (MIGRATION_LOCK_KEY,))
+
+
+def ensure_results_partitions(conn, months_ahead: int = 3) -> int:
+    """今月から months_ahead か月先までの results の月パーティションを作る。作成した数を返す。"""
+    (created,) = conn.execute(
+        "select public.ensure_results_partitions(current_date, %s)", (months_ahead,)
+    ).fetchone()
+    logger.info("results パーティションを作成しました: created=%d, months_ahead=%d", created, months_ahead)
+    return int(created)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="DB スキーマのマイグレーション")
+    parser.add_argument("--dsn", help="接続文字列（省略時は SUPABASE_DB_URL）")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="マイグレーションごとの適用状況を表示する")
+    apply_parser = sub.add_parser("apply", help="未適用のマイグレーションを適用する")
+    apply_parser.add_argument("--target", type=int, help="この番号までを適用する")
+    partitions_parser = sub.add_parser("partitions", help="先の月の results パーティションを作る")
+    partitions_parser.add_argument("--months-ahead", type=int, default=3)
+    args = parser.parse_args()
+
+    with connect(args.dsn) as conn:
+        if args.command == "status":
+            applied = applied_migrations(conn)
+            for m in load_migrations():
+                if m.version not in applied:
+                    state = "pending"
+                elif applied[m.version] != m.checksum:
+                    state = "modified"
+                else:
+                    state = "applied"
+                print(f"{m.version:04d} {m.name}: {state}")
+        elif args.command == "apply":
+            apply_migrations(conn, target=args.target)
+        else:
+            ensure_results_partitions(conn, args.months_ahead)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+-- 収集・ダッシュボードが前提とする基本テーブル。
+-- 既存の Supabase ではすでに作成済みのため、存在しないときだけ作る（ローカルの Postgres や新しい環境用）。
+-- 一意キーは scraper/data_to_supabase.py の upsert（on_conflict）と対応する。
+
+create table if not exists public.prefectures (
+  prefecture_id bigserial primary key,
+  name text not null unique
+);
+
+create table if not exists public.halls (
+  hall_id bigserial primary key,
+  name text not null,
+  prefecture_id bigint not null references public.prefectures (prefecture_id),
+  unique (name, prefecture_id)
+);
+
+create table if not exists public.models (
+  model_id bigserial primary key,
+  name text not null unique
+);
+
+create table if not exists public.results (
+  id bigserial primary key,
+  hall_id bigint not null references public.halls (hall_id),
+  model_id bigint not null references public.models (model_id),
+  unit_no integer not null,
+  date date not null,
+  game integer,
+  bb integer,
+  rb integer,
+  medal integer,
+  unique (hall_id, model_id, unit_no, date)
+);
@@ -0,0 +1,14 @@
+-- 収集前の事前スキップ判定用に、期間内の results 件数を (hall_id, date) 単位で返す。
+-- scraper/supabase_lookup.py の load_existing_results_index から RPC で呼び出す。
+create or replace function public.count_results_by_hall_date(start_date date, end_date date)
+returns table (hall_id bigint, date date, row_count bigint)
+language sql
+stable
+as $$
+  select r.hall_id::bigint, r.date::date, count(*)::bigint as row_count
+  from public.results r
+  where r.date between start_date and end_date
+  group by r.hall_id, r.date
+$$;
+
+grant execute on function public.count_results_by_hall_date(date, date) to anon, authenticated, service_role;
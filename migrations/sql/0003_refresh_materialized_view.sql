@@ -0,0 +1,49 @@
+-- マテリアライズドビューを1つ更新する。
+-- scraper/materialized_views.py の refresh_materialized_views から RPC で呼び出す。
+-- 一意インデックス（式・部分インデックスでないもの）があり、一度でも作成済みのビューは
+-- REFRESH MATERIALIZED VIEW CONCURRENTLY で更新し、更新中もダッシュボードからの読み取りを止めない。
+-- それ以外は通常の REFRESH を行う。マテビューでなければ何もしない。
+-- 返り値: 'concurrently' / 'blocking' / 'not_materialized'
+--
+-- 大きなビューでは service_role の statement_timeout（Supabase 既定 8 秒）を超えることがあるため、
+-- 必要に応じて `alter role service_role set statement_timeout = '10min';` を実行しておく。
+create or replace function public.refresh_materialized_view(view_name text, concurrent boolean default true)
+returns text
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  populated boolean;
+  has_unique_index boolean;
+begin
+  select m.ispopulated into populated
+  from pg_matviews m
+  where m.schemaname = 'public' and m.matviewname = view_name;
+  if not found then
+    return 'not_materialized';
+  end if;
+
+  select exists (
+    select 1
+    from pg_index i
+    join pg_class c on c.oid = i.indrelid
+    join pg_namespace n on n.oid = c.relnamespace
+    where n.nspname = 'public'
+      and c.relname = view_name
+      and i.indisunique
+      and i.indexprs is null
+      and i.indpred is null
+  ) into has_unique_index;
+
+  if concurrent and populated and has_unique_index then
+    execute format('refresh materialized view concurrently public.%I', view_name);
+    return 'concurrently';
+  end if;
+  execute format('refresh materialized view public.%I', view_name);
+  return 'blocking';
+end;
+$$;
+
+revoke all on function public.refresh_materialized_view(text, boolean) from public, anon, authenticated;
+grant execute on function public.refresh_materialized_view(text, boolean) to service_role;
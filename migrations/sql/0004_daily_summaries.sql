@@ -0,0 +1,131 @@
+-- results を (hall, model, date) と (hall, date) の粒度で集計した日次サマリーテーブル。
+-- 収集時に scraper/daily_summaries.py が、今回 results が変わったホール×日付だけを
+-- RPC（refresh_daily_summaries）で集計し直す。ダッシュボードは *_named ビューを読む。
+-- 初回は `python -m scraper.daily_summaries backfill --start YYYY-MM-DD --end YYYY-MM-DD` で埋める。
+
+create table if not exists public.daily_hall_model_summary (
+  hall_id bigint not null references public.halls (hall_id),
+  model_id bigint not null references public.models (model_id),
+  date date not null,
+  unit_count integer not null,
+  game_sum bigint not null,
+  medal_sum bigint not null,
+  bb_sum bigint not null,
+  rb_sum bigint not null,
+  updated_at timestamptz not null default now(),
+  primary key (hall_id, model_id, date)
+);
+create index if not exists daily_hall_model_summary_date_idx on public.daily_hall_model_summary (date);
+
+create table if not exists public.daily_hall_summary (
+  hall_id bigint not null references public.halls (hall_id),
+  date date not null,
+  model_count integer not null,
+  unit_count integer not null,
+  game_sum bigint not null,
+  medal_sum bigint not null,
+  bb_sum bigint not null,
+  rb_sum bigint not null,
+  updated_at timestamptz not null default now(),
+  primary key (hall_id, date)
+);
+create index if not exists daily_hall_summary_date_idx on public.daily_hall_summary (date);
+
+-- 指定したホール×日付（hall_ids[i], dates[i] の組）の集計を results から作り直す。
+-- 返り値: (hall, model, date) 粒度で書き込んだ行数
+create or replace function public.refresh_daily_summaries(hall_ids bigint[], dates date[])
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  written integer;
+begin
+  with targets as (
+    select distinct t.hall_id, t.date from unnest(hall_ids, dates) as t(hall_id, date)
+  ),
+  agg as (
+    select r.hall_id, r.model_id, r.date,
+           count(*)::integer as unit_count,
+           coalesce(sum(r.game), 0)::bigint as game_sum,
+           coalesce(sum(r.medal), 0)::bigint as medal_sum,
+           coalesce(sum(r.bb), 0)::bigint as bb_sum,
+           coalesce(sum(r.rb), 0)::bigint as rb_sum
+    from public.results r
+    join targets t on r.hall_id = t.hall_id and r.date = t.date
+    group by r.hall_id, r.model_id, r.date
+  )
+  insert into public.daily_hall_model_summary as s
+    (hall_id, model_id, date, unit_count, game_sum, medal_sum, bb_sum, rb_sum, updated_at)
+  select hall_id, model_id, date, unit_count, game_sum, medal_sum, bb_sum, rb_sum, now() from agg
+  on conflict (hall_id, model_id, date) do update set
+    unit_count = excluded.unit_count,
+    game_sum = excluded.game_sum,
+    medal_sum = excluded.medal_sum,
+    bb_sum = excluded.bb_sum,
+    rb_sum = excluded.rb_sum,
+    updated_at = excluded.updated_at;
+  get diagnostics written = row_count;
+
+  -- results から消えた機種の行を削除する
+  delete from public.daily_hall_model_summary s
+  using unnest(hall_ids, dates) as t(hall_id, date)
+  where s.hall_id = t.hall_id and s.date = t.date
+    and not exists (
+      select 1 from public.results r
+      where r.hall_id = s.hall_id and r.model_id = s.model_id and r.date = s.date
+    );
+
+  insert into public.daily_hall_summary as s
+    (hall_id, date, model_count, unit_count, game_sum, medal_sum, bb_sum, rb_sum, updated_at)
+  select m.hall_id, m.date, count(*)::integer, sum(m.unit_count)::integer,
+         sum(m.game_sum)::bigint, sum(m.medal_sum)::bigint, sum(m.bb_sum)::bigint, sum(m.rb_sum)::bigint, now()
+  from public.daily_hall_model_summary m
+  join (select distinct t.hall_id, t.date from unnest(hall_ids, dates) as t(hall_id, date)) t
+    on m.hall_id = t.hall_id and m.date = t.date
+  group by m.hall_id, m.date
+  on conflict (hall_id, date) do update set
+    model_count = excluded.model_count,
+    unit_count = excluded.unit_count,
+    game_sum = excluded.game_sum,
+    medal_sum = excluded.medal_sum,
+    bb_sum = excluded.bb_sum,
+    rb_sum = excluded.rb_sum,
+    updated_at = excluded.updated_at;
+
+  delete from public.daily_hall_summary s
+  using unnest(hall_ids, dates) as t(hall_id, date)
+  where s.hall_id = t.hall_id and s.date = t.date
+    and not exists (
+      select 1 from public.daily_hall_model_summary m where m.hall_id = s.hall_id and m.date = s.date
+    );
+
+  return written;
+end;
+$$;
+
+revoke all on function public.refresh_daily_summaries(bigint[], date[]) from public, anon, authenticated;
+grant execute on function public.refresh_daily_summaries(bigint[], date[]) to service_role;
+
+-- ダッシュボード用に名前・末尾日・曜日（0=日曜）を付けたビュー
+create or replace view public.daily_hall_model_summary_named as
+select p.name as prefecture, h.name as hall, m.name as model, s.date,
+       extract(day from s.date)::integer % 10 as day_last,
+       extract(dow from s.date)::integer as weekday,
+       s.unit_count, s.game_sum as game, s.medal_sum as medal, s.bb_sum as bb, s.rb_sum as rb
+from public.daily_hall_model_summary s
+join public.halls h on h.hall_id = s.hall_id
+join public.prefectures p on p.prefecture_id = h.prefecture_id
+join public.models m on m.model_id = s.model_id;
+
+create or replace view public.daily_hall_summary_named as
+select p.name as prefecture, h.name as hall, s.date,
+       extract(day from s.date)::integer % 10 as day_last,
+       extract(dow from s.date)::integer as weekday,
+       s.model_count, s.unit_count, s.game_sum as game, s.medal_sum as medal, s.bb_sum as bb, s.rb_sum as rb
+from public.daily_hall_summary s
+join public.halls h on h.hall_id = s.hall_id
+join public.prefectures p on p.prefecture_id = h.prefecture_id;
+
+grant select on public.daily_hall_model_summary_named, public.daily_hall_summary_named to anon, authenticated;
@@ -0,0 +1,281 @@
+-- results を date の月単位で範囲パーティション化する。
+-- ダッシュボードのクエリはどれも日付範囲で絞るため、対象月のパーティションだけを読むようになる。
+--
+-- 既存の results は results_legacy に名前を変えて全行を新しい results へ移し、削除する。
+-- 移行中は results への書き込みが止まるため、収集の動いていない時間に実行する。
+--  - results に依存するビュー・マテビューは定義・インデックス・所有者・権限を退避して作り直す
+--  - 主キー・一意制約はパーティションキーを含む必要があるため、date が無ければ末尾に加える
+--    （id の主キーは (id, date) になる。upsert の衝突キー (hall_id, model_id, unit_no, date) は変わらない）
+--  - 外部キー・インデックス・RLS ポリシー・権限は元の定義で付け直す
+-- パーティション名は results_YYYY_MM。範囲外の日付は results_default に入る。
+-- 先の月のパーティションは ensure_results_partitions で作る（python -m migrations.runner partitions）。
+
+-- from_date の月から、今月の months_ahead か月先までの月パーティションを作る。作成した数を返す。
+-- results_default に入っている該当月の行は、新しいパーティションへ移してから付け替える。
+create or replace function public.ensure_results_partitions(from_date date default current_date, months_ahead integer default 3)
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  month_start date := date_trunc('month', from_date)::date;
+  last_month date := (date_trunc('month', current_date) + make_interval(months => months_ahead))::date;
+  month_end date;
+  part_name text;
+  has_default boolean;
+  created integer := 0;
+begin
+  if (select c.relkind from pg_class c where c.oid = 'public.results'::regclass) <> 'p' then
+    raise exception 'public.results はパーティションテーブルではありません';
+  end if;
+  select exists (
+    select 1
+    from pg_inherits i
+    join pg_class c on c.oid = i.inhrelid
+    where i.inhparent = 'public.results'::regclass and c.relname = 'results_default'
+  ) into has_default;
+
+  while month_start <= last_month loop
+    month_end := (month_start + interval '1 month')::date;
+    part_name := format('results_%s', to_char(month_start, 'YYYY_MM'));
+    if to_regclass(format('public.%I', part_name)) is null then
+      execute format('create table public.%I (like public.results including defaults including constraints)', part_name);
+      if has_default then
+        execute format(
+          'with moved as (delete from public.results_default where date >= %L and date < %L returning *) '
+          'insert into public.%I select * from moved',
+          month_start, month_end, part_name
+        );
+      end if;
+      execute format(
+        'alter table public.results attach partition public.%I for values from (%L) to (%L)',
+        part_name, month_start, month_end
+      );
+      created := created + 1;
+    end if;
+    month_start := month_end;
+  end loop;
+  return created;
+end;
+$$;
+
+revoke all on function public.ensure_results_partitions(date, integer) from public, anon, authenticated;
+grant execute on function public.ensure_results_partitions(date, integer) to service_role;
+
+-- 権限（relacl）を別のテーブル・ビューに付け直す
+create or replace function pg_temp.regrant(target text, acl aclitem[])
+returns void
+language plpgsql
+as $$
+declare
+  item record;
+begin
+  if acl is null then
+    return;  -- 既定の権限のまま
+  end if;
+  for item in select * from aclexplode(acl) loop
+    execute format(
+      'grant %s on %s to %s',
+      item.privilege_type,
+      target,
+      case when item.grantee = 0 then 'public' else quote_ident(pg_get_userbyid(item.grantee)) end
+    );
+  end loop;
+end;
+$$;
+
+do $$
+declare
+  results_oid oid := to_regclass('public.results');
+  results_owner text;
+  results_acl aclitem[];
+  rls_enabled boolean;
+  rls_forced boolean;
+  min_date date;
+  dep record;
+  con record;
+  idx record;
+  pol record;
+  col record;
+  cols text[];
+begin
+  if results_oid is null then
+    raise exception 'public.results がありません（0001_baseline を先に適用してください）';
+  end if;
+  if (select c.relkind from pg_class c where c.oid = results_oid) = 'p' then
+    raise notice 'public.results はすでにパーティション化されています';
+    return;
+  end if;
+
+  -- 1. results に（間接的にも）依存するビュー・マテビューを退避する
+  create temp table results_dependents on commit drop as
+  with recursive deps (oid, depth) as (
+    select distinct rw.ev_class, 1
+    from pg_depend d
+    join pg_rewrite rw on rw.oid = d.objid
+    where d.classid = 'pg_rewrite'::regclass
+      and d.refclassid = 'pg_class'::regclass
+      and d.refobjid = results_oid
+      and rw.ev_class <> results_oid
+    union
+    select rw.ev_class, deps.depth + 1
+    from deps
+    join pg_depend d
+      on d.refobjid = deps.oid and d.classid = 'pg_rewrite'::regclass and d.refclassid = 'pg_class'::regclass
+    join pg_rewrite rw on rw.oid = d.objid
+    where rw.ev_class <> deps.oid
+  )
+  select c.oid,
+         max(deps.depth) as depth,
+         case c.relkind when 'm' then 'materialized view' else 'view' end as kind,
+         format('%I.%I', n.nspname, c.relname) as qualified_name,
+         c.reloptions,
+         pg_get_userbyid(c.relowner) as owner,
+         c.relacl as acl,
+         regexp_replace(pg_get_viewdef(c.oid), ';\s*$', '') as definition,
+         array(select pg_get_indexdef(i.indexrelid) from pg_index i where i.indrelid = c.oid) as indexes
+  from deps
+  join pg_class c on c.oid = deps.oid
+  join pg_namespace n on n.oid = c.relnamespace
+  group by c.oid, n.nspname, c.relname;
+
+  -- 2. results 自体の制約・インデックス・RLS・権限を退避する（定義は名前変更前の public.results で取る）
+  create temp table results_constraints on commit drop as
+  select pc.conname,
+         pc.contype,
+         pg_get_constraintdef(pc.oid) as definition,
+         array(
+           select a.attname::text
+           from unnest(pc.conkey) with ordinality k (attnum, ord)
+           join pg_attribute a on a.attrelid = pc.conrelid and a.attnum = k.attnum
+           order by k.ord
+         ) as cols
+  from pg_constraint pc
+  where pc.conrelid = results_oid and pc.contype in ('p', 'u', 'f');
+
+  create temp table results_indexes on commit drop as
+  select pg_get_indexdef(i.indexrelid) as definition,
+         i.indisunique,
+         exists (
+           select 1 from pg_attribute a
+           where a.attrelid = i.indrelid and a.attname = 'date' and a.attnum = any (i.indkey)
+         ) as has_date
+  from pg_index i
+  where i.indrelid = results_oid
+    and not exists (select 1 from pg_constraint pc where pc.conindid = i.indexrelid and pc.conrelid = results_oid);
+
+  create temp table results_policies on commit drop as
+  select * from pg_policies where schemaname = 'public' and tablename = 'results';
+
+  select pg_get_userbyid(c.relowner), c.relacl, c.relrowsecurity, c.relforcerowsecurity
+  into results_owner, results_acl, rls_enabled, rls_forced
+  from pg_class c
+  where c.oid = results_oid;
+
+  for dep in select * from results_dependents order by depth desc loop
+    execute format('drop %s %s', dep.kind, dep.qualified_name);
+  end loop;
+
+  -- 3. パーティションテーブルを作り、全行を移す
+  alter table public.results rename to results_legacy;
+  create table public.results (
+    like public.results_legacy including defaults including identity including constraints including storage including comments
+  ) partition by range (date);
+  create table public.results_default partition of public.results default;
+
+  select min(r.date) into min_date from public.results_legacy r;
+  perform public.ensure_results_partitions(coalesce(min_date, current_date), 3);
+
+  insert into public.results overriding system value select * from public.results_legacy;
+
+  -- 連番はシーケンスの所有を移し（serial）、identity は既存の最大値の次から振る
+  for col in
+    select a.attname, a.attidentity
+    from pg_attribute a
+    where a.attrelid = 'public.results_legacy'::regclass and a.attnum > 0 and not a.attisdropped
+  loop
+    continue when pg_get_serial_sequence('public.results_legacy', col.attname) is null;
+    if col.attidentity = '' then
+      execute format(
+        'alter sequence %s owned by public.results.%I',
+        pg_get_serial_sequence('public.results_legacy', col.attname),
+        col.attname
+      );
+    else
+      execute format(
+        'select setval(%L, (select coalesce(max(%I), 0) + 1 from public.results_legacy), false)',
+        pg_get_serial_sequence('public.results', col.attname),
+        col.attname
+      );
+    end if;
+  end loop;
+
+  drop table public.results_legacy;
+
+  -- 4. 制約・インデックスを付け直す（主キー・一意制約には date を含める）
+  for con in select * from results_constraints order by contype = 'f', conname loop
+    if con.contype = 'f' then
+      execute format('alter table public.results add constraint %I %s', con.conname, con.definition);
+      continue;
+    end if;
+    cols := con.cols;
+    if not ('date' = any (cols)) then
+      cols := cols || 'date'::text;
+    end if;
+    execute format(
+      'alter table public.results add constraint %I %s (%s)',
+      con.conname,
+      case con.contype when 'p' then 'primary key' else 'unique' end,
+      (select string_agg(quote_ident(c), ', ') from unnest(cols) c)
+    );
+  end loop;
+
+  for idx in select * from results_indexes loop
+    if idx.indisunique and not idx.has_date then
+      raise notice 'date を含まない一意インデックスはパーティションテーブルに作れないため作りません: %', idx.definition;
+      continue;
+    end if;
+    execute idx.definition;
+  end loop;
+
+  -- 5. RLS・ポリシー・所有者・権限
+  if rls_enabled then
+    alter table public.results enable row level security;
+  end if;
+  if rls_forced then
+    alter table public.results force row level security;
+  end if;
+  for pol in select * from results_policies loop
+    execute format(
+      'create policy %I on public.results as %s for %s to %s%s%s',
+      pol.policyname,
+      pol.permissive,
+      pol.cmd,
+      (select string_agg(case when r = 'public' then 'public' else quote_ident(r) end, ', ') from unnest(pol.roles) r),
+      coalesce(' using (' || pol.qual || ')', ''),
+      coalesce(' with check (' || pol.with_check || ')', '')
+    );
+  end loop;
+  execute format('alter table public.results owner to %I', results_owner);
+  perform pg_temp.regrant('public.results', results_acl);
+
+  -- 6. 依存していたビュー・マテビューを作り直す
+  for dep in select * from results_dependents order by depth loop
+    execute format(
+      'create %s %s%s as %s',
+      dep.kind,
+      dep.qualified_name,
+      coalesce(' with (' || array_to_string(dep.reloptions, ', ') || ')', ''),
+      dep.definition
+    );
+    for idx in select unnest(dep.indexes) as definition loop
+      execute idx.definition;
+    end loop;
+    execute format('alter %s %s owner to %I', dep.kind, dep.qualified_name, dep.owner);
+    perform pg_temp.regrant(dep.qualified_name, dep.acl);
+  end loop;
+
+  analyze public.results;
+end;
+$$;
@@ -0,0 +1,43 @@
+-- ダッシュボードの主な絞り込み（ホール・機種 × 日付範囲）用のカバリングインデックス。
+-- 集計に使う列を include に持たせ、results 本体（ヒープ）を読まずにインデックスだけで返せるようにする。
+-- パーティションテーブルに作ると、既存・今後の月パーティションにも同じインデックスが作られる。
+-- ホール×機種×台番号は一意制約 (hall_id, model_id, unit_no, date) のインデックスが使われる。
+
+create index if not exists results_hall_id_date_covering_idx
+  on public.results (hall_id, date) include (model_id, unit_no, game, bb, rb, medal);
+
+create index if not exists results_model_id_date_covering_idx
+  on public.results (model_id, date) include (hall_id, unit_no, game, bb, rb, medal);
+
+-- latest_units_results がマテビューの場合（Supabase 上の定義）は、fetch_results_by_units の
+-- 絞り込み列（名前で絞る）にもインデックスを作る。ビューであれば results 側のインデックスが使われる。
+do $$
+declare
+  spec record;
+begin
+  if not exists (select 1 from pg_matviews where schemaname = 'public' and matviewname = 'latest_units_results') then
+    return;
+  end if;
+  for spec in
+    select * from (values
+      ('latest_units_results_hall_date_idx', array['hall', 'date']),
+      ('latest_units_results_model_date_idx', array['model', 'date']),
+      ('latest_units_results_prefecture_date_idx', array['prefecture', 'date'])
+    ) as s (index_name, cols)
+  loop
+    if (
+      select count(*)
+      from pg_attribute a
+      where a.attrelid = 'public.latest_units_results'::regclass and a.attname = any (spec.cols) and not a.attisdropped
+    ) = cardinality(spec.cols) then
+      execute format(
+        'create index if not exists %I on public.latest_units_results (%s)',
+        spec.index_name,
+        (select string_agg(quote_ident(c), ', ') from unnest(spec.cols) c)
+      );
+    end if;
+  end loop;
+end;
+$$;
+
+analyze public.results;
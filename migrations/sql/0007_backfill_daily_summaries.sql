@@ -0,0 +1,16 @@
+-- 0004 で作った日次サマリーを、既存の results から埋める。
+-- 0004 の適用後に `python -m scraper.daily_summaries backfill` を実行していなくても、
+-- ダッシュボード（RB合算確率 機種別検索）が過去の期間を表示できるようにする。
+-- サマリーのあるホール×日付は飛ばすため、backfill 済みの環境ではほとんど何もしない。
+
+select public.refresh_daily_summaries(
+  coalesce(array_agg(t.hall_id order by t.hall_id, t.date), '{}'),
+  coalesce(array_agg(t.date order by t.hall_id, t.date), '{}')
+)
+from (
+  select distinct r.hall_id, r.date
+  from public.results r
+  where not exists (
+    select 1 from public.daily_hall_summary s where s.hall_id = r.hall_id and s.date = r.date
+  )
+) t;
@@ -0,0 +1,262 @@
+import asyncio
+import os
+import time
+from urllib.parse import quote, urljoin
+
+import pandas as pd
+from playwright.async_api import BrowserContext, Page, TimeoutError as PWTimeout, async_playwright
+
+from config import config
+from utils.logger_setup import setup_logger
+from utils.utils import _norm_text
+from utils.target_models import ModelMatcher, get_model_matcher
+from scraper.scraping_hall_page import _build_date_urls, _date_link_take, _save_date_urls
+from scraper.scraping_date_page import _match_model_links
+from scraper.scraping_model_page import (
+    INNER_TEXTS_JS,
+    MODEL_TABLE_ROW_CSS,
+    MODEL_TABLE_ROWS_JS,
+    MODEL_TITLE_CSS,
+    _build_model_frame,
+    _log_model_skip,
+    _resolve_db_model_name,
+    _select_h2_model,
+    _table_from_row_cells,
+    _unpack_model_url,
+)
+from scraper.scraping_result_data import log_date_discovery, record_date_result, timed_date
+from scraper.request_routing import install_request_routing_async
+from scraper.page_cache import CacheMissError, goto_cached_async
+from scraper.rate_limiter import backoff_delay
+
+# =========================
+# 設定・ロガー
+# =========================
+filename, ext = os.path.splitext(os.path.basename(__file__))
+logger = setup_logger(filename, log_file=config.LOG_PATH)
+
+
+# =========================
+# ページ操作（playwright.async_api 版）
+# =========================
+async def extract_date_url_async(
+    hall_url: str,
+    page: Page,
+    period: int,
+    target_dates: set[str] | None = None,
+    stop_at: str | None = None,
+    min_period: int = 0,
+) -> list[tuple[str, str, str, str]]:
+    """extract_date_url の async 版。returns: List[(prefecture, hall, date, date_url)]"""
+    logger.debug("ホールのトップページにアクセスします。")
+    logger.debug("url: %s", hall_url)
+    await goto_cached_async(page, hall_url, "hall", timeout=90_000, wait_until="domcontentloaded")
+
+    hall = _norm_text(await page.locator("#content h1").first.text_content())
+    pref = _norm_text(await page.locator("#content div span.todofuken").first.text_content())
+    logger.debug("Hall: %s / Pref: %s", hall, pref)
+
+    css = "#content div table tbody tr td a"
+    await page.wait_for_selector(css, timeout=15_000)
+    links = page.locator(css)
+    count = await links.count()
+    take = _date_link_take(count, period, target_dates)
+    logger.debug("link取得数: %d, take: %d", count, take)
+
+    raw_links = [
+        (await links.nth(i).inner_text(), await links.nth(i).get_attribute("href") or "")
+        for i in range(take)
+    ]
+    date_urls = _build_date_urls(raw_links, pref, hall, target_dates, period=min_period, stop_at=stop_at)
+    _save_date_urls(date_urls, pref, hall)
+    return date_urls
+
+
+async def extract_model_url_async(
+    page: Page, hall: str, pref: str, date_url: str, date: str
+) -> list[tuple[str, str, str, str, str, str, str, str, str, str]]:
+    """extract_model_url の async 版。"""
+    logger.debug("日付ページにアクセス: %s", date_url)
+    await goto_cached_async(page, date_url, "date", date, timeout=90_000, wait_until="domcontentloaded")
+
+    css_table = "table.kishu"
+    try:
+        await page.wait_for_selector(css_table, timeout=10_000)
+    except PWTimeout:
+        logger.warning("機種リンクが見つかりません: %s", date_url)
+        return []
+
+    links = page.locator(css_table).nth(0).locator("tbody tr td a")
+    count = await links.count()
+    raw_links = [
+        (await links.nth(j).inner_text(), await links.nth(j).get_attribute("href") or "")
+        for j in range(count)
+    ]
+    return _match_model_links(raw_links, hall, pref, date_url, date, get_model_matcher())
+
+
+async def goto_with_retry_async(page: Page, url: str, retries: int = 2, date: str | None = None) -> None:
+    """goto_with_retry の async 版。"""
+    last_error: Exception | None = None
+    for attempt in range(1, retries + 1):
+        try:
+            await goto_cached_async(page, url, "model", date, timeout=90_000, wait_until="domcontentloaded")
+            return
+        except CacheMissError:
+            raise
+        except Exception as e:
+            last_error = e
+            logger.warning(
+                "機種ページへのアクセスに失敗しました。retry=%d/%d, url=%s, error=%s",
+                attempt,
+                retries,
+                url,
+                e,
+            )
+            if attempt < retries:
+                delay = backoff_delay(attempt)
+                logger.debug("機種ページの再取得まで %.2f 秒待機します: url=%s", delay, url)
+                await asyncio.sleep(delay)
+    if last_error is not None:
+        raise last_error
+
+
+async def _extract_one_model(
+    page: Page, model_url_tuple: tuple, matcher: ModelMatcher
+) -> pd.DataFrame | None:
+    pref, hall, date, date_url, model_url = _unpack_model_url(model_url_tuple)[:5]
+    url = urljoin(date_url, model_url)
+    try:
+        logger.debug("機種ページにアクセスします。url: %s", url)
+        await goto_with_retry_async(page, url, retries=2, date=date)
+
+        model = ""
+        try:
+            await page.wait_for_selector(MODEL_TITLE_CSS, timeout=10_000)
+            model = _select_h2_model(await page.locator(MODEL_TITLE_CSS).evaluate_all(INNER_TEXTS_JS))
+            logger.debug("機種名(h2): %s", model)
+        except PWTimeout:
+            logger.warning("機種タイトルが取得できませんでした: %s", url)
+
+        model = _resolve_db_model_name(model, model_url_tuple, matcher)
+        if model is None:
+            return None
+
+        try:
+            await page.wait_for_selector(MODEL_TABLE_ROW_CSS, timeout=15_000)
+        except PWTimeout as e:
+            _log_model_skip(hall, date, model_url, url, e)
+            return None
+
+        row_cells = await page.locator(MODEL_TABLE_ROW_CSS).evaluate_all(MODEL_TABLE_ROWS_JS)
+        if not row_cells:
+            _log_model_skip(hall, date, model_url, url, "テーブル行が空")
+            return None
+
+        header, table = _table_from_row_cells(row_cells)
+        return _build_model_frame(header, table, pref=pref, hall=hall, model=model, date=date)
+    except Exception as e:
+        _log_model_skip(hall, date, model_url, url, e)
+        return None
+
+
+async def extract_model_data_async(
+    context: BrowserContext, model_urls: list[tuple], concurrency: int = 4
+) -> pd.DataFrame:
+    """extract_model_data の async 版。
+
+    機種ページを最大 concurrency 件まで同時に取得する。
+    ページはプールして使い回し、返却行の順序は model_urls の順に揃える。
+    """
+    if not model_urls:
+        return pd.DataFrame()
+
+    matcher = get_model_matcher()
+    page_count = max(1, min(concurrency, len(model_urls)))
+    pages: asyncio.Queue[Page] = asyncio.Queue()
+    for _ in range(page_count):
+        pages.put_nowait(await context.new_page())
+
+    async def run(model_url_tuple: tuple) -> pd.DataFrame | None:
+        page = await pages.get()
+        try:
+            return await _extract_one_model(page, model_url_tuple, matcher)
+        finally:
+            pages.put_nowait(page)
+
+    try:
+        results = await asyncio.gather(*(run(t) for t in model_urls))
+    finally:
+        while not pages.empty():
+            await pages.get_nowait().close()
+
+    frames = [df for df in results if df is not None]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+async def extract_result_data_by_dates_async(
+    context: BrowserContext,
+    page: Page,
+    hall_url: str,
+    period: int = 1,
+    date_filter=None,
+    target_dates: set[str] | None = None,
+    on_date_result=None,
+    model_concurrency: int = 4,
+    before_date=None,
+    stop_at: str | None = None,
+    min_period: int = 0,
+) -> list[tuple[str, str, str, pd.DataFrame, int]]:
+    """extract_result_data_by_dates の async 版。
+
+    ホール・日付ページは page で順に、機種ページは context 上の別ページで並行に取得する。
+    before_date(context, page) は取得する日付ごとに await され、以降に使う (context, page) を返す
+    （ブラウザコンテキストを作り直したときに差し替えるため）。
+    returns: List[(pref, hall, date, df_result, model_count)]（on_date_result を渡した場合は空）
+    """
+    discovery_start = time.perf_counter()
+    date_urls = await extract_date_url_async(
+        hall_url, page, period=period, target_dates=target_dates, stop_at=stop_at, min_period=min_period
+    )
+    log_date_discovery(hall_url, date_urls, discovery_start)
+    results: list[tuple[str, str, str, pd.DataFrame, int]] = []
+
+    for pref, hall, date, date_url in date_urls:
+        with timed_date(hall, date) as timing:
+            if date_filter is not None and not date_filter(pref, hall, date):
+                timing["status"] = "skipped_existing"
+                continue
+            if before_date is not None:
+                context, page = await before_date(context, page)
+            model_urls = await extract_model_url_async(page, hall, pref, date_url, date)
+            df_result = (
+                await extract_model_data_async(context, model_urls, concurrency=model_concurrency)
+                if model_urls
+                else None
+            )
+            timing["status"] = record_date_result(results, pref, hall, date, model_urls, df_result, on_date_result)
+
+    return results
+
+
+async def _main(hall_url: str, period: int) -> None:
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        context = await browser.new_context()
+        await install_request_routing_async(context)
+        page = await context.new_page()
+        try:
+            results = await extract_result_data_by_dates_async(context, page, hall_url, period)
+        finally:
+            await browser.close()
+    for pref, hall, date, df, model_count in results:
+        logger.info("取得結果: hall=%s, date=%s, models=%d, rows=%d", hall, date, model_count, len(df))
+
+
+if __name__ == "__main__":
+
+    period = 2
+    hall = "パーラーディオス下赤塚本店"
+    hall_url = urljoin(config.MAIN_URL, quote(hall))
+
+    asyncio.run(_main(hall_url, period))
@@ -0,0 +1,196 @@
+import os
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from config import config
+from utils.logger_setup import setup_logger
+from scraper.run_monitor import positive_int_env
+
+# =========================
+# 設定・ロガー
+# =========================
+filename, ext = os.path.splitext(os.path.basename(__file__))
+logger = setup_logger(filename, log_file=config.LOG_PATH)
+
+# CI コンテナ（/dev/shm が小さい・GPU なし）向けにメモリ消費を抑える Chromium の起動オプション
+CHROMIUM_LOW_MEMORY_ARGS = [
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-features=Translate,BackForwardCache,MediaRouter,OptimizationHints",
+    "--renderer-process-limit=2",
+    "--js-flags=--max-old-space-size=256",
+    "--mute-audio",
+    "--no-first-run",
+]
+
+MB = 1024 * 1024
+
+
+def chromium_launch_kwargs() -> dict:
+    """chromium.launch に渡す引数。CHROMIUM_LOW_MEMORY=false で省メモリ用のオプションを付けない。"""
+    kwargs: dict = {"headless": True}
+    if os.getenv("CHROMIUM_LOW_MEMORY", "true").strip().lower() != "false":
+        kwargs["args"] = list(CHROMIUM_LOW_MEMORY_ARGS)
+    return kwargs
+
+
+# ドライバーの起動前後で子プロセスを比べるため、ワーカー間で起動を直列化する
+_LAUNCH_LOCK = threading.Lock()
+
+
+def _process_children() -> dict[int, list[int]] | None:
+    """親 PID → 子 PID の一覧。/proc が無い環境では None を返す。"""
+    proc = Path("/proc")
+    if not (proc / "self" / "statm").exists():
+        return None
+    children: dict[int, list[int]] = {}
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        # プロセス名に空白や括弧を含むことがあるため、最後の ')' より後ろを分割する
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry.name))
+    return children
+
+
+@contextmanager
+def track_new_child_processes() -> Iterator[list[int]]:
+    """ブロック内で起動した自プロセスの子プロセスの PID を、yield したリストに追加する。
+
+    Playwright のドライバーはワーカーごとに自プロセスの子として起動し、Chromium はその子孫になる。
+    起動中は他のワーカーの起動を待たせるため、増えた子プロセスはこのワーカーのものとみなせる。
+    """
+    new_pids: list[int] = []
+    with _LAUNCH_LOCK:
+        before = set((_process_children() or {}).get(os.getpid(), []))
+        yield new_pids
+        after = (_process_children() or {}).get(os.getpid(), [])
+        new_pids.extend(pid for pid in after if pid not in before)
+
+
+def process_tree_rss_bytes(*root_pids: int) -> int | None:
+    """root_pids（既定は自プロセス）とその子孫プロセスの RSS 合計（バイト）。
+
+    Playwright のドライバー・Chromium・レンダラーはすべて子孫プロセスになる。
+    共有ページも各プロセスで数えるため概算値。/proc が無い環境では None を返す。
+    """
+    children = _process_children()
+    if children is None:
+        return None
+    proc = Path("/proc")
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+    stack = list(root_pids) or [os.getpid()]
+    while stack:
+        pid = stack.pop()
+        try:
+            total += int((proc / str(pid) / "statm").read_text().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            continue
+        stack.extend(children.get(pid, []))
+    return total
+
+
+@dataclass
+class BrowserRecycler:
+    """ブラウザコンテキストを作り直す時期を判定し、メモリ使用量を記録する。
+
+    - コンテキスト内のナビゲーション数が max_navigations に達した
+    - このワーカーのブラウザの RSS が max_rss_mb を超えた
+    のどちらかで作り直す。判定はページを使っていないホール・日付の区切りで行う。
+    RSS は browser_pids（このワーカーが起動したドライバー）の子孫プロセスの合計。
+    特定できなかったときは自プロセス全体の合計で判定する。
+    作り直しても RSS がすぐには下がらないことがあるため、作り直し後
+    rss_cooldown_navigations 回のナビゲーションまでは RSS で作り直さない。
+    """
+
+    worker_id: int
+    engine_name: str
+    max_navigations: int = 300
+    max_rss_mb: int = 1536
+    rss_cooldown_navigations: int = 50
+    browser_pids: list[int] = field(default_factory=list)
+    rss_reader: Callable[[], int | None] | None = None
+    navigations: int = 0
+    total_navigations: int = 0
+    recycles: int = 0
+    peak_rss_bytes: int = 0
+
+    @classmethod
+    def from_env(cls, worker_id: int, engine_name: str, browser_pids: list[int] | None = None) -> "BrowserRecycler":
+        """BROWSER_RECYCLE_NAVIGATIONS / BROWSER_RECYCLE_RSS_MB / BROWSER_RECYCLE_RSS_COOLDOWN から作る。"""
+        return cls(
+            worker_id=worker_id,
+            engine_name=engine_name,
+            max_navigations=positive_int_env("BROWSER_RECYCLE_NAVIGATIONS", 300),
+            max_rss_mb=positive_int_env("BROWSER_RECYCLE_RSS_MB", 1536),
+            rss_cooldown_navigations=positive_int_env("BROWSER_RECYCLE_RSS_COOLDOWN", 50),
+            browser_pids=list(browser_pids or []),
+        )
+
+    def watch(self, context) -> None:
+        """コンテキストのナビゲーション（ドキュメントの取得）を数える。sync / async どちらの API でも使える。"""
+        context.on("request", self._on_request)
+
+    def _on_request(self, request) -> None:
+        if request.is_navigation_request():
+            self.navigations += 1
+            self.total_navigations += 1
+
+    def read_rss(self) -> int | None:
+        if self.rss_reader is not None:
+            return self.rss_reader()
+        return process_tree_rss_bytes(*self.browser_pids)
+
+    def sample_rss(self) -> int | None:
+        rss = self.read_rss()
+        if rss is not None:
+            self.peak_rss_bytes = max(self.peak_rss_bytes, rss)
+        return rss
+
+    def recycle_reason(self) -> str | None:
+        """作り直すべきなら理由（navigations / rss）を返す。"""
+        if self.navigations >= self.max_navigations:
+            return "navigations"
+        rss = self.sample_rss()
+        cooling_down = self.recycles > 0 and self.navigations < self.rss_cooldown_navigations
+        if rss is not None and rss >= self.max_rss_mb * MB and not cooling_down:
+            return "rss"
+        return None
+
+    def record_recycle(self, reason: str, duration_sec: float) -> None:
+        """作り直しを記録し、ナビゲーション数を数え直す。"""
+        self.recycles += 1
+        logger.info(
+            "timing stage=browser_recycle worker=%d engine=%s reason=%s navigations=%d rss_mb=%.1f duration_sec=%.2f",
+            self.worker_id,
+            self.engine_name,
+            reason,
+            self.navigations,
+            (self.read_rss() or 0) / MB,
+            duration_sec,
+        )
+        self.navigations = 0
+
+    def log_summary(self) -> None:
+        self.sample_rss()
+        logger.info(
+            "timing stage=browser_memory worker=%d engine=%s navigations=%d recycles=%d peak_rss_mb=%.1f",
+            self.worker_id,
+            self.engine_name,
+            self.total_navigations,
+            self.recycles,
+            self.peak_rss_bytes / MB,
+        )
@@ -0,0 +1,116 @@
+"""日次サマリーテーブル（daily_hall_model_summary / daily_hall_summary）の更新。
+
+収集時は results が変わったホール×日付だけを、RPC（migrations/sql/0004_daily_summaries.sql の
+refresh_daily_summaries）で results から集計し直す。
+初回や定義変更時は backfill で期間内の全ホール×日付を作り直す。
+
+実行: python -m scraper.daily_summaries backfill --start 2026-01-01 --end 2026-10-17
+"""
+import argparse
+import os
+import time
+
+from supabase import Client
+
+from config import config
+from utils.logger_setup import setup_logger
+from scraper.supabase_lookup import COUNT_RESULTS_RPC, fetch_all_pages
+
+# =========================
+# 設定・ロガー
+# =========================
+filename, ext = os.path.splitext(os.path.basename(__file__))
+logger = setup_logger(filename, log_file=config.LOG_PATH)
+
+# migrations/sql/0004_daily_summaries.sql で作成する RPC
+REFRESH_DAILY_SUMMARIES_RPC = "refresh_daily_summaries"
+DAILY_SUMMARY_CHUNK_SIZE = 200
+
+
+def daily_summaries_enabled() -> bool:
+    """DAILY_SUMMARIES=false で収集時の日次サマリー更新を止める。"""
+    return os.getenv("DAILY_SUMMARIES", "true").strip().lower() != "false"
+
+
+def refresh_daily_summaries(
+    supabase: Client,
+    hall_dates: list[tuple[int, str]],
+    chunk_size: int = DAILY_SUMMARY_CHUNK_SIZE,
+) -> int:
+    """指定したホール×日付の日次サマリーを作り直す。(hall, model, date) 粒度の書き込み行数を返す。"""
+    pairs = sorted(set(hall_dates))
+    written = 0
+    for i in range(0, len(pairs), chunk_size):
+        chunk = pairs[i : i + chunk_size]
+        res = supabase.rpc(
+            REFRESH_DAILY_SUMMARIES_RPC,
+            {"hall_ids": [hall_id for hall_id, _ in chunk], "dates": [date for _, date in chunk]},
+        ).execute()
+        written += int(res.data or 0)
+    return written
+
+
+def retry_daily_summaries(
+    supabase: Client,
+    hall_dates: list[tuple[int, str]],
+    chunk_size: int = DAILY_SUMMARY_CHUNK_SIZE,
+) -> list[tuple[int, str]]:
+    """収集中に更新できなかったホール×日付を作り直す。再試行しても失敗した組を返す。"""
+    start = time.perf_counter()
+    pairs = sorted(set(hall_dates))
+    failed: list[tuple[int, str]] = []
+    written = 0
+    for i in range(0, len(pairs), chunk_size):
+        chunk = pairs[i : i + chunk_size]
+        try:
+            written += refresh_daily_summaries(supabase, chunk, chunk_size=chunk_size)
+        except Exception as e:
+            logger.warning("日次サマリーの再作成に失敗しました: hall_dates=%d, error=%s", len(chunk), e)
+            failed.extend(chunk)
+    logger.info(
+        "timing stage=db_summaries_retry hall_dates=%d failed=%d rows=%d duration_sec=%.2f",
+        len(pairs),
+        len(failed),
+        written,
+        time.perf_counter() - start,
+    )
+    return failed
+
+
+def backfill_daily_summaries(supabase: Client, start_date: str, end_date: str) -> int:
+    """期間内に results があるホール×日付をすべて集計し直す。"""
+    start = time.perf_counter()
+    rows = fetch_all_pages(
+        supabase.rpc(COUNT_RESULTS_RPC, {"start_date": start_date, "end_date": end_date})
+        .order("hall_id")
+        .order("date")
+    )
+    hall_dates = [(int(row["hall_id"]), str(row["date"])) for row in rows]
+    written = refresh_daily_summaries(supabase, hall_dates)
+    logger.info(
+        "timing stage=db_summaries_backfill start_date=%s end_date=%s hall_dates=%d rows=%d duration_sec=%.2f",
+        start_date,
+        end_date,
+        len(hall_dates),
+        written,
+        time.perf_counter() - start,
+    )
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="日次サマリーテーブルの作り直し")
+    sub = parser.add_subparsers(dest="command", required=True)
+    backfill_parser = sub.add_parser("backfill", help="期間内の全ホール×日付を results から集計し直す")
+    backfill_parser.add_argument("--start", required=True, help="開始日 (YYYY-MM-DD)")
+    backfill_parser.add_argument("--end", required=True, help="終了日 (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    from scraper.data_to_supabase import get_supabase_client
+
+    if args.command == "backfill":
+        backfill_daily_summaries(get_supabase_client(), args.start, args.end)
+
+
+if __name__ == "__main__":
+    main()
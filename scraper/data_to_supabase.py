@@ -1,9 +1,27 @@
 import os
+import threading
+from dataclasses import dataclass
+
+import numpy as np
 import pandas as pd
 from supabase import create_client, Client
 
 from config import config
 from utils.logger_setup import setup_logger
+from scraper.postgres_ingest import (
+    INGEST_BACKEND_COPY,
+    copy_upsert_results,
+    fetch_existing_results,
+    ingest_backend_from_env,
+)
+from scraper.result_fingerprints import (
+    ResultDiff,
+    diff_result_records,
+    diff_upsert_enabled,
+    fetch_existing_results_postgrest,
+    hall_date_pairs,
+)
+from scraper.supabase_lookup import fetch_all_pages
 # from app.data_from_supabase import get_supabase_client
 
 # =========================
@@ -24,37 +42,131 @@ def get_supabase_client() -> Client:
     return create_client(url, key)
 
 
-def add_model(df: pd.DataFrame, supabase: Client) -> None:
+class DimensionCache:
+    """prefectures / halls / models の name → ID を実行中に保持するキャッシュ。
+
+    初回利用時に3テーブルを1回ずつ読み込み、以降は未登録の名前だけを upsert して
+    返却行から ID を追加する。全ワーカーで共有するため、更新は lock 内で行う。
+    """
+
+    def __init__(self, supabase: Client) -> None:
+        self.supabase = supabase
+        self.pref_map: dict[str, int] = {}
+        # (prefecture_id, hall) -> hall_id
+        self.hall_map: dict[tuple[int, str], int] = {}
+        self.model_map: dict[str, int] = {}
+        self.request_count = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        prefectures = fetch_all_pages(
+            self.supabase.table("prefectures").select("prefecture_id, name").order("prefecture_id")
+        )
+        halls = fetch_all_pages(
+            self.supabase.table("halls").select("hall_id, name, prefecture_id").order("hall_id")
+        )
+        models = fetch_all_pages(
+            self.supabase.table("models").select("model_id, name").order("model_id")
+        )
+        self.request_count += 3
+        self.pref_map = {p["name"]: p["prefecture_id"] for p in prefectures}
+        self.hall_map = {(h["prefecture_id"], h["name"]): h["hall_id"] for h in halls}
+        self.model_map = {m["name"]: m["model_id"] for m in models}
+        self._loaded = True
+        logger.debug(
+            "ディメンション読み込み: prefectures=%d, halls=%d, models=%d",
+            len(self.pref_map),
+            len(self.hall_map),
+            len(self.model_map),
+        )
+
+    def ensure_models(self, names: list[str]) -> None:
+        with self._lock:
+            self._load()
+            new_names = [n for n in names if n not in self.model_map]
+            if not new_names:
+                return
+            # UNIQUE(models.name) 前提で upsert
+            res = (
+                self.supabase.table("models")
+                .upsert([{"name": n} for n in new_names], on_conflict="name")
+                .execute()
+            )
+            self.request_count += 1
+            self.model_map.update({m["name"]: m["model_id"] for m in res.data})
+            logger.debug(f"モデル upsert: {len(new_names)} 件（未登録分のみ）")
+
+    def ensure_prefectures(self, names: list[str]) -> None:
+        with self._lock:
+            self._load()
+            new_names = [n for n in names if n not in self.pref_map]
+            if not new_names:
+                return
+            res = (
+                self.supabase.table("prefectures")
+                .upsert([{"name": n} for n in new_names], on_conflict="name")
+                .execute()
+            )
+            self.request_count += 1
+            self.pref_map.update({p["name"]: p["prefecture_id"] for p in res.data})
+            logger.debug(f"都道府県 upsert: {len(new_names)} 件（未登録分のみ）")
+
+    def ensure_halls(self, halls: list[tuple[int, str]]) -> None:
+        """(prefecture_id, hall) の一覧を登録する。"""
+        with self._lock:
+            self._load()
+            new_halls = [key for key in halls if key not in self.hall_map]
+            if not new_halls:
+                return
+            # name + prefecture_id をユニークキー想定
+            res = (
+                self.supabase.table("halls")
+                .upsert(
+                    [{"name": hall, "prefecture_id": pid} for pid, hall in new_halls],
+                    on_conflict="name,prefecture_id",
+                )
+                .execute()
+            )
+            self.request_count += 1
+            self.hall_map.update({(h["prefecture_id"], h["name"]): h["hall_id"] for h in res.data})
+            logger.debug(f"ホール upsert: {len(new_halls)} 件（未登録分のみ）")
+
+    def snapshot(self) -> tuple[dict[str, int], dict[tuple[int, str], int], dict[str, int]]:
+        """(pref_map, hall_map, model_map) のコピーを返す。"""
+        with self._lock:
+            self._load()
+            return dict(self.pref_map), dict(self.hall_map), dict(self.model_map)
+
+
+def add_model(df: pd.DataFrame, supabase: Client, dimensions: DimensionCache | None = None) -> None:
     """--- モデルの登録 (models) ---"""
     models = df["model"].dropna().unique().tolist()
     if not models:
         logger.warning("モデルなし")
         return
 
-    # UNIQUE(models.name) 前提で upsert
-    rows = [{"name": m} for m in models]
-    supabase.table("models").upsert(rows, on_conflict="name").execute()
-    logger.debug(f"モデル upsert: {len(rows)} 件（新規/既存含む）")
+    dimensions = dimensions or DimensionCache(supabase)
+    dimensions.ensure_models(models)
 
 
-def add_prefecture_and_hall(df: pd.DataFrame, supabase: Client) -> None:
+def add_prefecture_and_hall(df: pd.DataFrame, supabase: Client, dimensions: DimensionCache | None = None) -> None:
     """--- 都道府県(prefectures) と ホール(halls) 登録 ---"""
     prefectures = df["pref"].dropna().unique().tolist()
     if not prefectures:
         logger.warning("pref カラムが空です。")
         return
 
-    # 1) prefectures upsert
-    pref_rows = [{"name": p} for p in prefectures]
-    supabase.table("prefectures").upsert(pref_rows, on_conflict="name").execute()
-    logger.debug(f"都道府県 upsert: {len(pref_rows)} 件（新規/既存含む）")
+    dimensions = dimensions or DimensionCache(supabase)
 
-    # 2) prefecture_id を取得してマップ化
-    pref_res = supabase.table("prefectures").select("prefecture_id, name").execute()
-    pref_map = {row["name"]: row["prefecture_id"] for row in pref_res.data}
+    # 1) prefectures upsert（未登録分のみ）→ prefecture_id のマップ
+    dimensions.ensure_prefectures(prefectures)
+    pref_map, _, _ = dimensions.snapshot()
 
-    # 3) halls upsert（name + prefecture_id をユニークキー想定）
-    hall_rows = []
+    # 2) halls upsert（未登録分のみ）
+    hall_keys = []
     for pref in prefectures:
         pid = pref_map.get(pref)
         if not pid:
@@ -62,87 +174,148 @@ def add_prefecture_and_hall(df: pd.DataFrame, supabase: Client) -> None:
             continue
         halls = df.loc[df["pref"] == pref, "hall"].dropna().unique().tolist()
         for hall in halls:
-            hall_rows.append({"name": hall, "prefecture_id": pid})
-
-    if hall_rows:
-        supabase.table("halls").upsert(
-            hall_rows,
-            on_conflict="name,prefecture_id",
-        ).execute()
-        logger.debug(f"ホール upsert: {len(hall_rows)} 件（新規/既存含む）")
+            hall_keys.append((pid, hall))
+
+    if hall_keys:
+        dimensions.ensure_halls(hall_keys)
     else:
         logger.warning("ホールなし")
 
 
-def add_data_result(df: pd.DataFrame, supabase: Client) -> int:
-    """--- results テーブルへデータ登録 ---
+RESULT_RECORD_COLUMNS = ["hall_id", "model_id", "unit_no", "date", "game", "bb", "rb", "medal"]
+RESULT_INT_COLUMNS = ["unit_no", "game", "bb", "rb", "medal"]
 
-    Returns:
-        upsert 対象として送信できた件数（新規/既存更新を含む）
-    """
 
-    # 1) 最新の prefectures / halls / models を取得して ID マップを作る
-    pref_res = supabase.table("prefectures").select("prefecture_id, name").execute()
-    hall_res = supabase.table("halls").select("hall_id, name, prefecture_id").execute()
-    model_res = supabase.table("models").select("model_id, name").execute()
+def _log_unmatched(mask: np.ndarray, message: str, values: pd.DataFrame) -> None:
+    """対応付けできなかった行を件数とユニーク値の例でまとめて警告する。"""
+    count = int(mask.sum())
+    if not count:
+        return
+    unmatched = values[mask].drop_duplicates().head(5).astype(str)
+    samples = unmatched.agg(" / ".join, axis=1).tolist()
+    logger.warning("⚠ %s: %d 件 (例: %s)", message, count, samples)
 
-    pref_map = {p["name"]: p["prefecture_id"] for p in pref_res.data}
-    # (pref, hall) -> hall_id
-    hall_map = {(h["prefecture_id"], h["name"]): h["hall_id"] for h in hall_res.data}
-    model_map = {m["name"]: m["model_id"] for m in model_res.data}
 
-    # 2) DataFrame から results 用レコードを作成
-    records = []
-    for _, row in df.iterrows():
-        pref = row["pref"]
-        hall_name = row["hall"]
-        model_name = row["model"]
+def build_result_records(
+    df: pd.DataFrame,
+    pref_map: dict[str, int],
+    hall_map: dict[tuple[int, str], int],
+    model_map: dict[str, int],
+) -> pd.DataFrame:
+    """results 用レコード（RESULT_RECORD_COLUMNS）を列単位の処理で作る。
 
-        pid = pref_map.get(pref)
-        if not pid:
-            logger.warning(f"⚠ prefecture_id なし: {pref}")
-            continue
-
-        hall_id = hall_map.get((pid, hall_name))
-        if not hall_id:
-            logger.warning(f"⚠ hall_id なし: {pref} / {hall_name}")
-            continue
+    ID は map / merge で付与し、数値列はまとめて変換する。
+    ID が引けない行・数値に変換できない行は除外し、理由ごとに件数を警告する。
+    """
+    df = df.reset_index(drop=True)
+    ids = pd.DataFrame(
+        {
+            "prefecture_id": df["pref"].map(pref_map).astype("Int64"),
+            "hall": df["hall"],
+            "model_id": df["model"].map(model_map).astype("Int64"),
+        }
+    )
+    hall_ids = pd.DataFrame(
+        [(pid, name, hall_id) for (pid, name), hall_id in hall_map.items()],
+        columns=["prefecture_id", "hall", "hall_id"],
+    ).astype({"prefecture_id": "Int64", "hall_id": "Int64"})
+    ids = ids.merge(hall_ids, how="left", on=["prefecture_id", "hall"], sort=False)
+
+    numbers = df[RESULT_INT_COLUMNS].apply(pd.to_numeric, errors="coerce").astype("float64")
+
+    no_pref = ids["prefecture_id"].isna().to_numpy()
+    no_hall = ~no_pref & ids["hall_id"].isna().to_numpy()
+    no_model = ~no_pref & ~no_hall & ids["model_id"].isna().to_numpy()
+    bad_number = ~(no_pref | no_hall | no_model) & ~np.isfinite(numbers.to_numpy()).all(axis=1)
+    _log_unmatched(no_pref, "prefecture_id なし", df[["pref"]])
+    _log_unmatched(no_hall, "hall_id なし", df[["pref", "hall"]])
+    _log_unmatched(no_model, "model_id なし", df[["model"]])
+    _log_unmatched(bad_number, "数値変換エラー", df[["hall", "model", "date", *RESULT_INT_COLUMNS]])
+
+    valid = ~(no_pref | no_hall | no_model | bad_number)
+    records = pd.DataFrame(
+        {
+            "hall_id": ids["hall_id"].fillna(0).to_numpy("int64")[valid],
+            "model_id": ids["model_id"].fillna(0).to_numpy("int64")[valid],
+            "date": df["date"].astype(str).to_numpy()[valid],  # 'YYYY-MM-DD' 文字列でOK
+        }
+    )
+    for col in RESULT_INT_COLUMNS:
+        # int() と同じく小数部は切り捨てる
+        records[col] = numbers[col].to_numpy()[valid].astype("int64")
+    return records[RESULT_RECORD_COLUMNS]
+
+
+def _records_to_dicts(records_df: pd.DataFrame) -> list[dict]:
+    """to_dict("records") と同じ結果を列ごとの tolist() から作る（大量行で高速）。"""
+    columns = list(records_df.columns)
+    return [dict(zip(columns, row)) for row in zip(*(records_df[c].tolist() for c in columns))]
+
+
+@dataclass(frozen=True)
+class ResultUpsertCounts:
+    """add_data_result の件数。
+
+    upserted は送信した件数（新規/既存更新を含む）。差分判定をしない PostgREST 登録では
+    新規と更新の内訳が分からないため inserted / updated は None。
+    changed_hall_dates は行を送った (hall_id, date)。日次サマリーの更新対象に使う。
+    """
 
-        model_id = model_map.get(model_name)
-        if not model_id:
-            logger.warning(f"⚠ model_id なし: {model_name}")
-            continue
+    upserted: int
+    inserted: int | None = None
+    updated: int | None = None
+    unchanged: int = 0
+    changed_hall_dates: tuple[tuple[int, str], ...] = ()
+
+
+def _diff_against_existing(records_df: pd.DataFrame, supabase: Client, use_copy: bool) -> ResultDiff | None:
+    """対象 (hall_id, date) の既存行をまとめて取得し、指紋で差分を取る。取得に失敗したら None。"""
+    pairs = hall_date_pairs(records_df)
+    try:
+        if use_copy:
+            existing_df = fetch_existing_results(pairs)
+        else:
+            existing_df = fetch_existing_results_postgrest(supabase, pairs)
+    except Exception as e:
+        logger.warning("results の既存行を取得できないため差分判定せず全件を登録します: %s", type(e).__name__)
+        return None
+    diff = diff_result_records(records_df, existing_df)
+    logger.debug(
+        "results 差分: hall_dates=%d, existing=%d, inserted=%d, updated=%d, unchanged=%d",
+        len(pairs),
+        len(existing_df),
+        diff.inserted,
+        diff.updated,
+        diff.unchanged,
+    )
+    return diff
+
+
+def add_data_result(
+    df: pd.DataFrame,
+    supabase: Client,
+    dimensions: DimensionCache | None = None,
+    diff_existing: bool = True,
+) -> ResultUpsertCounts:
+    """--- results テーブルへデータ登録 ---
 
-        try:
-            unit_no = int(row["unit_no"])
-            game = int(row["game"])
-            bb = int(row["bb"])
-            rb = int(row["rb"])
-            medal = int(row["medal"])
-        except (TypeError, ValueError):
-            logger.warning(f"⚠ 数値変換エラー: {row}")
-            continue
+    RESULTS_DIFF_UPSERT が有効（既定）なら、対象 (hall_id, date) の既存行と
+    game / bb / rb / medal の指紋を比べ、新規・変更行だけを送る。
+    既存行が無いと分かっている場合は diff_existing=False で既存行の取得を省く。
+    """
 
-        records.append(
-            {
-                "hall_id": hall_id,
-                "model_id": model_id,
-                "unit_no": unit_no,
-                "date": str(row["date"]),  # 'YYYY-MM-DD' 文字列でOK
-                "game": game,
-                "bb": bb,
-                "rb": rb,
-                "medal": medal,
-            }
-        )
+    # 1) prefectures / halls / models の ID マップ（dimensions が無ければ最新を取得する）
+    dimensions = dimensions or DimensionCache(supabase)
+    pref_map, hall_map, model_map = dimensions.snapshot()
 
-    if not records:
+    # 2) DataFrame から results 用レコードを作成
+    records_df = build_result_records(df, pref_map, hall_map, model_map)
+    if records_df.empty:
         logger.warning("results に挿入するデータがありません。")
-        return 0
+        return ResultUpsertCounts(upserted=0, inserted=0, updated=0)
 
     conflict_keys = ["hall_id", "model_id", "unit_no", "date"]
-    before_dedup = len(records)
-    records_df = pd.DataFrame(records)
+    before_dedup = len(records_df)
     duplicate_count = records_df.duplicated(subset=conflict_keys, keep=False).sum()
     if duplicate_count:
         logger.warning("results upsert前の重複件数(%s): %d 件", conflict_keys, duplicate_count)
@@ -150,10 +323,33 @@ def add_data_result(df: pd.DataFrame, supabase: Client) -> int:
         logger.debug("results upsert前の重複除去: %d 件 -> %d 件", before_dedup, len(records_df))
     else:
         logger.debug("results upsert前の重複件数(%s): %d 件", conflict_keys, duplicate_count)
-    records = records_df.to_dict("records")
+
+    # 3) 既存行と同じ値の行は送らない
+    use_copy = ingest_backend_from_env() == INGEST_BACKEND_COPY
+    diff = _diff_against_existing(records_df, supabase, use_copy) if diff_existing and diff_upsert_enabled() else None
+    unchanged = diff.unchanged if diff is not None else 0
+    if diff is not None:
+        records_df = diff.changed
+        if records_df.empty:
+            logger.debug("results の値に変更がないため登録を省略します: %d 件", unchanged)
+            return ResultUpsertCounts(upserted=0, inserted=0, updated=0, unchanged=unchanged)
+
+    changed_hall_dates = tuple(hall_date_pairs(records_df))
+
+    # 4-a) RESULTS_INGEST_BACKEND=copy: Postgres へ直接 COPY してマージする
+    if use_copy:
+        try:
+            inserted, updated = copy_upsert_results(records_df)
+        except Exception:
+            logger.exception("results COPY 登録失敗: 件数=%d", len(records_df))
+            raise
+        logger.debug("results COPY 登録: inserted=%d, updated=%d", inserted, updated)
+        return ResultUpsertCounts(inserted + updated, inserted, updated, unchanged, changed_hall_dates)
+
+    records = _records_to_dicts(records_df)
     logger.debug("results upsert対象件数: %d 件", len(records))
 
-    # 3) 一括 upsert（unique(hall_id, model_id, unit_no, date) を想定）
+    # 4-b) 一括 upsert（unique(hall_id, model_id, unit_no, date) を想定）
     #    行数が多い場合はバッチに分ける
     batch_size = 1000
     inserted = 0
@@ -181,7 +377,9 @@ def add_data_result(df: pd.DataFrame, supabase: Client) -> int:
         inserted += len(batch)
 
     logger.debug(f"results upsert: {inserted} 件（新規/既存含む）")
-    return inserted
+    if diff is None:
+        return ResultUpsertCounts(upserted=inserted, changed_hall_dates=changed_hall_dates)
+    return ResultUpsertCounts(inserted, diff.inserted, diff.updated, unchanged, changed_hall_dates)
 
 
 if __name__ == "__main__":
@@ -194,6 +392,7 @@ if __name__ == "__main__":
     logger.debug("row count: %d", df.shape[0])
 
     supabase = get_supabase_client()
-    add_model(df, supabase)
-    add_prefecture_and_hall(df, supabase)
-    add_data_result(df, supabase)
+    dimensions = DimensionCache(supabase)
+    add_model(df, supabase, dimensions)
+    add_prefecture_and_hall(df, supabase, dimensions)
+    add_data_result(df, supabase, dimensions)
@@ -0,0 +1,359 @@
+import os
+import time
+from urllib.parse import quote, urljoin
+
+import httpx
+import pandas as pd
+from bs4 import BeautifulSoup
+from playwright.sync_api import sync_playwright
+
+from config import config
+from utils.logger_setup import setup_logger
+from utils.utils import _norm_text
+from utils.target_models import get_model_matcher
+from scraper.scraping_hall_page import _build_date_urls, _date_link_take, _save_date_urls, extract_date_url
+from scraper.scraping_date_page import _match_model_links, extract_model_url
+from scraper.scraping_model_page import (
+    _build_model_frame,
+    _log_model_skip,
+    _resolve_db_model_name,
+    _select_h2_model,
+    _unpack_model_url,
+    extract_model_data,
+    parse_model_table_html,
+)
+from scraper.scraping_result_data import crawl_result_data_by_dates
+from scraper.request_routing import install_request_routing
+from scraper.browser_recycling import chromium_launch_kwargs
+from scraper.page_cache import CacheMissError, PageCache, get_page_cache
+from scraper.rate_limiter import THROTTLE_STATUS_CODES, backoff_delay, get_rate_limiter
+
+# =========================
+# 設定・ロガー
+# =========================
+filename, ext = os.path.splitext(os.path.basename(__file__))
+logger = setup_logger(filename, log_file=config.LOG_PATH)
+
+HTTP_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "ja,en-US;q=0.8,en;q=0.6",
+}
+
+# HTML を直接パースするため、ブラウザが補完する tbody の有無を問わないセレクタにしている
+HALL_TITLE_CSS = "#content h1"
+HALL_PREF_CSS = "#content div span.todofuken"
+HALL_DATE_LINK_CSS = "#content div table tr td a"
+DATE_MODEL_TABLE_CSS = "table.kishu"
+DATE_MODEL_LINK_CSS = "tr td a"
+
+
+class MissingSelectorError(ValueError):
+    """取得した HTML に想定したセレクタが存在しない場合に送出する。"""
+
+
+class HttpFetcher:
+    """keep-alive の接続プールを持つ httpx.Client で HTML を取得する。
+
+    cache を渡すと取得前にページキャッシュを参照し、パースに成功した HTML だけを保存する
+    （読み込み途中などの壊れたページをキャッシュすると、Playwright での再取得でもそれが使われてしまうため）。
+    cache.replay_only のときはネットワークへアクセスせず、キャッシュに無ければ CacheMissError を送出する。
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 4,
+        timeout_sec: float = 90.0,
+        cache: PageCache | None = None,
+    ) -> None:
+        self.cache = cache
+        self._client = httpx.Client(
+            headers=HTTP_HEADERS,
+            timeout=timeout_sec,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+        self.request_count = 0
+
+    def get_html(self, url: str, page_type: str, date: str | None = None, retries: int = 2) -> str:
+        return self.get_parsed(url, page_type, lambda html: html, date, retries)
+
+    def get_parsed(self, url: str, page_type: str, parse, date: str | None = None, retries: int = 2):
+        """HTML を取得して parse に渡し、その結果を返す。
+
+        parse が例外を送出した HTML はキャッシュに保存しない。キャッシュから読んだ HTML だった場合は
+        エントリを消すため、続く Playwright での再取得はネットワークから読み直す。
+        """
+        html = self.cache.get(url, page_type, date) if self.cache is not None else None
+        if html is not None:
+            try:
+                return parse(html)
+            except MissingSelectorError:
+                self.cache.invalidate(url)
+                raise
+        if self.cache is not None and self.cache.replay_only:
+            raise CacheMissError(f"キャッシュにないページです: {url}")
+        html = self._fetch(url, retries)
+        parsed = parse(html)
+        if self.cache is not None:
+            self.cache.put(url, html, page_type, date)
+        return parsed
+
+    def _fetch(self, url: str, retries: int) -> str:
+        limiter = get_rate_limiter()
+        last_error: Exception | None = None
+        for attempt in range(1, retries + 1):
+            limiter.acquire(url)
+            start = time.perf_counter()
+            try:
+                self.request_count += 1
+                res = self._client.get(url)
+                if res.status_code in THROTTLE_STATUS_CODES:
+                    limiter.record_failure(url, f"status={res.status_code}")
+                res.raise_for_status()
+                limiter.record_success(url, time.perf_counter() - start)
+                return res.text
+            except httpx.HTTPError as e:
+                if isinstance(e, httpx.TimeoutException):
+                    limiter.record_failure(url, "timeout")
+                last_error = e
+                logger.warning(
+                    "HTTP取得に失敗しました。retry=%d/%d, url=%s, error=%s",
+                    attempt,
+                    retries,
+                    url,
+                    e,
+                )
+            if attempt < retries:
+                time.sleep(backoff_delay(attempt))
+        raise last_error
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class PlaywrightFallback:
+    """HTML パースに失敗したページだけ Playwright で取得し直すためのブラウザ。
+
+    ブラウザは初回のフォールバック時に起動するため、
+    全ページを HTTP で処理できた場合は chromium.launch を行わない。
+    """
+
+    def __init__(self, worker_id: int = 1) -> None:
+        self.worker_id = worker_id
+        self.fallback_count = 0
+        self._pw_cm = None
+        self._browser = None
+        self._page = None
+
+    @property
+    def page(self):
+        if self._page is None:
+            browser_start = time.perf_counter()
+            self._pw_cm = sync_playwright()
+            p = self._pw_cm.__enter__()
+            self._browser = p.chromium.launch(**chromium_launch_kwargs())
+            self._page = self._browser.new_page()
+            install_request_routing(self._page)
+            logger.info(
+                "timing stage=browser_startup worker=%d engine=http_fallback duration_sec=%.2f",
+                self.worker_id,
+                time.perf_counter() - browser_start,
+            )
+        self.fallback_count += 1
+        return self._page
+
+    def close(self) -> None:
+        if self._pw_cm is None:
+            return
+        try:
+            self._browser.close()
+        finally:
+            self._pw_cm.__exit__(None, None, None)
+            self._pw_cm = self._browser = self._page = None
+
+
+# =========================
+# HTML パース
+# =========================
+def _soup(html: str) -> BeautifulSoup:
+    return BeautifulSoup(html, "lxml")
+
+
+def parse_hall_page(html: str) -> tuple[str, str, list[tuple[str, str]]]:
+    """ホールページ HTML から (県名, ホール名, [(リンク文字列, href)]) を取り出す。"""
+    soup = _soup(html)
+    hall_el = soup.select_one(HALL_TITLE_CSS)
+    pref_el = soup.select_one(HALL_PREF_CSS)
+    links = soup.select(HALL_DATE_LINK_CSS)
+    if hall_el is None or pref_el is None or not links:
+        raise MissingSelectorError("ホールページのホール名・県名・日付リンクが見つかりません")
+    raw_links = [(a.get_text(), a.get("href") or "") for a in links]
+    return _norm_text(pref_el.get_text()), _norm_text(hall_el.get_text()), raw_links
+
+
+def parse_date_page(html: str) -> list[tuple[str, str]]:
+    """日付ページ HTML の先頭の機種表から [(リンク文字列, href)] を取り出す。"""
+    table = _soup(html).select_one(DATE_MODEL_TABLE_CSS)
+    if table is None:
+        raise MissingSelectorError("日付ページの機種表が見つかりません")
+    return [(a.get_text(), a.get("href") or "") for a in table.select(DATE_MODEL_LINK_CSS)]
+
+
+def parse_model_page(html: str) -> tuple[list[str], list[str], list[list[str]]]:
+    """機種ページ HTML から (h2 文字列, ヘッダー, データ行) を取り出す。"""
+    h2_texts, header, table = parse_model_table_html(html)
+    if not header:
+        raise MissingSelectorError("機種ページのデータ表が見つかりません")
+    return h2_texts, header, table
+
+
+# =========================
+# ページ操作（HTTP 版）
+# =========================
+def extract_date_url_http(
+    hall_url: str,
+    fetcher: HttpFetcher,
+    period: int,
+    target_dates: set[str] | None = None,
+    fallback: PlaywrightFallback | None = None,
+    stop_at: str | None = None,
+    min_period: int = 0,
+) -> list[tuple[str, str, str, str]]:
+    """extract_date_url の HTTP 版。returns: List[(prefecture, hall, date, date_url)]"""
+    logger.debug("ホールのトップページを HTTP で取得します。url: %s", hall_url)
+    try:
+        pref, hall, raw_links = fetcher.get_parsed(hall_url, "hall", parse_hall_page)
+    except MissingSelectorError as e:
+        if fallback is None:
+            raise
+        logger.warning("Playwright で再取得します: url=%s, reason=%s", hall_url, e)
+        return extract_date_url(
+            hall_url, fallback.page, period, target_dates=target_dates, stop_at=stop_at, min_period=min_period
+        )
+
+    logger.debug("Hall: %s / Pref: %s", hall, pref)
+    take = _date_link_take(len(raw_links), period, target_dates)
+    date_urls = _build_date_urls(raw_links[:take], pref, hall, target_dates, period=min_period, stop_at=stop_at)
+    _save_date_urls(date_urls, pref, hall)
+    return date_urls
+
+
+def extract_model_url_http(
+    fetcher: HttpFetcher,
+    hall: str,
+    pref: str,
+    date_url: str,
+    date: str,
+    fallback: PlaywrightFallback | None = None,
+) -> list[tuple[str, str, str, str, str, str, str, str, str, str]]:
+    """extract_model_url の HTTP 版。"""
+    logger.debug("日付ページを HTTP で取得: %s", date_url)
+    try:
+        raw_links = fetcher.get_parsed(date_url, "date", parse_date_page, date)
+    except MissingSelectorError as e:
+        if fallback is None:
+            logger.warning("機種リンクが見つかりません: %s", date_url)
+            return []
+        logger.warning("Playwright で再取得します: url=%s, reason=%s", date_url, e)
+        return extract_model_url(fallback.page, hall, pref, date_url, date)
+
+    return _match_model_links(raw_links, hall, pref, date_url, date, get_model_matcher())
+
+
+def extract_model_data_http(
+    fetcher: HttpFetcher,
+    model_urls: list[tuple],
+    fallback: PlaywrightFallback | None = None,
+) -> pd.DataFrame:
+    """extract_model_data の HTTP 版。"""
+    frames: list[pd.DataFrame] = []
+    matcher = get_model_matcher()
+
+    for model_url_tuple in model_urls:
+        pref, hall, date, date_url, model_url = _unpack_model_url(model_url_tuple)[:5]
+        url = urljoin(date_url, model_url)
+        try:
+            logger.debug("機種ページを HTTP で取得します。url: %s", url)
+            try:
+                h2_texts, header, table = fetcher.get_parsed(url, "model", parse_model_page, date)
+            except MissingSelectorError as e:
+                if fallback is None:
+                    raise
+                logger.warning("Playwright で再取得します: url=%s, reason=%s", url, e)
+                df = extract_model_data(fallback.page, [model_url_tuple])
+                if not df.empty:
+                    frames.append(df)
+                continue
+
+            model = _select_h2_model(h2_texts)
+            if not model:
+                logger.warning("機種タイトルが取得できませんでした: %s", url)
+            model = _resolve_db_model_name(model, model_url_tuple, matcher)
+            if model is None:
+                continue
+            frames.append(
+                _build_model_frame(header, table, pref=pref, hall=hall, model=model, date=date)
+            )
+        except Exception as e:
+            _log_model_skip(hall, date, model_url, url, e)
+            continue
+
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def extract_result_data_by_dates_http(
+    fetcher: HttpFetcher,
+    hall_url: str,
+    period: int = 1,
+    date_filter=None,
+    target_dates: set[str] | None = None,
+    on_date_result=None,
+    fallback: PlaywrightFallback | None = None,
+    stop_at: str | None = None,
+    min_period: int = 0,
+) -> list[tuple[str, str, str, pd.DataFrame, int]]:
+    """extract_result_data_by_dates の HTTP 版。returns: List[(pref, hall, date, df_result, model_count)]（on_date_result を渡した場合は空）"""
+    return crawl_result_data_by_dates(
+        lambda hall_url, period, target_dates: extract_date_url_http(
+            hall_url,
+            fetcher,
+            period,
+            target_dates=target_dates,
+            fallback=fallback,
+            stop_at=stop_at,
+            min_period=min_period,
+        ),
+        lambda hall, pref, date_url, date: extract_model_url_http(
+            fetcher, hall, pref, date_url, date, fallback=fallback
+        ),
+        lambda model_urls: extract_model_data_http(fetcher, model_urls, fallback=fallback),
+        hall_url,
+        period,
+        date_filter=date_filter,
+        target_dates=target_dates,
+        on_date_result=on_date_result,
+    )
+
+
+if __name__ == "__main__":
+
+    period = 2
+    hall = "パーラーディオス下赤塚本店"
+    hall_url = urljoin(config.MAIN_URL, quote(hall))
+
+    fetcher = HttpFetcher(cache=get_page_cache())
+    fallback = PlaywrightFallback()
+    try:
+        results = extract_result_data_by_dates_http(fetcher, hall_url, period, fallback=fallback)
+    finally:
+        fetcher.close()
+        fallback.close()
+    for pref, hall, date, df, model_count in results:
+        logger.info("取得結果: hall=%s, date=%s, models=%d, rows=%d", hall, date, model_count, len(df))
@@ -0,0 +1,375 @@
+"""results と prefectures / halls / models をローカルの SQLite（または DuckDB）ファイルへ写す。
+
+ダッシュボードを APP_DATA_BACKEND=local で起動すると、app/mirror_backend.py がこのファイルを読む。
+results は日付のウォーターマーク（前回までに写した最新日付）から LOCAL_MIRROR_OVERLAP_DAYS 日戻った日以降だけを
+取り直し、その範囲のローカル行を入れ替える（後から登録・修正された直近の日付も反映される）。
+マスタ（prefectures / halls / models）は件数が少ないため毎回すべて入れ替える。
+ファイルの拡張子が .duckdb なら DuckDB、それ以外は SQLite で作る。
+
+snapshot（または sync --parquet）で、ミラーの results を名前付きの Parquet（月ごとのパーティション）へ書き出す。
+APP_ANALYTICS_BACKEND=duckdb のとき、app/analytics_backend.py がこのスナップショットを DuckDB で集計する。
+
+実行例:
+    python -m scraper.local_mirror sync
+    python -m scraper.local_mirror sync --path data/mirror.duckdb --full
+    python -m scraper.local_mirror sync --parquet
+    python -m scraper.local_mirror snapshot
+"""
+import argparse
+import datetime as dt
+import os
+import shutil
+import time
+from pathlib import Path
+
+import pandas as pd
+from supabase import Client
+
+from config import config
+from utils.logger_setup import setup_logger
+from scraper.run_monitor import positive_int_env
+from scraper.supabase_lookup import PAGE_SIZE, fetch_all_pages
+
+# =========================
+# 設定・ロガー
+# =========================
+filename, ext = os.path.splitext(os.path.basename(__file__))
+logger = setup_logger(filename, log_file=config.LOG_PATH)
+
+DEFAULT_MIRROR_PATH = config.DATA_DIR / "mirror.sqlite"
+DEFAULT_PARQUET_DIR = config.DATA_DIR / "results_parquet"
+DUCKDB_SUFFIXES = (".duckdb", ".ddb")
+RESULTS_WATERMARK_KEY = "results_watermark"
+LAST_SYNC_SINCE_KEY = "last_sync_since"
+
+RESULT_COLUMNS = ["hall_id", "model_id", "unit_no", "date", "game", "bb", "rb", "medal"]
+DIMENSION_TABLES = {
+    "prefectures": ("prefecture_id", ["prefecture_id", "name"]),
+    "halls": ("hall_id", ["hall_id", "name", "prefecture_id"]),
+    "models": ("model_id", ["model_id", "name"]),
+}
+
+# SQLite と DuckDB の両方で通る定義にする（日付は ISO 形式の文字列、末尾日・曜日は同期時に計算して持つ）
+MIRROR_SCHEMA = [
+    "create table if not exists prefectures (prefecture_id bigint primary key, name text not null)",
+    "create table if not exists halls (hall_id bigint primary key, name text not null, prefecture_id bigint)",
+    "create table if not exists models (model_id bigint primary key, name text not null)",
+    """
+    create table if not exists results (
+        hall_id bigint not null,
+        model_id bigint not null,
+        unit_no integer not null,
+        date text not null,
+        day_last integer not null,
+        weekday integer not null,
+        game integer,
+        bb integer,
+        rb integer,
+        medal integer,
+        primary key (hall_id, model_id, unit_no, date)
+    )
+    """,
+    "create index if not exists results_date_idx on results (date)",
+    "create index if not exists results_hall_id_date_idx on results (hall_id, date)",
+    "create index if not exists results_model_id_date_idx on results (model_id, date)",
+    "create index if not exists results_hall_id_unit_no_date_idx on results (hall_id, unit_no, date)",
+    "create table if not exists mirror_state (name text primary key, value text)",
+    # results に名前・末尾日・曜日を付けたビュー（全期間・全台）。Supabase の latest_units_results と
+    # 同じ列名で読めるが、同じ定義とは限らないため別名にする（旧版で作ったミラーの同名ビューは消す）
+    "drop view if exists latest_units_results",
+    """
+    create view if not exists results_named as
+    select p.name as prefecture, h.name as hall, m.name as model, r.unit_no, r.date,
+           r.day_last, r.weekday, r.game, r.bb, r.rb, r.medal
+    from results r
+    join halls h on h.hall_id = r.hall_id
+    join prefectures p on p.prefecture_id = h.prefecture_id
+    join models m on m.model_id = r.model_id
+    """,
+    # ホールごとの最新日付に設置されている台（絞り込みの候補用。同期のたびに作り直す）
+    """
+    create table if not exists latest_units_per_hall (
+        prefecture text, hall text, model text, unit_no integer
+    )
+    """,
+    "create table if not exists latest_models (prefecture text, hall text, model text)",
+]
+
+
+def mirror_path_from_env() -> Path:
+    """LOCAL_MIRROR_PATH からミラーのファイルを読む。未指定なら data/mirror.sqlite。"""
+    raw = os.getenv("LOCAL_MIRROR_PATH", "").strip()
+    return Path(raw) if raw else DEFAULT_MIRROR_PATH
+
+
+def parquet_dir_from_env() -> Path:
+    """ANALYTICS_PARQUET_DIR から Parquet スナップショットの置き場所を読む。未指定なら data/results_parquet。"""
+    raw = os.getenv("ANALYTICS_PARQUET_DIR", "").strip()
+    return Path(raw) if raw else DEFAULT_PARQUET_DIR
+
+
+def open_mirror(path: str | Path, read_only: bool = False):
+    """ミラーのファイルを開く。拡張子が .duckdb なら DuckDB、それ以外は SQLite。"""
+    path = Path(path)
+    if path.suffix in DUCKDB_SUFFIXES:
+        try:
+            import duckdb
+        except ImportError as e:
+            raise RuntimeError(f"{path.name} を使うには duckdb のインストールが必要です。") from e
+        return duckdb.connect(str(path), read_only=read_only)
+
+    import sqlite3
+
+    if read_only:
+        return sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False, isolation_level=None)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return sqlite3.connect(path, isolation_level=None)
+
+
+def _ensure_schema(conn) -> None:
+    for statement in MIRROR_SCHEMA:
+        conn.execute(statement)
+
+
+def _refresh_latest_tables(conn) -> None:
+    conn.execute("delete from latest_units_per_hall")
+    conn.execute(
+        """
+        insert into latest_units_per_hall (prefecture, hall, model, unit_no)
+        select p.name, h.name, m.name, r.unit_no
+        from results r
+        join (select hall_id, max(date) as date from results group by hall_id) l
+          on l.hall_id = r.hall_id and l.date = r.date
+        join halls h on h.hall_id = r.hall_id
+        join prefectures p on p.prefecture_id = h.prefecture_id
+        join models m on m.model_id = r.model_id
+        """
+    )
+    conn.execute("delete from latest_models")
+    conn.execute(
+        "insert into latest_models (prefecture, hall, model) "
+        "select distinct prefecture, hall, model from latest_units_per_hall"
+    )
+
+
+def _get_state(conn, name: str) -> str | None:
+    row = conn.execute("select value from mirror_state where name = ?", [name]).fetchone()
+    return row[0] if row else None
+
+
+def _set_state(conn, name: str, value: str) -> None:
+    conn.execute("delete from mirror_state where name = ?", [name])
+    conn.execute("insert into mirror_state (name, value) values (?, ?)", [name, value])
+
+
+def _insert_rows(conn, table: str, columns: list[str], rows: list[tuple]) -> None:
+    if not rows:
+        return
+    placeholders = ", ".join("?" for _ in columns)
+    conn.executemany(f"insert into {table} ({', '.join(columns)}) values ({placeholders})", rows)
+
+
+def _result_rows(page: list[dict]) -> list[tuple]:
+    """PostgREST の results 行を、末尾日・曜日（0=日曜）付きのミラーの行にする。"""
+    df = pd.DataFrame(page, columns=["id", *RESULT_COLUMNS])
+    dates = pd.to_datetime(df["date"])
+    df["date"] = dates.dt.strftime("%Y-%m-%d")
+    df["day_last"] = dates.dt.day % 10
+    df["weekday"] = (dates.dt.dayofweek + 1) % 7
+    df = df.astype(object).where(df.notna(), None)
+    columns = ["hall_id", "model_id", "unit_no", "date", "day_last", "weekday", "game", "bb", "rb", "medal"]
+    return list(df[columns].itertuples(index=False, name=None))
+
+
+def iter_remote_results(supabase: Client, since: str | None):
+    """since 以降の results を id 順のキーセットページングで1ページずつ返す。"""
+    last_id = 0
+    while True:
+        query = supabase.table("results").select(",".join(["id", *RESULT_COLUMNS]))
+        if since is not None:
+            query = query.gte("date", since)
+        page = query.gt("id", last_id).order("id").limit(PAGE_SIZE).execute().data or []
+        if page:
+            yield page
+        if len(page) < PAGE_SIZE:
+            return
+        last_id = page[-1]["id"]
+
+
+def sync_local_mirror(
+    supabase: Client,
+    path: str | Path | None = None,
+    full: bool = False,
+    since: str | None = None,
+    overlap_days: int | None = None,
+) -> int:
+    """Supabase の results とマスタをローカルのミラーへ写す。写した results の行数を返す。
+
+    full=True なら results をすべて取り直す。since を指定するとその日付以降を取り直す。
+    どちらも無ければ、前回のウォーターマークから overlap_days 日戻った日以降を取り直す。
+    """
+    start = time.perf_counter()
+    path = Path(path) if path is not None else mirror_path_from_env()
+    overlap_days = positive_int_env("LOCAL_MIRROR_OVERLAP_DAYS", 3) if overlap_days is None else overlap_days
+
+    conn = open_mirror(path)
+    try:
+        _ensure_schema(conn)
+        watermark = None if full else _get_state(conn, RESULTS_WATERMARK_KEY)
+        if since is None and watermark is not None:
+            since = (dt.date.fromisoformat(watermark) - dt.timedelta(days=overlap_days)).isoformat()
+
+        conn.execute("begin")
+        for table, (key, columns) in DIMENSION_TABLES.items():
+            rows = fetch_all_pages(supabase.table(table).select(",".join(columns)).order(key))
+            conn.execute(f"delete from {table}")
+            _insert_rows(conn, table, columns, [tuple(row.get(c) for c in columns) for row in rows])
+
+        if since is None:
+            conn.execute("delete from results")
+        else:
+            conn.execute("delete from results where date >= ?", [since])
+        synced = 0
+        latest = watermark
+        for page in iter_remote_results(supabase, since):
+            rows = _result_rows(page)
+            _insert_rows(
+                conn,
+                "results",
+                ["hall_id", "model_id", "unit_no", "date", "day_last", "weekday", "game", "bb", "rb", "medal"],
+                rows,
+            )
+            synced += len(rows)
+            page_latest = max(row[3] for row in rows)
+            latest = page_latest if latest is None else max(latest, page_latest)
+        if latest is not None:
+            _set_state(conn, RESULTS_WATERMARK_KEY, latest)
+        # Parquet スナップショットを取り直した範囲だけ書き直せるように残す（空文字はすべて）
+        _set_state(conn, LAST_SYNC_SINCE_KEY, since or "")
+        _refresh_latest_tables(conn)
+        conn.execute("commit")
+        # 統計を取り直し、名前で絞るクエリでもホール・台番号のインデックスが選ばれるようにする
+        conn.execute("analyze")
+    except Exception:
+        conn.execute("rollback")
+        raise
+    finally:
+        conn.close()
+
+    logger.info(
+        "timing stage=local_mirror path=%s since=%s rows=%d watermark=%s duration_sec=%.2f",
+        path,
+        since or "all",
+        synced,
+        latest or "-",
+        time.perf_counter() - start,
+    )
+    return synced
+
+
+def export_parquet_snapshot(
+    path: str | Path | None = None, out_dir: str | Path | None = None, since: str | None = None
+) -> int:
+    """ミラーの results を名前付きで month=YYYY-MM/results.parquet へ書き出す。書き出した行数を返す。
+
+    since を指定するとその日付を含む月以降だけを書き直す（sync で取り直した範囲に合わせる）。
+    ファイルは一時ファイルに書いてから置き換えるため、読み取り中のページが途中の状態を見ることはない。
+    """
+    start = time.perf_counter()
+    path = Path(path) if path is not None else mirror_path_from_env()
+    out_dir = Path(out_dir) if out_dir is not None else parquet_dir_from_env()
+
+    conn = open_mirror(path, read_only=True)
+    try:
+        month_sql = "select distinct substr(date, 1, 7) from results"
+        params = []
+        if since is not None:
+            month_sql += " where date >= ?"
+            params.append(since[:7] + "-01")
+        months = sorted(row[0] for row in conn.execute(month_sql, params).fetchall())
+
+        if since is None and out_dir.exists():
+            # ミラーから消えた月のスナップショットは残さない
+            for stale in out_dir.glob("month=*"):
+                if stale.name.removeprefix("month=") not in months:
+                    shutil.rmtree(stale)
+
+        exported = 0
+        for month in months:
+            df = pd.DataFrame(
+                conn.execute(
+                    "select prefecture, hall, model, unit_no, date, day_last, weekday, game, bb, rb, medal "
+                    "from results_named where date >= ? and date < ? "
+                    "order by prefecture, hall, model, unit_no, date",
+                    [f"{month}-01", _next_month(month)],
+                ).fetchall(),
+                columns=["prefecture", "hall", "model", "unit_no", "date", "day_last", "weekday",
+                         "game", "bb", "rb", "medal"],
+            )
+            df["date"] = pd.to_datetime(df["date"]).dt.date
+            for column in ["game", "bb", "rb", "medal"]:
+                df[column] = df[column].astype("Int64")
+
+            target = out_dir / f"month={month}" / "results.parquet"
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp = target.with_suffix(".parquet.tmp")
+            # ホール・機種・台番号順に並べ、行グループの統計で絞り込めるようにする
+            df.to_parquet(tmp, index=False, row_group_size=100_000)
+            os.replace(tmp, target)
+            exported += len(df)
+    finally:
+        conn.close()
+
+    logger.info(
+        "timing stage=parquet_snapshot dir=%s since=%s months=%d rows=%d duration_sec=%.2f",
+        out_dir,
+        since or "all",
+        len(months),
+        exported,
+        time.perf_counter() - start,
+    )
+    return exported
+
+
+def last_synced_since(path: str | Path | None = None) -> str | None:
+    """直前の sync が取り直した開始日を返す（すべて取り直した場合は None）。"""
+    conn = open_mirror(Path(path) if path is not None else mirror_path_from_env(), read_only=True)
+    try:
+        return _get_state(conn, LAST_SYNC_SINCE_KEY) or None
+    finally:
+        conn.close()
+
+
+def _next_month(month: str) -> str:
+    year, mon = (int(v) for v in month.split("-"))
+    return f"{year + mon // 12:04d}-{mon % 12 + 1:02d}-01"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="results とマスタのローカルミラー（SQLite / DuckDB）")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sync_parser = sub.add_parser("sync", help="前回のウォーターマーク以降の results とマスタを写す")
+    sync_parser.add_argument("--path", type=Path, help="ミラーのファイル（省略時は LOCAL_MIRROR_PATH）")
+    sync_parser.add_argument("--full", action="store_true", help="results をすべて取り直す")
+    sync_parser.add_argument("--since", help="この日付 (YYYY-MM-DD) 以降を取り直す")
+    sync_parser.add_argument("--parquet", action="store_true", help="取り直した月の Parquet スナップショットも書き直す")
+    snapshot_parser = sub.add_parser("snapshot", help="ミラーの results を Parquet スナップショットへ書き出す")
+    snapshot_parser.add_argument("--path", type=Path, help="ミラーのファイル（省略時は LOCAL_MIRROR_PATH）")
+    snapshot_parser.add_argument("--out", type=Path, help="書き出し先（省略時は ANALYTICS_PARQUET_DIR）")
+    snapshot_parser.add_argument("--since", help="この日付 (YYYY-MM-DD) を含む月以降だけを書き直す")
+    args = parser.parse_args()
+
+    if args.command == "snapshot":
+        export_parquet_snapshot(args.path, args.out, since=args.since)
+        return
+
+    from scraper.data_to_supabase import get_supabase_client
+
+    if args.command == "sync":
+        sync_local_mirror(get_supabase_client(), args.path, full=args.full, since=args.since)
+        if args.parquet:
+            export_parquet_snapshot(args.path, since=last_synced_since(args.path))
+
+
+if __name__ == "__main__":
+    main()
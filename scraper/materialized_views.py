@@ -1,19 +1,138 @@
 import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
 
+import yaml
 from supabase import Client
 
 from config import config
 from utils.logger_setup import setup_logger
+from scraper.run_monitor import emit_github_annotation
 
 filename, ext = os.path.splitext(os.path.basename(__file__))
 logger = setup_logger(filename, log_file=config.LOG_PATH)
 
+# migrations/sql/0003_refresh_materialized_view.sql で作成する RPC
+REFRESH_MATVIEW_RPC = "refresh_materialized_view"
+MATERIALIZED_VIEWS_YAML = config.BASE_DIR / "config" / "materialized_views.yaml"
 
-def refresh_materialized_views(supabase: Client) -> None:
-    """マテリアライズドビュー更新用の枠。
 
-    更新SQL/RPC名が確定したら、ここから Supabase RPC を呼び出す。
-    既存SQL・view・materialized view はこの変更では更新しない。
+@dataclass(frozen=True)
+class MaterializedView:
+    name: str
+    depends_on: tuple[str, ...] = ()
+
+
+def load_materialized_views(path: str | Path = MATERIALIZED_VIEWS_YAML) -> list[MaterializedView]:
+    """materialized_views.yaml を読み、依存先が先に来る順に並べて返す。"""
+    path = Path(path)
+    if not path.exists():
+        logger.warning("materialized_views.yaml が見つかりません: %s", path)
+        return []
+    with path.open("r", encoding="utf-8") as f:
+        items = (yaml.safe_load(f) or {}).get("materialized_views") or []
+
+    views = [
+        MaterializedView(
+            name=item["name"],
+            depends_on=tuple(item.get("depends_on") or ()),
+        )
+        for item in items
+        if item and item.get("enabled", True)
+    ]
+    return _sort_by_dependency(views)
+
+
+def _sort_by_dependency(views: list[MaterializedView]) -> list[MaterializedView]:
+    by_name = {v.name: v for v in views}
+    ordered: list[MaterializedView] = []
+    visiting: set[str] = set()
+    done: set[str] = set()
+
+    def visit(view: MaterializedView) -> None:
+        if view.name in done:
+            return
+        if view.name in visiting:
+            raise ValueError(f"materialized_views.yaml の依存関係が循環しています: {view.name}")
+        visiting.add(view.name)
+        for dep in view.depends_on:
+            if dep in by_name:
+                visit(by_name[dep])
+        visiting.discard(view.name)
+        done.add(view.name)
+        ordered.append(view)
+
+    for view in views:
+        visit(view)
+    return ordered
+
+
+def select_views_to_refresh(
+    views: list[MaterializedView],
+    changed_dates: set[str] | None,
+) -> list[MaterializedView]:
+    """更新するビューを依存順で返す。
+
+    登録ビューはどれも results の全期間を集計するため、ビューごとの絞り込みはしない。
+    results が変わらなかった（changed_dates が空）ときだけ何も更新せず、それ以外（変更日付が分からない
+    None を含む）はすべて更新する。
+    """
+    if changed_dates is not None and not changed_dates:
+        return []
+    return list(views)
+
+
+def refresh_materialized_views(
+    supabase: Client,
+    changed_dates: set[str] | None = None,
+    views: list[MaterializedView] | None = None,
+) -> list[str]:
+    """results が変わったときに、登録したマテビューを依存順に RPC で1つずつ更新する。更新したビュー名を返す。
+
+    一意インデックスのあるビューは REFRESH MATERIALIZED VIEW CONCURRENTLY で更新する
+    （MATVIEW_REFRESH_CONCURRENTLY=false で通常の REFRESH）。
+    1つのビューの更新に失敗しても、それに依存しない残りのビューは更新を続ける。
     """
-    logger.info("マテビュー更新は未実装です。RPC確定後にここへ実装します。")
-    # TODO: supabase.rpc("refresh_xxx_materialized_views").execute()
+    start = time.perf_counter()
+    views = load_materialized_views() if views is None else views
+    targets = select_views_to_refresh(views, changed_dates)
+    concurrent = os.getenv("MATVIEW_REFRESH_CONCURRENTLY", "true").strip().lower() != "false"
+
+    refreshed: list[str] = []
+    failed: set[str] = set()
+    for view in targets:
+        if any(dep in failed for dep in view.depends_on):
+            logger.warning("依存先の更新に失敗したためマテビュー更新をスキップします: %s", view.name)
+            failed.add(view.name)
+            continue
+        view_start = time.perf_counter()
+        mode = "error"
+        try:
+            res = supabase.rpc(REFRESH_MATVIEW_RPC, {"view_name": view.name, "concurrent": concurrent}).execute()
+            mode = res.data if isinstance(res.data, str) else "unknown"
+            if mode == "not_materialized":
+                logger.warning("マテビューではないため更新しません: %s", view.name)
+            else:
+                refreshed.append(view.name)
+        except Exception as e:
+            failed.add(view.name)
+            logger.exception("マテビュー更新でエラー: view=%s", view.name)
+            emit_github_annotation("warning", "マテビュー更新エラー", f"view={view.name}, error={type(e).__name__}: {e}")
+        finally:
+            logger.info(
+                "timing stage=matview view=%s mode=%s duration_sec=%.2f",
+                view.name,
+                mode,
+                time.perf_counter() - view_start,
+            )
+
+    logger.info(
+        "timing stage=matview_refresh changed_dates=%s refreshed=%d skipped=%d failed=%d duration_sec=%.2f",
+        "all" if changed_dates is None else len(changed_dates),
+        len(refreshed),
+        len(views) - len(targets),
+        len(failed),
+        time.perf_counter() - start,
+    )
+    return refreshed
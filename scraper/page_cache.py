@@ -0,0 +1,228 @@
+import datetime as dt
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from config import config
+from utils.logger_setup import setup_logger
+from scraper.rate_limiter import rate_limited_goto, rate_limited_goto_async
+from scraper.run_monitor import positive_int_env
+
+# =========================
+# 設定・ロガー
+# =========================
+filename, ext = os.path.splitext(os.path.basename(__file__))
+logger = setup_logger(filename, log_file=config.LOG_PATH)
+
+PAGE_CACHE_DIR = config.DATA_DIR / "page_cache"
+PAGE_TYPES = ("hall", "date", "model")
+JST = ZoneInfo("Asia/Tokyo")
+
+
+class CacheMissError(LookupError):
+    """REPLAY_ONLY=true でキャッシュに無いページを要求した場合に送出する。"""
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@dataclass
+class PageCache:
+    """取得済み HTML のディスクキャッシュ。
+
+    本文は内容のハッシュ（sha256）をキーに gzip 圧縮して objects/ へ保存し、
+    URL ごとのエントリ（urls/）からその本文ハッシュを参照する。
+    同じ内容のページは1つの本文ファイルを共有する。
+
+    有効期限はページ種別ごとに決める。
+    - hall: hall_ttl_sec 秒（日付リンクが日々増えるため短くする）
+    - date / model: 対象日が過去日なら無期限、当日以降は recent_ttl_sec 秒
+    replay_only のときは期限切れのエントリもそのまま使う。
+    """
+
+    root: Path = PAGE_CACHE_DIR
+    hall_ttl_sec: int = 3600
+    recent_ttl_sec: int = 3600
+    replay_only: bool = False
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @classmethod
+    def from_env(cls) -> "PageCache | None":
+        """PAGE_CACHE / REPLAY_ONLY / PAGE_CACHE_*_TTL_SEC から作る。無効なら None。"""
+        replay_only = os.getenv("REPLAY_ONLY", "").strip().lower() == "true"
+        enabled = os.getenv("PAGE_CACHE", "true").strip().lower() != "false"
+        if not enabled and not replay_only:
+            return None
+        return cls(
+            hall_ttl_sec=positive_int_env("PAGE_CACHE_HALL_TTL_SEC", 3600),
+            recent_ttl_sec=positive_int_env("PAGE_CACHE_RECENT_TTL_SEC", 3600),
+            replay_only=replay_only,
+        )
+
+    def _entry_path(self, url: str) -> Path:
+        key = _sha256(url.encode("utf-8"))
+        return self.root / "urls" / key[:2] / f"{key}.json"
+
+    def _object_path(self, content_hash: str) -> Path:
+        return self.root / "objects" / content_hash[:2] / f"{content_hash}.html.gz"
+
+    def ttl_sec(self, page_type: str, date: str | None = None) -> int | None:
+        """ページ種別と対象日から有効期限（秒）を返す。無期限なら None。"""
+        if page_type not in PAGE_TYPES:
+            raise ValueError(f"page_type は {', '.join(PAGE_TYPES)} のいずれかです: {page_type}")
+        if page_type == "hall":
+            return self.hall_ttl_sec
+        today = dt.datetime.now(JST).date().isoformat()
+        if date and date < today:
+            return None
+        return self.recent_ttl_sec
+
+    def get(self, url: str, page_type: str, date: str | None = None) -> str | None:
+        """キャッシュ済みで期限内の HTML を返す。無ければ None。"""
+        html = self._read(url, page_type, date)
+        with self.lock:
+            if html is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return html
+
+    def _read(self, url: str, page_type: str, date: str | None) -> str | None:
+        entry_path = self._entry_path(url)
+        try:
+            entry = json.loads(entry_path.read_text(encoding="utf-8"))
+            if not self.replay_only:
+                ttl = self.ttl_sec(page_type, date)
+                if ttl is not None and time.time() - entry["fetched_at"] > ttl:
+                    return None
+            data = gzip.decompress(self._object_path(entry["content_hash"]).read_bytes())
+        except (OSError, ValueError, KeyError) as e:
+            if entry_path.exists():
+                logger.warning("ページキャッシュを読めませんでした: url=%s, error=%s", url, e)
+            return None
+        if _sha256(data) != entry["content_hash"]:
+            logger.warning("ページキャッシュの内容がハッシュと一致しません: url=%s", url)
+            return None
+        return data.decode("utf-8")
+
+    def put(self, url: str, html: str, page_type: str, date: str | None = None) -> str:
+        """HTML を保存し、本文ハッシュを返す。"""
+        data = html.encode("utf-8")
+        content_hash = _sha256(data)
+        object_path = self._object_path(content_hash)
+        if not object_path.exists():
+            _atomic_write(object_path, gzip.compress(data))
+        entry = {
+            "url": url,
+            "page_type": page_type,
+            "date": date,
+            "content_hash": content_hash,
+            "fetched_at": time.time(),
+        }
+        _atomic_write(self._entry_path(url), json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+        with self.lock:
+            self.stores += 1
+        return content_hash
+
+    def invalidate(self, url: str) -> None:
+        """URL のエントリを消す（本文は他の URL と共有している可能性があるため残す）。"""
+        try:
+            self._entry_path(url).unlink()
+        except FileNotFoundError:
+            pass
+
+    def log_summary(self) -> None:
+        with self.lock:
+            logger.info(
+                "timing stage=page_cache replay_only=%s hits=%d misses=%d stores=%d",
+                self.replay_only,
+                self.hits,
+                self.misses,
+                self.stores,
+            )
+
+
+_page_cache_lock = threading.Lock()
+_page_cache: PageCache | None = None
+_page_cache_loaded = False
+
+
+def get_page_cache() -> PageCache | None:
+    """実行全体で共有するページキャッシュを返す（初回呼び出し時に環境変数から作る）。"""
+    global _page_cache, _page_cache_loaded
+    with _page_cache_lock:
+        if not _page_cache_loaded:
+            _page_cache = PageCache.from_env()
+            _page_cache_loaded = True
+            if _page_cache is not None and _page_cache.replay_only:
+                logger.info("REPLAY_ONLY=true のためページキャッシュのみから収集します: %s", _page_cache.root)
+        return _page_cache
+
+
+def replay_only_enabled() -> bool:
+    cache = get_page_cache()
+    return cache is not None and cache.replay_only
+
+
+# =========================
+# Playwright ページとの連携
+# =========================
+def _is_cacheable(response) -> bool:
+    """正常な応答（2xx）のときだけ True。
+
+    過去日のページは無期限でキャッシュされるため、429 / 5xx などのエラーページを保存すると二度と取り直せなくなる。
+    エラー時の扱い（後続のセレクタ待ちでの失敗・リトライ）はキャッシュが無い場合と変えない。
+    """
+    return response is not None and response.ok
+
+
+def goto_cached(page, url: str, page_type: str, date: str | None = None, **goto_kwargs) -> None:
+    """sync API の page.goto の代わりに使う。キャッシュがあれば set_content で読み込む。"""
+    cache = get_page_cache()
+    html = cache.get(url, page_type, date) if cache is not None else None
+    if html is not None:
+        page.set_content(html, wait_until="domcontentloaded")
+        return
+    if cache is not None and cache.replay_only:
+        raise CacheMissError(f"キャッシュにないページです: {url}")
+    response = rate_limited_goto(page, url, **goto_kwargs)
+    if cache is not None and _is_cacheable(response):
+        cache.put(url, page.content(), page_type, date)
+
+
+async def goto_cached_async(page, url: str, page_type: str, date: str | None = None, **goto_kwargs) -> None:
+    """goto_cached の async 版。"""
+    cache = get_page_cache()
+    html = cache.get(url, page_type, date) if cache is not None else None
+    if html is not None:
+        await page.set_content(html, wait_until="domcontentloaded")
+        return
+    if cache is not None and cache.replay_only:
+        raise CacheMissError(f"キャッシュにないページです: {url}")
+    response = await rate_limited_goto_async(page, url, **goto_kwargs)
+    if cache is not None and _is_cacheable(response):
+        cache.put(url, await page.content(), page_type, date)
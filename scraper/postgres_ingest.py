@@ -0,0 +1,139 @@
+import os
+import threading
+
+import pandas as pd
+
+from config import config
+from utils.logger_setup import setup_logger
+from scraper.run_monitor import positive_int_env
+
+# =========================
+# 設定・ロガー
+# =========================
+filename, ext = os.path.splitext(os.path.basename(__file__))
+logger = setup_logger(filename, log_file=config.LOG_PATH)
+
+# results の登録方法（RESULTS_INGEST_BACKEND）
+INGEST_BACKEND_POSTGREST = "postgrest"
+INGEST_BACKEND_COPY = "copy"
+INGEST_BACKENDS = (INGEST_BACKEND_POSTGREST, INGEST_BACKEND_COPY)
+
+RESULT_COPY_COLUMNS = ["hall_id", "model_id", "unit_no", "date", "game", "bb", "rb", "medal"]
+RESULT_CONFLICT_COLUMNS = ["hall_id", "model_id", "unit_no", "date"]
+
+
+def ingest_backend_from_env() -> str:
+    """RESULTS_INGEST_BACKEND から results の登録方法を読む。未指定なら postgrest。"""
+    name = os.getenv("RESULTS_INGEST_BACKEND", "").strip().lower() or INGEST_BACKEND_POSTGREST
+    if name not in INGEST_BACKENDS:
+        raise ValueError(
+            f"RESULTS_INGEST_BACKEND は {', '.join(INGEST_BACKENDS)} のいずれかで指定してください: {name}"
+        )
+    return name
+
+
+_pool_lock = threading.Lock()
+_pool = None
+
+
+def get_connection_pool():
+    """SUPABASE_DB_URL に接続する psycopg のコネクションプールを返す（初回呼び出し時に作る）。"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            return _pool
+        dsn = os.environ.get("SUPABASE_DB_URL")
+        if not dsn:
+            raise RuntimeError("RESULTS_INGEST_BACKEND=copy には SUPABASE_DB_URL の設定が必要です。")
+        try:
+            from psycopg_pool import ConnectionPool
+        except ImportError as e:
+            raise RuntimeError(
+                "RESULTS_INGEST_BACKEND=copy には psycopg[binary,pool] のインストールが必要です。"
+            ) from e
+        _pool = ConnectionPool(
+            dsn,
+            min_size=1,
+            max_size=positive_int_env("DB_POOL_MAX_SIZE", 4),
+            open=True,
+        )
+        return _pool
+
+
+def close_connection_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def _merge_sql(table: str) -> str:
+    columns = ", ".join(RESULT_COPY_COLUMNS)
+    conflict = ", ".join(RESULT_CONFLICT_COLUMNS)
+    updates = ", ".join(
+        f"{c} = excluded.{c}" for c in RESULT_COPY_COLUMNS if c not in RESULT_CONFLICT_COLUMNS
+    )
+    # xmax = 0 の行は今回 INSERT された行、それ以外は既存行の UPDATE
+    return f"""
+        with merged as (
+            insert into {table} ({columns})
+            select {columns} from results_staging
+            on conflict ({conflict}) do update set {updates}
+            returning (xmax = 0) as inserted
+        )
+        select
+            count(*) filter (where inserted),
+            count(*) filter (where not inserted)
+        from merged
+    """
+
+
+def copy_upsert_results(records_df: pd.DataFrame, pool=None, table: str = "results") -> tuple[int, int]:
+    """COPY で一時テーブルへ投入し、1回の INSERT ... ON CONFLICT で results へマージする。
+
+    records_df は RESULT_COPY_COLUMNS を持ち、衝突キーの重複を除去済みであること。
+    returns: (inserted, updated)
+    """
+    if records_df.empty:
+        return 0, 0
+    pool = pool or get_connection_pool()
+    columns = ", ".join(RESULT_COPY_COLUMNS)
+    rows = zip(*(records_df[c].tolist() for c in RESULT_COPY_COLUMNS))
+
+    with pool.connection() as conn:
+        with conn.transaction(), conn.cursor() as cur:
+            # 型は results の列定義をそのまま使う（制約・既定値は持たない）
+            cur.execute(
+                f"create temp table results_staging on commit drop as "
+                f"select {columns} from {table} with no data"
+            )
+            with cur.copy(f"copy results_staging ({columns}) from stdin") as copy:
+                for row in rows:
+                    copy.write_row(row)
+            cur.execute(_merge_sql(table))
+            inserted, updated = cur.fetchone()
+
+    logger.debug("results COPY マージ: inserted=%d, updated=%d", inserted, updated)
+    return int(inserted), int(updated)
+
+
+def fetch_existing_results(pairs: list[tuple[int, str]], pool=None, table: str = "results") -> pd.DataFrame:
+    """対象の (hall_id, date) の既存行（衝突キーと値）を1回のクエリで取得する。"""
+    if not pairs:
+        return pd.DataFrame(columns=RESULT_COPY_COLUMNS)
+    pool = pool or get_connection_pool()
+    hall_ids = [hall_id for hall_id, _ in pairs]
+    dates = [date for _, date in pairs]
+    with pool.connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            f"""
+            select {", ".join(f"r.{c}" for c in RESULT_COPY_COLUMNS)}
+            from {table} r
+            join unnest(%s::bigint[], %s::date[]) as t(hall_id, date)
+              on r.hall_id = t.hall_id and r.date = t.date
+            """,
+            (hall_ids, dates),
+        )
+        rows = cur.fetchall()
+    return pd.DataFrame(rows, columns=RESULT_COPY_COLUMNS)
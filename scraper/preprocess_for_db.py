@@ -7,6 +7,7 @@ import yaml
 
 from config import config
 from utils.logger_setup import setup_logger
+from scraper.raw_store import get_raw_store
 
 
 # =========================
@@ -111,11 +112,10 @@ def df_data_clean(df):
     else:
         logger.debug("clean後の重複件数(%s): %d 件", duplicate_keys, duplicate_count)
 
-    df.to_csv(config.CSV_DIR / "cleaned_all_result_data.csv", index=False)
     info_buffer = io.StringIO()
     df.info(buf=info_buffer)
     logger.debug("DataFrame info:\n%s", info_buffer.getvalue())
-    logger.debug("データを出力しました。")
+    logger.debug("データを整形しました。")
 
     return df
 
@@ -206,5 +206,6 @@ def calc_medal(df):
 
 if __name__ == "__main__":
 
-    df = pd.read_csv(config.CSV_DIR / "all_result_data.csv")
+    df = get_raw_store().read("results")
     df_clean = df_data_clean(df)
+    df_clean.to_csv(config.CSV_DIR / "cleaned_all_result_data.csv", index=False)
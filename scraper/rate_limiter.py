@@ -0,0 +1,215 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+from playwright.sync_api import TimeoutError as PWTimeout
+
+from config import config
+from utils.logger_setup import setup_logger
+from scraper.run_monitor import positive_int_env
+
+# =========================
+# 設定・ロガー
+# =========================
+filename, ext = os.path.splitext(os.path.basename(__file__))
+logger = setup_logger(filename, log_file=config.LOG_PATH)
+
+# 混雑・制限とみなす HTTP ステータス
+THROTTLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def _positive_float_env(name: str, default: float) -> float:
+    raw_value = os.getenv(name, "").strip()
+    if not raw_value:
+        return default
+    try:
+        value = float(raw_value)
+    except ValueError as exc:
+        raise ValueError(f"{name} は正の数で指定してください: {raw_value}") from exc
+    if value <= 0:
+        raise ValueError(f"{name} は正の数で指定してください: {raw_value}")
+    return value
+
+
+def backoff_delay(attempt: int, base_sec: float = 1.0, cap_sec: float = 30.0) -> float:
+    """attempt 回目（1始まり）の失敗後に待つ秒数。指数バックオフ + full jitter。"""
+    return random.uniform(0, min(cap_sec, base_sec * (2 ** (attempt - 1))))
+
+
+@dataclass
+class _HostBucket:
+    rate: float
+    tokens: float
+    updated: float
+    requests: int = 0
+    failures: int = 0
+    waited_sec: float = 0.0
+    first_request: float | None = None
+    last_request: float | None = None
+
+
+@dataclass
+class AdaptiveRateLimiter:
+    """ホールごとではなく、取得先ホスト単位で共有するトークンバケット。
+
+    レートは AIMD で調整する。
+    - 応答が fast_sec 未満で成功したら increase_rps だけ加算（max_rps まで）
+    - タイムアウトや 429 / 5xx なら decrease_factor を掛けて減速（min_rps まで）
+    """
+
+    enabled: bool = True
+    initial_rps: float = 2.0
+    min_rps: float = 0.2
+    max_rps: float = 5.0
+    burst: int = 2
+    increase_rps: float = 0.1
+    decrease_factor: float = 0.5
+    fast_sec: float = 2.0
+    buckets: dict[str, _HostBucket] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @classmethod
+    def from_env(cls) -> "AdaptiveRateLimiter":
+        """RATE_LIMIT / RATE_LIMIT_*_RPS / RATE_LIMIT_BURST から作る。"""
+        return cls(
+            enabled=os.getenv("RATE_LIMIT", "true").strip().lower() != "false",
+            initial_rps=_positive_float_env("RATE_LIMIT_RPS", 2.0),
+            min_rps=_positive_float_env("RATE_LIMIT_MIN_RPS", 0.2),
+            max_rps=_positive_float_env("RATE_LIMIT_MAX_RPS", 5.0),
+            burst=positive_int_env("RATE_LIMIT_BURST", 2),
+        )
+
+    def _bucket(self, host: str, now: float) -> _HostBucket:
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            bucket = _HostBucket(rate=self.initial_rps, tokens=float(self.burst), updated=now)
+            self.buckets[host] = bucket
+        return bucket
+
+    def _reserve(self, url: str) -> float:
+        """トークンを1つ予約し、取得まで待つ秒数を返す（不足分は前借りして後続を待たせる）。"""
+        host = urlsplit(url).hostname or ""
+        now = time.monotonic()
+        with self.lock:
+            bucket = self._bucket(host, now)
+            bucket.tokens = min(float(self.burst), bucket.tokens + (now - bucket.updated) * bucket.rate)
+            bucket.updated = now
+            bucket.tokens -= 1
+            wait_sec = 0.0 if bucket.tokens >= 0 else -bucket.tokens / bucket.rate
+            bucket.requests += 1
+            bucket.waited_sec += wait_sec
+            if bucket.first_request is None:
+                bucket.first_request = now + wait_sec
+            bucket.last_request = now + wait_sec
+        return wait_sec
+
+    def acquire(self, url: str) -> None:
+        if not self.enabled:
+            return
+        wait_sec = self._reserve(url)
+        if wait_sec > 0:
+            time.sleep(wait_sec)
+
+    async def acquire_async(self, url: str) -> None:
+        if not self.enabled:
+            return
+        wait_sec = self._reserve(url)
+        if wait_sec > 0:
+            await asyncio.sleep(wait_sec)
+
+    def record_success(self, url: str, elapsed_sec: float) -> None:
+        if not self.enabled or elapsed_sec >= self.fast_sec:
+            return
+        host = urlsplit(url).hostname or ""
+        with self.lock:
+            bucket = self._bucket(host, time.monotonic())
+            bucket.rate = min(self.max_rps, bucket.rate + self.increase_rps)
+
+    def record_failure(self, url: str, reason: str) -> None:
+        if not self.enabled:
+            return
+        host = urlsplit(url).hostname or ""
+        with self.lock:
+            bucket = self._bucket(host, time.monotonic())
+            previous_rate = bucket.rate
+            bucket.rate = max(self.min_rps, bucket.rate * self.decrease_factor)
+            bucket.failures += 1
+        logger.warning(
+            "取得レートを下げます: host=%s, reason=%s, rps=%.2f -> %.2f",
+            host,
+            reason,
+            previous_rate,
+            bucket.rate,
+        )
+
+    def log_summary(self) -> None:
+        with self.lock:
+            for host, bucket in self.buckets.items():
+                span = (bucket.last_request or 0) - (bucket.first_request or 0)
+                effective_rps = bucket.requests / span if span > 0 else float(bucket.requests)
+                logger.info(
+                    "timing stage=rate_limiter host=%s requests=%d failures=%d "
+                    "effective_rps=%.2f current_rps=%.2f waited_sec=%.2f",
+                    host,
+                    bucket.requests,
+                    bucket.failures,
+                    effective_rps,
+                    bucket.rate,
+                    bucket.waited_sec,
+                )
+
+
+_rate_limiter_lock = threading.Lock()
+_rate_limiter: AdaptiveRateLimiter | None = None
+
+
+def get_rate_limiter() -> AdaptiveRateLimiter:
+    """全ワーカー・全収集モジュールで共有するレートリミッター（初回呼び出し時に環境変数から作る）。"""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = AdaptiveRateLimiter.from_env()
+        return _rate_limiter
+
+
+# =========================
+# Playwright ページとの連携
+# =========================
+def _record_goto_result(limiter: AdaptiveRateLimiter, url: str, response, elapsed_sec: float) -> None:
+    status = getattr(response, "status", None)
+    if status in THROTTLE_STATUS_CODES:
+        limiter.record_failure(url, f"status={status}")
+    else:
+        limiter.record_success(url, elapsed_sec)
+
+
+def rate_limited_goto(page, url: str, **goto_kwargs):
+    """レートリミッターを通して sync API の page.goto を行う。"""
+    limiter = get_rate_limiter()
+    limiter.acquire(url)
+    start = time.perf_counter()
+    try:
+        response = page.goto(url, **goto_kwargs)
+    except PWTimeout:
+        limiter.record_failure(url, "timeout")
+        raise
+    _record_goto_result(limiter, url, response, time.perf_counter() - start)
+    return response
+
+
+async def rate_limited_goto_async(page, url: str, **goto_kwargs):
+    """rate_limited_goto の async 版。"""
+    limiter = get_rate_limiter()
+    await limiter.acquire_async(url)
+    start = time.perf_counter()
+    try:
+        response = await page.goto(url, **goto_kwargs)
+    except PWTimeout:
+        limiter.record_failure(url, "timeout")
+        raise
+    _record_goto_result(limiter, url, response, time.perf_counter() - start)
+    return response
@@ -0,0 +1,213 @@
+import datetime as dt
+import json
+import os
+import threading
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import quote
+
+import pandas as pd
+
+from config import config
+from utils.logger_setup import setup_logger
+
+# =========================
+# 設定・ロガー
+# =========================
+filename, ext = os.path.splitext(os.path.basename(__file__))
+logger = setup_logger(filename, log_file=config.LOG_PATH)
+
+RAW_STORE_DIR = config.DATA_DIR / "raw"
+RAW_KINDS = ("results", "model_urls")
+RAW_STORE_FORMATS = ("parquet", "csv")
+
+
+@dataclass
+class RawStore:
+    """収集した生データ（文字列のまま）を追記専用で保存する Parquet のデータレイク。
+
+    <root>/<kind>/date=YYYY-MM-DD/hall=<URLエンコードしたホール名>/part-<id>.parquet
+    の形で、ホール×日付の取得が終わるたびに1ファイルずつ書く（既存ファイルは書き換えない）。
+    書いたファイルは <root>/manifest.jsonl に1行ずつ記録する。
+    同じホール×日付を取り直した場合はマニフェスト上で後から書いたものを正とし、
+    古いファイルは compact() で削除する。
+    """
+
+    root: Path = RAW_STORE_DIR
+    compression: str = "zstd"
+    files_written: int = 0
+    rows_written: int = 0
+    bytes_written: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.root / "manifest.jsonl"
+
+    def partition_dir(self, kind: str, date: str, hall: str) -> Path:
+        if kind not in RAW_KINDS:
+            raise ValueError(f"kind は {', '.join(RAW_KINDS)} のいずれかです: {kind}")
+        # hall 名は '/' などを含みうるため URL エンコードする（pyarrow の hive 分割の既定と同じ）
+        return self.root / kind / f"date={date}" / f"hall={quote(hall, safe='')}"
+
+    def write(self, kind: str, pref: str, hall: str, date: str, df: pd.DataFrame) -> Path | None:
+        """ホール×日付1件分を Parquet で保存し、マニフェストに追記する。空なら何もしない。"""
+        if df.empty:
+            return None
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        part_dir = self.partition_dir(kind, date, hall)
+        part_dir.mkdir(parents=True, exist_ok=True)
+        path = part_dir / f"part-{uuid.uuid4().hex}.parquet"
+        tmp_path = part_dir / f".{path.name}.tmp"
+        table = pa.Table.from_pandas(df.astype("string"), preserve_index=False)
+        try:
+            pq.write_table(table, tmp_path, compression=self.compression)
+            os.replace(tmp_path, path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        size = path.stat().st_size
+        entry = {
+            "kind": kind,
+            "pref": pref,
+            "hall": hall,
+            "date": date,
+            "path": path.relative_to(self.root).as_posix(),
+            "rows": len(df),
+            "bytes": size,
+            "written_at": dt.datetime.now().isoformat(timespec="seconds"),
+        }
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self.lock:
+            with self.manifest_path.open("a", encoding="utf-8") as f:
+                f.write(line)
+            self.files_written += 1
+            self.rows_written += len(df)
+            self.bytes_written += size
+        return path
+
+    def manifest(self) -> list[dict]:
+        if not self.manifest_path.exists():
+            return []
+        entries = []
+        with self.manifest_path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning("マニフェストの壊れた行を読み飛ばします: %s", self.manifest_path)
+        return entries
+
+    def latest_parts(
+        self,
+        kind: str = "results",
+        start_date: str | None = None,
+        end_date: str | None = None,
+        halls: set[str] | None = None,
+    ) -> list[dict]:
+        """条件に合うホール×日付ごとに、最後に書いたファイルのマニフェスト行を返す。"""
+        latest: dict[tuple[str, str], dict] = {}
+        for entry in self.manifest():
+            if entry["kind"] != kind:
+                continue
+            if start_date and entry["date"] < start_date:
+                continue
+            if end_date and entry["date"] > end_date:
+                continue
+            if halls is not None and entry["hall"] not in halls:
+                continue
+            latest[(entry["date"], entry["hall"])] = entry
+        return sorted(latest.values(), key=lambda e: (e["date"], e["hall"]))
+
+    def read(
+        self,
+        kind: str = "results",
+        start_date: str | None = None,
+        end_date: str | None = None,
+        halls: set[str] | None = None,
+    ) -> pd.DataFrame:
+        """必要なパーティションのファイルだけを読み、1つの DataFrame にする。"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        parts = self.latest_parts(kind, start_date, end_date, halls)
+        if not parts:
+            return pd.DataFrame()
+        tables = [pq.read_table(self.root / e["path"]) for e in parts]
+        return pa.concat_tables(tables, promote_options="default").to_pandas()
+
+    def compact(self) -> int:
+        """取り直しで不要になったファイルを削除し、マニフェストを最新分だけに書き直す。削除件数を返す。"""
+        with self.lock:
+            entries = self.manifest()
+            latest: dict[tuple[str, str, str], dict] = {}
+            for entry in entries:
+                latest[(entry["kind"], entry["date"], entry["hall"])] = entry
+            keep = {e["path"] for e in latest.values()}
+            removed = 0
+            for entry in entries:
+                if entry["path"] not in keep:
+                    (self.root / entry["path"]).unlink(missing_ok=True)
+                    removed += 1
+            tmp_path = self.manifest_path.with_suffix(".jsonl.tmp")
+            tmp_path.write_text(
+                "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in latest.values()),
+                encoding="utf-8",
+            )
+            os.replace(tmp_path, self.manifest_path)
+        return removed
+
+    def log_summary(self) -> None:
+        with self.lock:
+            logger.info(
+                "timing stage=raw_store files=%d rows=%d bytes=%d compression=%s",
+                self.files_written,
+                self.rows_written,
+                self.bytes_written,
+                self.compression,
+            )
+
+
+def raw_store_format_from_env() -> str:
+    """RAW_STORE_FORMAT を読む。未指定なら parquet（csv で従来の日付ごとの CSV 出力）。"""
+    name = os.getenv("RAW_STORE_FORMAT", "").strip().lower() or "parquet"
+    if name not in RAW_STORE_FORMATS:
+        raise ValueError(f"RAW_STORE_FORMAT は {', '.join(RAW_STORE_FORMATS)} のいずれかで指定してください: {name}")
+    return name
+
+
+_raw_store_lock = threading.Lock()
+_raw_store: RawStore | None = None
+
+
+def get_raw_store() -> RawStore:
+    """実行全体で共有する生データストアを返す（初回呼び出し時に環境変数から作る）。"""
+    global _raw_store
+    with _raw_store_lock:
+        if _raw_store is None:
+            _raw_store = RawStore(
+                root=Path(os.getenv("RAW_STORE_DIR", "").strip() or RAW_STORE_DIR),
+                compression=os.getenv("RAW_STORE_COMPRESSION", "").strip() or "zstd",
+            )
+        return _raw_store
+
+
+def save_hall_date_frames(
+    pref: str,
+    hall: str,
+    date: str,
+    df_model_urls: pd.DataFrame,
+    df_result: pd.DataFrame,
+) -> None:
+    """ホール×日付1件分の機種 URL 一覧と結果データを保存する。"""
+    if raw_store_format_from_env() == "csv":
+        df_model_urls.to_csv(config.CSV_DIR / f"{pref}_{hall}_{date}_model_urls.csv", index=False)
+        df_result.to_csv(config.CSV_DIR / f"{pref}_{hall}_{date}_result_data.csv", index=False)
+        return
+    store = get_raw_store()
+    store.write("model_urls", pref, hall, date, df_model_urls)
+    store.write("results", pref, hall, date, df_result)
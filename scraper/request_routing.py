@@ -0,0 +1,146 @@
+import os
+import threading
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+from config import config
+from utils.logger_setup import setup_logger
+
+# =========================
+# 設定・ロガー
+# =========================
+filename, ext = os.path.splitext(os.path.basename(__file__))
+logger = setup_logger(filename, log_file=config.LOG_PATH)
+
+# 収集に必要なリソース種別とドメイン（これ以外は abort する）
+DEFAULT_ALLOWED_RESOURCE_TYPES = ("document", "script", "xhr", "fetch")
+DEFAULT_ALLOWED_DOMAINS = ("min-repo.com",)
+
+# abort したリクエストの削減量見積もりに使う1件あたりの目安サイズ（bytes）
+ESTIMATED_BYTES_BY_RESOURCE_TYPE = {
+    "image": 40_000,
+    "media": 200_000,
+    "font": 60_000,
+    "stylesheet": 30_000,
+    "script": 50_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+}
+DEFAULT_ESTIMATED_BYTES = 10_000
+
+
+def _csv_env(name: str, default: tuple[str, ...]) -> tuple[str, ...]:
+    raw_value = os.getenv(name, "").strip()
+    if not raw_value:
+        return default
+    return tuple(v.strip().lower() for v in raw_value.split(",") if v.strip())
+
+
+@dataclass(frozen=True)
+class RoutePolicy:
+    """リクエストを通すかどうかの許可リスト。"""
+
+    enabled: bool = True
+    allowed_resource_types: tuple[str, ...] = DEFAULT_ALLOWED_RESOURCE_TYPES
+    allowed_domains: tuple[str, ...] = DEFAULT_ALLOWED_DOMAINS
+
+    @classmethod
+    def from_env(cls) -> "RoutePolicy":
+        """REQUEST_BLOCKING / ROUTE_ALLOWED_RESOURCE_TYPES / ROUTE_ALLOWED_DOMAINS から作る。"""
+        return cls(
+            enabled=os.getenv("REQUEST_BLOCKING", "true").strip().lower() != "false",
+            allowed_resource_types=_csv_env("ROUTE_ALLOWED_RESOURCE_TYPES", DEFAULT_ALLOWED_RESOURCE_TYPES),
+            allowed_domains=_csv_env("ROUTE_ALLOWED_DOMAINS", DEFAULT_ALLOWED_DOMAINS),
+        )
+
+    def _is_allowed_domain(self, url: str) -> bool:
+        host = (urlsplit(url).hostname or "").lower()
+        return any(host == d or host.endswith("." + d) for d in self.allowed_domains)
+
+    def block_reason(self, resource_type: str, url: str) -> str | None:
+        """abort する場合はその理由（resource_type / domain）を返す。"""
+        if not url.startswith(("http://", "https://")):
+            return None
+        if resource_type not in self.allowed_resource_types:
+            return "resource_type"
+        if not self._is_allowed_domain(url):
+            return "domain"
+        return None
+
+
+@dataclass
+class RouteStats:
+    """abort / 通過したリクエストの集計。全ワーカーから更新する。"""
+
+    allowed_requests: int = 0
+    blocked_requests: int = 0
+    estimated_saved_bytes: int = 0
+    blocked_by_type: dict[str, int] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def record(self, resource_type: str, blocked: bool) -> None:
+        with self.lock:
+            if not blocked:
+                self.allowed_requests += 1
+                return
+            self.blocked_requests += 1
+            self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + 1
+            self.estimated_saved_bytes += ESTIMATED_BYTES_BY_RESOURCE_TYPE.get(
+                resource_type, DEFAULT_ESTIMATED_BYTES
+            )
+
+    def log_summary(self) -> None:
+        with self.lock:
+            blocked_by_type = ",".join(f"{k}:{v}" for k, v in sorted(self.blocked_by_type.items()))
+            logger.info(
+                "timing stage=request_routing allowed_requests=%d blocked_requests=%d "
+                "estimated_saved_bytes=%d blocked_by_type=%s",
+                self.allowed_requests,
+                self.blocked_requests,
+                self.estimated_saved_bytes,
+                blocked_by_type or "-",
+            )
+
+
+# 実行全体で共有する集計
+ROUTE_STATS = RouteStats()
+
+
+def install_request_routing(target, policy: RoutePolicy | None = None, stats: RouteStats = ROUTE_STATS) -> None:
+    """sync API の BrowserContext / Page に不要リクエストの abort を設定する。"""
+    policy = policy or RoutePolicy.from_env()
+    if not policy.enabled:
+        logger.info("REQUEST_BLOCKING=false のためリクエストを遮断しません。")
+        return
+
+    def handle(route) -> None:
+        request = route.request
+        reason = policy.block_reason(request.resource_type, request.url)
+        stats.record(request.resource_type, blocked=reason is not None)
+        if reason is None:
+            route.continue_()
+        else:
+            route.abort()
+
+    target.route("**/*", handle)
+
+
+async def install_request_routing_async(
+    target, policy: RoutePolicy | None = None, stats: RouteStats = ROUTE_STATS
+) -> None:
+    """async API の BrowserContext / Page に不要リクエストの abort を設定する。"""
+    policy = policy or RoutePolicy.from_env()
+    if not policy.enabled:
+        logger.info("REQUEST_BLOCKING=false のためリクエストを遮断しません。")
+        return
+
+    async def handle(route) -> None:
+        request = route.request
+        reason = policy.block_reason(request.resource_type, request.url)
+        stats.record(request.resource_type, blocked=reason is not None)
+        if reason is None:
+            await route.continue_()
+        else:
+            await route.abort()
+
+    await target.route("**/*", handle)
@@ -0,0 +1,118 @@
+import os
+from dataclasses import dataclass
+
+import pandas as pd
+
+from config import config
+from utils.logger_setup import setup_logger
+from scraper.supabase_lookup import fetch_all_pages
+
+# =========================
+# 設定・ロガー
+# =========================
+filename, ext = os.path.splitext(os.path.basename(__file__))
+logger = setup_logger(filename, log_file=config.LOG_PATH)
+
+RESULT_KEY_COLUMNS = ["hall_id", "model_id", "unit_no", "date"]
+RESULT_VALUE_COLUMNS = ["game", "bb", "rb", "medal"]
+# 既存行の NULL 値。今回の値とは一致させず、変更行として扱う
+_MISSING_VALUE = -(2**63)
+
+
+def diff_upsert_enabled() -> bool:
+    """RESULTS_DIFF_UPSERT=false で差分判定をせず全行を送る。"""
+    return os.getenv("RESULTS_DIFF_UPSERT", "true").strip().lower() != "false"
+
+
+def row_fingerprints(df: pd.DataFrame) -> pd.Series:
+    """game / bb / rb / medal から行ごとの指紋（64bit のハッシュ）を作る。"""
+    values = df[RESULT_VALUE_COLUMNS].fillna(_MISSING_VALUE).astype("int64").reset_index(drop=True)
+    hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+    # 突き合わせ時の欠損で float に変わらないよう、nullable な Int64 で持つ
+    return pd.Series(pd.array(hashes.view("int64"), dtype="Int64"))
+
+
+def _normalize_keys(df: pd.DataFrame) -> pd.DataFrame:
+    keys = df[RESULT_KEY_COLUMNS].reset_index(drop=True).copy()
+    keys["hall_id"] = keys["hall_id"].astype("int64")
+    keys["model_id"] = keys["model_id"].astype("int64")
+    keys["unit_no"] = keys["unit_no"].astype("int64")
+    # DB からは 'YYYY-MM-DD'、COPY 経由では date 型で返るため文字列に揃える
+    keys["date"] = keys["date"].astype(str).str[:10]
+    return keys
+
+
+def fingerprint_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """衝突キー（hall_id, model_id, unit_no, date）と指紋の表を作る。"""
+    keys = _normalize_keys(df)
+    keys["fingerprint"] = row_fingerprints(df)
+    return keys
+
+
+def hall_date_pairs(records_df: pd.DataFrame) -> list[tuple[int, str]]:
+    pairs = records_df[["hall_id", "date"]].drop_duplicates()
+    return [(int(h), str(d)) for h, d in zip(pairs["hall_id"], pairs["date"])]
+
+
+def fetch_existing_results_postgrest(supabase, pairs: list[tuple[int, str]]) -> pd.DataFrame:
+    """対象の (hall_id, date) の results の既存行を取得する。
+
+    hall_id の in と日付の範囲で1つのクエリにまとめ（ページ分割あり）、範囲内の対象外の組は取得後に除く。
+    """
+    all_columns = RESULT_KEY_COLUMNS + RESULT_VALUE_COLUMNS
+    if not pairs:
+        return pd.DataFrame(columns=all_columns)
+    hall_ids = sorted({hall_id for hall_id, _ in pairs})
+    dates = [date for _, date in pairs]
+    query = (
+        supabase.table("results")
+        .select(",".join(all_columns))
+        .in_("hall_id", hall_ids)
+        .gte("date", min(dates))
+        .lte("date", max(dates))
+        .order("hall_id")
+        .order("date")
+        .order("model_id")
+        .order("unit_no")
+    )
+    existing_df = pd.DataFrame(fetch_all_pages(query), columns=all_columns)
+    if existing_df.empty:
+        return existing_df
+    wanted = set(pairs)
+    in_pairs = [
+        (int(hall_id), str(date)[:10]) in wanted for hall_id, date in zip(existing_df["hall_id"], existing_df["date"])
+    ]
+    return existing_df[in_pairs].reset_index(drop=True)
+
+
+@dataclass(frozen=True)
+class ResultDiff:
+    """今回のレコードを既存行と突き合わせた結果。changed は新規・変更行のみ。"""
+
+    changed: pd.DataFrame
+    inserted: int
+    updated: int
+    unchanged: int
+
+
+def diff_result_records(records_df: pd.DataFrame, existing_df: pd.DataFrame) -> ResultDiff:
+    """指紋を比べ、新規（既存行なし）・変更（指紋が違う）・変更なしに分ける。
+
+    records_df は衝突キーの重複を除去済みであること。
+    """
+    records_df = records_df.reset_index(drop=True)
+    if existing_df.empty:
+        return ResultDiff(records_df, inserted=len(records_df), updated=0, unchanged=0)
+
+    current = fingerprint_frame(records_df)
+    existing = fingerprint_frame(existing_df).rename(columns={"fingerprint": "existing_fingerprint"})
+    merged = current.merge(existing, how="left", on=RESULT_KEY_COLUMNS, sort=False)
+    is_new = merged["existing_fingerprint"].isna().to_numpy()
+    is_same = (merged["existing_fingerprint"] == merged["fingerprint"]).fillna(False).to_numpy(bool)
+    changed = records_df[~is_same]
+    return ResultDiff(
+        changed=changed.reset_index(drop=True),
+        inserted=int(is_new.sum()),
+        updated=int((~is_new & ~is_same).sum()),
+        unchanged=int(is_same.sum()),
+    )
@@ -0,0 +1,137 @@
+import datetime as dt
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from config import config
+from utils.logger_setup import setup_logger
+
+# =========================
+# 設定・ロガー
+# =========================
+filename, ext = os.path.splitext(os.path.basename(__file__))
+logger = setup_logger(filename, log_file=config.LOG_PATH)
+
+RUN_JOURNAL_DIR = config.DATA_DIR / "run_journal"
+
+# 再開時に処理済みとみなすホール×日付の状態（db_error / empty_rows / scraped は再取得する）
+FINISHED_UNIT_STATUSES = {"completed", "skipped_empty", "skipped_existing"}
+
+
+def _default_run_id() -> str:
+    github_run_id = os.getenv("GITHUB_RUN_ID", "").strip()
+    if github_run_id:
+        return f"gh-{github_run_id}"
+    return dt.datetime.now().strftime("%Y%m%d-%H%M%S")
+
+
+@dataclass
+class RunJournal:
+    """実行単位のチェックポイント（追記専用の JSONL）。
+
+    1行1レコードで、ホール×日付の処理結果（type=unit）と
+    ホール単位の完了（type=hall、そのホールで扱ったホール×日付の一覧つき）を記録する。
+    同じ run_id で開き直すと、処理済みのホール×日付・ホールを読み込む。
+    """
+
+    run_id: str
+    path: Path
+    unit_statuses: dict[tuple[str, str], str] = field(default_factory=dict)
+    hall_units: dict[str, list[tuple[str, str]]] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @classmethod
+    def open(cls, run_id: str | None = None, root: Path = RUN_JOURNAL_DIR) -> "RunJournal":
+        """run_id のジャーナルを開く（無ければ新規作成）。"""
+        run_id = run_id or _default_run_id()
+        root.mkdir(parents=True, exist_ok=True)
+        journal = cls(run_id=run_id, path=root / f"{run_id}.jsonl")
+        if journal.path.exists():
+            journal._load()
+            journal._terminate_last_line()
+        return journal
+
+    @classmethod
+    def from_env(cls) -> "RunJournal":
+        """RESUME_RUN_ID があればそのジャーナルを再開し、無ければ新しい run_id で作る。"""
+        resume_run_id = os.getenv("RESUME_RUN_ID", "").strip()
+        if not resume_run_id:
+            return cls.open(os.getenv("RUN_ID", "").strip() or None)
+        journal = cls.open(resume_run_id)
+        if not journal.unit_statuses and not journal.hall_units:
+            logger.warning("RESUME_RUN_ID のジャーナルが見つからないため最初から実行します: %s", journal.path)
+        return journal
+
+    def _load(self) -> None:
+        with self.path.open("r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, start=1):
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 強制終了で最終行が途中までしか書かれていない場合は読み飛ばす
+                    logger.warning("ジャーナルの壊れた行を読み飛ばします: %s:%d", self.path, line_no)
+                    continue
+                if record.get("type") == "unit":
+                    self.unit_statuses[(record["hall"], record["date"])] = record["status"]
+                elif record.get("type") == "hall" and record.get("status") == "completed":
+                    self.hall_units[record["hall_name"]] = [tuple(u) for u in record.get("units", [])]
+        logger.info(
+            "ジャーナルを読み込みました: run_id=%s, finished_units=%d, completed_halls=%d",
+            self.run_id,
+            sum(1 for s in self.unit_statuses.values() if s in FINISHED_UNIT_STATUSES),
+            len(self.hall_units),
+        )
+
+    def _terminate_last_line(self) -> None:
+        """途中までしか書かれていない最終行があれば、次の追記と混ざらないよう改行で閉じる。"""
+        with self.path.open("rb+") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+    def _append(self, record: dict) -> None:
+        record["recorded_at"] = dt.datetime.now().isoformat(timespec="seconds")
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self.lock:
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def record_unit(self, hall: str, date: str, status: str, rows: int = 0, upserted_rows: int = 0) -> None:
+        """ホール×日付の処理結果を記録する。"""
+        self._append(
+            {
+                "type": "unit",
+                "hall": hall,
+                "date": date,
+                "status": status,
+                "rows": rows,
+                "upserted_rows": upserted_rows,
+            }
+        )
+        with self.lock:
+            self.unit_statuses[(hall, date)] = status
+
+    def record_hall(self, hall_name: str, status: str, units: list[tuple[str, str]]) -> None:
+        """ホール単位の処理結果を、そのホールで扱ったホール×日付の一覧とともに記録する。"""
+        self._append({"type": "hall", "hall_name": hall_name, "status": status, "units": units})
+
+    def is_unit_finished(self, hall: str, date: str) -> bool:
+        with self.lock:
+            return self.unit_statuses.get((hall, date)) in FINISHED_UNIT_STATUSES
+
+    def finished_hall_units(self, hall_name: str) -> list[tuple[str, str]] | None:
+        """前回の実行でホールの全日付が処理済みなら、そのホール×日付の一覧を返す。"""
+        with self.lock:
+            units = self.hall_units.get(hall_name)
+            if units is None:
+                return None
+            if all(self.unit_statuses.get(u) in FINISHED_UNIT_STATUSES for u in units):
+                return units
+            return None
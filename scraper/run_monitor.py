@@ -60,6 +60,7 @@ def build_quality_issues(
     target_count: int,
     hall_error_count: int,
     db_error_count: int,
+    summary_error_count: int = 0,
 ) -> list[str]:
     issues: list[str] = []
     if hall_count and target_count == 0:
@@ -68,6 +69,8 @@ def build_quality_issues(
         issues.append(f"ホール処理エラーが{hall_error_count}件あります")
     if db_error_count:
         issues.append(f"DB登録エラーが{db_error_count}件あります")
+    if summary_error_count:
+        issues.append(f"再試行しても日次サマリーを更新できないホール×日付が{summary_error_count}件あります")
     return issues
 
 
@@ -2,17 +2,29 @@ import pandas as pd
 from urllib.parse import quote, urljoin
 import os
 import datetime as dt
+import queue
 import re
+import threading
 import time
+from dataclasses import dataclass, field
+import httpx
 import yaml
-from playwright.sync_api import TimeoutError as PWTimeout, sync_playwright
+from playwright.sync_api import TimeoutError as PWTimeout
 
 from config import config
 from utils.logger_setup import setup_logger
-from scraper.scraping_result_data import RESULT_COLUMNS, extract_result_data_by_dates
+from scraper.raw_store import get_raw_store
+from scraper.scraping_engines import open_scraping_engine, scraping_engine_from_env
+from scraper.request_routing import ROUTE_STATS
+from scraper.page_cache import get_page_cache
+from scraper.rate_limiter import get_rate_limiter
+from scraper.run_journal import RunJournal
+from scraper.sharding import ShardSpec, ShardSummary, select_shard_halls
 from scraper.preprocess_for_db import df_data_clean
 from scraper import data_to_supabase
+from scraper.postgres_ingest import close_connection_pool, ingest_backend_from_env
 from scraper.materialized_views import refresh_materialized_views
+from scraper.daily_summaries import daily_summaries_enabled, refresh_daily_summaries, retry_daily_summaries
 from scraper.run_monitor import (
     CircuitBreakerOpenError,
     ConsecutiveErrorCircuitBreaker,
@@ -21,7 +33,7 @@ from scraper.run_monitor import (
     emit_github_annotation,
     positive_int_env,
 )
-from scraper.supabase_lookup import has_enough_results
+from scraper.supabase_lookup import ExistingResultsIndex, has_enough_results, load_existing_results_index
 
 # =========================
 # 設定・ロガー
@@ -29,6 +41,15 @@ from scraper.supabase_lookup import has_enough_results
 filename, ext = os.path.splitext(os.path.basename(__file__))
 logger = setup_logger(filename, log_file=config.LOG_PATH)
 
+# サーキットブレーカーの対象にするタイムアウト（Playwright / HTTP 取得）
+TIMEOUT_ERRORS = (PWTimeout, httpx.TimeoutException)
+
+# 事前スキップ索引の期間に、ホールの period に加えて含める日数（サイト側の掲載遅れ分）
+PRE_SKIP_EXTRA_DAYS = 7
+
+# 登録済みの日付まで日付リンクを読み進めるときの上限件数（DATE_DISCOVERY_MAX_DAYS）
+DATE_DISCOVERY_MAX_DAYS = 14
+
 
 def _parse_bool_env(name: str) -> bool:
     return os.getenv(name, "").strip().lower() == "true"
@@ -101,7 +122,14 @@ def _upsert_hall_date(
     *,
     hall: str,
     date: str,
+    dimensions: data_to_supabase.DimensionCache | None = None,
+    diff_existing: bool = True,
+    on_summary_error=None,
 ) -> int:
+    """ホール×日付の結果を登録し、登録件数を返す。
+
+    日次サマリーの更新に失敗したら、対象の (hall_id, date) を on_summary_error に渡す（後で再試行する）。
+    """
     db_start = time.perf_counter()
     if df_hall_date.empty:
         logger.warning("空データのためDB登録をスキップします。")
@@ -121,8 +149,8 @@ def _upsert_hall_date(
         return 0
 
     dimension_start = time.perf_counter()
-    data_to_supabase.add_model(df_clean, supabase)
-    data_to_supabase.add_prefecture_and_hall(df_clean, supabase)
+    data_to_supabase.add_model(df_clean, supabase, dimensions)
+    data_to_supabase.add_prefecture_and_hall(df_clean, supabase, dimensions)
     logger.info(
         "timing stage=db_dimensions hall=%s date=%s rows=%d duration_sec=%.2f",
         hall,
@@ -132,14 +160,22 @@ def _upsert_hall_date(
     )
 
     result_start = time.perf_counter()
-    upserted_rows = data_to_supabase.add_data_result(df_clean, supabase)
+    counts = data_to_supabase.add_data_result(df_clean, supabase, dimensions, diff_existing=diff_existing)
+    upserted_rows = counts.upserted
     logger.info(
-        "timing stage=db_results hall=%s date=%s rows=%d duration_sec=%.2f",
+        "timing stage=db_results hall=%s date=%s rows=%d inserted=%s updated=%s unchanged=%d duration_sec=%.2f",
         hall,
         date,
         upserted_rows,
+        "-" if counts.inserted is None else counts.inserted,
+        "-" if counts.updated is None else counts.updated,
+        counts.unchanged,
         time.perf_counter() - result_start,
     )
+    if counts.changed_hall_dates and daily_summaries_enabled():
+        refreshed = _refresh_daily_summaries(supabase, counts.changed_hall_dates, hall=hall, date=date)
+        if not refreshed and on_summary_error is not None:
+            on_summary_error(counts.changed_hall_dates)
     logger.info(
         "timing stage=db_total hall=%s date=%s rows=%d duration_sec=%.2f",
         hall,
@@ -150,15 +186,576 @@ def _upsert_hall_date(
     return upserted_rows
 
 
+def _refresh_daily_summaries(supabase, hall_dates, *, hall: str, date: str) -> bool:
+    """results を登録したホール×日付の日次サマリーを作り直す。失敗しても results の登録は失敗扱いにしない。
+
+    成功したかを返す。失敗した組は実行の最後（シャード実行では統合ステップ）で再試行する。
+    """
+    summary_start = time.perf_counter()
+    status = "completed"
+    rows = 0
+    try:
+        rows = refresh_daily_summaries(supabase, list(hall_dates))
+    except Exception as e:
+        status = "error"
+        logger.exception("日次サマリー更新でエラー: hall=%s, date=%s", hall, date)
+        emit_github_annotation(
+            "warning",
+            "日次サマリー更新エラー",
+            f"hall={hall}, date={date}, error={type(e).__name__}: {e}（実行の最後に再試行します）",
+        )
+    finally:
+        logger.info(
+            "timing stage=db_summaries hall=%s date=%s status=%s rows=%d duration_sec=%.2f",
+            hall,
+            date,
+            status,
+            rows,
+            time.perf_counter() - summary_start,
+        )
+    return status == "completed"
+
+
+@dataclass
+class _RunStats:
+    """ワーカー間で共有する実行カウンタ。更新は必ず lock 内で行う。"""
+
+    target_count: int = 0
+    skipped_count: int = 0
+    scrape_target_count: int = 0
+    scraped_rows: int = 0
+    total_upserted: int = 0
+    hall_error_count: int = 0
+    db_error_count: int = 0
+    # results が実際に変わった日付（マテビューの更新対象の判定に使う）
+    changed_dates: set[str] = field(default_factory=set)
+    # 日次サマリーの更新に失敗した (hall_id, date)
+    summary_error_hall_dates: set[tuple[int, str]] = field(default_factory=set)
+    warned_prefecture_mismatch_halls: set[str] = field(default_factory=set)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def add(self, **counts: int) -> None:
+        with self.lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+
+@dataclass
+class _RunContext:
+    supabase: object | None
+    target_dates: set[str] | None
+    force_rescrape: bool
+    disable_pre_skip: bool
+    min_existing_rows: int
+    upsert_each_date: bool
+    timeout_limit: int
+    timeout_breaker: ConsecutiveErrorCircuitBreaker
+    hall_count: int
+    engine_name: str = "sync"
+    date_discovery_max_days: int = DATE_DISCOVERY_MAX_DAYS
+    pre_skip_index: ExistingResultsIndex | None = None
+    # 事前スキップ判定で分かった (hall, date) ごとの既存行数
+    existing_counts: dict[tuple[str, str], int] = field(default_factory=dict)
+    dimensions: data_to_supabase.DimensionCache | None = None
+    db_queue: "queue.Queue | None" = None
+    journal: RunJournal | None = None
+    stats: _RunStats = field(default_factory=_RunStats)
+    stop_event: threading.Event = field(default_factory=threading.Event)
+    breaker_lock: threading.Lock = field(default_factory=threading.Lock)
+    fatal_error: BaseException | None = None
+
+
+def _should_scrape(ctx: _RunContext, pref: str, hall: str, date: str) -> bool:
+    stats = ctx.stats
+    stats.add(target_count=1)
+    if ctx.journal is not None and ctx.journal.is_unit_finished(hall, date):
+        stats.add(skipped_count=1)
+        logger.info(
+            "timing stage=db_lookup hall=%s date=%s source=journal duration_sec=0.00",
+            hall,
+            date,
+        )
+        logger.debug("ジャーナル上で処理済みのためスキップ: hall=%s, date=%s", hall, date)
+        return False
+    if ctx.supabase is None or ctx.force_rescrape or ctx.disable_pre_skip:
+        stats.add(scrape_target_count=1)
+        logger.info(
+            "timing stage=db_lookup hall=%s date=%s status=bypassed duration_sec=0.00",
+            hall,
+            date,
+        )
+        logger.info("新規取得対象: hall=%s, date=%s", hall, date)
+        return True
+    lookup_start = time.perf_counter()
+    use_index = ctx.pre_skip_index is not None and ctx.pre_skip_index.covers(date)
+    try:
+        if use_index:
+            should_skip, existing_count, _ = ctx.pre_skip_index.has_enough_results(
+                pref,
+                hall,
+                date,
+                min_existing_rows=ctx.min_existing_rows,
+            )
+        else:
+            should_skip, existing_count, _ = has_enough_results(
+                ctx.supabase,
+                pref,
+                hall,
+                date,
+                min_existing_rows=ctx.min_existing_rows,
+            )
+    finally:
+        logger.info(
+            "timing stage=db_lookup hall=%s date=%s source=%s duration_sec=%.2f",
+            hall,
+            date,
+            "index" if use_index else "query",
+            time.perf_counter() - lookup_start,
+        )
+    ctx.existing_counts[(hall, date)] = existing_count
+    if should_skip:
+        stats.add(skipped_count=1)
+        if ctx.journal is not None:
+            ctx.journal.record_unit(hall, date, "skipped_existing", rows=existing_count)
+        logger.debug(
+            "取得済みのためスキップ: hall=%s, date=%s, existing_count=%d",
+            hall,
+            date,
+            existing_count,
+        )
+        return False
+    stats.add(scrape_target_count=1)
+    logger.info("新規取得対象: hall=%s, date=%s", hall, date)
+    return True
+
+
+def _record_hall_outcome(ctx: _RunContext, error: Exception | None) -> None:
+    """ホール処理結果をサーキットブレーカーへ反映する。
+
+    ブレーカーは全ワーカーで共有し、ホールの完了順で連続数を数える。
+    """
+    with ctx.breaker_lock:
+        if error is None or not isinstance(error, TIMEOUT_ERRORS):
+            ctx.timeout_breaker.reset()
+            return
+        consecutive_count, is_open, signature = ctx.timeout_breaker.record(error)
+        logger.warning(
+            "同種タイムアウト連続数: count=%d limit=%d signature=%s",
+            consecutive_count,
+            ctx.timeout_limit,
+            signature,
+        )
+        if not is_open or ctx.stop_event.is_set():
+            return
+        message = (
+            "同種タイムアウトが連続したため収集を打ち切ります: "
+            f"count={consecutive_count}, limit={ctx.timeout_limit}, signature={signature}"
+        )
+        logger.error(message)
+        emit_github_annotation("error", "収集サーキットブレーカー作動", message)
+        ctx.fatal_error = CircuitBreakerOpenError(message)
+        ctx.fatal_error.__cause__ = error
+        ctx.stop_event.set()
+
+
+def _needs_result_diff(ctx: _RunContext, hall: str, date: str) -> bool:
+    """既存行との差分判定が必要か。
+
+    取り直し（FORCE_RESCRAPE / DISABLE_PRE_SKIP / TARGET_DATES）と、事前スキップ判定で既存行が
+    見つかったホール×日付だけ既存行を取得する。通常の新規日付は全行が新規のため取得しない。
+    """
+    if ctx.force_rescrape or ctx.disable_pre_skip or ctx.target_dates is not None:
+        return True
+    return ctx.existing_counts.get((hall, date), 0) > 0
+
+
+def _add_summary_errors(stats: _RunStats, hall_dates) -> None:
+    with stats.lock:
+        stats.summary_error_hall_dates.update(hall_dates)
+
+
+def _write_hall_date(
+    ctx: _RunContext,
+    hall: str,
+    date: str,
+    df_hall_date: pd.DataFrame,
+    model_count: int,
+) -> None:
+    """ホール×日付の取得結果を DB 登録する（DB 登録ワーカーから呼ぶ）。"""
+    stats = ctx.stats
+    upserted_rows = 0
+    if ctx.upsert_each_date and ctx.supabase is not None:
+        db_start = time.perf_counter()
+        db_status = "started"
+        try:
+            upserted_rows = _upsert_hall_date(
+                df_hall_date,
+                ctx.supabase,
+                hall=hall,
+                date=date,
+                dimensions=ctx.dimensions,
+                diff_existing=_needs_result_diff(ctx, hall, date),
+                on_summary_error=lambda pairs: _add_summary_errors(stats, pairs),
+            )
+            stats.add(total_upserted=upserted_rows)
+            if upserted_rows:
+                with stats.lock:
+                    stats.changed_dates.add(date)
+            db_status = "completed" if upserted_rows else "skipped_empty"
+        except Exception as e:
+            stats.add(db_error_count=1)
+            db_status = "error"
+            logger.exception("DB登録でエラー: hall=%s, date=%s, error=%s", hall, date, e)
+            emit_github_annotation(
+                "error",
+                "DB登録エラー",
+                f"hall={hall}, date={date}, error={type(e).__name__}: {e}",
+            )
+            return
+        finally:
+            logger.info(
+                "timing stage=db hall=%s date=%s status=%s duration_sec=%.2f",
+                hall,
+                date,
+                db_status,
+                time.perf_counter() - db_start,
+            )
+            if ctx.journal is not None:
+                ctx.journal.record_unit(
+                    hall,
+                    date,
+                    "db_error" if db_status == "error" else db_status,
+                    rows=len(df_hall_date),
+                    upserted_rows=upserted_rows,
+                )
+    elif ctx.journal is not None:
+        ctx.journal.record_unit(hall, date, "scraped", rows=len(df_hall_date))
+    logger.info(
+        "取得・保存完了: hall=%s, date=%s, models=%d, rows=%d, upserted_rows=%d",
+        hall,
+        date,
+        model_count,
+        len(df_hall_date),
+        upserted_rows,
+    )
+
+
+def _store_hall_date_result(
+    ctx: _RunContext,
+    h: config.HallInfo,
+    hall_date_result: tuple[str, str, str, pd.DataFrame, int],
+) -> None:
+    """日付1件分の取得結果を集計し、DB 登録キュー（無ければその場）で登録する。"""
+    stats = ctx.stats
+    pref, hall, date, df_hall_date, model_count = hall_date_result
+    with stats.lock:
+        warn_mismatch = (
+            h.prefecture
+            and pref
+            and h.prefecture != pref
+            and hall not in stats.warned_prefecture_mismatch_halls
+        )
+        if warn_mismatch:
+            stats.warned_prefecture_mismatch_halls.add(hall)
+    if warn_mismatch:
+        logger.warning(
+            "config prefecture と site prefecture が違います: config_prefecture=%s, site_prefecture=%s, hall=%s",
+            h.prefecture,
+            pref,
+            hall,
+        )
+    row_count = len(df_hall_date)
+    if row_count == 0:
+        logger.warning("取得対象があるのに rows=0 です: hall=%s, date=%s", hall, date)
+        if ctx.journal is not None:
+            ctx.journal.record_unit(hall, date, "empty_rows")
+        return
+    with stats.lock:
+        stats.scraped_rows += row_count
+
+    if ctx.db_queue is None:
+        _write_hall_date(ctx, hall, date, df_hall_date, model_count)
+        return
+    # キューが満杯なら DB 登録が追いつくまで収集側を待たせる
+    wait_start = time.perf_counter()
+    ctx.db_queue.put((hall, date, df_hall_date, model_count))
+    logger.info(
+        "timing stage=db_enqueue hall=%s date=%s queue_size=%d duration_sec=%.2f",
+        hall,
+        date,
+        ctx.db_queue.qsize(),
+        time.perf_counter() - wait_start,
+    )
+
+
+def _db_writer(ctx: _RunContext, db_queue: "queue.Queue", writer_id: int) -> None:
+    """DB 登録キューから取り出して登録するワーカー。None を受け取ると終了する。"""
+    while True:
+        item = db_queue.get()
+        try:
+            if item is None:
+                return
+            _write_hall_date(ctx, *item)
+        except BaseException as e:
+            # DB エラーは _write_hall_date 内で db_error_count に数える。ここに来るのは想定外の異常のみ
+            logger.exception("DB登録ワーカーで想定外のエラー: writer=%d, error=%s", writer_id, e)
+            with ctx.breaker_lock:
+                if ctx.fatal_error is None:
+                    ctx.fatal_error = e
+            ctx.stop_event.set()
+        finally:
+            db_queue.task_done()
+
+
+def _start_db_writers(ctx: _RunContext, writer_count: int, queue_size: int) -> list[threading.Thread]:
+    ctx.db_queue = queue.Queue(maxsize=queue_size)
+    logger.info("DB登録ワーカー起動: writers=%d, queue_size=%d", writer_count, queue_size)
+    writers = [
+        threading.Thread(
+            target=_db_writer,
+            args=(ctx, ctx.db_queue, writer_id),
+            name=f"db-writer-{writer_id}",
+            daemon=True,
+        )
+        for writer_id in range(1, writer_count + 1)
+    ]
+    for writer in writers:
+        writer.start()
+    return writers
+
+
+def _flush_db_writers(ctx: _RunContext, writers: list[threading.Thread]) -> None:
+    """キューに残った登録をすべて終えてから DB 登録ワーカーを止める。"""
+    if ctx.db_queue is None:
+        return
+    flush_start = time.perf_counter()
+    pending = ctx.db_queue.qsize()
+    for _ in writers:
+        ctx.db_queue.put(None)
+    for writer in writers:
+        writer.join()
+    ctx.db_queue = None
+    logger.info(
+        "timing stage=db_flush writers=%d pending=%d duration_sec=%.2f",
+        len(writers),
+        pending,
+        time.perf_counter() - flush_start,
+    )
+
+
+def _skip_finished_hall(ctx: _RunContext, h: config.HallInfo, worker_id: int) -> bool:
+    """ジャーナル上で全日付が処理済みのホールは、ページを開かずにスキップする。"""
+    if ctx.journal is None:
+        return False
+    units = ctx.journal.finished_hall_units(h.name)
+    if units is None:
+        return False
+    ctx.stats.add(target_count=len(units), skipped_count=len(units))
+    logger.info(
+        "timing stage=hall hall=%s worker=%d status=skipped_journal units=%d duration_sec=0.00",
+        h.name,
+        worker_id,
+        len(units),
+    )
+    return True
+
+
+def _discovery_period(ctx: _RunContext, h: config.HallInfo) -> tuple[int, str | None]:
+    """ホールページから読む日付リンクの上限件数と、読み取りを止める登録済みの日付を決める。
+
+    halls.yaml の period 件は常に読み、その後ろは date_discovery_max_days 件を上限に、
+    results に登録済みの最新日付（stop_at）以前のリンクが出たところで止める。
+    停止明けなどで間が空いても、未登録の日付だけを新しい順に拾って取りこぼしを埋める。
+    索引の期間内に登録が無いホールは上限まで読み、索引が無い場合・日付指定時・DB未登録のホールは period をそのまま使う。
+    returns: (period, stop_at)
+    """
+    index = ctx.pre_skip_index
+    if index is None or ctx.target_dates:
+        return h.period, None
+    hall_id = index.hall_ids.get((h.prefecture, h.name))
+    if hall_id is None:
+        logger.warning(
+            "索引にホールが無いため日付リンクは period 件だけ読みます: prefecture=%s, hall=%s, period=%d",
+            h.prefecture,
+            h.name,
+            h.period,
+        )
+        return h.period, None
+    latest_date = index.latest_date(hall_id, min_existing_rows=ctx.min_existing_rows)
+    period = max(h.period, ctx.date_discovery_max_days)
+    if latest_date is None:
+        # 索引の期間内に登録が無い = 上限を超えて止まっていた
+        logger.info(
+            "登録済みの日付が無いため日付リンクを上限まで読みます: hall=%s, period=%d -> %d",
+            h.name,
+            h.period,
+            period,
+        )
+    return period, latest_date
+
+
+def _scrape_hall(ctx: _RunContext, engine, h: config.HallInfo, index: int, worker_id: int) -> None:
+    if _skip_finished_hall(ctx, h, worker_id):
+        return
+    hall_start = time.perf_counter()
+    hall_status = "started"
+    units: list[tuple[str, str]] = []
+
+    def date_filter(pref: str, hall: str, date: str) -> bool:
+        units.append((hall, date))
+        return _should_scrape(ctx, pref, hall, date)
+    encoded_slug = quote(h.slug)
+    hall_url = urljoin(config.MAIN_URL, encoded_slug)
+    logger.debug(
+        "(%d/%d) 処理中: worker=%d, name=%s, prefecture=%s, url=%s",
+        index,
+        ctx.hall_count,
+        worker_id,
+        h.name,
+        h.prefecture,
+        hall_url,
+    )
+
+    period, stop_at = _discovery_period(ctx, h)
+    try:
+        engine.extract_result_data_by_dates(
+            hall_url,
+            period,
+            date_filter=date_filter,
+            target_dates=ctx.target_dates,
+            on_date_result=lambda result: _store_hall_date_result(ctx, h, result),
+            stop_at=stop_at,
+            min_period=h.period,
+        )
+    except Exception as e:
+        ctx.stats.add(hall_error_count=1)
+        hall_status = "error"
+        logger.exception("ホール処理でエラー: %s", e)
+        emit_github_annotation(
+            "error",
+            "ホール収集エラー",
+            f"hall={h.name}, error={type(e).__name__}: {e}",
+        )
+        _record_hall_outcome(ctx, e)
+        return
+    else:
+        _record_hall_outcome(ctx, None)
+        hall_status = "completed"
+    finally:
+        if ctx.journal is not None:
+            ctx.journal.record_hall(h.name, hall_status, units)
+        logger.info(
+            "timing stage=hall hall=%s worker=%d status=%s duration_sec=%.2f",
+            h.name,
+            worker_id,
+            hall_status,
+            time.perf_counter() - hall_start,
+        )
+
+
+def _hall_worker(
+    ctx: _RunContext,
+    hall_queue: "queue.Queue[tuple[int, config.HallInfo]]",
+    worker_id: int,
+) -> None:
+    """キューからホールを取り出して処理するワーカー。
+
+    Playwright の sync API はスレッドをまたいで使えないため、
+    ワーカーごとに収集エンジン（Playwright・ブラウザ・コンテキスト）を起動する。
+    """
+    try:
+        with open_scraping_engine(ctx.engine_name, worker_id=worker_id) as engine:
+            while not ctx.stop_event.is_set():
+                try:
+                    index, h = hall_queue.get_nowait()
+                except queue.Empty:
+                    break
+                _scrape_hall(ctx, engine, h, index, worker_id)
+    except BaseException as e:
+        logger.exception("ワーカーが異常終了しました: worker=%d, error=%s", worker_id, e)
+        with ctx.breaker_lock:
+            if ctx.fatal_error is None:
+                ctx.fatal_error = e
+        ctx.stop_event.set()
+
+
+def _run_hall_workers(ctx: _RunContext, hall_list: list[config.HallInfo], concurrency: int) -> None:
+    hall_queue: queue.Queue[tuple[int, config.HallInfo]] = queue.Queue()
+    for i, h in enumerate(hall_list, start=1):
+        hall_queue.put((i, h))
+
+    worker_count = max(1, min(concurrency, len(hall_list)))
+    logger.info("ホール収集ワーカー起動: workers=%d, halls=%d", worker_count, len(hall_list))
+    workers = [
+        threading.Thread(
+            target=_hall_worker,
+            args=(ctx, hall_queue, worker_id),
+            name=f"hall-worker-{worker_id}",
+            daemon=True,
+        )
+        for worker_id in range(1, worker_count + 1)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    if ctx.fatal_error is not None:
+        raise ctx.fatal_error
+
+
+def _pre_skip_window(
+    hall_list: list[config.HallInfo],
+    target_dates: set[str] | None,
+    discovery_max_days: int = DATE_DISCOVERY_MAX_DAYS,
+) -> tuple[str, str]:
+    """事前スキップ索引を作る期間 (start_date, end_date) を返す。
+
+    日付リンクの読み取り件数を広げる上限（discovery_max_days）の分も含め、
+    各ホールの登録済み最新日付を同じ索引から求められるようにする。
+    """
+    if target_dates:
+        return min(target_dates), max(target_dates)
+    jst_date = os.getenv("JST_DATE", "").strip()
+    today = dt.date.fromisoformat(jst_date) if jst_date else dt.date.today()
+    max_period = max(max((h.period for h in hall_list), default=1), discovery_max_days)
+    start_date = today - dt.timedelta(days=max_period + PRE_SKIP_EXTRA_DAYS)
+    return start_date.isoformat(), today.isoformat()
+
+
+def _load_pre_skip_index(
+    supabase,
+    hall_list: list[config.HallInfo],
+    target_dates: set[str] | None,
+    discovery_max_days: int = DATE_DISCOVERY_MAX_DAYS,
+) -> ExistingResultsIndex | None:
+    """実行開始時に、期間内の既存件数を一括で読み込む。"""
+    start_date, end_date = _pre_skip_window(hall_list, target_dates, discovery_max_days)
+    index_start = time.perf_counter()
+    index = load_existing_results_index(supabase, start_date, end_date)
+    logger.info(
+        "timing stage=db_pre_skip_index status=%s start_date=%s end_date=%s halls=%d hall_dates=%d duration_sec=%.2f",
+        "loaded" if index is not None else "fallback",
+        start_date,
+        end_date,
+        len(index.hall_ids) if index is not None else 0,
+        len(index.counts) if index is not None else 0,
+        time.perf_counter() - index_start,
+    )
+    return index
+
+
 def scraper_all_hall(
     test_mode: bool = False,
     test_count: int = 2,
     min_existing_rows: int = 10,
     upsert_each_date: bool = True,
-) -> pd.DataFrame:
+) -> None:
     start = time.perf_counter()
     load_halls_start = time.perf_counter()
     hall_list = _load_hall_list(test_mode=test_mode, test_count=test_count)
+    shard = ShardSpec.from_env()
+    hall_list = select_shard_halls(hall_list, shard)
     logger.info(
         "timing stage=load_halls hall_count=%d duration_sec=%.2f",
         len(hall_list),
@@ -176,7 +773,12 @@ def scraper_all_hall(
     force_rescrape = _parse_bool_env("FORCE_RESCRAPE")
     disable_pre_skip = _parse_bool_env("DISABLE_PRE_SKIP")
     timeout_limit = positive_int_env("CONSECUTIVE_TIMEOUT_LIMIT", 5)
-    timeout_breaker = ConsecutiveErrorCircuitBreaker(threshold=timeout_limit)
+    concurrency = positive_int_env("SCRAPE_CONCURRENCY", 1)
+    discovery_max_days = positive_int_env("DATE_DISCOVERY_MAX_DAYS", DATE_DISCOVERY_MAX_DAYS)
+    engine_name = scraping_engine_from_env()
+    logger.info("収集エンジン: engine=%s", engine_name)
+    if supabase is not None:
+        logger.info("results 登録方法: backend=%s", ingest_backend_from_env())
     if force_rescrape:
         logger.info("force_rescrape=true のため取得済みでも再取得します")
     if disable_pre_skip:
@@ -187,210 +789,101 @@ def scraper_all_hall(
     if jst_date or jst_hour:
         logger.info("実行基準時刻: JST_DATE=%s, JST_HOUR=%s", jst_date, jst_hour)
 
-    frames: list[pd.DataFrame] = []
-    target_count = 0
-    skipped_count = 0
-    scrape_target_count = 0
-    scraped_rows = 0
-    total_upserted = 0
-    hall_error_count = 0
-    db_error_count = 0
-    warned_prefecture_mismatch_halls: set[str] = set()
-    cols = RESULT_COLUMNS
-
-    with sync_playwright() as p:
-        browser_start = time.perf_counter()
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        logger.info(
-            "timing stage=browser_startup duration_sec=%.2f",
-            time.perf_counter() - browser_start,
+    pre_skip_index = None
+    if supabase is not None and not force_rescrape and not disable_pre_skip:
+        pre_skip_index = _load_pre_skip_index(supabase, hall_list, target_dates, discovery_max_days)
+
+    journal = RunJournal.from_env()
+    logger.info("実行ジャーナル: run_id=%s, path=%s", journal.run_id, journal.path)
+
+    ctx = _RunContext(
+        supabase=supabase,
+        target_dates=target_dates,
+        force_rescrape=force_rescrape,
+        disable_pre_skip=disable_pre_skip,
+        min_existing_rows=min_existing_rows,
+        upsert_each_date=upsert_each_date,
+        timeout_limit=timeout_limit,
+        timeout_breaker=ConsecutiveErrorCircuitBreaker(threshold=timeout_limit),
+        hall_count=len(hall_list),
+        engine_name=engine_name,
+        date_discovery_max_days=discovery_max_days,
+        pre_skip_index=pre_skip_index,
+        dimensions=data_to_supabase.DimensionCache(supabase) if supabase is not None else None,
+        journal=journal,
+    )
+    stats = ctx.stats
+
+    db_writers: list[threading.Thread] = []
+    if supabase is not None:
+        db_writers = _start_db_writers(
+            ctx,
+            writer_count=positive_int_env("DB_WRITER_COUNT", 1),
+            queue_size=positive_int_env("DB_QUEUE_SIZE", 4),
         )
-        try:
-            for i, h in enumerate(hall_list, start=1):
-                hall_start = time.perf_counter()
-                hall_status = "started"
-                encoded_slug = quote(h.slug)
-                hall_url = urljoin(config.MAIN_URL, encoded_slug)
-                logger.debug("(%d/%d) 処理中: name=%s, prefecture=%s, url=%s", i, len(hall_list), h.name, h.prefecture, hall_url)
-
-                def should_scrape(pref: str, hall: str, date: str) -> bool:
-                    nonlocal target_count, skipped_count, scrape_target_count
-                    target_count += 1
-                    if supabase is None or force_rescrape or disable_pre_skip:
-                        scrape_target_count += 1
-                        logger.info(
-                            "timing stage=db_lookup hall=%s date=%s status=bypassed duration_sec=0.00",
-                            hall,
-                            date,
-                        )
-                        logger.info("新規取得対象: hall=%s, date=%s", hall, date)
-                        return True
-                    lookup_start = time.perf_counter()
-                    try:
-                        should_skip, existing_count, _ = has_enough_results(
-                            supabase,
-                            pref,
-                            hall,
-                            date,
-                            min_existing_rows=min_existing_rows,
-                        )
-                    finally:
-                        logger.info(
-                            "timing stage=db_lookup hall=%s date=%s duration_sec=%.2f",
-                            hall,
-                            date,
-                            time.perf_counter() - lookup_start,
-                        )
-                    if should_skip:
-                        skipped_count += 1
-                        logger.debug(
-                            "取得済みのためスキップ: hall=%s, date=%s, existing_count=%d",
-                            hall,
-                            date,
-                            existing_count,
-                        )
-                        return False
-                    scrape_target_count += 1
-                    logger.info("新規取得対象: hall=%s, date=%s", hall, date)
-                    return True
-
-                try:
-                    hall_date_results = extract_result_data_by_dates(
-                        page,
-                        hall_url,
-                        h.period,
-                        date_filter=should_scrape,
-                        target_dates=target_dates,
-                    )
-                except Exception as e:
-                    hall_error_count += 1
-                    hall_status = "error"
-                    logger.exception("ホール処理でエラー: %s", e)
-                    emit_github_annotation(
-                        "error",
-                        "ホール収集エラー",
-                        f"hall={h.name}, error={type(e).__name__}: {e}",
-                    )
-                    if isinstance(e, PWTimeout):
-                        consecutive_count, is_open, signature = timeout_breaker.record(e)
-                        logger.warning(
-                            "同種タイムアウト連続数: count=%d limit=%d signature=%s",
-                            consecutive_count,
-                            timeout_limit,
-                            signature,
-                        )
-                        if is_open:
-                            message = (
-                                "同種タイムアウトが連続したため収集を打ち切ります: "
-                                f"count={consecutive_count}, limit={timeout_limit}, signature={signature}"
-                            )
-                            logger.error(message)
-                            emit_github_annotation("error", "収集サーキットブレーカー作動", message)
-                            raise CircuitBreakerOpenError(message) from e
-                    else:
-                        timeout_breaker.reset()
-                    continue
-                else:
-                    timeout_breaker.reset()
-                    hall_status = "completed"
-                finally:
-                    logger.info(
-                        "timing stage=hall hall=%s status=%s duration_sec=%.2f",
-                        h.name,
-                        hall_status,
-                        time.perf_counter() - hall_start,
-                    )
-
-                for pref, hall, date, df_hall_date, model_count in hall_date_results:
-                    if (
-                        h.prefecture
-                        and pref
-                        and h.prefecture != pref
-                        and hall not in warned_prefecture_mismatch_halls
-                    ):
-                        logger.warning(
-                            "config prefecture と site prefecture が違います: config_prefecture=%s, site_prefecture=%s, hall=%s",
-                            h.prefecture,
-                            pref,
-                            hall,
-                        )
-                        warned_prefecture_mismatch_halls.add(hall)
-                    row_count = len(df_hall_date)
-                    if row_count == 0:
-                        logger.warning("取得対象があるのに rows=0 です: hall=%s, date=%s", hall, date)
-                        continue
-                    scraped_rows += row_count
-                    frames.append(df_hall_date)
-                    upserted_rows = 0
-                    if upsert_each_date and supabase is not None:
-                        db_start = time.perf_counter()
-                        db_status = "started"
-                        try:
-                            upserted_rows = _upsert_hall_date(
-                                df_hall_date,
-                                supabase,
-                                hall=hall,
-                                date=date,
-                            )
-                            total_upserted += upserted_rows
-                            db_status = "completed" if upserted_rows else "skipped_empty"
-                        except Exception as e:
-                            db_error_count += 1
-                            db_status = "error"
-                            logger.exception("DB登録でエラー: hall=%s, date=%s, error=%s", hall, date, e)
-                            emit_github_annotation(
-                                "error",
-                                "DB登録エラー",
-                                f"hall={hall}, date={date}, error={type(e).__name__}: {e}",
-                            )
-                            continue
-                        finally:
-                            logger.info(
-                                "timing stage=db hall=%s date=%s status=%s duration_sec=%.2f",
-                                hall,
-                                date,
-                                db_status,
-                                time.perf_counter() - db_start,
-                            )
-                    logger.info(
-                        "取得・保存完了: hall=%s, date=%s, models=%d, rows=%d, upserted_rows=%d",
-                        hall,
-                        date,
-                        model_count,
-                        row_count,
-                        upserted_rows,
-                    )
-        finally:
-            browser.close()
+    try:
+        _run_hall_workers(ctx, hall_list, concurrency)
+    finally:
+        # マテビュー更新・品質判定の前に、キューに残った DB 登録をすべて終える
+        _flush_db_writers(ctx, db_writers)
+        ROUTE_STATS.log_summary()
+        get_rate_limiter().log_summary()
+        get_raw_store().log_summary()
+        close_connection_pool()
+        page_cache = get_page_cache()
+        if page_cache is not None:
+            page_cache.log_summary()
+        if ctx.dimensions is not None:
+            logger.info(
+                "timing stage=db_dimension_cache requests=%d prefectures=%d halls=%d models=%d",
+                ctx.dimensions.request_count,
+                len(ctx.dimensions.pref_map),
+                len(ctx.dimensions.hall_map),
+                len(ctx.dimensions.model_map),
+            )
+    # DB 登録ワーカーの想定外エラーは flush 後に判明するため、ここでも確認する
+    if ctx.fatal_error is not None:
+        raise ctx.fatal_error
 
     logger.info(
         "取得済み確認完了: target_count=%d, skipped_count=%d, scrape_target_count=%d",
-        target_count,
-        skipped_count,
-        scrape_target_count,
+        stats.target_count,
+        stats.skipped_count,
+        stats.scrape_target_count,
     )
 
-    if scrape_target_count == 0:
+    if stats.scrape_target_count == 0:
         logger.info("全対象が取得済みのため、今回のスクレイピングは実行せず終了します。")
 
-    if frames:
-        df_all = pd.concat(frames, ignore_index=True)
-    else:
-        if scrape_target_count == 0:
-            logger.info("取得データが空のため、空DataFrameを出力します。")
-        else:
-            logger.warning("取得対象があるのに取得データが空のため、空DataFrameを出力します。")
-        df_all = pd.DataFrame(columns=cols)
-
-    for c in cols:
-        if c not in df_all.columns:
-            df_all[c] = pd.NA
-    df_all = df_all[cols]
-    df_all.to_csv(config.CSV_DIR / "all_result_data.csv", index=False)
-
-    if upsert_each_date and supabase is not None and total_upserted > 0:
-        refresh_materialized_views(supabase)
+    if stats.scrape_target_count > 0 and stats.scraped_rows == 0:
+        logger.warning("取得対象があるのに取得データが空です。")
+
+    # 日次サマリーを更新できなかった組は、シャード実行なら統合ステップ、それ以外はここで再試行する
+    summary_errors = sorted(stats.summary_error_hall_dates)
+    if summary_errors and not shard.enabled:
+        summary_errors = retry_daily_summaries(supabase, summary_errors)
+
+    if shard.enabled:
+        ShardSummary(
+            shard_index=shard.index,
+            shard_count=shard.count,
+            run_id=journal.run_id,
+            hall_count=len(hall_list),
+            target_count=stats.target_count,
+            skipped_count=stats.skipped_count,
+            scrape_target_count=stats.scrape_target_count,
+            scraped_rows=stats.scraped_rows,
+            upserted_rows=stats.total_upserted,
+            hall_error_count=stats.hall_error_count,
+            db_error_count=stats.db_error_count,
+            changed_dates=sorted(stats.changed_dates),
+            summary_error_hall_dates=summary_errors,
+        ).write()
+
+    if shard.enabled:
+        logger.info("シャード実行のため、マテビュー更新は統合ステップ（python -m scraper.sharding merge）で行います。")
+    elif upsert_each_date and supabase is not None and stats.total_upserted > 0:
+        refresh_materialized_views(supabase, changed_dates=stats.changed_dates)
     elif upsert_each_date:
         logger.info("新規登録対象がないためマテビュー更新は呼びません。")
 
@@ -398,13 +891,13 @@ def scraper_all_hall(
         "スクレイピング対象確認結果: target_count=%d, skipped_count=%d, "
         "scrape_target_count=%d, scraped_rows=%d, upserted_rows=%d, "
         "hall_error_count=%d, db_error_count=%d",
-        target_count,
-        skipped_count,
-        scrape_target_count,
-        scraped_rows,
-        total_upserted,
-        hall_error_count,
-        db_error_count,
+        stats.target_count,
+        stats.skipped_count,
+        stats.scrape_target_count,
+        stats.scraped_rows,
+        stats.total_upserted,
+        stats.hall_error_count,
+        stats.db_error_count,
     )
 
     end = time.perf_counter()
@@ -412,18 +905,20 @@ def scraper_all_hall(
 
     quality_issues = build_quality_issues(
         hall_count=len(hall_list),
-        target_count=target_count,
-        hall_error_count=hall_error_count,
-        db_error_count=db_error_count,
+        target_count=stats.target_count,
+        hall_error_count=stats.hall_error_count,
+        db_error_count=stats.db_error_count,
+        summary_error_count=0 if shard.enabled else len(summary_errors),
     )
-    if quality_issues:
+    if quality_issues and shard.enabled:
+        # シャード単位では判定せず、統合ステップで全シャードを合算して判定する
+        logger.warning("シャード内の収集品質の問題（統合ステップで判定します）: %s", "; ".join(quality_issues))
+    elif quality_issues:
         message = "; ".join(quality_issues)
         logger.error("収集品質チェック失敗: %s", message)
         emit_github_annotation("error", "収集品質チェック失敗", message)
         raise RunQualityError(message)
 
-    return df_all
-
 
 if __name__ == "__main__":
     scraper_all_hall(test_mode=False, test_count=2, min_existing_rows=10)
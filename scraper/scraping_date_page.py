@@ -7,8 +7,10 @@ import os
 from config import config
 from utils.logger_setup import setup_logger
 from utils.utils import _norm_text
-from utils.target_models import build_alias_to_canonical, match_target_model_detail
+from utils.target_models import ModelMatcher, get_model_matcher
 from scraper.scraping_hall_page import extract_date_url
+from scraper.request_routing import install_request_routing
+from scraper.page_cache import goto_cached
 
 # =========================
 # 設定・ロガー
@@ -20,6 +22,54 @@ logger = setup_logger(filename, log_file=config.LOG_PATH)
 # =========================
 # ページ操作
 # =========================
+def _match_model_links(
+    raw_links: list[tuple[str, str]],
+    hall: str,
+    pref: str,
+    date_url: str,
+    date: str,
+    matcher: ModelMatcher,
+) -> list[tuple[str, str, str, str, str, str, str, str, str, str]]:
+    """(リンク文字列, href) の一覧から target_models.yaml に一致する機種リンクを抽出する。"""
+    model_urls: list[tuple[str, str, str, str, str, str, str, str, str, str]] = []
+    for raw_text, href in raw_links:
+        model_text = _norm_text(raw_text)
+        model_match = matcher.match(model_text)
+        if model_match:
+            logger.debug(
+                "対象機種に一致: raw_model_name=%s, normalized_model_name=%s, canonical_model_name=%s, match_type=%s, matched_alias=%s, url=%s",
+                model_match.raw_model_name,
+                model_match.normalized_model_name,
+                model_match.canonical_name,
+                model_match.match_type,
+                model_match.matched_alias,
+                href,
+            )
+            model_urls.append((
+                pref,
+                hall,
+                date,
+                date_url,
+                href,
+                model_match.canonical_name,
+                model_match.raw_model_name,
+                model_match.normalized_model_name,
+                model_match.match_type,
+                model_match.matched_alias,
+            ))
+        else:
+            logger.debug("対象外機種: raw_model_name=%s, url=%s", model_text, href)
+            matcher.report_near_miss(model_text)
+
+    logger.debug("機種リンク抽出: %d 件", len(model_urls))
+    if model_urls:
+        logger.debug("model_urls[0] = %s", model_urls[0])
+        for i, model_url in enumerate(model_urls):
+            logger.debug(f"{i+1} = {model_url}")
+
+    return model_urls
+
+
 def extract_model_url(
     page: Page, hall: str, pref: str, date_url: str, date: str
 ) -> list[tuple[str, str, str, str, str, str, str, str, str, str]]:
@@ -29,7 +79,7 @@ def extract_model_url(
     """
 
     logger.debug("日付ページにアクセス: %s", date_url)
-    page.goto(date_url, timeout=90_000, wait_until="domcontentloaded")
+    goto_cached(page, date_url, "date", date, timeout=90_000, wait_until="domcontentloaded")
 
     # スクリーンショット
     # page.screenshot(
@@ -42,8 +92,7 @@ def extract_model_url(
     title = _norm_text(page.locator("h1").first.text_content())
     logger.debug("Page title: %s", title)
 
-    model_urls: list[tuple[str, str, str, str, str, str, str, str, str, str]] = []
-    alias_to_canonical = build_alias_to_canonical()
+    matcher = get_model_matcher()
     css_table = "table.kishu"
     first_table = page.locator(css_table).nth(0)
 
@@ -51,47 +100,18 @@ def extract_model_url(
         page.wait_for_selector(css_table, timeout=10_000)
     except PWTimeout:
         logger.warning("機種リンクが見つかりません: %s", date_url)
-        return model_urls
+        return []
 
     css_table = "tbody tr td a"
     links = first_table.locator(css_table)
     # links = page.locator(css)
     
     count = links.count()
-    for j in range(count):
-        model_text = _norm_text(links.nth(j).inner_text())
-        href = links.nth(j).get_attribute("href") or ""
-        model_match = match_target_model_detail(model_text, alias_to_canonical)
-        if model_match:
-            logger.debug(
-                "対象機種に一致: raw_model_name=%s, normalized_model_name=%s, canonical_model_name=%s, match_type=%s, matched_alias=%s, url=%s",
-                model_match.raw_model_name,
-                model_match.normalized_model_name,
-                model_match.canonical_name,
-                model_match.match_type,
-                model_match.matched_alias,
-                href,
-            )
-            model_urls.append((
-                pref,
-                hall,
-                date,
-                date_url,
-                href,
-                model_match.canonical_name,
-                model_match.raw_model_name,
-                model_match.normalized_model_name,
-                model_match.match_type,
-                model_match.matched_alias,
-            ))
-        else:
-            logger.debug("対象外機種: raw_model_name=%s, url=%s", model_text, href)
-
-    logger.debug("機種リンク抽出: %d 件", len(model_urls))
-    if model_urls:
-        logger.debug("model_urls[0] = %s", model_urls[0])
-        for i, model_url in enumerate(model_urls):
-            logger.debug(f"{i+1} = {model_url}")
+    raw_links = [
+        (links.nth(j).inner_text(), links.nth(j).get_attribute("href") or "")
+        for j in range(count)
+    ]
+    model_urls = _match_model_links(raw_links, hall, pref, date_url, date, matcher)
 
     return model_urls
 
@@ -108,6 +128,7 @@ if __name__ == "__main__":
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
         page = browser.new_page()
+        install_request_routing(page)
 
         date_urls = extract_date_url(hall_url, page, period=3)
 
@@ -0,0 +1,294 @@
+import asyncio
+import os
+import time
+
+import pandas as pd
+from playwright.async_api import async_playwright
+from playwright.sync_api import sync_playwright
+
+from config import config
+from utils.logger_setup import setup_logger
+from scraper.async_scraping import extract_result_data_by_dates_async
+from scraper.browser_recycling import BrowserRecycler, chromium_launch_kwargs, track_new_child_processes
+from scraper.http_scraping import HttpFetcher, PlaywrightFallback, extract_result_data_by_dates_http
+from scraper.page_cache import get_page_cache, replay_only_enabled
+from scraper.request_routing import install_request_routing, install_request_routing_async
+from scraper.run_monitor import positive_int_env
+from scraper.scraping_date_page import extract_model_url
+from scraper.scraping_hall_page import extract_date_url
+from scraper.scraping_model_page import extract_model_data
+from scraper.scraping_result_data import crawl_result_data_by_dates
+
+# =========================
+# 設定・ロガー
+# =========================
+filename, ext = os.path.splitext(os.path.basename(__file__))
+logger = setup_logger(filename, log_file=config.LOG_PATH)
+
+HallDateResults = list[tuple[str, str, str, pd.DataFrame, int]]
+
+
+class SyncPlaywrightEngine:
+    """playwright.sync_api で1ページずつ順に取得する従来の収集エンジン。
+
+    ナビゲーション数・RSS が上限を超えたら、ホール・日付の区切りでコンテキストとページを作り直す。
+    """
+
+    name = "sync"
+
+    def __init__(self, worker_id: int = 1) -> None:
+        self.worker_id = worker_id
+
+    def __enter__(self) -> "SyncPlaywrightEngine":
+        browser_start = time.perf_counter()
+        self._pw_cm = sync_playwright()
+        with track_new_child_processes() as browser_pids:
+            p = self._pw_cm.__enter__()
+        try:
+            self._browser = p.chromium.launch(**chromium_launch_kwargs())
+            self._recycler = BrowserRecycler.from_env(self.worker_id, self.name, browser_pids)
+            self._open_context()
+        except BaseException:
+            self._pw_cm.__exit__(None, None, None)
+            raise
+        logger.info(
+            "timing stage=browser_startup worker=%d engine=%s duration_sec=%.2f",
+            self.worker_id,
+            self.name,
+            time.perf_counter() - browser_start,
+        )
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            self._recycler.log_summary()
+            self._context.close()
+            self._browser.close()
+        finally:
+            self._pw_cm.__exit__(exc_type, exc, tb)
+
+    def _open_context(self) -> None:
+        self._context = self._browser.new_context()
+        install_request_routing(self._context)
+        self._recycler.watch(self._context)
+        self.page = self._context.new_page()
+
+    def _maybe_recycle(self) -> None:
+        reason = self._recycler.recycle_reason()
+        if reason is None:
+            return
+        recycle_start = time.perf_counter()
+        self._context.close()
+        self._open_context()
+        self._recycler.record_recycle(reason, time.perf_counter() - recycle_start)
+
+    def extract_result_data_by_dates(
+        self,
+        hall_url: str,
+        period: int,
+        date_filter=None,
+        target_dates: set[str] | None = None,
+        on_date_result=None,
+        stop_at: str | None = None,
+        min_period: int = 0,
+    ) -> HallDateResults:
+        # 作り直すと self.page が変わるため、ページは呼び出しのたびに参照する
+        self._maybe_recycle()
+        return crawl_result_data_by_dates(
+            lambda hall_url, period, target_dates: extract_date_url(
+                hall_url, self.page, period=period, target_dates=target_dates, stop_at=stop_at, min_period=min_period
+            ),
+            lambda hall, pref, date_url, date: extract_model_url(self.page, hall, pref, date_url, date),
+            lambda model_urls: extract_model_data(self.page, model_urls),
+            hall_url,
+            period,
+            date_filter=date_filter,
+            target_dates=target_dates,
+            on_date_result=on_date_result,
+            before_date=self._maybe_recycle,
+        )
+
+
+class AsyncPlaywrightEngine:
+    """playwright.async_api で機種ページを並行取得する収集エンジン。
+
+    ワーカースレッドごとにイベントループを持ち、ブラウザは起動したまま使い回す。
+    コンテキストは sync エンジンと同じ条件でホール・日付の区切りに作り直す。
+    機種ページの同時取得数は MODEL_CONCURRENCY（既定値4）で指定する。
+    """
+
+    name = "async"
+
+    def __init__(self, worker_id: int = 1, model_concurrency: int | None = None) -> None:
+        self.worker_id = worker_id
+        self.model_concurrency = model_concurrency or positive_int_env("MODEL_CONCURRENCY", 4)
+
+    async def _start(self, browser_pids: list[int]) -> None:
+        self._pw = await async_playwright().start()
+        try:
+            self._browser = await self._pw.chromium.launch(**chromium_launch_kwargs())
+            self._recycler = BrowserRecycler.from_env(self.worker_id, self.name, browser_pids)
+            await self._open_context()
+        except BaseException:
+            await self._pw.stop()
+            raise
+
+    async def _open_context(self) -> None:
+        self._context = await self._browser.new_context()
+        await install_request_routing_async(self._context)
+        self._recycler.watch(self._context)
+        self._page = await self._context.new_page()
+
+    async def _maybe_recycle(self) -> None:
+        reason = self._recycler.recycle_reason()
+        if reason is None:
+            return
+        recycle_start = time.perf_counter()
+        await self._context.close()
+        await self._open_context()
+        self._recycler.record_recycle(reason, time.perf_counter() - recycle_start)
+
+    async def _before_date(self, context, page):
+        await self._maybe_recycle()
+        return self._context, self._page
+
+    async def _stop(self) -> None:
+        try:
+            self._recycler.log_summary()
+            await self._context.close()
+            await self._browser.close()
+        finally:
+            await self._pw.stop()
+
+    def __enter__(self) -> "AsyncPlaywrightEngine":
+        browser_start = time.perf_counter()
+        self._loop = asyncio.new_event_loop()
+        try:
+            with track_new_child_processes() as browser_pids:
+                self._loop.run_until_complete(self._start(browser_pids))
+        except BaseException:
+            self._loop.close()
+            raise
+        logger.info(
+            "timing stage=browser_startup worker=%d engine=%s model_concurrency=%d duration_sec=%.2f",
+            self.worker_id,
+            self.name,
+            self.model_concurrency,
+            time.perf_counter() - browser_start,
+        )
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            self._loop.run_until_complete(self._stop())
+        finally:
+            self._loop.close()
+
+    def extract_result_data_by_dates(
+        self,
+        hall_url: str,
+        period: int,
+        date_filter=None,
+        target_dates: set[str] | None = None,
+        on_date_result=None,
+        stop_at: str | None = None,
+        min_period: int = 0,
+    ) -> HallDateResults:
+        self._loop.run_until_complete(self._maybe_recycle())
+        return self._loop.run_until_complete(
+            extract_result_data_by_dates_async(
+                self._context,
+                self._page,
+                hall_url,
+                period,
+                date_filter=date_filter,
+                target_dates=target_dates,
+                on_date_result=on_date_result,
+                model_concurrency=self.model_concurrency,
+                before_date=self._before_date,
+                stop_at=stop_at,
+                min_period=min_period,
+            )
+        )
+
+
+class HttpEngine:
+    """ブラウザを使わず HTTP + HTML パーサーで取得する収集エンジン。
+
+    想定セレクタが見つからないページだけ Playwright で取得し直す。
+    """
+
+    name = "http"
+
+    def __init__(self, worker_id: int = 1) -> None:
+        self.worker_id = worker_id
+
+    def __enter__(self) -> "HttpEngine":
+        cache = get_page_cache()
+        self._fetcher = HttpFetcher(cache=cache)
+        self._fallback = PlaywrightFallback(worker_id=self.worker_id)
+        # REPLAY_ONLY ではネットワークを使わないため、Playwright での再取得も行わない
+        self._fallback_enabled = not (cache is not None and cache.replay_only)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        logger.info(
+            "timing stage=http_engine worker=%d requests=%d playwright_fallbacks=%d",
+            self.worker_id,
+            self._fetcher.request_count,
+            self._fallback.fallback_count,
+        )
+        try:
+            self._fetcher.close()
+        finally:
+            self._fallback.close()
+
+    def extract_result_data_by_dates(
+        self,
+        hall_url: str,
+        period: int,
+        date_filter=None,
+        target_dates: set[str] | None = None,
+        on_date_result=None,
+        stop_at: str | None = None,
+        min_period: int = 0,
+    ) -> HallDateResults:
+        return extract_result_data_by_dates_http(
+            self._fetcher,
+            hall_url,
+            period,
+            date_filter=date_filter,
+            target_dates=target_dates,
+            on_date_result=on_date_result,
+            fallback=self._fallback if self._fallback_enabled else None,
+            stop_at=stop_at,
+            min_period=min_period,
+        )
+
+
+SCRAPING_ENGINES = {
+    SyncPlaywrightEngine.name: SyncPlaywrightEngine,
+    AsyncPlaywrightEngine.name: AsyncPlaywrightEngine,
+    HttpEngine.name: HttpEngine,
+}
+
+
+def scraping_engine_from_env() -> str:
+    """SCRAPER_ENGINE から収集エンジン名を読む。未指定なら sync。
+
+    REPLAY_ONLY=true のときはブラウザを起動しないよう http エンジンに固定する。
+    """
+    name = os.getenv("SCRAPER_ENGINE", "").strip().lower() or SyncPlaywrightEngine.name
+    if name not in SCRAPING_ENGINES:
+        raise ValueError(
+            f"SCRAPER_ENGINE は {', '.join(SCRAPING_ENGINES)} のいずれかで指定してください: {name}"
+        )
+    if replay_only_enabled() and name != HttpEngine.name:
+        logger.info("REPLAY_ONLY=true のため SCRAPER_ENGINE=%s を http に切り替えます。", name)
+        return HttpEngine.name
+    return name
+
+
+def open_scraping_engine(name: str, worker_id: int = 1):
+    """収集エンジンを生成する。with 文で開いて使う。"""
+    return SCRAPING_ENGINES[name](worker_id=worker_id)
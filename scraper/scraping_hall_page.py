@@ -4,10 +4,13 @@ import pandas as pd
 import re
 import datetime as dt
 import os
+from typing import Iterable
 
 from config import config
 from utils.utils import _norm_text
 from utils.logger_setup import setup_logger
+from scraper.request_routing import install_request_routing
+from scraper.page_cache import goto_cached
 
 # =========================
 # ロガー
@@ -19,15 +22,85 @@ logger = setup_logger(filename, log_file=config.LOG_PATH)
 # =========================
 # ページ操作
 # =========================
-def extract_date_url(hall_url, page, period, target_dates: set[str] | None = None) -> list[tuple[str, str, str, str]]:
+def _date_link_take(count: int, period: int, target_dates: set[str] | None) -> int:
+    """日付リンクのうち先頭から何件を読むか。日付指定時は全件を読む。"""
+    return count if target_dates else min(period, count)
+
+
+def _parse_date_text(date_text: str) -> str | None:
+    """日付文字列（YYYY/MM/DD or M/D）を YYYY-MM-DD に変換する。解釈できなければ None。"""
+    m = re.match(r"(?:(\d{4})/)?(\d{1,2})/(\d{1,2})", date_text)
+    if not m:
+        logger.warning("日付文字列を解釈できません: %s", date_text)
+        return None
+    y, mth, d = m.groups()
+    if y is None:
+        y = str(dt.date.today().year)
+    try:
+        return dt.date(int(y), int(mth), int(d)).strftime("%Y-%m-%d")
+    except ValueError:
+        logger.warning("日付に変換できません: %s", date_text)
+        return None
+
+
+def _build_date_urls(
+    raw_links: Iterable[tuple[str, str]],
+    pref: str,
+    hall: str,
+    target_dates: set[str] | None = None,
+    period: int = 0,
+    stop_at: str | None = None,
+) -> list[tuple[str, str, str, str]]:
+    """(リンク文字列, href) の一覧から日付URLの一覧を作る。
+
+    stop_at（登録済みの最新日付）を渡した場合、先頭 period 件より後ろは stop_at 以前の日付が
+    出てきたところで読むのをやめる（raw_links が遅延評価なら、それ以降のリンクは読まない）。
+    """
+    date_urls: list[tuple[str, str, str, str]] = []
+    read = 0
+    for read, (raw_text, href) in enumerate(raw_links, start=1):
+        date_iso = _parse_date_text(_norm_text(raw_text))
+        if date_iso is None:
+            continue
+        if stop_at is not None and read > period and date_iso <= stop_at:
+            logger.info(
+                "登録済みの日付で日付リンクの読み取りを止めます: hall=%s, stop_at=%s, period=%d, read=%d",
+                hall,
+                stop_at,
+                period,
+                read - 1,
+            )
+            break
+        if target_dates is not None and date_iso not in target_dates:
+            continue
+        date_urls.append((pref, hall, date_iso, href))
+
+    logger.debug("取得した日付URL: %d 件", len(date_urls))
+    if date_urls:
+        logger.debug(f"date_urlsの一行目 : {date_urls[0]}")
+        for i, date_url in enumerate(date_urls):
+            logger.debug(f"{i+1} = {date_url}")
+    return date_urls
+
+
+def _save_date_urls(date_urls: list[tuple[str, str, str, str]], pref: str, hall: str) -> None:
+    columns = ["pref", "hall", "date", "date_url"]
+    df = pd.DataFrame(date_urls, columns=columns)
+    df.to_csv(config.CSV_DIR / f"{pref}_{hall}_date_urls.csv", index=False)
+
+
+def extract_date_url(
+    hall_url, page, period, target_dates: set[str] | None = None, stop_at: str | None = None, min_period: int = 0
+) -> list[tuple[str, str, str, str]]:
     """
     ホールのメインページから、直近 period 件または指定日付の日付リンクを取得
+    stop_at を渡した場合は、先頭 min_period 件より後ろを stop_at 以前の日付が出たところで打ち切る
     returns: List[(prefecture, hall, date(YYYY-MM-DD), date_url)]
     """
 
     logger.debug("ホールのトップページにアクセスします。")
     logger.debug("url: %s", hall_url)
-    page.goto(hall_url, timeout=90_000, wait_until="domcontentloaded")
+    goto_cached(page, hall_url, "hall", timeout=90_000, wait_until="domcontentloaded")
 
     # ホール名・県名
     hall = _norm_text(page.locator("#content h1").first.text_content())
@@ -48,42 +121,16 @@ def extract_date_url(hall_url, page, period, target_dates: set[str] | None = Non
     links = page.locator(css)
     count = links.count()
     logger.debug(f"link取得数: {count}")
-    take = count if target_dates else min(period, count)
+    take = _date_link_take(count, period, target_dates)
     logger.debug(f"take: {take}")
 
-    date_urls: list[tuple[str, str, str, str]] = []
-    for i in range(take):
-        href = links.nth(i).get_attribute("href") or ""
-        date_text = _norm_text(links.nth(i).inner_text())
-
-        # "YYYY/MM/DD" or "M/D" に対応
-        m = re.match(r"(?:(\d{4})/)?(\d{1,2})/(\d{1,2})", date_text)
-        if not m:
-            logger.warning("日付文字列を解釈できません: %s", date_text)
-            continue
-        y, mth, d = m.groups()
-        if y is None:
-            y = str(dt.date.today().year)
-        try:
-            date_iso = dt.date(int(y), int(mth), int(d)).strftime("%Y-%m-%d")
-        except ValueError:
-            logger.warning("日付に変換できません: %s", date_text)
-            continue
-
-        if target_dates is not None and date_iso not in target_dates:
-            continue
-
-        date_urls.append((pref, hall, date_iso, href))
-
-    logger.debug("取得した日付URL: %d 件", len(date_urls))
-    if date_urls:
-        logger.debug(f"date_urlsの一行目 : {date_urls[0]}")
-        for i, date_url in enumerate(date_urls):
-            logger.debug(f"{i+1} = {date_url}")
-
-    columns = ["pref", "hall", "date", "date_url"]
-    df = pd.DataFrame(date_urls, columns=columns)
-    df.to_csv(config.CSV_DIR / f"{pref}_{hall}_date_urls.csv", index=False)
+    # 打ち切った後ろのリンクは読まないよう、ジェネレータで1件ずつ渡す
+    raw_links = (
+        (links.nth(i).inner_text(), links.nth(i).get_attribute("href") or "")
+        for i in range(take)
+    )
+    date_urls = _build_date_urls(raw_links, pref, hall, target_dates, period=min_period, stop_at=stop_at)
+    _save_date_urls(date_urls, pref, hall)
 
     return date_urls
 
@@ -95,5 +142,6 @@ if __name__ == "__main__":
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
         page = browser.new_page()
+        install_request_routing(page)
         hall_url = urljoin(config.MAIN_URL, quote(hall))
         date_urls = extract_date_url(hall_url, page, period=3)
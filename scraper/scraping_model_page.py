@@ -1,14 +1,19 @@
 from playwright.sync_api import Page, sync_playwright, TimeoutError as PWTimeout
+from bs4 import BeautifulSoup
 import pandas as pd
 from urllib.parse import quote, urljoin
 import os
+import time
 
 from config import config
 from utils.logger_setup import setup_logger
 from utils.utils import _norm_text, extract_model_name
-from utils.target_models import build_alias_to_canonical, match_target_model_detail
+from utils.target_models import ModelMatcher, get_model_matcher
 from scraper.scraping_hall_page import extract_date_url
 from scraper.scraping_date_page import extract_model_url
+from scraper.request_routing import install_request_routing
+from scraper.page_cache import CacheMissError, goto_cached
+from scraper.rate_limiter import backoff_delay
 
 # =========================
 # 設定・ロガー
@@ -20,13 +25,15 @@ logger = setup_logger(filename, log_file=config.LOG_PATH)
 # =========================
 # ページ操作
 # =========================
-def goto_with_retry(page: Page, url: str, retries: int = 2) -> None:
-    """機種ページへ軽くリトライしながら遷移する。"""
+def goto_with_retry(page: Page, url: str, retries: int = 2, date: str | None = None) -> None:
+    """機種ページへ軽くリトライしながら遷移する（ページキャッシュがあればそれを使う）。"""
     last_error: Exception | None = None
     for attempt in range(1, retries + 1):
         try:
-            page.goto(url, timeout=90_000, wait_until="domcontentloaded")
+            goto_cached(page, url, "model", date, timeout=90_000, wait_until="domcontentloaded")
             return
+        except CacheMissError:
+            raise
         except Exception as e:
             last_error = e
             logger.warning(
@@ -36,6 +43,10 @@ def goto_with_retry(page: Page, url: str, retries: int = 2) -> None:
                 url,
                 e,
             )
+            if attempt < retries:
+                delay = backoff_delay(attempt)
+                logger.debug("機種ページの再取得まで %.2f 秒待機します: url=%s", delay, url)
+                time.sleep(delay)
     if last_error is not None:
         raise last_error
 
@@ -57,6 +68,154 @@ def _log_model_skip(
     )
 
 
+TARGET_MODEL = "ジャグラー"
+MODEL_TITLE_CSS = "div.tab_content > h2"
+MODEL_TABLE_ROW_CSS = "div > div.table_wrap > table > tbody > tr"
+
+# テーブル全行の th/td テキストを1回の evaluate でまとめて取得する
+# （セルごとに inner_text() を呼ぶとブラウザとの往復がセル数分発生するため）
+MODEL_TABLE_ROWS_JS = """(rows) => rows.map((tr) => ({
+    th: Array.from(tr.querySelectorAll("th"), (el) => el.innerText),
+    td: Array.from(tr.querySelectorAll("td"), (el) => el.innerText),
+}))"""
+INNER_TEXTS_JS = "(els) => els.map((el) => el.innerText)"
+# HTML を直接パースする場合はブラウザのように tbody が補完されないため、tbody の有無を問わない
+MODEL_TABLE_ROW_HTML_CSS = "div > div.table_wrap > table tr"
+
+
+def _unpack_model_url(model_url_tuple: tuple) -> tuple:
+    """extract_model_url の返却タプルを10要素に揃える（古い5要素形式も受け付ける）。"""
+    values = tuple(model_url_tuple[:10])
+    return values + (None,) * (10 - len(values))
+
+
+def _select_h2_model(h2_texts: list[str]) -> str:
+    """h2 の文字列一覧から機種名を選ぶ。ジャグラーを含むものを優先する。"""
+    for text in h2_texts:
+        txt = extract_model_name(text)
+        if TARGET_MODEL in txt:
+            return txt
+    if h2_texts:
+        return extract_model_name(h2_texts[-1])
+    return ""
+
+
+def _resolve_db_model_name(
+    model: str,
+    model_url_tuple: tuple,
+    matcher: ModelMatcher,
+) -> str | None:
+    """DB保存用の機種名を返す。h2 と canonical_model_name が食い違う場合は None。"""
+    _, _, _, _, _, canonical_model_name, raw_model_name, normalized_model_name, match_type, matched_alias = (
+        _unpack_model_url(model_url_tuple)
+    )
+    if not canonical_model_name:
+        return model
+
+    h2_match = matcher.match(model) if model else None
+    if model and (h2_match is None or h2_match.canonical_name != canonical_model_name):
+        logger.warning(
+            "h2_model と canonical_model_name が想定外に違うため機種データをスキップします: "
+            "raw_model_name=%s, normalized_model_name=%s, h2_model=%s, "
+            "canonical_model_name=%s, match_type=%s, matched_alias=%s",
+            raw_model_name,
+            normalized_model_name,
+            model,
+            canonical_model_name,
+            match_type,
+            matched_alias,
+        )
+        return None
+
+    logger.debug(
+        "DB保存用機種名に canonical_model_name を使用: raw_model_name=%s, "
+        "normalized_model_name=%s, h2_model=%s, canonical_model_name=%s, "
+        "match_type=%s, matched_alias=%s",
+        raw_model_name,
+        normalized_model_name,
+        model,
+        canonical_model_name,
+        match_type,
+        matched_alias,
+    )
+    return canonical_model_name
+
+
+def _table_from_row_cells(row_cells: list[dict]) -> tuple[list[str], list[list[str]]]:
+    """行ごとの th/td 文字列からヘッダーとデータ行を作る。
+
+    ヘッダーは先頭行の th、データ行は td を持つ行（空行はスキップ）。
+    """
+    if not row_cells:
+        return [], []
+    header = [_norm_text(text) for text in row_cells[0].get("th", [])]
+    if not header:
+        return [], []
+    table = [
+        [_norm_text(text) for text in cells["td"]]
+        for cells in row_cells
+        if cells.get("td")
+    ]
+    return header, table
+
+
+def parse_model_table_html(html: str) -> tuple[list[str], list[str], list[list[str]]]:
+    """保存済みの機種ページ HTML から h2 文字列・ヘッダー・データ行を取り出す。
+
+    ブラウザを使わずに evaluate 版と同じ形のデータを返す（HTTP取得モード・ベンチマーク用）。
+    """
+    soup = BeautifulSoup(html, "lxml")
+    h2_texts = [el.get_text() for el in soup.select(MODEL_TITLE_CSS)]
+    row_cells = [
+        {
+            "th": [el.get_text() for el in tr.select("th")],
+            "td": [el.get_text() for el in tr.select("td")],
+        }
+        for tr in soup.select(MODEL_TABLE_ROW_HTML_CSS)
+    ]
+    header, table = _table_from_row_cells(row_cells)
+    return h2_texts, header, table
+
+
+def _build_model_frame(
+    header: list[str],
+    table: list[list[str]],
+    *,
+    pref: str,
+    hall: str,
+    model: str,
+    date: str,
+) -> pd.DataFrame:
+    """正規化済みのヘッダー・行から台データの DataFrame を作る。
+
+    取り込めない場合はスキップ理由を持つ ValueError を送出する。
+    """
+    if not header:
+        raise ValueError("テーブルヘッダーが空")
+    logger.debug(header)
+    if not table:
+        raise ValueError("テーブルデータが空")
+    for t in table:
+        logger.debug(t)
+
+    df = pd.DataFrame(table, columns=header)
+    if "台番" not in df.columns:
+        raise ValueError("台番列が見つからない")
+    df = df[~df["台番"].astype(str).str.contains("平均")]
+    df["pref"] = pref
+    df["hall"] = hall
+    df["model"] = model
+    df["date"] = date
+    logger.debug(
+        "機種データ取得成功: hall=%s, date=%s, model=%s, rows=%d",
+        hall,
+        date,
+        model,
+        len(df),
+    )
+    return df
+
+
 def extract_model_data(
     page: Page, model_urls: list[tuple]
 ) -> pd.DataFrame:
@@ -66,20 +225,15 @@ def extract_model_data(
     """
 
     frames: list[pd.DataFrame] = []
-    alias_to_canonical = build_alias_to_canonical()
+    matcher = get_model_matcher()
 
     for model_url_tuple in model_urls:
-        pref, hall, date, date_url, model_url = model_url_tuple[:5]
-        canonical_model_name = model_url_tuple[5] if len(model_url_tuple) >= 6 else None
-        raw_model_name = model_url_tuple[6] if len(model_url_tuple) >= 7 else None
-        normalized_model_name = model_url_tuple[7] if len(model_url_tuple) >= 8 else None
-        match_type = model_url_tuple[8] if len(model_url_tuple) >= 9 else None
-        matched_alias = model_url_tuple[9] if len(model_url_tuple) >= 10 else None
+        pref, hall, date, date_url, model_url = _unpack_model_url(model_url_tuple)[:5]
         url = urljoin(date_url, model_url)
         try:
             logger.debug("機種ページにアクセスします。")
             logger.debug("url: %s", url)
-            goto_with_retry(page, url, retries=2)
+            goto_with_retry(page, url, retries=2, date=date)
 
             # スクリーンショット
             # page.screenshot(
@@ -91,105 +245,34 @@ def extract_model_data(
 
             # 機種名 (DB保存用は canonical_model_name を優先)
             model = ""
-            css = "div.tab_content > h2"
-            # css  = "div > h2"
-            TARGET_MODEL = "ジャグラー"
             try:
-                page.wait_for_selector(css, timeout=10_000)
-                h2s = page.locator(css)
-                for i in range(h2s.count()):
-                    txt = extract_model_name(h2s.nth(i).inner_text())
-                    if TARGET_MODEL in txt:
-                        model = txt
-                        break
-                if not model and h2s.count():
-                    model = extract_model_name(h2s.nth(i).inner_text())
+                page.wait_for_selector(MODEL_TITLE_CSS, timeout=10_000)
+                h2_texts = page.locator(MODEL_TITLE_CSS).evaluate_all(INNER_TEXTS_JS)
+                model = _select_h2_model(h2_texts)
                 logger.debug("機種名(h2): %s", model)
             except PWTimeout:
                 logger.warning("機種タイトルが取得できませんでした: %s", url)
 
-            if canonical_model_name:
-                h2_match = match_target_model_detail(model, alias_to_canonical) if model else None
-                if model and (h2_match is None or h2_match.canonical_name != canonical_model_name):
-                    logger.warning(
-                        "h2_model と canonical_model_name が想定外に違うため機種データをスキップします: "
-                        "raw_model_name=%s, normalized_model_name=%s, h2_model=%s, "
-                        "canonical_model_name=%s, match_type=%s, matched_alias=%s",
-                        raw_model_name,
-                        normalized_model_name,
-                        model,
-                        canonical_model_name,
-                        match_type,
-                        matched_alias,
-                    )
-                    continue
-
-                logger.debug(
-                    "DB保存用機種名に canonical_model_name を使用: raw_model_name=%s, "
-                    "normalized_model_name=%s, h2_model=%s, canonical_model_name=%s, "
-                    "match_type=%s, matched_alias=%s",
-                    raw_model_name,
-                    normalized_model_name,
-                    model,
-                    canonical_model_name,
-                    match_type,
-                    matched_alias,
-                )
-                model = canonical_model_name
+            model = _resolve_db_model_name(model, model_url_tuple, matcher)
+            if model is None:
+                continue
 
             # テーブルの取得
-            css = "div > div.table_wrap > table > tbody > tr"
             try:
-                page.wait_for_selector(css, timeout=15_000)
+                page.wait_for_selector(MODEL_TABLE_ROW_CSS, timeout=15_000)
             except PWTimeout as e:
                 _log_model_skip(hall, date, model_url, url, e)
                 continue
 
-            rows = page.locator(css)
-            if rows.count() == 0:
+            row_cells = page.locator(MODEL_TABLE_ROW_CSS).evaluate_all(MODEL_TABLE_ROWS_JS)
+            if not row_cells:
                 _log_model_skip(hall, date, model_url, url, "テーブル行が空")
                 continue
 
-            # th行(header)処理
-            ths = rows.nth(0).locator("th")
-            header = [_norm_text(ths.nth(i).inner_text()) for i in range(ths.count())]
-            if not header:
-                _log_model_skip(hall, date, model_url, url, "テーブルヘッダーが空")
-                continue
-            logger.debug(header)
-            # td(date)行処理
-            table: list[list[str]] = []
-            for j in range(rows.count()):
-                tds = rows.nth(j).locator("td")
-                row = []
-                for k in range(tds.count()):
-                    row.append(_norm_text(tds.nth(k).inner_text()))
-                if row:  # 空行スキップ
-                    table.append(row)
-
-            if not table:
-                _log_model_skip(hall, date, model_url, url, "テーブルデータが空")
-                continue
-            for t in table:
-                logger.debug(t)
-
-            df = pd.DataFrame(table, columns=header)
-            if "台番" not in df.columns:
-                _log_model_skip(hall, date, model_url, url, "台番列が見つからない")
-                continue
-            df = df[~df["台番"].astype(str).str.contains("平均")]
-            df["pref"] = pref
-            df["hall"] = hall
-            df["model"] = model
-            df["date"] = date
-            logger.debug(
-                "機種データ取得成功: hall=%s, date=%s, model=%s, rows=%d",
-                hall,
-                date,
-                model,
-                len(df),
+            header, table = _table_from_row_cells(row_cells)
+            frames.append(
+                _build_model_frame(header, table, pref=pref, hall=hall, model=model, date=date)
             )
-            frames.append(df)
         except Exception as e:
             _log_model_skip(hall, date, model_url, url, e)
             continue
@@ -211,6 +294,7 @@ if __name__ == "__main__":
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
         page = browser.new_page()
+        install_request_routing(page)
 
         date_urls = extract_date_url(hall_url, page, period=period)
 
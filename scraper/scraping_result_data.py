@@ -4,6 +4,7 @@ import pandas as pd
 from urllib.parse import quote, urljoin
 import os
 import time
+from contextlib import contextmanager
 
 from config import config
 from utils.logger_setup import setup_logger
@@ -11,6 +12,8 @@ from utils.utils import _norm_text, extract_model_name
 from scraper.scraping_hall_page import extract_date_url
 from scraper.scraping_date_page import extract_model_url
 from scraper.scraping_model_page import extract_model_data
+from scraper.request_routing import install_request_routing
+from scraper.raw_store import save_hall_date_frames
 
 # =========================
 # 設定・ロガー
@@ -27,63 +30,131 @@ def extract_result_data_by_dates(
     period: int = 1,
     date_filter=None,
     target_dates: set[str] | None = None,
+    on_date_result=None,
+    stop_at: str | None = None,
+    min_period: int = 0,
 ) -> list[tuple[str, str, str, pd.DataFrame, int]]:
     """ホール×日付単位で結果データを取得する。
 
-    returns: List[(pref, hall, date, df_result, model_count)]
+    stop_at を渡した場合、日付リンクは先頭 min_period 件より後ろを stop_at 以前の日付で打ち切る。
+    returns: List[(pref, hall, date, df_result, model_count)]（on_date_result を渡した場合は空）
     """
-    discovery_start = time.perf_counter()
-    date_urls = extract_date_url(hall_url, page, period=period, target_dates=target_dates)
+    return crawl_result_data_by_dates(
+        lambda hall_url, period, target_dates: extract_date_url(
+            hall_url, page, period=period, target_dates=target_dates, stop_at=stop_at, min_period=min_period
+        ),
+        lambda hall, pref, date_url, date: extract_model_url(page, hall, pref, date_url, date),
+        lambda model_urls: extract_model_data(page, model_urls),
+        hall_url,
+        period,
+        date_filter=date_filter,
+        target_dates=target_dates,
+        on_date_result=on_date_result,
+    )
+
+
+def _add_date_result(results: list, result: tuple, on_date_result=None) -> None:
+    """日付単位の結果を on_date_result があればすぐに渡し、無ければ results に追加する。
+
+    on_date_result に渡した結果は results に残さない（ホール全体の DataFrame をメモリに溜めないため）。
+    """
+    if on_date_result is not None:
+        on_date_result(result)
+    else:
+        results.append(result)
+
+
+def log_date_discovery(hall_url: str, date_urls: list, started_at: float) -> None:
     logger.info(
         "timing stage=date_discovery hall_url=%s date_count=%d duration_sec=%.2f",
         hall_url,
         len(date_urls),
-        time.perf_counter() - discovery_start,
+        time.perf_counter() - started_at,
     )
+
+
+@contextmanager
+def timed_date(hall: str, date: str):
+    """日付1件の処理時間を timing stage=date で記録する。yield した dict の status に結果を書く。"""
+    state = {"status": "started"}
+    date_start = time.perf_counter()
+    try:
+        yield state
+    finally:
+        logger.info(
+            "timing stage=date hall=%s date=%s status=%s duration_sec=%.2f",
+            hall,
+            date,
+            state["status"],
+            time.perf_counter() - date_start,
+        )
+
+
+def record_date_result(
+    results: list,
+    pref: str,
+    hall: str,
+    date: str,
+    model_urls: list,
+    df_result: pd.DataFrame | None,
+    on_date_result=None,
+) -> str:
+    """1日分の機種URLと結果データを保存して results に追加し、timing に記録する status を返す。
+
+    model_urls が空なら df_result は使わない（機種ページを取得していないため None でよい）。
+    """
+    if not model_urls:
+        logger.warning("機種URLが取得できませんでした: %s / %s / %s", pref, hall, date)
+        _add_date_result(results, (pref, hall, date, pd.DataFrame(columns=RESULT_COLUMNS), 0), on_date_result)
+        return "empty_model_urls"
+
+    if df_result.empty:
+        status = "empty_result"
+        logger.warning("結果データが空です: %s / %s / %s", pref, hall, date)
+        df_result = pd.DataFrame(columns=RESULT_COLUMNS)
+    else:
+        status = "scraped"
+    save_hall_date_frames(pref, hall, date, pd.DataFrame(model_urls, columns=MODEL_URL_COLUMNS), df_result)
+    _add_date_result(results, (pref, hall, date, df_result, len(model_urls)), on_date_result)
+    return status
+
+
+def crawl_result_data_by_dates(
+    extract_dates,
+    extract_models,
+    extract_data,
+    hall_url: str,
+    period: int = 1,
+    date_filter=None,
+    target_dates: set[str] | None = None,
+    on_date_result=None,
+    before_date=None,
+) -> list[tuple[str, str, str, pd.DataFrame, int]]:
+    """ホール → 日付 → 機種の巡回処理。ページ取得方法は引数の関数で差し替える。
+
+    extract_dates(hall_url, period, target_dates) -> List[(pref, hall, date, date_url)]
+    extract_models(hall, pref, date_url, date) -> extract_model_url と同じ形式
+    extract_data(model_urls) -> extract_model_data と同じ形式
+    on_date_result((pref, hall, date, df_result, model_count)) は日付ごとの取得完了時に呼ばれる
+    （ホール全体の完了を待たずに DB 登録などを始めるため）。渡した場合、戻り値は空のリストになる
+    before_date() は取得する日付ごとに、ページを使う前に呼ばれる（ブラウザの作り直しなど）
+    async 版（async_scraping.extract_result_data_by_dates_async）も同じ補助関数で日付ごとの処理を行う。
+    """
+    discovery_start = time.perf_counter()
+    date_urls = extract_dates(hall_url, period, target_dates)
+    log_date_discovery(hall_url, date_urls, discovery_start)
     results: list[tuple[str, str, str, pd.DataFrame, int]] = []
 
     for pref, hall, date, date_url in date_urls:
-        date_start = time.perf_counter()
-        status = "started"
-        try:
+        with timed_date(hall, date) as timing:
             if date_filter is not None and not date_filter(pref, hall, date):
-                status = "skipped_existing"
+                timing["status"] = "skipped_existing"
                 continue
-
-            model_urls = extract_model_url(page, hall, pref, date_url, date)
-            model_count = len(model_urls)
-            if not model_urls:
-                status = "empty_model_urls"
-                logger.warning("機種URLが取得できませんでした: %s / %s / %s", pref, hall, date)
-                results.append((pref, hall, date, pd.DataFrame(columns=RESULT_COLUMNS), model_count))
-                continue
-
-            df_model_urls = pd.DataFrame(model_urls, columns=MODEL_URL_COLUMNS)
-            df_model_urls.to_csv(
-                config.CSV_DIR / f"{pref}_{hall}_{date}_model_urls.csv",
-                index=False,
-            )
-
-            df_result = extract_model_data(page, model_urls)
-            if df_result.empty:
-                status = "empty_result"
-                logger.warning("結果データが空です: %s / %s / %s", pref, hall, date)
-                df_result = pd.DataFrame(columns=RESULT_COLUMNS)
-            else:
-                status = "scraped"
-            df_result.to_csv(
-                config.CSV_DIR / f"{pref}_{hall}_{date}_result_data.csv",
-                index=False,
-            )
-            results.append((pref, hall, date, df_result, model_count))
-        finally:
-            logger.info(
-                "timing stage=date hall=%s date=%s status=%s duration_sec=%.2f",
-                hall,
-                date,
-                status,
-                time.perf_counter() - date_start,
-            )
+            if before_date is not None:
+                before_date()
+            model_urls = extract_models(hall, pref, date_url, date)
+            df_result = extract_data(model_urls) if model_urls else None
+            timing["status"] = record_date_result(results, pref, hall, date, model_urls, df_result, on_date_result)
 
     return results
 
@@ -97,6 +168,7 @@ def extract_result_data(hall_url: str, period: int = 1):
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
         page = browser.new_page()
+        install_request_routing(page)
 
         date_urls = extract_date_url(hall_url, page, period=period)
 
@@ -0,0 +1,320 @@
+"""GitHub Actions の matrix で複数ランナーに収集を分担させるためのシャード分割と統合。
+
+実行例:
+    # ログからホールごとの所要時間を集計する（config/hall_durations.json を更新）
+    python -m scraper.sharding durations data/logs/minrepo.log
+
+    # 既存の値にログの値を上書きして別ファイルへ書く（ログに出てこないホールは既存の値を残す）
+    python -m scraper.sharding durations --base config/hall_durations.json --output data/hall_durations.json data/logs/minrepo.log
+
+    # 全シャードの集計結果を統合し、品質判定とマテビュー更新を1回だけ行う
+    python -m scraper.sharding merge
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import statistics
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from config import config
+from utils.logger_setup import setup_logger
+from scraper.run_monitor import (
+    RunQualityError,
+    build_quality_issues,
+    emit_github_annotation,
+    positive_int_env,
+)
+
+# =========================
+# 設定・ロガー
+# =========================
+filename, ext = os.path.splitext(os.path.basename(__file__))
+logger = setup_logger(filename, log_file=config.LOG_PATH)
+
+HALL_DURATIONS_PATH = config.BASE_DIR / "config" / "hall_durations.json"
+SHARD_SUMMARY_DIR = config.DATA_DIR / "shards"
+
+# timing stage=hall の完了行（ホール名に空白を含む場合があるため worker= までを名前とみなす）
+HALL_TIMING_PATTERN = re.compile(
+    r"timing stage=hall hall=(?P<hall>.+?) worker=\d+ status=completed duration_sec=(?P<sec>[\d.]+)"
+)
+
+
+@dataclass(frozen=True)
+class ShardSpec:
+    index: int = 0
+    count: int = 1
+
+    def __post_init__(self) -> None:
+        if not 0 <= self.index < self.count:
+            raise ValueError(f"SHARD_INDEX は 0 以上 SHARD_COUNT 未満で指定してください: {self.index}")
+
+    @property
+    def enabled(self) -> bool:
+        return self.count > 1
+
+    @classmethod
+    def from_env(cls) -> "ShardSpec":
+        """SHARD_INDEX（0始まり）/ SHARD_COUNT から作る。未指定なら分割しない。"""
+        count = positive_int_env("SHARD_COUNT", 1)
+        raw_index = os.getenv("SHARD_INDEX", "").strip() or "0"
+        try:
+            index = int(raw_index)
+        except ValueError as exc:
+            raise ValueError(f"SHARD_INDEX は 0 以上の整数で指定してください: {raw_index}") from exc
+        return cls(index=index, count=count)
+
+
+# =========================
+# ホールの割り当て
+# =========================
+def slug_hash(slug: str) -> int:
+    """実行ごとに変わらないホールの順序付け用ハッシュ（組み込みの hash() は実行ごとに変わる）。"""
+    return int(hashlib.sha256(slug.encode("utf-8")).hexdigest()[:16], 16)
+
+
+def load_hall_durations(path: Path = HALL_DURATIONS_PATH) -> dict[str, float]:
+    """ホール名 → 所要時間（秒）を読み込む。ファイルが無ければ空。"""
+    if not path.exists():
+        return {}
+    with path.open("r", encoding="utf-8") as f:
+        return {str(k): float(v) for k, v in json.load(f).items()}
+
+
+def build_hall_durations(log_paths: list[Path]) -> dict[str, float]:
+    """ログの timing stage=hall（status=completed）からホールごとの所要時間の中央値を求める。"""
+    samples: dict[str, list[float]] = {}
+    for log_path in log_paths:
+        with log_path.open("r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                m = HALL_TIMING_PATTERN.search(line)
+                if m:
+                    samples.setdefault(m.group("hall"), []).append(float(m.group("sec")))
+    return {hall: round(statistics.median(secs), 2) for hall, secs in sorted(samples.items())}
+
+
+def assign_shards(
+    hall_list: list[config.HallInfo],
+    shard_count: int,
+    durations: dict[str, float] | None = None,
+) -> list[list[config.HallInfo]]:
+    """ホールを所要時間の合計がなるべく均等になるよう shard_count 個に分ける。
+
+    所要時間の長いホールから順に、その時点で合計が最も小さいシャードへ入れる（LPT）。
+    同じ所要時間のホールは slug のハッシュ順に並べるため、全ランナーで同じ割り当てになる。
+    履歴の無いホールは既知のホールの平均所要時間とみなす（履歴が全く無ければ件数で均等に分ける）。
+    各シャード内のホールは元の設定順を保つ。
+    """
+    durations = durations or {}
+    known = [durations[h.name] for h in hall_list if h.name in durations]
+    default_sec = statistics.fmean(known) if known else 1.0
+
+    order = {id(h): i for i, h in enumerate(hall_list)}
+    weighted = sorted(hall_list, key=lambda h: (-durations.get(h.name, default_sec), slug_hash(h.slug)))
+
+    shards: list[list[config.HallInfo]] = [[] for _ in range(shard_count)]
+    loads = [0.0] * shard_count
+    for h in weighted:
+        target = min(range(shard_count), key=lambda i: (loads[i], len(shards[i]), i))
+        shards[target].append(h)
+        loads[target] += durations.get(h.name, default_sec)
+    return [sorted(shard, key=lambda h: order[id(h)]) for shard in shards]
+
+
+def select_shard_halls(
+    hall_list: list[config.HallInfo],
+    shard: ShardSpec,
+    durations: dict[str, float] | None = None,
+) -> list[config.HallInfo]:
+    """このランナーが担当するホールを返す。"""
+    if not shard.enabled:
+        return hall_list
+    durations = load_hall_durations() if durations is None else durations
+    shards = assign_shards(hall_list, shard.count, durations)
+    selected = shards[shard.index]
+    known = [durations[h.name] for h in hall_list if h.name in durations]
+    default_sec = statistics.fmean(known) if known else 0.0
+    logger.info(
+        "timing stage=shard index=%d count=%d halls=%d total_halls=%d known_durations=%d expected_sec=%.2f",
+        shard.index,
+        shard.count,
+        len(selected),
+        len(hall_list),
+        len(known),
+        sum(durations.get(h.name, default_sec) for h in selected),
+    )
+    return selected
+
+
+# =========================
+# シャードごとの集計結果
+# =========================
+@dataclass
+class ShardSummary:
+    """シャードの収集結果。統合ステップで品質判定に使う件数だけを持つ。"""
+
+    shard_index: int
+    shard_count: int
+    run_id: str
+    hall_count: int = 0
+    target_count: int = 0
+    skipped_count: int = 0
+    scrape_target_count: int = 0
+    scraped_rows: int = 0
+    upserted_rows: int = 0
+    hall_error_count: int = 0
+    db_error_count: int = 0
+    changed_dates: list[str] = field(default_factory=list)
+    # 日次サマリーの更新に失敗した (hall_id, date)。統合ステップで再試行する
+    summary_error_hall_dates: list[tuple[int, str]] = field(default_factory=list)
+
+    def write(self, root: Path = SHARD_SUMMARY_DIR) -> Path:
+        root.mkdir(parents=True, exist_ok=True)
+        path = root / f"shard-{self.shard_index}.json"
+        path.write_text(json.dumps(asdict(self), ensure_ascii=False, indent=2), encoding="utf-8")
+        logger.info("シャードの集計結果を保存しました: %s", path)
+        return path
+
+
+def load_shard_summaries(root: Path = SHARD_SUMMARY_DIR) -> list[ShardSummary]:
+    summaries = []
+    for path in sorted(root.glob("shard-*.json")):
+        with path.open("r", encoding="utf-8") as f:
+            summary = ShardSummary(**json.load(f))
+        # JSON では [hall_id, date] の配列になるため組に戻す
+        summary.summary_error_hall_dates = [(int(h), str(d)) for h, d in summary.summary_error_hall_dates]
+        summaries.append(summary)
+    return summaries
+
+
+def merge_shard_summaries(
+    summaries: list[ShardSummary],
+    shard_count: int | None = None,
+    summary_error_count: int | None = None,
+) -> tuple[ShardSummary, list[str]]:
+    """全シャードの件数を合算し、品質判定の問題点を返す。
+
+    shard_count を省略した場合は集計結果に記録されたシャード数を使う。
+    集計結果が無いシャード（異常終了したランナー）も問題として扱う。
+    summary_error_count は再試行後も日次サマリーを更新できなかった組の数（省略時は記録された全件）。
+    """
+    if shard_count is None:
+        shard_count = max((s.shard_count for s in summaries), default=1)
+    total = ShardSummary(
+        shard_index=-1,
+        shard_count=shard_count,
+        run_id=",".join(sorted({s.run_id for s in summaries})),
+    )
+    for s in summaries:
+        for name in (
+            "hall_count",
+            "target_count",
+            "skipped_count",
+            "scrape_target_count",
+            "scraped_rows",
+            "upserted_rows",
+            "hall_error_count",
+            "db_error_count",
+        ):
+            setattr(total, name, getattr(total, name) + getattr(s, name))
+    total.changed_dates = sorted({date for s in summaries for date in s.changed_dates})
+    total.summary_error_hall_dates = sorted({tuple(pair) for s in summaries for pair in s.summary_error_hall_dates})
+    if summary_error_count is None:
+        summary_error_count = len(total.summary_error_hall_dates)
+
+    issues: list[str] = []
+    missing = sorted(set(range(shard_count)) - {s.shard_index for s in summaries})
+    if missing:
+        issues.append(f"集計結果の無いシャードがあります: {','.join(map(str, missing))}")
+    issues.extend(
+        build_quality_issues(
+            hall_count=total.hall_count,
+            target_count=total.target_count,
+            hall_error_count=total.hall_error_count,
+            db_error_count=total.db_error_count,
+            summary_error_count=summary_error_count,
+        )
+    )
+    return total, issues
+
+
+def run_shard_merge(root: Path = SHARD_SUMMARY_DIR, refresh_views: bool = True) -> ShardSummary:
+    """統合ステップ: 件数を合算してログに出し、マテビューを1回だけ更新してから品質判定する。
+
+    シャードで日次サマリーを更新できなかったホール×日付はここで再試行し、残れば品質判定で失敗にする。
+    """
+    summaries = load_shard_summaries(root)
+    summary_errors = sorted({pair for s in summaries for pair in s.summary_error_hall_dates})
+    if summary_errors:
+        from scraper.daily_summaries import retry_daily_summaries
+        from scraper.data_to_supabase import get_supabase_client
+
+        summary_errors = retry_daily_summaries(get_supabase_client(), summary_errors)
+    total, issues = merge_shard_summaries(
+        summaries, positive_int_env("SHARD_COUNT", 0) or None, summary_error_count=len(summary_errors)
+    )
+    logger.info(
+        "シャード統合結果: shards=%d/%d, hall_count=%d, target_count=%d, skipped_count=%d, "
+        "scrape_target_count=%d, scraped_rows=%d, upserted_rows=%d, hall_error_count=%d, db_error_count=%d",
+        len(summaries),
+        total.shard_count,
+        total.hall_count,
+        total.target_count,
+        total.skipped_count,
+        total.scrape_target_count,
+        total.scraped_rows,
+        total.upserted_rows,
+        total.hall_error_count,
+        total.db_error_count,
+    )
+
+    if refresh_views and total.upserted_rows > 0:
+        # supabase クライアントは統合ステップでだけ必要なため、ここで読み込む
+        from scraper.data_to_supabase import get_supabase_client
+        from scraper.materialized_views import refresh_materialized_views
+
+        # 変更日付を記録していない集計結果（旧形式）が混ざる場合はすべて更新する
+        legacy = any(s.upserted_rows and not s.changed_dates for s in summaries)
+        changed_dates = None if legacy else set(total.changed_dates)
+        refresh_materialized_views(get_supabase_client(), changed_dates=changed_dates)
+    elif refresh_views:
+        logger.info("新規登録対象がないためマテビュー更新は呼びません。")
+
+    if issues:
+        message = "; ".join(issues)
+        logger.error("収集品質チェック失敗: %s", message)
+        emit_github_annotation("error", "収集品質チェック失敗", message)
+        raise RunQualityError(message)
+    return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="シャード分割用の所要時間集計と、シャード結果の統合")
+    sub = parser.add_subparsers(dest="command", required=True)
+    durations_parser = sub.add_parser("durations", help="ログからホールごとの所要時間を集計する")
+    durations_parser.add_argument("logs", nargs="+", type=Path)
+    durations_parser.add_argument("--output", type=Path, default=HALL_DURATIONS_PATH)
+    durations_parser.add_argument("--base", type=Path, help="ログに無いホールの値を引き継ぐ所要時間ファイル")
+    merge_parser = sub.add_parser("merge", help="全シャードの集計結果を統合する")
+    merge_parser.add_argument("--summary-dir", type=Path, default=SHARD_SUMMARY_DIR)
+    merge_parser.add_argument("--no-refresh", action="store_true", help="マテビュー更新を行わない")
+    args = parser.parse_args()
+
+    if args.command == "durations":
+        durations = load_hall_durations(args.base) if args.base is not None else {}
+        durations.update(build_hall_durations(args.logs))
+        durations = dict(sorted(durations.items()))
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(durations, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        logger.info("ホール所要時間を保存しました: halls=%d, path=%s", len(durations), args.output)
+    else:
+        run_shard_merge(args.summary_dir, refresh_views=not args.no_refresh)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,7 @@
 import os
+from dataclasses import dataclass
+
+from postgrest.exceptions import APIError
 from supabase import Client
 
 from config import config
@@ -7,6 +10,10 @@ from utils.logger_setup import setup_logger
 filename, ext = os.path.splitext(os.path.basename(__file__))
 logger = setup_logger(filename, log_file=config.LOG_PATH)
 
+PAGE_SIZE = 1000
+# migrations/sql/0002_count_results_by_hall_date.sql で作成する RPC
+COUNT_RESULTS_RPC = "count_results_by_hall_date"
+
 
 def get_hall_id(supabase: Client, pref: str, hall: str) -> int | None:
     """既存DBから prefecture + hall に一致する hall_id を取得する。"""
@@ -65,3 +72,94 @@ def has_enough_results(
     existing_count = count_results_by_hall_date(supabase, hall_id, date)
     should_skip = existing_count >= min_existing_rows
     return should_skip, existing_count, hall_id
+
+
+# =========================
+# 実行単位の一括確認
+# =========================
+def fetch_all_pages(query) -> list[dict]:
+    """PostgREST の上限行数を超える結果を range で分割取得する。"""
+    rows: list[dict] = []
+    offset = 0
+    while True:
+        res = query.range(offset, offset + PAGE_SIZE - 1).execute()
+        page = res.data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        offset += PAGE_SIZE
+
+
+@dataclass(frozen=True)
+class ExistingResultsIndex:
+    """start_date〜end_date の (hall_id, date) ごとの既存行数を保持する事前スキップ用索引。"""
+
+    start_date: str
+    end_date: str
+    hall_ids: dict[tuple[str, str], int]
+    counts: dict[tuple[int, str], int]
+
+    def covers(self, date: str) -> bool:
+        return self.start_date <= date <= self.end_date
+
+    def has_enough_results(
+        self,
+        pref: str,
+        hall: str,
+        date: str,
+        min_existing_rows: int = 10,
+    ) -> tuple[bool, int, int | None]:
+        """has_enough_results と同じ判定をメモリ上で行う。date は covers() の範囲内であること。"""
+        hall_id = self.hall_ids.get((pref, hall))
+        if hall_id is None:
+            logger.info("DB未登録ホールのため取得対象にします: %s / %s / %s", pref, hall, date)
+            return False, 0, None
+
+        existing_count = self.counts.get((hall_id, date), 0)
+        return existing_count >= min_existing_rows, existing_count, hall_id
+
+    def latest_date(self, hall_id: int, min_existing_rows: int = 10) -> str | None:
+        """期間内で既存行数が閾値以上ある最新の日付。無ければ None。"""
+        return max(
+            (date for (hid, date), count in self.counts.items() if hid == hall_id and count >= min_existing_rows),
+            default=None,
+        )
+
+
+def load_existing_results_index(
+    supabase: Client,
+    start_date: str,
+    end_date: str,
+) -> ExistingResultsIndex | None:
+    """ホール一覧と期間内の (hall_id, date) 別件数をまとめて取得する。
+
+    件数は RPC（count_results_by_hall_date）で集計済みの行だけを受け取る。
+    RPC が未作成などで失敗した場合は None を返し、呼び出し側は従来の個別確認を使う。
+    """
+    try:
+        prefectures = fetch_all_pages(
+            supabase.table("prefectures").select("prefecture_id,name").order("prefecture_id")
+        )
+        halls = fetch_all_pages(
+            supabase.table("halls").select("hall_id,name,prefecture_id").order("hall_id")
+        )
+        count_rows = fetch_all_pages(
+            supabase.rpc(COUNT_RESULTS_RPC, {"start_date": start_date, "end_date": end_date})
+            .order("hall_id")
+            .order("date")
+        )
+    except APIError as e:
+        logger.warning("既存件数の一括取得に失敗したため、ホール・日付ごとに確認します: %s", e)
+        return None
+
+    pref_names = {row["prefecture_id"]: row["name"] for row in prefectures}
+    hall_ids = {
+        (pref_names.get(row["prefecture_id"]), row["name"]): row["hall_id"] for row in halls
+    }
+    counts = {(row["hall_id"], str(row["date"])): int(row["row_count"]) for row in count_rows}
+    return ExistingResultsIndex(
+        start_date=start_date,
+        end_date=end_date,
+        hall_ids=hall_ids,
+        counts=counts,
+    )
@@ -0,0 +1,13 @@
+"""テスト中のログ・CSV・キャッシュなどを一時ディレクトリに書き、リポジトリの data/ を汚さない。
+
+config は import 時に出力先を決めるため、テストモジュールより先に読まれるここで DATA_DIR を設定する。
+"""
+import atexit
+import os
+import shutil
+import tempfile
+
+if not os.getenv("DATA_DIR", "").strip():
+    _data_dir = tempfile.mkdtemp(prefix="minrepo-test-data-")
+    os.environ["DATA_DIR"] = _data_dir
+    atexit.register(shutil.rmtree, _data_dir, ignore_errors=True)
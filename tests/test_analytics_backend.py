@@ -0,0 +1,124 @@
+import datetime as dt
+import importlib.util
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+from scraper.local_mirror import export_parquet_snapshot, sync_local_mirror
+from tests.test_local_mirror import _FakeSupabase
+
+HAS_DUCKDB = importlib.util.find_spec("duckdb") is not None
+
+
+@unittest.skipUnless(HAS_DUCKDB, "duckdb が未インストールのため DuckDB の集計のテストをスキップします")
+class AnalyticsBackendTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.mirror = root / "mirror.sqlite"
+        self.out = root / "results_parquet"
+        env = mock.patch.dict(
+            os.environ, {"LOCAL_MIRROR_PATH": str(self.mirror), "ANALYTICS_PARQUET_DIR": str(self.out)}
+        )
+        env.start()
+        self.addCleanup(env.stop)
+
+        # 2026-10-01 〜 2026-11-14 の2ホール × 3台。成績は行ごとに変える
+        self.supabase = _FakeSupabase(days=45)
+        self.supabase.tables["models"][1]["name"] = "ネオアイムジャグラーEX"
+        for i, row in enumerate(self.supabase.tables["results"]):
+            row.update(game=(i * 1237) % 9000, bb=(i * 7) % 41, rb=(i * 11) % 37, medal=(i * 389) % 6000 - 3000)
+        sync_local_mirror(self.supabase, self.mirror)
+        export_parquet_snapshot(self.mirror, self.out)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_matches_pandas_pivot_and_setting_prediction(self) -> None:
+        from app import analytics_backend, mirror_backend
+        from app.utils import calc_grape_rate, continuous_setting
+
+        start, end = dt.date(2026, 10, 1), dt.date(2026, 11, 14)
+        df = calc_grape_rate(mirror_backend.fetch_results_by_units(start, end, pref="東京都"))
+        df["weight_setting"] = df.apply(
+            lambda r: continuous_setting(r["game"], r["rb"], r["bb"], r["grape_rate"], r["model"]), axis=1
+        )
+        df["weight_setting"] = pd.to_numeric(df["weight_setting"], errors="coerce").round(1)
+        values = ["game", "medal", "weight_setting"]
+        expected = df.pivot_table(index=["hall", "model"], columns=["date"], values=values, aggfunc="mean")
+
+        agg = analytics_backend.aggregate_by_date(["hall", "model"], start, end, pref="東京都")
+        self.assertEqual(2 * 45, len(agg))
+        actual = agg.pivot_table(index=["hall", "model"], columns=["date"], values=values)
+        pd.testing.assert_frame_equal(expected, actual[expected.columns], check_dtype=False)
+
+        rows = analytics_backend.unit_results(start, end, pref="東京都", unit_no=[1])
+        self.assertEqual(45, len(rows))
+        self.assertEqual("2026-11-14", rows["date"].iloc[0])
+        # 設定予測は (hall, model, unit_no, date) で行に戻すので、台ごとの値も pandas と一致する
+        expected_rows = df[df["unit_no"] == 1].set_index("date")["weight_setting"]
+        actual_rows = rows.set_index("date")["weight_setting"].round(1)
+        pd.testing.assert_series_equal(
+            expected_rows.sort_index(), actual_rows.sort_index(), check_dtype=False, check_names=False
+        )
+
+    def test_unit_stats_and_payout_rates(self) -> None:
+        from app import analytics_backend
+
+        stats = analytics_backend.unit_stats(day_last=1, pref="東京都")
+        # 末尾1の日は 10/1, 10/11, 10/21, 10/31, 11/1, 11/11
+        self.assertEqual([6, 6, 6], stats["count"].tolist())
+        self.assertEqual([1, 2, 3], stats["rb_rank"].tolist())
+        self.assertTrue(stats["rb_rate"].is_monotonic_increasing)
+        self.assertTrue(stats["weight_setting"].between(1, 6).all())
+
+        limited = analytics_backend.unit_stats(day_last=1, pref="東京都", max_rb_rate=stats["rb_rate"].iloc[1])
+        self.assertEqual(2, len(limited))
+
+        weekday = analytics_backend.payout_rates("weekday", pref="埼玉県")
+        self.assertEqual(list(range(7)), weekday["weekday"].tolist())
+        rows = pd.DataFrame(self.supabase.tables["results"]).query("hall_id == 2")
+        sunday = rows[pd.to_datetime(rows["date"]).dt.dayofweek == 6]
+        expected = (sunday["game"].sum() * 3 + sunday["medal"].sum()) / (sunday["game"].sum() * 3) * 100
+        self.assertAlmostEqual(expected, weekday["medal_rate"].iloc[0])
+        self.assertEqual(len(sunday), weekday["count"].iloc[0])
+
+    def test_snapshot_rewrites_only_months_since(self) -> None:
+        from app import analytics_backend
+
+        october = self.out / "month=2026-10" / "results.parquet"
+        before = october.stat().st_mtime_ns
+        self.supabase.add_result(1, 1, 9, "2026-12-01", medal=500)
+        sync_local_mirror(self.supabase, self.mirror, since="2026-11-10")
+        # 11月は月ごと書き直す（14日 × 6台）
+        self.assertEqual(6 * 14 + 1, export_parquet_snapshot(self.mirror, self.out, since="2026-11-10"))
+
+        self.assertEqual(before, october.stat().st_mtime_ns)
+        rows = analytics_backend.unit_results(dt.date(2026, 12, 1), dt.date(2026, 12, 31))
+        self.assertEqual([9], rows["unit_no"].tolist())
+
+
+class StatsPeriodTest(unittest.TestCase):
+    def test_defaults_to_whole_snapshot(self) -> None:
+        from app import analytics_backend
+
+        with mock.patch.dict(os.environ, {"APP_ANALYTICS_STATS_MONTHS": ""}):
+            self.assertEqual((None, None), analytics_backend.stats_period())
+
+    def test_months_back_from_first_of_month(self) -> None:
+        from app import analytics_backend
+
+        today = dt.date(2026, 2, 17)
+        with mock.patch.dict(os.environ, {"APP_ANALYTICS_STATS_MONTHS": "3"}):
+            self.assertEqual((dt.date(2025, 11, 1), today), analytics_backend.stats_period(today))
+        with mock.patch.dict(os.environ, {"APP_ANALYTICS_STATS_MONTHS": "0"}):
+            with self.assertRaises(ValueError):
+                analytics_backend.stats_period(today)
+
+
+if __name__ == "__main__":
+    unittest.main()
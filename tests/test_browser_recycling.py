@@ -0,0 +1,95 @@
+import subprocess
+import sys
+import unittest
+
+from scraper.browser_recycling import MB, BrowserRecycler, process_tree_rss_bytes, track_new_child_processes
+
+
+class _Request:
+    def __init__(self, navigation: bool) -> None:
+        self._navigation = navigation
+
+    def is_navigation_request(self) -> bool:
+        return self._navigation
+
+
+class _Context:
+    def __init__(self) -> None:
+        self.handlers = []
+
+    def on(self, event, handler) -> None:
+        self.handlers.append((event, handler))
+
+    def emit(self, request) -> None:
+        for event, handler in self.handlers:
+            if event == "request":
+                handler(request)
+
+
+class BrowserRecyclerTest(unittest.TestCase):
+    def test_recycles_after_max_navigations(self) -> None:
+        recycler = BrowserRecycler(worker_id=1, engine_name="sync", max_navigations=2, rss_reader=lambda: None)
+        context = _Context()
+        recycler.watch(context)
+
+        context.emit(_Request(navigation=True))
+        context.emit(_Request(navigation=False))
+        self.assertIsNone(recycler.recycle_reason())
+        context.emit(_Request(navigation=True))
+        self.assertEqual("navigations", recycler.recycle_reason())
+
+        recycler.record_recycle("navigations", 0.1)
+        self.assertIsNone(recycler.recycle_reason())
+        self.assertEqual((1, 2), (recycler.recycles, recycler.total_navigations))
+
+    def test_recycles_over_rss_and_keeps_peak(self) -> None:
+        samples = iter([100 * MB, 300 * MB, 150 * MB])
+        recycler = BrowserRecycler(
+            worker_id=1, engine_name="async", max_rss_mb=200, rss_reader=lambda: next(samples)
+        )
+
+        self.assertIsNone(recycler.recycle_reason())
+        self.assertEqual("rss", recycler.recycle_reason())
+        self.assertIsNone(recycler.recycle_reason())
+        self.assertEqual(300 * MB, recycler.peak_rss_bytes)
+
+    def test_rss_recycle_waits_for_cooldown_navigations(self) -> None:
+        recycler = BrowserRecycler(
+            worker_id=1, engine_name="sync", max_rss_mb=200, rss_cooldown_navigations=2, rss_reader=lambda: 300 * MB
+        )
+        context = _Context()
+        recycler.watch(context)
+
+        self.assertEqual("rss", recycler.recycle_reason())
+        recycler.record_recycle("rss", 0.1)
+        # 作り直し直後は RSS が下がっていなくても作り直さない
+        self.assertIsNone(recycler.recycle_reason())
+        context.emit(_Request(navigation=True))
+        self.assertIsNone(recycler.recycle_reason())
+        context.emit(_Request(navigation=True))
+        self.assertEqual("rss", recycler.recycle_reason())
+
+    def test_rss_is_measured_for_processes_started_by_the_worker(self) -> None:
+        if process_tree_rss_bytes() is None:
+            self.skipTest("/proc がない環境")
+        with track_new_child_processes() as pids:
+            child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        try:
+            self.assertEqual([child.pid], pids)
+            recycler = BrowserRecycler(worker_id=1, engine_name="sync", browser_pids=pids)
+            child_rss = recycler.sample_rss()
+            self.assertGreater(child_rss, 0)
+            self.assertLess(child_rss, process_tree_rss_bytes())
+        finally:
+            child.kill()
+            child.wait()
+
+    def test_process_tree_rss_includes_current_process(self) -> None:
+        rss = process_tree_rss_bytes()
+        if rss is None:
+            self.skipTest("/proc がない環境")
+        self.assertGreater(rss, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
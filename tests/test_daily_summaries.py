@@ -0,0 +1,50 @@
+import unittest
+
+from scraper.daily_summaries import refresh_daily_summaries, retry_daily_summaries
+
+
+class _FakeSupabase:
+    def __init__(self):
+        self.calls = []
+
+    def rpc(self, name, params):
+        self.calls.append((name, params))
+        return self
+
+    def execute(self):
+        return type("Res", (), {"data": len(self.calls[-1][1]["hall_ids"]) * 3})()
+
+
+class RefreshDailySummariesTest(unittest.TestCase):
+    def test_sends_unique_hall_dates_in_chunks(self) -> None:
+        supabase = _FakeSupabase()
+        hall_dates = [(2, "2026-10-17"), (1, "2026-10-17"), (2, "2026-10-17"), (1, "2026-10-16")]
+
+        written = refresh_daily_summaries(supabase, hall_dates, chunk_size=2)
+
+        self.assertEqual(9, written)
+        self.assertEqual(
+            [
+                ("refresh_daily_summaries", {"hall_ids": [1, 1], "dates": ["2026-10-16", "2026-10-17"]}),
+                ("refresh_daily_summaries", {"hall_ids": [2], "dates": ["2026-10-17"]}),
+            ],
+            supabase.calls,
+        )
+
+    def test_retry_returns_hall_dates_still_failing(self) -> None:
+        supabase = _FakeSupabase()
+        execute = supabase.execute
+
+        def fail_second_chunk():
+            if len(supabase.calls) == 2:
+                raise RuntimeError("timeout")
+            return execute()
+
+        supabase.execute = fail_second_chunk
+        hall_dates = [(1, "2026-10-16"), (1, "2026-10-17"), (2, "2026-10-17")]
+
+        self.assertEqual([(2, "2026-10-17")], retry_daily_summaries(supabase, hall_dates, chunk_size=2))
+
+
+if __name__ == "__main__":
+    unittest.main()
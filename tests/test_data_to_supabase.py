@@ -0,0 +1,246 @@
+import unittest
+
+import pandas as pd
+
+from scraper.data_to_supabase import (
+    DimensionCache,
+    add_data_result,
+    add_model,
+    add_prefecture_and_hall,
+    build_result_records,
+)
+from scraper.result_fingerprints import diff_result_records, fetch_existing_results_postgrest
+
+
+class _Res:
+    def __init__(self, data):
+        self.data = data
+
+
+class _FakeTable:
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+        self._upsert_rows = None
+        self._filters = []
+
+    def select(self, *args):
+        return self
+
+    def eq(self, column, value):
+        self._filters.append(lambda r: r.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        self._filters.append(lambda r: r.get(column) in values)
+        return self
+
+    def gte(self, column, value):
+        self._filters.append(lambda r: r.get(column) >= value)
+        return self
+
+    def lte(self, column, value):
+        self._filters.append(lambda r: r.get(column) <= value)
+        return self
+
+    def order(self, *args):
+        return self
+
+    def range(self, start, end):
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self._upsert_rows = rows
+        return self
+
+    def execute(self):
+        self.db.requests.append((self.name, "upsert" if self._upsert_rows is not None else "select"))
+        rows = self.db.tables[self.name]
+        if self._upsert_rows is None:
+            return _Res([dict(r) for r in rows if all(f(r) for f in self._filters)])
+        id_key = {"prefectures": "prefecture_id", "halls": "hall_id", "models": "model_id"}.get(self.name)
+        returned = []
+        for row in self._upsert_rows:
+            row = dict(row)
+            if id_key:
+                row[id_key] = len(rows) + 1
+            if self.name == "results":
+                # unique(hall_id, model_id, unit_no, date) の upsert
+                key = ("hall_id", "model_id", "unit_no", "date")
+                rows[:] = [r for r in rows if [r[k] for k in key] != [row[k] for k in key]]
+            rows.append(row)
+            returned.append(row)
+        return _Res(returned)
+
+
+class _FakeSupabase:
+    def __init__(self):
+        self.tables = {
+            "prefectures": [{"prefecture_id": 1, "name": "東京都"}],
+            "halls": [{"hall_id": 1, "name": "既存ホール", "prefecture_id": 1}],
+            "models": [{"model_id": 1, "name": "マイジャグラーV"}],
+            "results": [],
+        }
+        self.requests = []
+
+    def table(self, name):
+        return _FakeTable(self, name)
+
+
+def _frame(hall, model, medal=100):
+    return pd.DataFrame(
+        [
+            {
+                "pref": "東京都",
+                "hall": hall,
+                "model": model,
+                "date": "2026-10-17",
+                "unit_no": 1,
+                "game": 1000,
+                "bb": 3,
+                "rb": 4,
+                "medal": medal,
+            }
+        ]
+    )
+
+
+class DimensionCacheTest(unittest.TestCase):
+    def _store(self, df, supabase, dimensions):
+        add_model(df, supabase, dimensions)
+        add_prefecture_and_hall(df, supabase, dimensions)
+        return add_data_result(df, supabase, dimensions)
+
+    def test_known_names_need_only_results_requests(self) -> None:
+        supabase = _FakeSupabase()
+        dimensions = DimensionCache(supabase)
+
+        self._store(_frame("既存ホール", "マイジャグラーV"), supabase, dimensions)
+        supabase.requests.clear()
+        counts = self._store(_frame("既存ホール", "マイジャグラーV", medal=200), supabase, dimensions)
+
+        self.assertEqual((1, 0, 1, 0), (counts.upserted, counts.inserted, counts.updated, counts.unchanged))
+        self.assertEqual([("results", "select"), ("results", "upsert")], supabase.requests)
+
+    def test_unchanged_rows_are_not_upserted(self) -> None:
+        supabase = _FakeSupabase()
+        dimensions = DimensionCache(supabase)
+
+        first = self._store(_frame("既存ホール", "マイジャグラーV"), supabase, dimensions)
+        supabase.requests.clear()
+        second = self._store(_frame("既存ホール", "マイジャグラーV"), supabase, dimensions)
+
+        self.assertEqual((1, 1, 0), (first.upserted, first.inserted, first.unchanged))
+        self.assertEqual((0, 0, 0, 1), (second.upserted, second.inserted, second.updated, second.unchanged))
+        self.assertEqual(((1, "2026-10-17"),), first.changed_hall_dates)
+        self.assertEqual((), second.changed_hall_dates)
+        self.assertEqual([("results", "select")], supabase.requests)
+
+    def test_known_new_hall_date_skips_existing_rows_lookup(self) -> None:
+        supabase = _FakeSupabase()
+        dimensions = DimensionCache(supabase)
+        df = _frame("既存ホール", "マイジャグラーV")
+        add_model(df, supabase, dimensions)
+        add_prefecture_and_hall(df, supabase, dimensions)
+        supabase.requests.clear()
+
+        counts = add_data_result(df, supabase, dimensions, diff_existing=False)
+
+        self.assertEqual(1, counts.upserted)
+        self.assertEqual([("results", "upsert")], supabase.requests)
+
+    def test_new_names_are_upserted_once_and_ids_taken_from_response(self) -> None:
+        supabase = _FakeSupabase()
+        dimensions = DimensionCache(supabase)
+
+        self._store(_frame("新ホール", "ネオアイムジャグラーEX"), supabase, dimensions)
+
+        upserts = [r for r in supabase.requests if r[1] == "upsert"]
+        self.assertEqual([("models", "upsert"), ("halls", "upsert"), ("results", "upsert")], upserts)
+        self.assertEqual(2, dimensions.model_map["ネオアイムジャグラーEX"])
+        result = supabase.tables["results"][0]
+        self.assertEqual((2, 2), (result["hall_id"], result["model_id"]))
+
+
+class BuildResultRecordsTest(unittest.TestCase):
+    def test_drops_unmatched_and_non_numeric_rows(self) -> None:
+        df = pd.DataFrame(
+            {
+                "pref": ["東京都", "大阪府", "東京都", "東京都", "東京都"],
+                "hall": ["A", "A", "B", "A", "A"],
+                "model": ["M", "M", "M", "X", "M"],
+                "date": ["2026-10-17"] * 5,
+                "unit_no": [1, 2, 3, 4, "x"],
+                "game": [1000, 0, 0, 0, 0],
+                "bb": [3.0, 0, 0, 0, 0],
+                "rb": [4, 0, 0, 0, 0],
+                "medal": [-120, 0, 0, 0, 0],
+            },
+            index=[10, 11, 12, 13, 14],
+        )
+
+        with self.assertLogs("data_to_supabase", level="WARNING") as logs:
+            records = build_result_records(df, {"東京都": 1}, {(1, "A"): 7}, {"M": 3})
+
+        self.assertEqual(
+            [
+                {
+                    "hall_id": 7,
+                    "model_id": 3,
+                    "unit_no": 1,
+                    "date": "2026-10-17",
+                    "game": 1000,
+                    "bb": 3,
+                    "rb": 4,
+                    "medal": -120,
+                }
+            ],
+            records.to_dict("records"),
+        )
+        self.assertEqual(4, len(logs.output))
+
+
+class FetchExistingResultsTest(unittest.TestCase):
+    def test_fetches_requested_hall_dates_in_one_query(self) -> None:
+        supabase = _FakeSupabase()
+        base = {"model_id": 1, "unit_no": 1, "game": 0, "bb": 0, "rb": 0, "medal": 0}
+        supabase.tables["results"] = [
+            {**base, "hall_id": 1, "date": "2026-10-15"},
+            {**base, "hall_id": 1, "date": "2026-10-16"},
+            {**base, "hall_id": 2, "date": "2026-10-17"},
+            {**base, "hall_id": 2, "date": "2026-10-15"},
+            {**base, "hall_id": 3, "date": "2026-10-15"},
+        ]
+
+        existing = fetch_existing_results_postgrest(supabase, [(1, "2026-10-15"), (2, "2026-10-17")])
+
+        self.assertEqual([(1, "2026-10-15"), (2, "2026-10-17")], list(zip(existing["hall_id"], existing["date"])))
+        self.assertEqual([("results", "select")], supabase.requests)
+
+
+class DiffResultRecordsTest(unittest.TestCase):
+    def test_splits_new_changed_and_unchanged_rows(self) -> None:
+        records = pd.DataFrame(
+            {
+                "hall_id": [1, 1, 1, 1],
+                "model_id": [2, 2, 2, 2],
+                "unit_no": [101, 102, 103, 104],
+                "date": ["2026-10-17"] * 4,
+                "game": [1000, 2000, 3000, 4000],
+                "bb": [3, 4, 5, 6],
+                "rb": [1, 1, 1, 1],
+                "medal": [-100, 200, 300, 400],
+            }
+        )
+        existing = records.iloc[:3].astype(object).copy()
+        existing.loc[1, "medal"] = 150
+        existing.loc[2, "rb"] = None
+
+        diff = diff_result_records(records, existing)
+
+        self.assertEqual((1, 2, 1), (diff.inserted, diff.updated, diff.unchanged))
+        self.assertEqual([102, 103, 104], diff.changed["unit_no"].tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()
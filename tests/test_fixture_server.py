@@ -0,0 +1,123 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+
+from config import config
+from benchmarks.fixture_server import FixtureSite, MinrepoFixtureServer
+from scraper.http_scraping import HttpFetcher, extract_result_data_by_dates_http
+from scraper.rate_limiter import AdaptiveRateLimiter
+from scraper.raw_store import RawStore
+
+
+class FixtureServerTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        patches = [
+            patch.object(config, "CSV_DIR", Path(self._tmp.name)),
+            patch("scraper.http_scraping.get_rate_limiter", lambda: AdaptiveRateLimiter(enabled=False)),
+            patch("scraper.rate_limiter.get_rate_limiter", lambda: AdaptiveRateLimiter(enabled=False)),
+            patch("scraper.page_cache.get_page_cache", lambda: None),
+            patch("scraper.raw_store.get_raw_store", lambda: RawStore(root=Path(self._tmp.name) / "raw")),
+            patch("scraper.http_scraping.backoff_delay", lambda attempt: 0.0),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.addCleanup(self._tmp.cleanup)
+
+
+class HttpEngineEndToEndTest(FixtureServerTestCase):
+    def test_crawls_hall_dates_and_target_models(self) -> None:
+        site = FixtureSite(days=2, units_per_model=3)
+        with MinrepoFixtureServer(site) as server:
+            fetcher = HttpFetcher(cache=None)
+            try:
+                results = extract_result_data_by_dates_http(fetcher, server.hall_url("テストホール"), period=2)
+            finally:
+                fetcher.close()
+
+        target_count = len(site.model_names()) - len(site.extra_models)
+        self.assertEqual(["2026-10-17", "2026-10-16"], [date for _, _, date, _, _ in results])
+        pref, hall, _, df, model_count = results[0]
+        self.assertEqual(("東京都", "テストホール", target_count), (pref, hall, model_count))
+        self.assertEqual(target_count * 3, len(df))
+        # ホール1 + 日付2 + 機種ページ（対象機種のみ）
+        self.assertEqual(1 + 2 + 2 * target_count, server.stats.requests)
+
+    def test_streamed_results_are_not_kept(self) -> None:
+        site = FixtureSite(days=2, units_per_model=3)
+        streamed = []
+        with MinrepoFixtureServer(site) as server:
+            fetcher = HttpFetcher(cache=None)
+            try:
+                results = extract_result_data_by_dates_http(
+                    fetcher, server.hall_url("テストホール"), period=2, on_date_result=streamed.append
+                )
+            finally:
+                fetcher.close()
+
+        self.assertEqual([], results)
+        self.assertEqual(["2026-10-17", "2026-10-16"], [date for _, _, date, _, _ in streamed])
+
+    def test_date_links_stop_at_ingested_date(self) -> None:
+        site = FixtureSite(days=6, units_per_model=1)
+        with MinrepoFixtureServer(site) as server:
+            fetcher = HttpFetcher(cache=None)
+            try:
+                results = extract_result_data_by_dates_http(
+                    fetcher, server.hall_url("テストホール"), period=14, stop_at="2026-10-15", min_period=1
+                )
+                # 先頭 min_period 件は登録済みの日付でも読む
+                floor = extract_result_data_by_dates_http(
+                    fetcher, server.hall_url("テストホール"), period=14, stop_at="2026-10-17", min_period=2
+                )
+            finally:
+                fetcher.close()
+
+        self.assertEqual(["2026-10-17", "2026-10-16"], [date for _, _, date, _, _ in results])
+        self.assertEqual(["2026-10-17", "2026-10-16"], [date for _, _, date, _, _ in floor])
+
+    def test_injected_failures_are_retried(self) -> None:
+        site = FixtureSite(days=1, units_per_model=1, failure_rate=1.0)
+        with MinrepoFixtureServer(site) as server:
+            fetcher = HttpFetcher(cache=None)
+            try:
+                with self.assertRaises(httpx.HTTPStatusError):
+                    fetcher.get_html(server.hall_url("テストホール"), "hall", retries=2)
+            finally:
+                fetcher.close()
+
+        self.assertEqual((2, 2), (server.stats.requests, server.stats.failures))
+
+
+class SyncEngineEndToEndTest(FixtureServerTestCase):
+    def test_sync_engine_matches_http_engine(self) -> None:
+        from scraper.scraping_engines import SyncPlaywrightEngine
+
+        site = FixtureSite(days=1, units_per_model=2)
+        with MinrepoFixtureServer(site) as server:
+            try:
+                engine = SyncPlaywrightEngine().__enter__()
+            except Exception as e:
+                self.skipTest(f"Chromium を起動できません: {type(e).__name__}")
+            try:
+                sync_results = engine.extract_result_data_by_dates(server.hall_url("テストホール"), 1)
+            finally:
+                engine.__exit__(None, None, None)
+            fetcher = HttpFetcher(cache=None)
+            try:
+                http_results = extract_result_data_by_dates_http(fetcher, server.hall_url("テストホール"), 1)
+            finally:
+                fetcher.close()
+
+        self.assertEqual(
+            [(d, len(df)) for _, _, d, df, _ in http_results],
+            [(d, len(df)) for _, _, d, df, _ in sync_results],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+from pathlib import Path
+
+from scraper.http_scraping import MissingSelectorError, parse_date_page, parse_hall_page, parse_model_page
+
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures" / "minrepo"
+
+
+def _read(name: str) -> str:
+    return (FIXTURE_DIR / name).read_text(encoding="utf-8")
+
+
+class ParseHallPageTest(unittest.TestCase):
+    def test_reads_names_and_date_links_without_tbody(self) -> None:
+        pref, hall, raw_links = parse_hall_page(_read("hall_page.html"))
+
+        self.assertEqual(("東京都", "テストホール"), (pref, hall))
+        self.assertEqual(3, len(raw_links))
+        self.assertEqual(("2026/10/17(土)", "https://min-repo.com/9000017/"), raw_links[0])
+
+    def test_missing_selectors_raise(self) -> None:
+        with self.assertRaises(MissingSelectorError):
+            parse_hall_page("<html><body><div id='content'></div></body></html>")
+
+
+class ParseDatePageTest(unittest.TestCase):
+    def test_reads_only_first_model_table(self) -> None:
+        raw_links = parse_date_page(_read("date_page.html"))
+
+        self.assertEqual(
+            ["マイジャグラーＶ", "ゴーゴージャグラー３", "スマスロ北斗の拳"],
+            [text for text, _ in raw_links],
+        )
+
+    def test_missing_table_raises(self) -> None:
+        with self.assertRaises(MissingSelectorError):
+            parse_date_page("<html><body><h1>x</h1></body></html>")
+
+
+class ParseModelPageTest(unittest.TestCase):
+    def test_missing_table_raises(self) -> None:
+        with self.assertRaises(MissingSelectorError):
+            parse_model_page("<html><body><div class='tab_content'><h2>x</h2></div></body></html>")
+
+    def test_reads_header(self) -> None:
+        _, header, _ = parse_model_page(_read("model_page.html"))
+
+        self.assertEqual("台番", header[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
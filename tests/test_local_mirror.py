@@ -0,0 +1,155 @@
+import datetime as dt
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from app import mirror_backend
+from scraper.local_mirror import sync_local_mirror
+
+
+class _Res:
+    def __init__(self, data):
+        self.data = data
+
+
+class _FakeQuery:
+    """sync_local_mirror が使う PostgREST のフィルタだけを持つ偽クエリ。"""
+
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+        self.filters = []
+        self._limit = None
+
+    def select(self, *args):
+        return self
+
+    def gte(self, column, value):
+        self.filters.append((column, "gte", value))
+        return self
+
+    def gt(self, column, value):
+        self.filters.append((column, "gt", value))
+        return self
+
+    def order(self, *args):
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def range(self, start, end):
+        return self
+
+    def execute(self):
+        self.db.queries.append((self.name, list(self.filters)))
+        rows = [
+            dict(r)
+            for r in self.db.tables[self.name]
+            if all(r[c] >= v if op == "gte" else r[c] > v for c, op, v in self.filters)
+        ]
+        return _Res(rows[: self._limit] if self._limit else rows)
+
+
+class _FakeSupabase:
+    def __init__(self, days: int):
+        start = dt.date(2026, 10, 1)
+        self.tables = {
+            "prefectures": [{"prefecture_id": 1, "name": "東京都"}, {"prefecture_id": 2, "name": "埼玉県"}],
+            "halls": [
+                {"hall_id": 1, "name": "ホールA", "prefecture_id": 1},
+                {"hall_id": 2, "name": "ホールB", "prefecture_id": 2},
+            ],
+            "models": [{"model_id": 1, "name": "マイジャグラーV"}, {"model_id": 2, "name": "ハッピージャグラー"}],
+            "results": [],
+        }
+        for d in range(days):
+            for hall_id in (1, 2):
+                for unit_no in (1, 2, 3):
+                    self.add_result(hall_id, 1 + unit_no % 2, unit_no, (start + dt.timedelta(days=d)).isoformat())
+        self.queries = []
+
+    def add_result(self, hall_id, model_id, unit_no, date, medal=100):
+        results = self.tables["results"]
+        results.append(
+            {
+                "id": len(results) + 1,
+                "hall_id": hall_id,
+                "model_id": model_id,
+                "unit_no": unit_no,
+                "date": date,
+                "game": 3000,
+                "bb": 10,
+                "rb": 12,
+                "medal": medal,
+            }
+        )
+
+    def table(self, name):
+        return _FakeQuery(self, name)
+
+
+class LocalMirrorTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "mirror.sqlite"
+        env = mock.patch.dict(os.environ, {"APP_DATA_BACKEND": "local", "LOCAL_MIRROR_PATH": str(self.path)})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_sync_is_incremental_from_watermark(self) -> None:
+        supabase = _FakeSupabase(days=10)
+        self.assertEqual(60, sync_local_mirror(supabase, self.path))
+
+        # 直近の日付の修正と新しい日付だけが取り直される
+        for row in supabase.tables["results"]:
+            if row["date"] == "2026-10-10" and row["hall_id"] == 1 and row["unit_no"] == 1:
+                row["medal"] = 999
+        supabase.add_result(1, 2, 1, "2026-10-11")
+        supabase.queries.clear()
+        synced = sync_local_mirror(supabase, self.path, overlap_days=3)
+
+        self.assertEqual(6 * 4 + 1, synced)
+        results_query = [filters for name, filters in supabase.queries if name == "results"][0]
+        self.assertIn(("date", "gte", "2026-10-07"), results_query)
+
+        df = mirror_backend.fetch_results_by_units(dt.date(2026, 10, 1), dt.date(2026, 10, 11))
+        self.assertEqual(61, len(df))
+        updated = df[(df["date"] == "2026-10-10") & (df["hall"] == "ホールA") & (df["unit_no"] == 1)]
+        self.assertEqual(999, updated["medal"].item())
+
+    def test_backend_answers_dashboard_queries(self) -> None:
+        sync_local_mirror(_FakeSupabase(days=14), self.path)
+
+        df = mirror_backend.fetch_results_by_units(
+            dt.date(2026, 10, 1), dt.date(2026, 10, 14), day_last=[1], weekday="すべて", pref="東京都", unit_no=[1, 3]
+        )
+        self.assertEqual({"2026-10-01", "2026-10-11"}, set(df["date"]))
+        self.assertEqual({"ホールA"}, set(df["hall"]))
+        self.assertEqual({1, 3}, set(df["unit_no"]))
+        # 2026-10-11 は日曜日（0）
+        self.assertEqual(0, df[df["date"] == "2026-10-11"]["weekday"].iloc[0])
+
+        self.assertEqual(["東京都", "埼玉県"], mirror_backend.fetch_prefectures())
+        self.assertEqual(["ホールB"], mirror_backend.fetch_halls("埼玉県"))
+        self.assertEqual({"マイジャグラーV", "ハッピージャグラー"}, set(mirror_backend.fetch_models(pref="すべて", hall="ホールA")))
+        self.assertEqual([1, 3], mirror_backend.fetch_units(hall="ホールA", model="ハッピージャグラー"))
+
+        summary = mirror_backend.fetch_daily_summary(dt.date(2026, 10, 1), dt.date(2026, 10, 1), by_model=False)
+        self.assertEqual([3, 3], summary.sort_values("hall")["unit_count"].tolist())
+        self.assertEqual([9000, 9000], summary["game"].tolist())
+
+        joined = mirror_backend.fetch("result_joined", "2026-10-01", "2026-10-01", hall="ホールA")
+        self.assertEqual(3, len(joined))
+        with self.assertRaises(ValueError):
+            mirror_backend.fetch("medal_rate_by_model", "2026-10-01", "2026-10-01")
+
+
+if __name__ == "__main__":
+    unittest.main()
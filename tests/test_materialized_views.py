@@ -0,0 +1,63 @@
+import unittest
+
+from scraper.materialized_views import (
+    MaterializedView,
+    load_materialized_views,
+    refresh_materialized_views,
+    select_views_to_refresh,
+)
+
+VIEWS = [
+    MaterializedView("latest_units_results"),
+    MaterializedView("recent_hall_summary"),
+    MaterializedView("medal_rate_by_unit_no", depends_on=("latest_units_results",)),
+    MaterializedView("recent_hall_ranking", depends_on=("recent_hall_summary",)),
+]
+
+
+class _Rpc:
+    def __init__(self, client, params):
+        self.client = client
+        self.params = params
+
+    def execute(self):
+        name = self.params["view_name"]
+        self.client.calls.append(name)
+        if name in self.client.failing:
+            raise RuntimeError("statement timeout")
+        return type("Res", (), {"data": "concurrently"})()
+
+
+class _FakeSupabase:
+    def __init__(self, failing=()):
+        self.calls = []
+        self.failing = set(failing)
+
+    def rpc(self, name, params):
+        return _Rpc(self, params)
+
+
+class SelectViewsTest(unittest.TestCase):
+    def test_refreshes_everything_unless_nothing_changed(self) -> None:
+        self.assertEqual(VIEWS, select_views_to_refresh(VIEWS, {"2026-09-01"}))
+        self.assertEqual([], select_views_to_refresh(VIEWS, set()))
+        self.assertEqual(VIEWS, select_views_to_refresh(VIEWS, None))
+
+    def test_registry_is_ordered_by_dependency(self) -> None:
+        names = [v.name for v in load_materialized_views()]
+        self.assertLess(names.index("latest_units_results"), names.index("medal_rate_by_unit_no"))
+
+
+class RefreshMaterializedViewsTest(unittest.TestCase):
+    def test_failure_skips_only_dependent_views(self) -> None:
+        supabase = _FakeSupabase(failing={"latest_units_results"})
+        with self.assertLogs("materialized_views", level="INFO") as logs:
+            refreshed = refresh_materialized_views(supabase, {"2026-10-17"}, views=VIEWS)
+
+        self.assertEqual(["recent_hall_summary", "recent_hall_ranking"], refreshed)
+        self.assertEqual(["latest_units_results", "recent_hall_summary", "recent_hall_ranking"], supabase.calls)
+        self.assertTrue(any("timing stage=matview view=recent_hall_summary mode=concurrently" in o for o in logs.output))
+
+
+if __name__ == "__main__":
+    unittest.main()
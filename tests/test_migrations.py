@@ -0,0 +1,183 @@
+import datetime as dt
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from migrations.explain_check import ExplainCase, params_to_sql, postgrest_params, run_explain_check
+from migrations.runner import MigrationError, apply_migrations, load_migrations, pending_migrations
+
+# ローカルの Postgres（例: docker run -e POSTGRES_PASSWORD=postgres -p 5432:5432 postgres）で実行する
+TEST_POSTGRES_DSN = os.getenv("TEST_POSTGRES_DSN")
+TEST_DATABASE = "test_migrations"
+TODAY = dt.date.today()
+
+# Supabase 上の latest_units_results の代わりに、同じ列を持つビューを results から作る
+LATEST_UNITS_RESULTS_SELECT = """
+    select p.name as prefecture, h.name as hall, m.name as model, r.unit_no, r.date,
+           extract(day from r.date)::integer % 10 as day_last,
+           extract(dow from r.date)::integer as weekday,
+           r.game, r.bb, r.rb, r.medal
+    from public.results r
+    join public.halls h on h.hall_id = r.hall_id
+    join public.prefectures p on p.prefecture_id = h.prefecture_id
+    join public.models m on m.model_id = r.model_id
+"""
+
+
+class PendingMigrationsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = Path(tempfile.mkdtemp())
+        for m in load_migrations():
+            shutil.copy(m.path, self.tmp / m.path.name)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmp)
+
+    def test_returns_unapplied_migrations_in_order(self) -> None:
+        migrations = load_migrations(self.tmp)
+        applied = {m.version: m.checksum for m in migrations[:2]}
+        pending = pending_migrations(migrations, applied, target=4)
+        self.assertEqual([3, 4], [m.version for m in pending])
+
+    def test_rejects_modified_applied_migration(self) -> None:
+        applied = {m.version: m.checksum for m in load_migrations(self.tmp)}
+        first = sorted(self.tmp.glob("*.sql"))[0]
+        first.write_text(first.read_text(encoding="utf-8") + "\n-- changed\n", encoding="utf-8")
+        with self.assertRaises(MigrationError):
+            pending_migrations(load_migrations(self.tmp), applied)
+
+
+class ExplainCheckQueryTest(unittest.TestCase):
+    def test_builds_sql_from_fetch_results_by_units_filters(self) -> None:
+        case = ExplainCase("hall_unit_no", {"pref": "東京都", "hall": "A,B ホール", "unit_no": [101, 102]})
+        params = postgrest_params(case, dt.date(2026, 10, 1), dt.date(2026, 10, 15))
+        self.assertIn(("hall", 'eq.A,B ホール'), params)
+
+        text = params_to_sql(params).as_string(None)
+        self.assertIn(""""date" >= '2026-10-01'""", text)
+        self.assertIn(""""hall" = 'A,B ホール'""", text)
+        self.assertIn(""""unit_no" in ('101', '102')""", text)
+        self.assertTrue(text.endswith("limit 1000 offset 0"))
+
+
+@unittest.skipUnless(TEST_POSTGRES_DSN, "TEST_POSTGRES_DSN が未設定のため Postgres を使うテストをスキップします")
+class PartitionMigrationTest(unittest.TestCase):
+    """空のデータベースに全マイグレーションを適用し、results のパーティション化と EXPLAIN の確認を行う。"""
+
+    def setUp(self) -> None:
+        import psycopg
+        from psycopg.conninfo import make_conninfo
+
+        self.admin = psycopg.connect(TEST_POSTGRES_DSN, autocommit=True)
+        self.admin.execute(f"drop database if exists {TEST_DATABASE}")
+        self.admin.execute(f"create database {TEST_DATABASE}")
+        # Supabase の既定ロール（マイグレーションの grant 先）
+        for role in ("anon", "authenticated", "service_role"):
+            self.admin.execute(
+                f"do $$ begin if not exists (select 1 from pg_roles where rolname = '{role}') "
+                f"then create role {role} nologin; end if; end $$"
+            )
+        self.conn = psycopg.connect(make_conninfo(TEST_POSTGRES_DSN, dbname=TEST_DATABASE), autocommit=True)
+
+    def tearDown(self) -> None:
+        self.conn.close()
+        self.admin.execute(f"drop database if exists {TEST_DATABASE}")
+        self.admin.close()
+
+    def _load_rows(self) -> None:
+        """30ホール × 10機種 × 10台 × 90日分の results を作る。"""
+        self.conn.execute("insert into prefectures (name) values ('東京都'), ('神奈川県'), ('埼玉県')")
+        self.conn.execute(
+            "insert into halls (name, prefecture_id) select 'ホール' || i, 1 + i % 3 from generate_series(1, 30) i"
+        )
+        self.conn.execute("insert into models (name) select '機種' || i from generate_series(1, 40) i")
+        self.conn.execute(
+            """
+            insert into results (hall_id, model_id, unit_no, date, game, bb, rb, medal)
+            select h, 1 + (h * 7 + m) %% 40, m * 100 + u, %s::date - d, 1000 + u, u %% 5, u %% 7, u * 10 - 500
+            from generate_series(1, 30) h, generate_series(1, 10) m, generate_series(1, 10) u,
+                 generate_series(0, 89) d
+            """,
+            (TODAY,),
+        )
+
+    def test_partitions_results_and_keeps_dependent_views(self) -> None:
+        apply_migrations(self.conn, target=4)
+        self._load_rows()
+        self.conn.execute(f"create materialized view latest_units_results as {LATEST_UNITS_RESULTS_SELECT}")
+        self.conn.execute(
+            "create unique index latest_units_results_key on latest_units_results (hall, model, unit_no, date)"
+        )
+        self.conn.execute("grant select on latest_units_results to anon")
+        (max_id,) = self.conn.execute("select max(id) from results").fetchone()
+
+        applied = apply_migrations(self.conn)
+        self.assertEqual([5, 6, 7], [m.version for m in applied])
+        self.assertEqual([], apply_migrations(self.conn))
+
+        (relkind,) = self.conn.execute("select relkind from pg_class where oid = 'public.results'::regclass").fetchone()
+        self.assertEqual("p", relkind)
+        (partitions,) = self.conn.execute(
+            "select count(*) from pg_inherits where inhparent = 'public.results'::regclass"
+        ).fetchone()
+        self.assertGreaterEqual(partitions, 5)  # 90日分の月 + 先の月 + default
+        self.assertEqual((270000,), self.conn.execute("select count(*) from results").fetchone())
+        self.assertEqual((270000,), self.conn.execute("select count(*) from latest_units_results").fetchone())
+        # 0007 で既存の results から日次サマリーが埋まる（30ホール × 90日）
+        self.assertEqual((2700,), self.conn.execute("select count(*) from daily_hall_summary").fetchone())
+        indexes = {
+            row[0]
+            for row in self.conn.execute(
+                "select indexname from pg_indexes where tablename in ('results', 'latest_units_results')"
+            )
+        }
+        self.assertIn("latest_units_results_key", indexes)
+        self.assertIn("latest_units_results_hall_date_idx", indexes)
+        self.assertIn("results_hall_id_date_covering_idx", indexes)
+        (can_select,) = self.conn.execute(
+            "select has_table_privilege('anon', 'public.latest_units_results', 'select')"
+        ).fetchone()
+        self.assertTrue(can_select)
+
+        # 連番は既存の最大値の次から振られ、upsert の衝突キーも残っている
+        (new_id,) = self.conn.execute(
+            "insert into results (hall_id, model_id, unit_no, date) values (1, 1, 1, %s) returning id", (TODAY,)
+        ).fetchone()
+        self.assertGreater(new_id, max_id)
+        self.conn.execute(
+            "insert into results (hall_id, model_id, unit_no, date, game) values (1, 1, 1, %s, 5) "
+            "on conflict (hall_id, model_id, unit_no, date) do update set game = excluded.game",
+            (TODAY,),
+        )
+
+        # 月をまたいで先のパーティションを作っても default に入った行は移される
+        far = TODAY.replace(day=1) + dt.timedelta(days=31 * 6)
+        self.conn.execute("insert into results (hall_id, model_id, unit_no, date) values (1, 1, 1, %s)", (far,))
+        (created,) = self.conn.execute("select ensure_results_partitions(current_date, 7)").fetchone()
+        self.assertGreater(created, 0)
+        (in_default,) = self.conn.execute("select count(*) from results_default").fetchone()
+        self.assertEqual(0, in_default)
+
+        start, end = TODAY - dt.timedelta(days=14), TODAY - dt.timedelta(days=1)
+        self.assertEqual({}, run_explain_check(self.conn, start, end))
+
+        # マテビューのインデックスが無ければ Seq Scan として検出する
+        self.conn.execute("drop index latest_units_results_hall_date_idx, latest_units_results_key")
+        self.conn.execute("analyze latest_units_results")
+        failures = run_explain_check(self.conn, start, end)
+        self.assertIn("latest_units_results", failures["hall"])
+
+    def test_explain_check_passes_on_plain_view_over_partitions(self) -> None:
+        apply_migrations(self.conn)
+        self._load_rows()
+        self.conn.execute(f"create view latest_units_results as {LATEST_UNITS_RESULTS_SELECT}")
+        self.conn.execute("analyze")
+
+        start, end = TODAY - dt.timedelta(days=14), TODAY - dt.timedelta(days=1)
+        self.assertEqual({}, run_explain_check(self.conn, start, end))
+
+
+if __name__ == "__main__":
+    unittest.main()
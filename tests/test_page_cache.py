@@ -0,0 +1,109 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from scraper.http_scraping import HttpFetcher, MissingSelectorError, parse_model_page
+from scraper.page_cache import CacheMissError, PageCache, goto_cached
+
+
+class PageCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_same_content_shares_one_compressed_object(self) -> None:
+        cache = PageCache(root=self.root)
+        cache.put("https://min-repo.com/1/", "<html>同じ</html>", "model", "2020-01-01")
+        cache.put("https://min-repo.com/2/", "<html>同じ</html>", "model", "2020-01-01")
+
+        self.assertEqual(1, len(list((self.root / "objects").rglob("*.html.gz"))))
+        self.assertEqual("<html>同じ</html>", cache.get("https://min-repo.com/2/", "model", "2020-01-01"))
+        self.assertIsNone(cache.get("https://min-repo.com/3/", "model", "2020-01-01"))
+        self.assertEqual((1, 1, 2), (cache.hits, cache.misses, cache.stores))
+
+    def test_ttl_per_page_type(self) -> None:
+        cache = PageCache(root=self.root, hall_ttl_sec=1, recent_ttl_sec=1)
+
+        self.assertEqual(1, cache.ttl_sec("hall"))
+        self.assertIsNone(cache.ttl_sec("model", "2020-01-01"))
+        self.assertEqual(1, cache.ttl_sec("date", "2999-01-01"))
+
+        cache.put("https://min-repo.com/hall", "<html>hall</html>", "hall")
+        cache.put("https://min-repo.com/old", "<html>old</html>", "model", "2020-01-01")
+        real_time = time.time
+        try:
+            time.time = lambda: real_time() + 10
+            self.assertIsNone(cache.get("https://min-repo.com/hall", "hall"))
+            self.assertEqual("<html>old</html>", cache.get("https://min-repo.com/old", "model", "2020-01-01"))
+            # REPLAY_ONLY では期限切れでも使う
+            replay = PageCache(root=self.root, hall_ttl_sec=1, replay_only=True)
+            self.assertEqual("<html>hall</html>", replay.get("https://min-repo.com/hall", "hall"))
+        finally:
+            time.time = real_time
+
+    def test_replay_only_fetcher_never_uses_network(self) -> None:
+        fetcher = HttpFetcher(cache=PageCache(root=self.root, replay_only=True))
+        fetcher._fetch = lambda url, retries: self.fail("ネットワークへアクセスしました")
+        try:
+            fetcher.cache.put("https://min-repo.com/1/", "<html>1</html>", "date", "2020-01-01")
+            self.assertEqual("<html>1</html>", fetcher.get_html("https://min-repo.com/1/", "date", "2020-01-01"))
+            with self.assertRaises(CacheMissError):
+                fetcher.get_html("https://min-repo.com/2/", "date", "2020-01-01")
+        finally:
+            fetcher.close()
+        self.assertEqual(0, fetcher.request_count)
+
+    def test_unparsable_page_is_not_cached(self) -> None:
+        url = "https://min-repo.com/model/"
+        fetcher = HttpFetcher(cache=PageCache(root=self.root))
+        fetcher._fetch = lambda url, retries: "<html>読み込み中</html>"
+        try:
+            with self.assertRaises(MissingSelectorError):
+                fetcher.get_parsed(url, "model", parse_model_page, "2020-01-01")
+            self.assertIsNone(fetcher.cache.get(url, "model", "2020-01-01"))
+
+            # 以前に保存された壊れたページも、パースに失敗した時点でエントリを消す
+            fetcher.cache.put(url, "<html>読み込み中</html>", "model", "2020-01-01")
+            with self.assertRaises(MissingSelectorError):
+                fetcher.get_parsed(url, "model", parse_model_page, "2020-01-01")
+            self.assertIsNone(fetcher.cache.get(url, "model", "2020-01-01"))
+        finally:
+            fetcher.close()
+
+    def test_goto_cached_stores_only_ok_responses(self) -> None:
+        class _Response:
+            def __init__(self, status):
+                self.status = status
+                self.ok = 200 <= status < 300
+
+        class _Page:
+            def __init__(self, status):
+                self.status = status
+
+            def goto(self, url, **kwargs):
+                return _Response(self.status)
+
+            def content(self):
+                return f"<html>{self.status}</html>"
+
+        cache = PageCache(root=self.root)
+        url = "https://min-repo.com/1/"
+        with mock.patch("scraper.page_cache.get_page_cache", return_value=cache):
+            goto_cached(_Page(503), url, "model", "2020-01-01")
+            goto_cached(_Page(404), url, "model", "2020-01-01")
+            self.assertIsNone(cache.get(url, "model", "2020-01-01"))
+
+            goto_cached(_Page(200), url, "model", "2020-01-01")
+            self.assertEqual("<html>200</html>", cache.get(url, "model", "2020-01-01"))
+        # キャッシュ無効時も、エラー応答の扱いは page.goto と同じ（例外にしない）
+        with mock.patch("scraper.page_cache.get_page_cache", return_value=None):
+            goto_cached(_Page(503), url, "hall")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import unittest
+
+import pandas as pd
+
+from scraper.postgres_ingest import copy_upsert_results, fetch_existing_results
+from scraper.result_fingerprints import diff_result_records
+
+# ローカルの Postgres（例: docker run -e POSTGRES_PASSWORD=postgres -p 5432:5432 postgres）で実行する
+TEST_POSTGRES_DSN = os.getenv("TEST_POSTGRES_DSN")
+TABLE = "test_results_copy_ingest"
+
+
+@unittest.skipUnless(TEST_POSTGRES_DSN, "TEST_POSTGRES_DSN が未設定のため Postgres を使うテストをスキップします")
+class CopyUpsertResultsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        from psycopg_pool import ConnectionPool
+
+        self.pool = ConnectionPool(TEST_POSTGRES_DSN, min_size=1, max_size=1, open=True)
+        with self.pool.connection() as conn:
+            conn.execute(f"drop table if exists {TABLE}")
+            conn.execute(
+                f"""
+                create table {TABLE} (
+                    id bigserial primary key,
+                    hall_id bigint not null,
+                    model_id bigint not null,
+                    unit_no integer not null,
+                    date date not null,
+                    game integer,
+                    bb integer,
+                    rb integer,
+                    medal integer,
+                    unique (hall_id, model_id, unit_no, date)
+                )
+                """
+            )
+
+    def tearDown(self) -> None:
+        with self.pool.connection() as conn:
+            conn.execute(f"drop table if exists {TABLE}")
+        self.pool.close()
+
+    def test_counts_inserted_and_updated_rows(self) -> None:
+        first = pd.DataFrame(
+            {
+                "hall_id": [1, 1],
+                "model_id": [2, 2],
+                "unit_no": [101, 102],
+                "date": ["2026-10-17", "2026-10-17"],
+                "game": [1000, 2000],
+                "bb": [3, 4],
+                "rb": [5, 6],
+                "medal": [-100, 200],
+            }
+        )
+        self.assertEqual((2, 0), copy_upsert_results(first, pool=self.pool, table=TABLE))
+
+        second = first.copy()
+        second.loc[1, "game"] = 2500
+        second.loc[2] = [1, 2, 103, "2026-10-17", 10, 0, 0, -10]
+        self.assertEqual((1, 2), copy_upsert_results(second, pool=self.pool, table=TABLE))
+
+        with self.pool.connection() as conn:
+            rows = conn.execute(f"select unit_no, game from {TABLE} order by unit_no").fetchall()
+        self.assertEqual([(101, 1000), (102, 2500), (103, 10)], rows)
+
+        existing = fetch_existing_results([(1, "2026-10-17"), (9, "2026-10-17")], pool=self.pool, table=TABLE)
+        diff = diff_result_records(second, existing)
+        self.assertEqual((0, 0, 3), (diff.inserted, diff.updated, diff.unchanged))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from scraper.rate_limiter import AdaptiveRateLimiter, backoff_delay
+
+URL = "https://min-repo.com/123/"
+
+
+class AdaptiveRateLimiterTest(unittest.TestCase):
+    def test_burst_then_wait_for_next_token(self) -> None:
+        limiter = AdaptiveRateLimiter(initial_rps=2.0, burst=2)
+
+        self.assertEqual(0.0, limiter._reserve(URL))
+        self.assertEqual(0.0, limiter._reserve(URL))
+        self.assertAlmostEqual(0.5, limiter._reserve(URL), places=2)
+        # 別ホストは別のバケット
+        self.assertEqual(0.0, limiter._reserve("https://example.com/"))
+
+    def test_aimd_stays_within_bounds(self) -> None:
+        limiter = AdaptiveRateLimiter(initial_rps=1.0, min_rps=0.2, max_rps=1.3, increase_rps=0.1)
+
+        for _ in range(10):
+            limiter.record_success(URL, elapsed_sec=0.1)
+        self.assertAlmostEqual(1.3, limiter.buckets["min-repo.com"].rate)
+
+        limiter.record_success(URL, elapsed_sec=5.0)
+        self.assertAlmostEqual(1.3, limiter.buckets["min-repo.com"].rate)
+
+        for _ in range(10):
+            limiter.record_failure(URL, "status=429")
+        bucket = limiter.buckets["min-repo.com"]
+        self.assertAlmostEqual(0.2, bucket.rate)
+        self.assertEqual(10, bucket.failures)
+
+    def test_backoff_delay_is_capped(self) -> None:
+        for attempt in range(1, 10):
+            delay = backoff_delay(attempt, base_sec=1.0, cap_sec=4.0)
+            self.assertGreaterEqual(delay, 0.0)
+            self.assertLessEqual(delay, min(4.0, 2 ** (attempt - 1)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from scraper.raw_store import RawStore
+from scraper.scraping_result_data import RESULT_COLUMNS
+
+
+def _result(hall: str, date: str, diff: str) -> pd.DataFrame:
+    return pd.DataFrame([["東京都", hall, "機種A", date, "101", "5,000", "10", "12", diff]], columns=RESULT_COLUMNS)
+
+
+class RawStoreTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = RawStore(root=Path(tmp.name))
+
+    def test_writes_hive_partitions_and_manifest(self) -> None:
+        path = self.store.write("results", "東京都", "A/B店", "2026-10-17", _result("A/B店", "2026-10-17", "+1,200"))
+
+        self.assertEqual(
+            Path("results/date=2026-10-17/hall=A%2FB%E5%BA%97"),
+            path.parent.relative_to(self.store.root),
+        )
+        entry = json.loads(self.store.manifest_path.read_text(encoding="utf-8"))
+        self.assertEqual(("A/B店", "2026-10-17", 1), (entry["hall"], entry["date"], entry["rows"]))
+        self.assertEqual((1, 1), (self.store.files_written, self.store.rows_written))
+        self.assertIsNone(self.store.write("results", "東京都", "A/B店", "2026-10-17", pd.DataFrame()))
+
+    def test_read_filters_partitions_and_prefers_latest_part(self) -> None:
+        self.store.write("results", "東京都", "A店", "2026-10-16", _result("A店", "2026-10-16", "+100"))
+        self.store.write("results", "東京都", "A店", "2026-10-17", _result("A店", "2026-10-17", "+200"))
+        self.store.write("results", "東京都", "B店", "2026-10-17", _result("B店", "2026-10-17", "+300"))
+        self.store.write("results", "東京都", "A店", "2026-10-17", _result("A店", "2026-10-17", "+999"))
+
+        df = self.store.read("results", start_date="2026-10-17", halls={"A店"})
+        self.assertEqual(["+999"], df["差枚"].tolist())
+        self.assertEqual(3, len(self.store.read("results")))
+
+        self.assertEqual(1, self.store.compact())
+        self.assertEqual(3, len(self.store.manifest()))
+        self.assertEqual(3, len(list(self.store.root.glob("results/*/*/*.parquet"))))
+
+
+if __name__ == "__main__":
+    unittest.main()
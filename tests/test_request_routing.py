@@ -0,0 +1,32 @@
+import unittest
+
+from scraper.request_routing import RoutePolicy, RouteStats
+
+
+class RoutePolicyTest(unittest.TestCase):
+    def test_blocks_assets_and_third_party_scripts(self) -> None:
+        policy = RoutePolicy()
+
+        self.assertIsNone(policy.block_reason("document", "https://min-repo.com/2611/"))
+        self.assertIsNone(policy.block_reason("script", "https://cdn.min-repo.com/app.js"))
+        self.assertEqual("resource_type", policy.block_reason("image", "https://min-repo.com/a.png"))
+        self.assertEqual("resource_type", policy.block_reason("stylesheet", "https://min-repo.com/a.css"))
+        self.assertEqual("domain", policy.block_reason("script", "https://www.googletagmanager.com/gtm.js"))
+        self.assertIsNone(policy.block_reason("image", "data:image/png;base64,AAAA"))
+
+
+class RouteStatsTest(unittest.TestCase):
+    def test_counts_blocked_requests_by_type(self) -> None:
+        stats = RouteStats()
+        stats.record("document", blocked=False)
+        stats.record("image", blocked=True)
+        stats.record("image", blocked=True)
+
+        self.assertEqual(1, stats.allowed_requests)
+        self.assertEqual(2, stats.blocked_requests)
+        self.assertEqual({"image": 2}, stats.blocked_by_type)
+        self.assertGreater(stats.estimated_saved_bytes, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from scraper.run_journal import RunJournal
+
+
+class RunJournalTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_resume_skips_finished_units_and_retries_failed(self) -> None:
+        journal = RunJournal.open("run-1", root=self.root)
+        journal.record_unit("ホールA", "2026-10-16", "completed", rows=40, upserted_rows=40)
+        journal.record_unit("ホールA", "2026-10-17", "db_error", rows=40)
+        journal.record_unit("ホールB", "2026-10-17", "skipped_existing", rows=40)
+        journal.record_hall("設定ホールA", "completed", [("ホールA", "2026-10-16"), ("ホールA", "2026-10-17")])
+        journal.record_hall("設定ホールB", "completed", [("ホールB", "2026-10-17")])
+        # 強制終了で途中まで書かれた行
+        with journal.path.open("a", encoding="utf-8") as f:
+            f.write('{"type": "unit", "hall": "ホール')
+
+        resumed = RunJournal.open("run-1", root=self.root)
+
+        self.assertTrue(resumed.is_unit_finished("ホールA", "2026-10-16"))
+        self.assertFalse(resumed.is_unit_finished("ホールA", "2026-10-17"))
+        self.assertIsNone(resumed.finished_hall_units("設定ホールA"))
+        self.assertEqual([("ホールB", "2026-10-17")], resumed.finished_hall_units("設定ホールB"))
+
+        resumed.record_unit("ホールA", "2026-10-17", "completed", rows=40, upserted_rows=40)
+        self.assertEqual(2, len(resumed.finished_hall_units("設定ホールA")))
+        self.assertTrue(RunJournal.open("run-1", root=self.root).is_unit_finished("ホールA", "2026-10-17"))
+
+
+if __name__ == "__main__":
+    unittest.main()
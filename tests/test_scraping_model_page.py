@@ -0,0 +1,61 @@
+import unittest
+from pathlib import Path
+
+from scraper.scraping_model_page import (
+    _build_model_frame,
+    _select_h2_model,
+    _table_from_row_cells,
+    parse_model_table_html,
+)
+
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures" / "minrepo"
+
+
+class TableFromRowCellsTest(unittest.TestCase):
+    def test_header_from_first_row_and_empty_rows_skipped(self) -> None:
+        header, table = _table_from_row_cells(
+            [
+                {"th": [" 台番 ", "G数"], "td": []},
+                {"th": [], "td": [" 101 ", "1,234\n"]},
+                {"th": [], "td": []},
+            ]
+        )
+
+        self.assertEqual(["台番", "G数"], header)
+        self.assertEqual([["101", "1,234"]], table)
+
+    def test_missing_header_returns_empty(self) -> None:
+        self.assertEqual(([], []), _table_from_row_cells([{"th": [], "td": ["1"]}]))
+        self.assertEqual(([], []), _table_from_row_cells([]))
+
+
+class ParseModelTableHtmlTest(unittest.TestCase):
+    def test_fixture_builds_frame_without_average_row(self) -> None:
+        html = (FIXTURE_DIR / "model_page.html").read_text(encoding="utf-8")
+
+        h2_texts, header, table = parse_model_table_html(html)
+        df = _build_model_frame(
+            header,
+            table,
+            pref="東京都",
+            hall="テストホール",
+            model=_select_h2_model(h2_texts),
+            date="2026-10-17",
+        )
+
+        self.assertEqual("マイジャグラーV", _select_h2_model(h2_texts))
+        self.assertEqual(["台番", "G数", "差枚", "BB", "RB"], header)
+        self.assertEqual(41, len(table))
+        self.assertEqual(40, len(df))
+        self.assertFalse(df["台番"].str.contains("平均").any())
+        self.assertEqual({"2026-10-17"}, set(df["date"]))
+
+    def test_frame_without_unit_column_is_rejected(self) -> None:
+        with self.assertRaisesRegex(ValueError, "台番列"):
+            _build_model_frame(
+                ["G数"], [["1"]], pref="p", hall="h", model="m", date="2026-10-17"
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from config import config
+from scraper.sharding import (
+    ShardSpec,
+    ShardSummary,
+    assign_shards,
+    build_hall_durations,
+    load_shard_summaries,
+    merge_shard_summaries,
+)
+
+
+def _halls(count: int) -> list[config.HallInfo]:
+    return [config.HallInfo(name=f"ホール{i}", prefecture="東京都", slug=f"hall-{i}") for i in range(count)]
+
+
+class AssignShardsTest(unittest.TestCase):
+    def test_every_hall_is_assigned_once_and_deterministically(self) -> None:
+        halls = _halls(10)
+
+        shards = assign_shards(halls, 3)
+
+        self.assertEqual(sorted(h.slug for h in halls), sorted(h.slug for s in shards for h in s))
+        self.assertEqual([4, 3, 3], sorted((len(s) for s in shards), reverse=True))
+        self.assertEqual(
+            [[h.slug for h in s] for s in shards],
+            [[h.slug for h in s] for s in assign_shards(list(halls), 3)],
+        )
+
+    def test_balances_by_historical_duration(self) -> None:
+        halls = _halls(5)
+        durations = {"ホール0": 100.0, "ホール1": 30.0, "ホール2": 30.0, "ホール3": 20.0, "ホール4": 20.0}
+
+        shards = assign_shards(halls, 2, durations)
+
+        loads = sorted(sum(durations[h.name] for h in s) for s in shards)
+        self.assertEqual([100.0, 100.0], loads)
+
+    def test_invalid_index(self) -> None:
+        with self.assertRaises(ValueError):
+            ShardSpec(index=2, count=2)
+
+
+class ShardMergeTest(unittest.TestCase):
+    def test_aggregates_quality_issues_and_reports_missing_shards(self) -> None:
+        summaries = [
+            ShardSummary(shard_index=0, shard_count=3, run_id="gh-1", hall_count=2, target_count=4, upserted_rows=10),
+            ShardSummary(shard_index=2, shard_count=3, run_id="gh-1", hall_count=2, target_count=3, db_error_count=1),
+        ]
+
+        total, issues = merge_shard_summaries(summaries)
+
+        self.assertEqual((4, 7, 10, 1), (total.hall_count, total.target_count, total.upserted_rows, total.db_error_count))
+        self.assertEqual(["集計結果の無いシャードがあります: 1", "DB登録エラーが1件あります"], issues)
+
+    def test_failed_daily_summaries_are_merged_and_fail_the_gate(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            ShardSummary(0, 2, "gh-1", hall_count=1, target_count=1, summary_error_hall_dates=[(1, "2026-10-17")]).write(root)
+            ShardSummary(1, 2, "gh-1", hall_count=1, target_count=1, summary_error_hall_dates=[(1, "2026-10-17"), (2, "2026-10-16")]).write(root)
+
+            summaries = load_shard_summaries(root)
+
+        total, issues = merge_shard_summaries(summaries)
+        self.assertEqual([(1, "2026-10-17"), (2, "2026-10-16")], total.summary_error_hall_dates)
+        self.assertEqual(["再試行しても日次サマリーを更新できないホール×日付が2件あります"], issues)
+        # 統合ステップで再試行して成功した場合は問題にしない
+        self.assertEqual([], merge_shard_summaries(summaries, summary_error_count=0)[1])
+
+    def test_build_hall_durations_uses_completed_hall_timings(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            log_path = Path(tmp) / "minrepo.log"
+            log_path.write_text(
+                "[2026-01-01 00:00:00,000] [INFO] [scraper] timing stage=hall hall=A 店 worker=1 status=completed duration_sec=10.00\n"
+                "[2026-01-02 00:00:00,000] [INFO] [scraper] timing stage=hall hall=A 店 worker=2 status=completed duration_sec=30.00\n"
+                "[2026-01-02 00:00:00,000] [INFO] [scraper] timing stage=hall hall=A 店 worker=2 status=completed duration_sec=20.00\n"
+                "[2026-01-02 00:00:00,000] [INFO] [scraper] timing stage=hall hall=B worker=1 status=error duration_sec=90.00\n",
+                encoding="utf-8",
+            )
+
+            self.assertEqual({"A 店": 20.0}, build_hall_durations([log_path]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+from dataclasses import replace
+from types import SimpleNamespace
+
+from config import config
+from scraper import supabase_lookup
+from scraper.scraper import _discovery_period
+from scraper.supabase_lookup import ExistingResultsIndex, fetch_all_pages
+
+
+class _Res:
+    def __init__(self, data):
+        self.data = data
+
+
+class _PagedQuery:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = 0
+
+    def range(self, start, end):
+        self._slice = (start, end)
+        return self
+
+    def execute(self):
+        self.calls += 1
+        start, end = self._slice
+        return _Res(self.rows[start : end + 1])
+
+
+class FetchAllPagesTest(unittest.TestCase):
+    def test_reads_until_short_page(self) -> None:
+        original = supabase_lookup.PAGE_SIZE
+        supabase_lookup.PAGE_SIZE = 2
+        try:
+            query = _PagedQuery([{"n": i} for i in range(5)])
+            self.assertEqual([0, 1, 2, 3, 4], [r["n"] for r in fetch_all_pages(query)])
+            self.assertEqual(3, query.calls)
+        finally:
+            supabase_lookup.PAGE_SIZE = original
+
+
+class ExistingResultsIndexTest(unittest.TestCase):
+    def test_answers_like_has_enough_results(self) -> None:
+        index = ExistingResultsIndex(
+            start_date="2026-10-10",
+            end_date="2026-10-17",
+            hall_ids={("東京都", "テストホール"): 7},
+            counts={(7, "2026-10-16"): 40, (7, "2026-10-17"): 3},
+        )
+
+        self.assertTrue(index.covers("2026-10-10"))
+        self.assertFalse(index.covers("2026-10-18"))
+        self.assertEqual((True, 40, 7), index.has_enough_results("東京都", "テストホール", "2026-10-16"))
+        self.assertEqual((False, 3, 7), index.has_enough_results("東京都", "テストホール", "2026-10-17"))
+        self.assertEqual((False, 0, 7), index.has_enough_results("東京都", "テストホール", "2026-10-15"))
+        self.assertEqual((False, 0, None), index.has_enough_results("東京都", "未登録", "2026-10-16"))
+
+    def test_latest_date_ignores_partial_days(self) -> None:
+        index = ExistingResultsIndex(
+            start_date="2026-10-10",
+            end_date="2026-10-17",
+            hall_ids={("東京都", "テストホール"): 7},
+            counts={(7, "2026-10-15"): 40, (7, "2026-10-16"): 3, (8, "2026-10-17"): 40},
+        )
+
+        self.assertEqual("2026-10-15", index.latest_date(7))
+        self.assertIsNone(index.latest_date(9))
+
+
+class DiscoveryPeriodTest(unittest.TestCase):
+    def _ctx(self, index) -> SimpleNamespace:
+        return SimpleNamespace(
+            pre_skip_index=index, target_dates=None, min_existing_rows=10, date_discovery_max_days=14
+        )
+
+    def test_stops_at_latest_ingested_date(self) -> None:
+        index = ExistingResultsIndex(
+            start_date="2026-09-20",
+            end_date="2026-10-17",
+            hall_ids={("東京都", "テストホール"): 7},
+            counts={(7, "2026-10-01"): 40},
+        )
+        hall = config.HallInfo(name="テストホール", prefecture="東京都", slug="テストホール", period=2)
+
+        self.assertEqual((14, "2026-10-01"), _discovery_period(self._ctx(index), hall))
+        self.assertEqual((14, None), _discovery_period(self._ctx(replace(index, counts={})), hall))
+
+    def test_missing_hall_warns_and_keeps_period(self) -> None:
+        index = ExistingResultsIndex(start_date="2026-09-20", end_date="2026-10-17", hall_ids={}, counts={})
+        hall = config.HallInfo(name="テストホール", prefecture="東京都", slug="テストホール", period=2)
+
+        with self.assertLogs(level="WARNING") as logs:
+            self.assertEqual((2, None), _discovery_period(self._ctx(index), hall))
+        self.assertIn("hall=テストホール", logs.output[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
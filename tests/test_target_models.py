@@ -0,0 +1,48 @@
+import unittest
+
+from utils.target_models import ModelMatcher, build_alias_to_canonical, match_target_model_detail
+
+TARGET_MODELS = [
+    {"canonical_name": "マイジャグラーV", "aliases": ["マイジャグラーV", "マイジャグラーⅤ"]},
+    {"canonical_name": "ネオアイムジャグラーEX", "aliases": ["ネオアイムジャグラーEX", "SネオアイムジャグラーEX-KK"]},
+    {"canonical_name": "アイムジャグラーEX-TP", "aliases": ["アイムジャグラーEX-TP", "SアイムジャグラーEX"]},
+    {"canonical_name": "無効機種", "enabled": False, "aliases": ["ハナハナ"]},
+]
+
+
+class ModelMatcherTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.alias_to_canonical = build_alias_to_canonical(TARGET_MODELS)
+        self.matcher = ModelMatcher.from_aliases(self.alias_to_canonical)
+
+    def test_matches_same_as_alias_loop(self) -> None:
+        texts = [
+            "マイジャグラーⅤ",
+            "Ｓマイジャグラー V",
+            "LSネオアイムジャグラーEX",
+            "アイムジャグラーEX",
+            "ネオアイムジャグラーEX-KK",
+            "ハナハナ",
+            "",
+            "S",
+        ]
+        for text in texts:
+            with self.subTest(text=text):
+                self.assertEqual(match_target_model_detail(text, self.alias_to_canonical), self.matcher.match(text))
+        self.assertEqual("prefix_stripped_exact", self.matcher.match("アイムジャグラーEX").match_type)
+
+    def test_reports_near_miss_once(self) -> None:
+        found = self.matcher.report_near_miss("SネオアイムジャグラーEX-KT")
+
+        self.assertEqual(["ネオアイムジャグラーEX"], [n.canonical_name for n in found][:1])
+        self.assertGreaterEqual(found[0].score, 0.8)
+        self.assertEqual([], self.matcher.report_near_miss("SネオアイムジャグラーEX-KT"))
+        self.assertEqual([], self.matcher.near_misses("ミリオンゴッド"))
+
+    def test_threshold_zero_disables_fuzzy_index(self) -> None:
+        matcher = ModelMatcher.from_aliases(self.alias_to_canonical, near_miss_threshold=0)
+        self.assertEqual([], matcher.near_misses("ネオアイムジャグラーEX-KT"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,7 @@
+import difflib
+import threading
 import unicodedata
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 
 import yaml
@@ -10,6 +12,7 @@ from utils.logger_setup import setup_logger
 logger = setup_logger(__name__, log_file=config.LOG_PATH)
 
 PREFIXES_TO_STRIP = ("S", "L")
+NEAR_MISS_THRESHOLD = 0.8
 TARGET_MODELS_YAML = config.BASE_DIR / "config" / "target_models.yaml"
 
 
@@ -114,3 +117,148 @@ def match_target_model(raw_model_name: str, alias_to_canonical: dict[str, str])
     """対象機種に一致する canonical_name を返す。"""
     match = match_target_model_detail(raw_model_name, alias_to_canonical)
     return match.canonical_name if match else None
+
+
+@dataclass(frozen=True)
+class NearMiss:
+    raw_model_name: str
+    normalized_model_name: str
+    canonical_name: str
+    alias: str
+    score: float
+
+
+def _bigrams(text: str) -> set[str]:
+    return {text[i:i + 2] for i in range(len(text) - 1)} if len(text) > 1 else {text}
+
+
+@dataclass
+class ModelMatcher:
+    """対象機種の判定用に、alias の索引を事前に作っておくマッチャー。
+
+    判定結果は match_target_model_detail と同じ（完全一致 → 接頭辞除去後の完全一致）。
+    どちらも辞書引き1回で済む。near_miss_threshold > 0 なら、一致しなかった機種名について
+    文字 bigram の索引で候補を絞り、類似度が閾値以上の alias を「別名候補」として報告できる。
+    """
+
+    exact: dict[str, str]
+    stripped: dict[str, tuple[str, str]]
+    near_miss_threshold: float = NEAR_MISS_THRESHOLD
+    bigram_index: dict[str, set[str]] = field(default_factory=dict)
+    reported: set[str] = field(default_factory=set)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @classmethod
+    def from_aliases(
+        cls, alias_to_canonical: dict[str, str], near_miss_threshold: float = NEAR_MISS_THRESHOLD
+    ) -> "ModelMatcher":
+        stripped: dict[str, tuple[str, str]] = {}
+        for normalized_alias, canonical_name in alias_to_canonical.items():
+            stripped_alias = normalize_model_name(normalized_alias, strip_prefix=True)
+            # 従来の判定と同じく、同じ除去後文字列なら先に定義された alias を優先する
+            if stripped_alias:
+                stripped.setdefault(stripped_alias, (normalized_alias, canonical_name))
+
+        bigram_index: dict[str, set[str]] = {}
+        if near_miss_threshold > 0:
+            for stripped_alias in stripped:
+                for gram in _bigrams(stripped_alias):
+                    bigram_index.setdefault(gram, set()).add(stripped_alias)
+        return cls(
+            exact=dict(alias_to_canonical),
+            stripped=stripped,
+            near_miss_threshold=near_miss_threshold,
+            bigram_index=bigram_index,
+        )
+
+    def match(self, raw_model_name: str) -> ModelMatch | None:
+        normalized_raw = normalize_model_name(raw_model_name)
+        if not normalized_raw:
+            return None
+
+        canonical_name = self.exact.get(normalized_raw)
+        if canonical_name:
+            return ModelMatch(
+                canonical_name=canonical_name,
+                raw_model_name=raw_model_name,
+                normalized_model_name=normalized_raw,
+                match_type="exact",
+                matched_alias=normalized_raw,
+            )
+
+        stripped_raw = normalize_model_name(normalized_raw, strip_prefix=True)
+        hit = self.stripped.get(stripped_raw)
+        if hit:
+            normalized_alias, canonical_name = hit
+            return ModelMatch(
+                canonical_name=canonical_name,
+                raw_model_name=raw_model_name,
+                normalized_model_name=stripped_raw,
+                match_type="prefix_stripped_exact",
+                matched_alias=normalized_alias,
+            )
+        return None
+
+    def near_misses(self, raw_model_name: str, limit: int = 3) -> list[NearMiss]:
+        """一致しなかった機種名に近い alias を類似度の高い順に返す。"""
+        if not self.bigram_index:
+            return []
+        stripped_raw = normalize_model_name(raw_model_name, strip_prefix=True)
+        if not stripped_raw:
+            return []
+
+        raw_grams = _bigrams(stripped_raw)
+        shared: dict[str, int] = {}
+        for gram in raw_grams:
+            for stripped_alias in self.bigram_index.get(gram, ()):
+                shared[stripped_alias] = shared.get(stripped_alias, 0) + 1
+
+        found: list[NearMiss] = []
+        for stripped_alias, count in shared.items():
+            # 共有 bigram の割合（Dice 係数）が低い候補は編集距離を計算しない
+            if 2 * count / (len(raw_grams) + len(_bigrams(stripped_alias))) < self.near_miss_threshold / 2:
+                continue
+            score = difflib.SequenceMatcher(None, stripped_raw, stripped_alias).ratio()
+            if score >= self.near_miss_threshold:
+                normalized_alias, canonical_name = self.stripped[stripped_alias]
+                found.append(NearMiss(raw_model_name, stripped_raw, canonical_name, normalized_alias, score))
+        found.sort(key=lambda m: (-m.score, m.alias))
+        return found[:limit]
+
+    def report_near_miss(self, raw_model_name: str) -> list[NearMiss]:
+        """別名候補があればログに出す。同じ機種名は実行中に1回だけ報告する。"""
+        key = normalize_model_name(raw_model_name)
+        with self.lock:
+            if key in self.reported:
+                return []
+            self.reported.add(key)
+        found = self.near_misses(raw_model_name)
+        for near in found:
+            logger.info(
+                "対象機種の別名候補: raw_model_name=%s, canonical_model_name=%s, alias=%s, score=%.2f",
+                near.raw_model_name,
+                near.canonical_name,
+                near.alias,
+                near.score,
+            )
+        return found
+
+
+def compile_model_matcher(
+    target_models: list[dict] | None = None, near_miss_threshold: float = NEAR_MISS_THRESHOLD
+) -> ModelMatcher:
+    """target_models.yaml から ModelMatcher を作る。"""
+    return ModelMatcher.from_aliases(build_alias_to_canonical(target_models), near_miss_threshold)
+
+
+_matcher_lock = threading.Lock()
+_matcher: ModelMatcher | None = None
+
+
+def get_model_matcher() -> ModelMatcher:
+    """実行全体で共有する ModelMatcher を返す（target_models.yaml は初回だけ読む）。"""
+    global _matcher
+    with _matcher_lock:
+        if _matcher is None:
+            _matcher = compile_model_matcher()
+        return _matcher